@@ -20,7 +20,14 @@ notfound() {
 
 test -d pytraj || notfound
 
-pyflakes pytraj 2>&1 | \
+if python -c 'import sys; sys.exit(sys.version_info < (3, 6))'; then
+    targets=pytraj
+else
+    # pytraj/aio.py uses python >= 3.6 syntax
+    targets=`find pytraj -name "*.py" ! -path "pytraj/aio.py"`
+fi
+
+pyflakes $targets 2>&1 | \
     grep -v -e "__init__.py" \
             -e "pytraj/externals/six.py" \
             -e "redefinition of unused 'topology' from line" \
@@ -11,6 +11,8 @@ except ImportError:
 
 import sys
 import os
+import importlib
+from collections import OrderedDict
 
 if sys.platform.startswith('win'):
     # set PATH to find libcpptraj.lib
@@ -22,6 +24,7 @@ from .version import version as __version__
 from .utils import c_commands
 from .utils import tools
 from .utils.misc import info
+from .utils.profiling import profile
 from .utils.cyutils import _fast_iterptr as iterframe_from_array
 from .core.c_options import info as compiled_info
 from .core.c_options import __cpptraj_version__
@@ -50,6 +53,8 @@ from .trajectory.shared_methods import iterframe_master
 from .trajectory.frameiter import iterframe
 from .trajectory.frameiter import iterchunk
 from .trajectory.frameiter import FrameIterator
+from .trajectory.compressed_trajectory import CompressedTrajectory
+from .trajectory.trajectory_view import TrajectoryView
 from .datasets.cast_dataset import cast_dataset
 from .datasets.datasetlist import DatasetList as Dataset
 
@@ -58,6 +63,7 @@ from .io import load
 from .io import iterload
 from .io import load_remd
 from .io import iterload_remd
+from .io import build_remd_index
 from .io import _load_from_frame_iter as load_from_frame_iter
 from .io import load_pdb_rcsb
 from .io import load_sample_data
@@ -80,144 +86,7 @@ from .datasets.datasetlist import DatasetList
 # actions and analyses
 from .analysis.c_action import c_action as allactions
 from .analysis.c_action import c_action
-from .analysis.c_analysis import c_analysis as allanalyses
-from .analysis.c_analysis import c_analysis
-
-from .analysis.dssp_analysis import dssp
-from .analysis.dssp_analysis import dssp_allatoms
-from .analysis.dssp_analysis import dssp_allresidues
-from .analysis.energy_analysis import esander
-from .analysis.energy_analysis import lie
-from .analysis.hbond_analysis import hbond
-from .analysis.nucleic_acid_analysis import nastruct
-from .analysis import nmr
-from .analysis.nmr import ired_vector_and_matrix
-from .analysis.nmr import _ired
-from .analysis.nmr import nh_order_parameters
-from .analysis.nmr import jcoupling
-from .analysis.water import spam
-from .analysis.topology_analysis import atominfo
-from .analysis.topology_analysis import resinfo
-from .analysis.topology_analysis import bondinfo
-from .analysis.topology_analysis import angleinfo
-from .analysis.topology_analysis import dihedralinfo
-
-from .analysis import dssp_analysis
-from .analysis import energy_analysis
-from .analysis import hbond_analysis
-from .analysis import nucleic_acid_analysis
-from .analysis import topology_analysis
-
-from . import all_actions
-from .all_actions import analyze_modes
-from .all_actions import acorr
-from .all_actions import align
-from .all_actions import align_principal_axis
-from .all_actions import atomicfluct
-from .all_actions import atom_map
-from .all_actions import autoimage
-from .all_actions import angle
-from .all_actions import atomiccorr
-from .all_actions import atomicfluct
-from .all_actions import bfactors
-from .all_actions import center_of_geometry
-from .all_actions import center_of_mass
-from .all_actions import diffusion
-from .all_actions import dihedral
-from .all_actions import distance
-from .all_actions import distance_to_point
-from .all_actions import distance_to_reference
-from .all_actions import mindist
-from .all_actions import molsurf
-from .all_actions import multidihedral
-from .all_actions import pairdist
-from .all_actions import pairwise_distance
-from .all_actions import pairwise_rmsd
-from .all_actions import radgyr
-from .all_actions import radgyr_tensor
-from .all_actions import rdf
-from .all_actions import rotdif
-from .all_actions import rmsd_nofit
-from .all_actions import rotation_matrix
-from .all_actions import surf
-from .all_actions import volmap
-from .all_actions import volume
-from .all_actions import watershell
-from .all_actions import center
-from .all_actions import check_structure
-from .all_actions import check_chirality
-from .all_actions import fiximagedbonds
-from .all_actions import closest
-from .all_actions import crank
-from .all_actions import density
-from .all_actions import _dihedral_res
-from .all_actions import distance_rmsd
-from .all_actions import get_average_frame
-from .all_actions import get_velocity
-from .all_actions import set_velocity
-from .all_actions import gist
-from .all_actions import grid
-from .all_actions import _grid
-from .all_actions import image
-# from .all_actions import lifetime
-from .all_actions import lowestcurve
-from .all_actions import make_structure
-from .all_actions import native_contacts
-from .all_actions import pca
-from .all_actions import principal_axes
-from .all_actions import projection
-from .all_actions import pucker
-from .all_actions import randomize_ions
-from .all_actions import replicate_cell
-from .all_actions import rmsd
-from .all_actions import rmsd_perres
-from .all_actions import rotate
-from .all_actions import rotate_dihedral
-from .all_actions import scale
-from .all_actions import search_neighbors
-from .all_actions import set_dihedral
-from .all_actions import strip
-from .all_actions import superpose
-from .all_actions import symmrmsd
-from .all_actions import timecorr
-from .all_actions import transform
-from .all_actions import translate
-from .all_actions import velocityautocorr
-from .all_actions import wavelet
-from .all_actions import xcorr
-from .all_actions import ti
-from .all_actions import lipidscd
-from .all_actions import xtalsymm
-from .all_actions import hausdorff
-from .all_actions import permute_dihedrals
-
-from .analysis.matrix import dist as distance_matrix
-from .analysis import matrix
-from .analysis import vector
-from .analysis.vector import multivector
-from . import cluster
-
-from .analysis import dihedral_analysis
-from .analysis.dihedral_analysis import calc_alpha
-from .analysis.dihedral_analysis import calc_beta
-from .analysis.dihedral_analysis import calc_chin
-from .analysis.dihedral_analysis import calc_chip
-from .analysis.dihedral_analysis import calc_delta
-from .analysis.dihedral_analysis import calc_epsilon
-from .analysis.dihedral_analysis import calc_gamma
-from .analysis.dihedral_analysis import calc_nu1
-from .analysis.dihedral_analysis import calc_nu2
-from .analysis.dihedral_analysis import calc_omega
-from .analysis.dihedral_analysis import calc_omega
-from .analysis.dihedral_analysis import calc_phi
-from .analysis.dihedral_analysis import calc_psi
-from .analysis.dihedral_analysis import calc_zeta
-
 from .analysis.c_action.c_action import ActionDict
-from .analysis.c_analysis.analysis_dict import AnalysisDict
-
-# others
-from .testing.run_tests import run_tests
 
 # turn off verbose in cpptraj
 from .core.c_options import set_error_silent
@@ -230,61 +99,181 @@ set_world_silent(True)
 write_trajectory = write_traj
 select = select_atoms
 dispatch = Command.dispatch
-energy_decomposition = esander
-check_overlap = check_structure
 fetch_pdb = load_pdb_rcsb
-calc_rmsd_nofit = rmsd_nofit
-search_hbonds = hbond
-distances = calc_distance = distance
-calc_pairwise_distance = pairwise_distance
-calc_angle = angles = angle
-calc_dihedral = dihedrals = dihedral
-calc_atomicfluct = rmsf = atomicfluct
-rms2d = calc_pairwise_rmsd = pairwise_rmsd
-calc_rotation_matrix = rotation_matrix
-calc_multidihedral = multidihedral
-calc_bfactors = bfactors
-calc_rdf = rdf
-calc_atomiccorr = atomiccorr
-calc_center_of_mass = center_of_mass
-calc_center_of_geometry = center_of_geometry
-mean_structure = get_average_frame
-average_frame = get_average_frame
-calc_pca = pca
-calc_pairdist = pair_distribution = pairdist
-calc_jcoupling = jcoupling
-calc_dssp = dssp
-calc_distance_rmsd = drmsd = distance_rmsd
-calc_radgyr = radgyr
-calc_mindist = mindist
-calc_diffusion = diffusion
-calc_multivector = multivector
-calc_volmap = volmap
-calc_molsurf = molsurf
-calc_surf = surf
-calc_watershell = watershell
-calc_pairdist = pairdist
-calc_volume = volume
-calc_pairwise_rmsd = rms2d
-
-NH_order_parameters = nh_order_parameters
-atommap = atom_map
-checkoverlap = check_structure
-nativecontacts = native_contacts
-lowest_curve = lowestcurve
-randomizeions = randomize_ions
-permutedihedrals = permute_dihedrals
 
 adict = ActionDict()
-analdict = AnalysisDict()
 
-# import parallel package after all pytraj or cpptraj's method so we
-# can import them to parallel namespace
-# import _pmap here to be called from nmr module
-from .parallel.multiprocess import pmap, _pmap
-from .parallel.mpi import pmap_mpi
-from .parallel.base import _load_batch_pmap
-from .visualization import view
+# Analysis modules are imported on first access (``pt.rmsd``, ``from pytraj import
+# matrix``, ...) so ``import pytraj`` stays cheap for pmap workers, MPI ranks and
+# scripts. To add a new public function, register it here instead of importing it.
+#
+# name -> (module, attribute). attribute is None for a module.
+# module is None for an alias of another name in pytraj's namespace.
+_LAZY_ATTRS = OrderedDict()
+
+
+def _register_lazy(module, names):
+    for name in names:
+        if isinstance(name, tuple):
+            name, attr = name
+        else:
+            attr = name
+        _LAZY_ATTRS[name] = (module, attr)
+
+
+_register_lazy('.analysis.c_analysis', [('allanalyses', 'c_analysis'),
+                                        'c_analysis'])
+_register_lazy('.analysis.c_analysis.analysis_dict', ['AnalysisDict'])
+_register_lazy('.analysis.dssp_analysis',
+               ['dssp', 'dssp_allatoms', 'dssp_allresidues'])
+_register_lazy('.analysis.energy_analysis', ['esander', 'lie'])
+_register_lazy('.analysis.hbond_analysis', ['hbond'])
+_register_lazy('.analysis.nucleic_acid_analysis', ['nastruct'])
+_register_lazy('.analysis.nmr', [
+    'ired_vector_and_matrix', '_ired', 'nh_order_parameters', 'jcoupling'
+])
+_register_lazy('.analysis.water', ['spam'])
+_register_lazy('.analysis.grid_analysis',
+               ['grid_occupancy', 'density_profile'])
+_register_lazy('.analysis.rdf_analysis', ['multirdf'])
+_register_lazy('.analysis.progressive', ['progressive'])
+_register_lazy('.analysis.streaming', ['stream_stats'])
+_register_lazy('.analysis.follow', ['follow'])
+_register_lazy('.analysis.topology_analysis', [
+    'atominfo', 'resinfo', 'bondinfo', 'angleinfo', 'dihedralinfo'
+])
+_register_lazy('.analysis.matrix', [('distance_matrix', 'dist')])
+_register_lazy('.analysis.vector', ['multivector'])
+_register_lazy('.analysis.dihedral_analysis', [
+    'calc_alpha', 'calc_beta', 'calc_chin', 'calc_chip', 'calc_delta',
+    'calc_epsilon', 'calc_gamma', 'calc_nu1', 'calc_nu2', 'calc_omega',
+    'calc_phi', 'calc_psi', 'calc_zeta'
+])
+_register_lazy('.all_actions', [
+    'analyze_modes', 'acorr', 'align', 'align_principal_axis',
+    'atomicfluct', 'atom_map', 'autoimage', 'angle', 'atomiccorr',
+    'bfactors', 'center_of_geometry', 'center_of_mass', 'diffusion',
+    'dihedral', 'distance', 'distance_to_point', 'distance_to_reference',
+    'mindist', 'molsurf', 'multidihedral', 'pairdist', 'pairwise_distance',
+    'pairwise_rmsd', 'radgyr', 'radgyr_tensor', 'rdf', 'rotdif',
+    'rmsd_nofit', 'rmsd_to_references', 'rotation_matrix', 'surf', 'volmap', 'volume',
+    'watershell', 'center', 'check_structure', 'check_chirality',
+    'fiximagedbonds', 'closest', 'crank', 'density', '_dihedral_res',
+    'distance_rmsd', 'get_average_frame', 'get_velocity', 'set_velocity',
+    'gist', 'grid', '_grid', 'image', 'lowestcurve', 'make_structure',
+    'native_contacts', 'pca', 'principal_axes', 'projection', 'pucker',
+    'randomize_ions', 'replicate_cell', 'rmsd', 'rmsd_perres', 'rotate',
+    'rotate_dihedral', 'scale', 'search_neighbors', 'set_dihedral', 'strip',
+    'superpose', 'symmrmsd', 'timecorr', 'transform', 'translate',
+    'velocityautocorr', 'wavelet', 'xcorr', 'ti', 'lipidscd', 'xtalsymm',
+    'hausdorff', 'permute_dihedrals'
+])
+# from .all_actions import lifetime
+for _name in ['all_actions', 'cluster', 'aio']:
+    _LAZY_ATTRS[_name] = ('.' + _name, None)
+for _name in [
+        'nmr', 'matrix', 'vector', 'dihedral_analysis', 'dssp_analysis',
+        'energy_analysis', 'hbond_analysis', 'nucleic_acid_analysis',
+        'topology_analysis', 'grid_analysis', 'rdf_analysis', 'streaming'
+]:
+    _LAZY_ATTRS[_name] = ('.analysis.' + _name, None)
+
+# others
+_register_lazy('.testing.run_tests', ['run_tests'])
+_register_lazy('.utils.result_cache', ['ResultCache', 'memoize'])
+
+# alias
+for _aliases, _target in [
+    (['energy_decomposition'], 'esander'),
+    (['check_overlap', 'checkoverlap'], 'check_structure'),
+    (['calc_rmsd_nofit'], 'rmsd_nofit'),
+    (['search_hbonds'], 'hbond'),
+    (['distances', 'calc_distance'], 'distance'),
+    (['calc_pairwise_distance'], 'pairwise_distance'),
+    (['calc_angle', 'angles'], 'angle'),
+    (['calc_dihedral', 'dihedrals'], 'dihedral'),
+    (['calc_atomicfluct', 'rmsf'], 'atomicfluct'),
+    (['rms2d', 'calc_pairwise_rmsd'], 'pairwise_rmsd'),
+    (['calc_rotation_matrix'], 'rotation_matrix'),
+    (['calc_multidihedral'], 'multidihedral'),
+    (['calc_bfactors'], 'bfactors'),
+    (['calc_rdf'], 'rdf'),
+    (['calc_atomiccorr'], 'atomiccorr'),
+    (['calc_center_of_mass'], 'center_of_mass'),
+    (['calc_center_of_geometry'], 'center_of_geometry'),
+    (['mean_structure', 'average_frame'], 'get_average_frame'),
+    (['calc_pca'], 'pca'),
+    (['calc_pairdist', 'pair_distribution'], 'pairdist'),
+    (['calc_jcoupling'], 'jcoupling'),
+    (['calc_dssp'], 'dssp'),
+    (['calc_distance_rmsd', 'drmsd'], 'distance_rmsd'),
+    (['calc_radgyr'], 'radgyr'),
+    (['calc_mindist'], 'mindist'),
+    (['calc_diffusion'], 'diffusion'),
+    (['calc_multivector'], 'multivector'),
+    (['calc_volmap'], 'volmap'),
+    (['calc_molsurf'], 'molsurf'),
+    (['calc_surf'], 'surf'),
+    (['calc_watershell'], 'watershell'),
+    (['calc_volume'], 'volume'),
+    (['NH_order_parameters'], 'nh_order_parameters'),
+    (['atommap'], 'atom_map'),
+    (['nativecontacts'], 'native_contacts'),
+    (['lowest_curve'], 'lowestcurve'),
+    (['randomizeions'], 'randomize_ions'),
+    (['permutedihedrals'], 'permute_dihedrals'),
+]:
+    _register_lazy(None, [(_alias, _target) for _alias in _aliases])
+
+# name -> class name, instantiated on first access
+_LAZY_INSTANCES = OrderedDict([('analdict', 'AnalysisDict')])
+
+# parallel package uses pytraj's methods, so register it last
+# (_pmap is also called from nmr module)
+_register_lazy('.parallel.multiprocess', ['pmap', '_pmap'])
+_register_lazy('.parallel.mpi', ['pmap_mpi'])
+_register_lazy('.parallel.base', ['_load_batch_pmap'])
+_register_lazy('.parallel.ensemble', ['map_ensemble'])
+_register_lazy('.visualization', ['view'])
+
+
+def __getattr__(name):
+    """import registered analysis functions and modules on first access (PEP 562)
+    """
+    if name == '__all__':
+        value = _get_all()
+    elif name in _LAZY_INSTANCES:
+        value = _get_lazy(_LAZY_INSTANCES[name])()
+    elif name in _LAZY_ATTRS:
+        module, attr = _LAZY_ATTRS[name]
+        if module is None:
+            value = _get_lazy(attr)
+        else:
+            mod = importlib.import_module(module, __name__)
+            value = mod if attr is None else getattr(mod, attr)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name))
+    globals()[name] = value
+    return value
+
+
+def _get_lazy(name):
+    try:
+        return globals()[name]
+    except KeyError:
+        return __getattr__(name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | set(_LAZY_INSTANCES))
+
+
+def _load_all():
+    """import all lazily registered names
+    """
+    for name in list(_LAZY_ATTRS) + list(_LAZY_INSTANCES):
+        _get_lazy(name)
 
 
 def show_versions():
@@ -301,31 +290,55 @@ def show_versions():
 
 # for website
 # do not put __all__ in the top of this file to avoid circular import (all_actions)
-__all__ = sorted(io.__all__ + all_actions.__all__ + dihedral_analysis.__all__ +
-                 nmr.__all__ + ['nastruct'] + ['esander'] + [
-                     'Atom',
-                     'Residue',
-                     'Molecule',
-                     'Topology',
-                     'Frame',
-                     'AtomMask',
-                     'Trajectory',
-                     'TrajectoryIterator',
-                     'TrajectoryWriter',
-                     'ActionList',
-                     'ActionDict',
-                     'AnalysisDict',
-                     'adict',
-                     'analdict',
-                     'dispatch',
-                     'iterchunk',
-                     'iterframe',
-                     'select',
-                     'show_versions',
-                     'dihedral_analysis',
-                     'hbond_analysis',
-                     'dssp_analysis',
-                     'nucleic_acid_analysis',
-                     'tools',
-                     'set_cpptraj_verbose',
-                 ])
+# __all__ is built on first access since it needs the lazily imported modules
+def _get_all():
+    return sorted(
+        _get_lazy('io').__all__ + _get_lazy('all_actions').__all__ +
+        _get_lazy('dihedral_analysis').__all__ + _get_lazy('nmr').__all__ +
+        ['nastruct'] + ['esander'] + [
+            'Atom',
+            'Residue',
+            'Molecule',
+            'Topology',
+            'Frame',
+            'AtomMask',
+            'Trajectory',
+            'TrajectoryIterator',
+            'CompressedTrajectory',
+            'TrajectoryView',
+            'TrajectoryWriter',
+            'ActionList',
+            'ActionDict',
+            'AnalysisDict',
+            'adict',
+            'analdict',
+            'dispatch',
+            'iterchunk',
+            'iterframe',
+            'select',
+            'show_versions',
+            'profile',
+            'dihedral_analysis',
+            'hbond_analysis',
+            'dssp_analysis',
+            'nucleic_acid_analysis',
+            'grid_analysis',
+            'grid_occupancy',
+            'density_profile',
+            'rdf_analysis',
+            'multirdf',
+            'progressive',
+            'streaming',
+            'stream_stats',
+            'follow',
+            'ResultCache',
+            'memoize',
+            'tools',
+            'set_cpptraj_verbose',
+        ])
+
+
+if sys.version_info < (3, 7):
+    # no module level __getattr__ (PEP 562): import everything now
+    _load_all()
+    __all__ = _get_all()
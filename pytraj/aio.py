@@ -0,0 +1,378 @@
+'''asyncio API: awaitable loading, analysis, ``pmap`` and frame iteration (python >= 3.6)
+
+Blocking pytraj calls run on a shared ``AsyncExecutor`` so they do not block the event
+loop. The executor runs at most ``max_workers`` calls at a time; other calls wait (without
+blocking the loop) in arrival order, so many concurrent requests share the CPU fairly.
+``pmap`` calls take ``n_cores`` slots.
+
+Examples
+--------
+>>> import asyncio
+>>> import pytraj as pt
+>>> from pytraj import aio
+>>> from pytraj.testing import get_fn
+>>> fname, tname = get_fn('tz2')
+>>> async def main():
+...     traj = await aio.iterload(fname, tname)
+...     rmsd, rg = await asyncio.gather(aio.run(pt.rmsd, traj, ref=0),
+...                                     aio.pmap(pt.radgyr, traj, n_cores=2))
+...     async for chunk in aio.iterchunk(traj, chunksize=50, mask='@CA'):
+...         pass
+...     return rmsd
+>>> loop = asyncio.new_event_loop()
+>>> rmsd = loop.run_until_complete(main())
+>>> loop.close()
+'''
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from multiprocessing import cpu_count
+
+from .externals.six import string_types
+from .utils.check_and_assert import is_int
+
+try:
+    _get_running_loop = asyncio.get_running_loop
+except AttributeError:
+    # python 3.6: returns the running loop when called from a coroutine
+    _get_running_loop = asyncio.get_event_loop
+
+__all__ = [
+    'AsyncExecutor', 'get_executor', 'set_executor', 'run', 'load', 'iterload',
+    'load_topology', 'compute', 'pmap', 'iterchunk', 'iterframe'
+]
+
+
+class _Limiter(object):
+    '''FIFO weighted semaphore: a waiting call is not overtaken by later smaller calls.
+    Slots are released from worker threads, waiters may belong to different event loops.
+    '''
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.used = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def n_waiting(self):
+        return sum(not fut.done() for _, fut, _ in self._waiters)
+
+    async def acquire(self, weight):
+        loop = _get_running_loop()
+        with self._lock:
+            if not self._waiters and self.used + weight <= self.capacity:
+                self.used += weight
+                return
+            fut = loop.create_future()
+            self._waiters.append((weight, fut, loop))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.cancelled():
+                # still waiting (dropped by _wake) or granted but not notified yet
+                # (released by _grant)
+                with self._lock:
+                    self._wake()
+            else:
+                self.release(weight)
+            raise
+
+    def release(self, weight):
+        with self._lock:
+            self.used -= weight
+            self._wake()
+
+    def _grant(self, fut, weight):
+        if fut.done():
+            self.release(weight)
+        else:
+            fut.set_result(None)
+
+    def _wake(self):
+        # must hold self._lock
+        while self._waiters:
+            weight, fut, loop = self._waiters[0]
+            if fut.done():
+                self._waiters.popleft()
+            elif self.used + weight <= self.capacity:
+                self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._grant, fut, weight)
+                except RuntimeError:
+                    # event loop is closed
+                    continue
+                self.used += weight
+            else:
+                break
+
+
+class AsyncExecutor(object):
+    '''run blocking pytraj calls from asyncio code on a pool of threads
+
+    Parameters
+    ----------
+    max_workers : int, default None (number of cores)
+        maximum number of slots used at the same time. A call takes one slot, a ``pmap``
+        call takes ``n_cores`` slots.
+
+    Notes
+    -----
+    - A call is cancelled if the awaiting task is cancelled before the call starts. A
+      started call can not be interrupted: it runs to the end (its result is discarded)
+      and keeps its slots until then. Iterators are cancelled between chunks.
+    - Calls run in threads: do not use the same TrajectoryIterator in concurrent calls.
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> import pytraj as pt
+    >>> from pytraj.aio import AsyncExecutor
+    >>> traj = pt.datafiles.load_tz2()
+    >>> executor = AsyncExecutor(max_workers=2)
+    >>> loop = asyncio.new_event_loop()
+    >>> rg = loop.run_until_complete(executor.run(pt.radgyr, traj, '@CA'))
+    >>> loop.close()
+    >>> executor.shutdown()
+    '''
+
+    def __init__(self, max_workers=None):
+        if max_workers is None or max_workers <= 0:
+            max_workers = cpu_count()
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers)
+        self._limiter = _Limiter(max_workers)
+
+    def __repr__(self):
+        return '<AsyncExecutor: max_workers={}, used={}, waiting={}>'.format(
+            self.max_workers, self._limiter.used, self._limiter.n_waiting)
+
+    async def run(self, func, *args, **kwargs):
+        '''await ``func(*args, **kwargs)``, run in a worker thread
+        '''
+        return await self._run(1, func, args, kwargs)
+
+    async def _run(self, weight, func, args, kwargs):
+        weight = max(1, min(weight, self.max_workers))
+        await self._limiter.acquire(weight)
+        try:
+            future = self._pool.submit(partial(func, *args, **kwargs))
+        except Exception:
+            self._limiter.release(weight)
+            raise
+        # the slots are freed when the call ends, not when the caller gives up
+        future.add_done_callback(lambda _: self._limiter.release(weight))
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+_EXECUTOR = None
+
+
+def get_executor():
+    '''return the default AsyncExecutor (created on first use)
+    '''
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = AsyncExecutor()
+    return _EXECUTOR
+
+
+def set_executor(executor):
+    '''use ``executor`` (AsyncExecutor or None) as the default executor, return the
+    previous one
+    '''
+    global _EXECUTOR
+    previous, _EXECUTOR = _EXECUTOR, executor
+    return previous
+
+
+def _pop_executor(kwargs):
+    executor = kwargs.pop('executor', None)
+    return get_executor() if executor is None else executor
+
+
+async def run(func, *args, **kwargs):
+    '''await ``func(*args, **kwargs)`` on the default executor (or ``executor=``)
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> import pytraj as pt
+    >>> from pytraj import aio
+    >>> traj = pt.datafiles.load_tz2()
+    >>> loop = asyncio.new_event_loop()
+    >>> data = loop.run_until_complete(aio.run(pt.rmsd, traj, mask='@CA', ref=0))
+    >>> # an ActionList
+    >>> actlist = pt.ActionList(['radgyr @CA'], top=traj.top)
+    >>> loop.run_until_complete(aio.run(actlist.compute, traj))
+    >>> loop.close()
+    '''
+    executor = _pop_executor(kwargs)
+    return await executor.run(func, *args, **kwargs)
+
+
+async def load(*args, **kwargs):
+    '''awaitable ``pytraj.load``
+    '''
+    from .io import load as _load
+    return await run(_load, *args, **kwargs)
+
+
+async def iterload(*args, **kwargs):
+    '''awaitable ``pytraj.iterload``
+    '''
+    from .io import iterload as _iterload
+    return await run(_iterload, *args, **kwargs)
+
+
+async def load_topology(*args, **kwargs):
+    '''awaitable ``pytraj.load_topology``
+    '''
+    from .io import load_topology as _load_topology
+    return await run(_load_topology, *args, **kwargs)
+
+
+async def compute(commands, traj, *args, **kwargs):
+    '''awaitable ``pytraj.compute``
+    '''
+    from .analysis.c_action.actionlist import compute as _compute
+    return await run(_compute, commands, traj, *args, **kwargs)
+
+
+async def pmap(func, traj, *args, **kwargs):
+    '''awaitable ``pytraj.pmap``, taking ``n_cores`` slots of the executor
+    '''
+    from .parallel.multiprocess import pmap as _pmap
+
+    executor = _pop_executor(kwargs)
+    n_cores = kwargs.get('n_cores', 2)
+    weight = cpu_count() if n_cores <= 0 else n_cores
+    return await executor._run(weight, _pmap, (func, traj) + args, kwargs)
+
+
+def _read_chunk(traj, start, stop, mask, autoimage, ref, ref_mask):
+    chunk = traj[start:stop]
+    if autoimage:
+        chunk.autoimage()
+    if ref is not None:
+        chunk.superpose(ref=ref, mask=ref_mask)
+    if mask is not None:
+        chunk = chunk[mask]
+    return chunk
+
+
+async def iterchunk(traj,
+                    chunksize=100,
+                    start=0,
+                    stop=None,
+                    mask=None,
+                    autoimage=False,
+                    rmsfit=None,
+                    prefetch=2,
+                    executor=None):
+    '''``async for`` over chunks (Trajectory) of ``traj``. The next chunks are read in
+    the background while the current one is used.
+
+    Parameters
+    ----------
+    traj : Trajectory-like
+    chunksize : int, default 100
+    start, stop : int, default (0, None)
+    mask : {None, str}, atom mask
+    autoimage : bool, default False
+    rmsfit : {None, int, Frame, tuple of (reference, mask)}, superpose each frame to
+        the reference (after autoimage). A reference given by index is autoimaged too, a
+        Frame is used as is
+    prefetch : int, default 2
+        maximum number of chunks read ahead. Reading waits if the consumer is slower
+    executor : {None, AsyncExecutor}, default None (default executor)
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> import pytraj as pt
+    >>> from pytraj import aio
+    >>> traj = pt.datafiles.load_tz2_ortho()
+    >>> async def main():
+    ...     async for chunk in aio.iterchunk(traj, 4, autoimage=True, rmsfit=(0, '@CA')):
+    ...         print(chunk.n_frames)
+    >>> loop = asyncio.new_event_loop()
+    >>> loop.run_until_complete(main())
+    4
+    4
+    2
+    >>> loop.close()
+    '''
+    executor = get_executor() if executor is None else executor
+    stop = traj.n_frames if stop is None else stop
+    start, stop, _ = slice(start, stop).indices(traj.n_frames)
+
+    ref, ref_mask = None, '*'
+    if rmsfit is not None:
+        if isinstance(rmsfit, (tuple, list)):
+            ref, ref_mask = rmsfit
+        else:
+            ref = rmsfit
+        if is_int(ref):
+            # same processing as the chunks (autoimage)
+            index = ref % traj.n_frames
+            ref = (await executor.run(_read_chunk, traj, index, index + 1, None,
+                                      autoimage, None, '*'))[0].copy()
+    if mask is not None and not isinstance(mask, string_types):
+        from .utils.convert import array_to_cpptraj_atommask
+        mask = array_to_cpptraj_atommask(mask)
+
+    queue = asyncio.Queue(maxsize=max(1, prefetch))
+    done = object()
+
+    async def produce():
+        for index in range(start, stop, chunksize):
+            chunk = await executor.run(_read_chunk, traj, index,
+                                       min(index + chunksize, stop), mask,
+                                       autoimage, ref, ref_mask)
+            await queue.put(chunk)
+        await queue.put(done)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            finished, _ = await asyncio.wait(
+                [getter, producer], return_when=asyncio.FIRST_COMPLETED)
+            if producer in finished and producer.exception() is not None:
+                getter.cancel()
+                producer.result()
+            chunk = await getter
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        producer.cancel()
+
+
+async def iterframe(traj, *args, **kwargs):
+    '''``async for`` over frames of ``traj``. Frames are read by chunks (in the
+    background) and belong to their chunk. Use ``Frame.copy`` to keep a frame.
+
+    Parameters are the same as ``iterchunk``.
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> import pytraj as pt
+    >>> from pytraj import aio
+    >>> traj = pt.datafiles.load_tz2()
+    >>> async def main():
+    ...     return [frame.xyz[0].copy() async for frame in aio.iterframe(traj, mask='@CA')]
+    >>> loop = asyncio.new_event_loop()
+    >>> xyz = loop.run_until_complete(main())
+    >>> loop.close()
+    '''
+    async for chunk in iterchunk(traj, *args, **kwargs):
+        for frame in chunk:
+            yield frame
@@ -22,7 +22,7 @@ from .trajectory.shared_methods import iterframe_master
 from .trajectory.frame import Frame
 from .trajectory.trajectory import Trajectory
 from .trajectory.trajectory_iterator import TrajectoryIterator
-from .utils.decorators import register_pmap, register_openmp
+from .utils.decorators import register_pmap, register_openmp, register_pmap_setup
 from .analysis.c_action import c_action
 from .analysis.c_action import do_action
 from .analysis.c_analysis import c_analysis
@@ -35,8 +35,10 @@ from .analysis.rmsd import (
     rmsd_perres,
     rmsd_nofit,
     rmsd,
+    rmsd_to_references,
     symmrmsd,
-    distance_rmsd, )
+    distance_rmsd,
+    _superpose_in_memory, )
 from .analysis.energy_analysis import (
     esander,
     lie, )
@@ -116,6 +118,7 @@ __all__ = [
     'rmsd_perres',
     'rmsd_nofit',
     'rmsd',
+    'rmsd_to_references',
     'rmsf',
     'symmrmsd',
     'distance_rmsd',
@@ -865,7 +868,16 @@ def volume(traj=None, mask="", top=None, dtype='ndarray', frame_indices=None):
     return get_data_from_dtype(c_dslist, dtype)
 
 
+def _volmap_pmap_setup(traj, mask, grid_spacing, size=None, **kwargs):
+    '''pmap and pmap_mpi need ``size``: without it, cpptraj sets the grid up from the
+    first frame of each chunk, so the averaged maps of the chunks could not be merged
+    '''
+    assert size is not None, 'must provide "size" value'
+    return {}
+
+
 @register_pmap
+@register_pmap_setup(_volmap_pmap_setup)
 @super_dispatch()
 def volmap(traj,
            mask,
@@ -905,6 +917,11 @@ def volmap(traj,
         Note: To get all the output from cpptraj, it would be better to specify
         dtype='dict'
 
+    Notes
+    -----
+    With ``pytraj.pmap``, ``size`` must be given so all cores use the same grid as the
+    serial calculation.
+
     Examples
     --------
     >>> import pytraj as pt
@@ -1016,7 +1033,8 @@ def rdf(traj=None,
     Notes
     -----
     - install ``pytraj`` and ``libcpptraj`` with openmp to speed up calculation
-    - do not use this method with pytraj.pmap
+    - do not use this method with pytraj.pmap. Use ``pytraj.multirdf`` to compute rdf with
+      pytraj.pmap or to compute many solute/solvent pairs in a single pass
     '''
 
     traj = get_fiterator(traj, frame_indices)
@@ -1148,15 +1166,33 @@ do_rotation = rotate
 
 
 @super_dispatch()
-def autoimage(traj, mask="", frame_indices=None, top=None):
+def autoimage(traj, mask="", frame_indices=None, top=None, engine='cpptraj'):
     '''perform autoimage and return the updated-coordinate traj
 
+    Parameters
+    ----------
+    traj : Trajectory
+    mask : str, cpptraj's autoimage command
+    frame_indices : {None, array-like}
+    top : {None, Topology}
+    engine : str, {'cpptraj', 'numpy'}, default 'cpptraj'
+        if 'numpy', use vectorized molecule-aware imaging for the whole in-memory
+        Trajectory (see pytraj.math.imaging.Imager). frame_indices is not supported.
+
+    Examples
+    --------
     >>> import pytraj as pt
     >>> traj = pt.datafiles.load_tz2_ortho()[:]
     >>> traj = pt.autoimage(traj)
+    >>> traj = pt.autoimage(traj, engine='numpy')
     '''
     _assert_mutable(traj)
     command = mask
+    if engine != 'cpptraj':
+        if frame_indices is not None or not hasattr(traj, 'autoimage'):
+            raise ValueError(
+                'engine="{}" requires in-memory Trajectory without frame_indices'.format(engine))
+        return traj.autoimage(command, engine=engine)
     do_action(traj, command, c_action.Action_AutoImage, top=top)
     return traj
 
@@ -1618,9 +1654,16 @@ def align(traj,
     Notes
     -----
     versionadded: 1.0.6
+
+    In-memory Trajectory is superposed for all frames at once with a vectorized Kabsch
+    kernel (see ``pytraj.math.superposition.superpose_xyz``).
     """
     if isinstance(traj, TrajectoryIterator):
         return traj.superpose(mask=mask, ref=ref, ref_mask=ref_mask, mass=mass)
+    elif isinstance(traj, Trajectory) and traj.xyz is not None:
+        _superpose_in_memory(
+            traj, mask=mask, ref=ref, ref_mask=ref_mask, mass=mass, top=top)
+        return traj
     else:
         mask_ = mask
         refmask_ = ref_mask
@@ -1701,17 +1744,24 @@ def principal_axes(traj=None, mask='*', dorotation=False, mass=True, top=None):
     return (c_dslist[0].values, c_dslist[1].values)
 
 
-def _closest_iter(act, traj):
+def _closest_iter(act, traj, reuse_frame=False):
     '''
 
     Parameters
     ----------
     act : Action object
     traj : Trajectory-like
+    reuse_frame : bool, default False
+        if True, copy each new frame to the same Frame buffer (only valid until the
+        next iteration)
     '''
 
+    new_frame = None
     for frame in iterframe_master(traj):
-        new_frame = act.compute(frame, get_new_frame=True)
+        if reuse_frame and new_frame is not None:
+            act.compute(frame, get_new_frame=True, out=new_frame)
+        else:
+            new_frame = act.compute(frame, get_new_frame=True)
         yield new_frame
 
 
@@ -1769,15 +1819,15 @@ def closest(traj=None,
     act.read_input(command, top, dslist=c_dslist)
     new_top = act.setup(top, get_new_top=True)
 
-    fiter = _closest_iter(act, traj)
-
     if dtype == 'trajectory':
+        # coordinates are copied right away: reuse the Frame buffer
+        fiter = _closest_iter(act, traj, reuse_frame=True)
         return Trajectory(
             xyz=np.array([frame.xyz.copy() for frame in fiter]),
             top=new_top.copy())
     else:
         # iterator
-        return (fiter, new_top.copy())
+        return (_closest_iter(act, traj), new_top.copy())
 
 
 @register_pmap
@@ -0,0 +1,56 @@
+"""base class of mergeable analysis states (GridState, ProfileState, RdfState, DSSPState,
+StreamState)
+
+A state holds raw sums (or per-frame values) instead of normalized results, so states of
+different chunks of a trajectory are merged exactly with ``merge`` (or ``+``).
+
+States returned by mergeable functions (``register_mergeable``) are merged by
+``pytraj.pmap_mpi`` with MPI collectives instead of pickling them. They implement:
+
+- ``_reduce_arrays()``: list of arrays summed over ranks (Reduce)
+- ``_gather_arrays()``: list of arrays concatenated over ranks along the first axis
+  (Gatherv)
+- ``_from_reduced(summed, gathered)``: return the merged state
+- optionally ``_extent()`` and ``_aligned(extents)`` if array shapes depend on the data
+  (e.g bins of ProfileState)
+"""
+from __future__ import absolute_import
+import numpy as np
+
+__all__ = []
+
+
+class _StateMixin(object):
+    def __add__(self, other):
+        return self.merge(other)
+
+    def __radd__(self, other):
+        # so sum(states) works
+        if isinstance(other, int) and other == 0:
+            return self
+        return other.merge(self)
+
+    def to_dtype(self, dtype='state'):
+        '''dtype : str, {'state', 'ndarray', 'dict'}
+        '''
+        dtype = dtype.lower()
+        if dtype == 'state':
+            return self
+        elif dtype == 'ndarray':
+            return self.values
+        elif dtype == 'dict':
+            return self.to_dict()
+        raise ValueError("dtype must be 'state', 'ndarray' or 'dict'")
+
+    def save(self, filename):
+        '''save to numpy npz file
+        '''
+        np.savez(filename, **self.to_dict())
+
+    def _extent(self):
+        return None
+
+    def _aligned(self, extents):
+        '''return a state that has the same array shapes as states of other ranks
+        '''
+        return self
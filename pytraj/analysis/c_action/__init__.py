@@ -1,11 +1,34 @@
 """"""
 from __future__ import absolute_import
 import inspect
+import numpy as np
 from ...datasets.c_datasetlist import DatasetList as CpptrajDatasetList
 from . import c_action
 from ...utils.context import capture_stdout
 from ...trajectory.shared_methods import iterframe_master
 from ...externals.six import StringIO
+from ...utils.profiling import get_profiler
+
+
+def _cpptraj_source(traj):
+    '''return (TrajectoryCpptraj, frame_indices) if frames of ``traj`` can be read and
+    processed in C++ (with the GIL released), else (None, None)
+    '''
+    from ...trajectory.c_traj.c_trajectory import TrajectoryCpptraj
+
+    if isinstance(traj, TrajectoryCpptraj):
+        return traj, np.arange(traj.n_frames)
+    if not hasattr(traj, '_source_frame_indices'):
+        return None, None
+    source, indices = traj._source_frame_indices()
+    if not isinstance(source, TrajectoryCpptraj):
+        return None, None
+    indices = np.asarray(indices, dtype='i8')
+    indices = np.where(indices < 0, indices + source.n_frames, indices)
+    if indices.size and (indices.min() < 0 or indices.max() >= source.n_frames):
+        raise IndexError('frame index out of range for trajectory having {} frames'.
+                         format(source.n_frames))
+    return source, indices
 
 
 def do_action(traj, command, action_class, post_process=True, top=None):
@@ -23,11 +46,33 @@ def do_action(traj, command, action_class, post_process=True, top=None):
     c_dslist = CpptrajDatasetList()
     top = traj.top if top is None else top
     act = action_class(command=command, top=top, dslist=c_dslist)
+
+    post_process_ = act.post_process
+    prof = get_profiler()
+
+    source, frame_indices = _cpptraj_source(traj)
+    if prof is None and source is not None:
+        # fast path: read frames and compute in C++ without the GIL
+        with capture_stdout() as (out, _):
+            source._run_action(act, frame_indices)
+            if post_process:
+                post_process_()
+        return c_dslist, StringIO(out.read()).read()
+
+    frame_iter = iterframe_master(traj)
+    compute_frame = act.compute
+    if prof is not None:
+        name = 'do_action'
+        frame_iter = prof.timed_iter(frame_iter, name, 'read')
+        compute_frame = prof.timed(compute_frame, name, action_class.__name__)
+        post_process_ = prof.timed(post_process_, name,
+                                   action_class.__name__ + '.post_process')
+
     with capture_stdout() as (out, _):
-        for frame in iterframe_master(traj):
-            act.compute(frame)
+        for frame in frame_iter:
+            compute_frame(frame)
         if post_process:
-            act.post_process()
+            post_process_()
     # make sure to use StringIO
     # If not, if not, there won't be output in the next function call
     return c_dslist, StringIO(out.read()).read()
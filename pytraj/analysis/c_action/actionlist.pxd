@@ -19,7 +19,7 @@ cdef extern from "ActionList.h":
         int AddAction(_Action*, _ArgList&,
                       _ActionInit&,)
         int SetupActions(_ActionSetup, bint exit_on_error)
-        bint DoActions(int, _ActionFrame)
+        bint DoActions(int, _ActionFrame) nogil
         void PrintActions()
         void List()
         bint Empty()
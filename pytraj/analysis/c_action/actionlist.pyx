@@ -1,9 +1,11 @@
 # distutils: language = c++
 from cython.operator cimport dereference as deref
 
+import numpy as np
 from ...externals.six import string_types
 from .c_action import ActionDict
 from ...trajectory.shared_methods import iterframe_master
+from ...utils.profiling import get_profiler
 
 
 def _get_arglist(arg):
@@ -13,6 +15,13 @@ def _get_arglist(arg):
         return ArgList(arg)
 
 
+def _split_commands(commands):
+    if isinstance(commands, string_types):
+        return [line.lstrip().rstrip()
+                for line in commands.split('\n') if line.strip() != '']
+    return commands
+
+
 def pipe(traj, commands, DatasetList dslist=DatasetList(), frame_indices=None):
     '''create frame iterator from cpptraj's commands.
 
@@ -61,15 +70,19 @@ def pipe(traj, commands, DatasetList dslist=DatasetList(), frame_indices=None):
     else:
         fi = traj.iterframe(frame_indices=frame_indices)
 
-    if isinstance(commands, (list, tuple)):
-        commands = commands
-    elif isinstance(commands, string_types):
-        commands = [line.lstrip().rstrip()
-                    for line in commands.split('\n') if line.strip() != '']
+    actlist = ActionList(_split_commands(commands), top=traj.top, dslist=dslist)
+
+    frame_iter = iterframe_master(fi)
+    compute_frame = actlist.compute
+    prof = get_profiler()
+    if prof is not None:
+        name = 'pipe'
+        frame_iter = prof.timed_iter(frame_iter, name, 'read')
+        compute_frame = prof.timed(compute_frame, name,
+                                   'ActionList[' + '; '.join(actlist._commands()) + ']')
 
-    actlist = ActionList(commands, top=traj.top, dslist=dslist)
-    for frame in iterframe_master(fi):
-        actlist.compute(frame)
+    for frame in frame_iter:
+        compute_frame(frame)
         yield frame
 
 
@@ -149,6 +162,7 @@ def compute(lines, traj, *args, **kwd):
     >>> data = pt.compute(['rmsd @CA', 'radgyr'], TrajectoryList([traj0, traj1]))
     """
     cdef DatasetList dslist
+    from ...trajectory.c_traj.c_trajectory import TrajectoryCpptraj
 
     # frequency to make the bar
     # None or an int
@@ -179,6 +193,11 @@ def compute(lines, traj, *args, **kwd):
                 ref_dset.top = traj.top
                 ref_dset.add_frame(ref_)
 
+        if freq is None and isinstance(traj, TrajectoryCpptraj):
+            # fast path: no Frame is created in Python
+            ActionList(_split_commands(lines), top=traj.top, dslist=dslist).run(traj)
+            return dslist[len(reflist):].to_dict()
+
         # create Frame generator
         fi = pipe(traj, commands=lines, dslist=dslist)
 
@@ -207,6 +226,10 @@ def compute(lines, traj, *args, **kwd):
         return dslist[len(reflist):].to_dict()
 
     elif callable(lines):
+        prof = get_profiler()
+        if prof is not None:
+            name = getattr(lines, '__name__', lines.__class__.__name__)
+            return prof.timed(lines, 'compute', 'callback:' + name)(traj, *args, **kwd)
         return lines(traj, *args, **kwd)
 
 
@@ -362,8 +385,80 @@ cdef class ActionList:
             self.thisptr.DoActions(self.n_frames, actionframe_)
             self.n_frames += 1
         else:
-            for frame in iterframe_master(traj):
-                self.compute(frame)
+            frame_iter = iterframe_master(traj)
+            compute_frame = self.compute
+            prof = get_profiler()
+            if prof is not None:
+                name = 'ActionList'
+                frame_iter = prof.timed_iter(frame_iter, name, 'read')
+                compute_frame = prof.timed(compute_frame, name,
+                                           'ActionList[' + '; '.join(self._commands()) + ']')
+            for frame in frame_iter:
+                compute_frame(frame)
+
+    def run(self, traj, int start=0, int stop=-1, int step=1, frame_indices=None):
+        '''perform all actions for frames in ``traj``
+
+        If ``traj`` is a TrajectoryIterator, reading frames and performing actions are
+        done in a C++ loop with the GIL released: there is no Python overhead per frame
+        and several ActionLists can run concurrently in threads (each thread must
+        use its own TrajectoryIterator object). Other trajectory types fall back to
+        ``compute``.
+
+        Parameters
+        ----------
+        traj : Trajectory-like
+        start, stop, step : int, default (0, -1, 1)
+            stop=-1 means all frames
+        frame_indices : {None, array-like}, default None
+            if given, ignore start, stop, step
+
+        Examples
+        --------
+        >>> import pytraj as pt
+        >>> from pytraj.datasets import CpptrajDatasetList
+        >>> traj = pt.datafiles.load_tz2_ortho()
+        >>> dslist = CpptrajDatasetList()
+        >>> actlist = pt.ActionList(['autoimage', 'radgyr @CA'], traj.top, dslist=dslist)
+        >>> actlist.run(traj, step=2)
+        >>> dslist[0].size
+        5
+        '''
+        from ...trajectory.c_traj.c_trajectory import TrajectoryCpptraj
+
+        if not self.is_setup:
+            self.setup(self.top)
+            self.is_setup = True
+
+        if not isinstance(traj, TrajectoryCpptraj):
+            if frame_indices is None and (start, stop, step) != (0, -1, 1):
+                frame_indices = range(start, traj.n_frames if stop == -1 else stop, step)
+            if frame_indices is not None:
+                traj = traj.iterframe(frame_indices=frame_indices)
+            self.compute(traj)
+            return
+
+        n_frames = traj.n_frames
+        if frame_indices is None:
+            indices = np.arange(start, n_frames if stop == -1 else stop, step)
+        else:
+            indices = np.asarray(frame_indices, dtype='i8')
+            indices = np.where(indices < 0, indices + n_frames, indices)
+        if indices.size and (indices.min() < 0 or indices.max() >= n_frames):
+            raise IndexError('frame index out of range (n_frames={})'.format(n_frames))
+
+        run_actions = traj._run_actionlist
+        prof = get_profiler()
+        if prof is not None:
+            run_actions = prof.timed(run_actions, 'ActionList',
+                                     'run[' + '; '.join(self._commands()) + ']')
+        run_actions(self, indices)
+
+    def _commands(self):
+        '''return list of action commands
+        '''
+        cdef int i
+        return [self.thisptr.CmdString(i).decode() for i in range(self.thisptr.Naction())]
 
     def post_process(self):
         self.thisptr.PrintActions()
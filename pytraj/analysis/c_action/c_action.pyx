@@ -186,7 +186,7 @@ cdef class Action:
             return new_top
 
     @makesureABC("Action")
-    def compute(self, current_frame=None, get_new_frame=False):
+    def compute(self, current_frame=None, get_new_frame=False, Frame out=None):
         """Perform action on Frame
 
         Parameters
@@ -194,6 +194,10 @@ cdef class Action:
         current_frame : Frame instance need to be processed, default=Frame()
         itx : int, frame index
         get_new_frame : bool
+        out : {None, Frame}
+            if given (with get_new_frame=True), copy coordinates and box of the new frame
+            to ``out`` instead of allocating a new Frame. ``out`` must have the same
+            number of atoms as the new frame.
         """
         # debug
         cdef Frame frame, new_frame
@@ -208,6 +212,12 @@ cdef class Action:
             self.n_frames += 1
 
             if get_new_frame:
+                if out is not None:
+                    if out.thisptr.Natom() != actframe_.ModifyFrm().Natom():
+                        raise ValueError("must have the same number of atoms")
+                    out.thisptr.SetCoordinates(actframe_.ModifyFrm())
+                    out.thisptr.SetBox(actframe_.ModifyFrm().BoxCrd())
+                    return out
                 new_frame = Frame()
                 new_frame.thisptr[0] = actframe_.ModifyFrm()
                 return new_frame
@@ -1,15 +1,18 @@
 from __future__ import absolute_import
+from collections import OrderedDict
 import numpy as np
-from pytraj.externals.six import PY3
-from pytraj import DatasetList, tools
+from pytraj import DatasetList
 from ..utils.get_common_objects import get_data_from_dtype, super_dispatch, get_topology
-from ..utils.decorators import register_openmp
+from ..utils.decorators import register_openmp, register_mergeable
 from ..datasets.c_datasetlist import DatasetList as CpptrajDatasetList
+from ..datasets.array import DataArray
 from .c_action.c_action import Action_DSSP
+from .base_state import _StateMixin
 
-__all__ = ['dssp', 'dssp_allatoms', 'dssp_allresidues']
+__all__ = ['dssp', 'dssp_allatoms', 'dssp_allresidues', 'DSSPState', 'decode_ss']
 
 
+@register_mergeable
 @register_openmp
 @super_dispatch()
 def dssp(traj=None,
@@ -30,7 +33,10 @@ def dssp(traj=None,
         if None, do all frames
     dtype : str, default 'ndarray'
         return data type, for regular user, just use default one (ndarray).
-        use dtype='dataset' if wanting to get secondary structure in integer format
+        use dtype='integer' to get secondary structure as uint8 codes (see Notes) instead
+        of strings, dtype='state' to get a :class:`DSSPState` (compact codes, per-residue
+        fractions and segments, mergeable by pmap) or dtype='dataset' to get cpptraj's
+        datasets
     simplified : bool, default False
         if True, use simplified codes, only has 'H', 'E' and 'C'
         if False, use all DSSP codes
@@ -42,7 +48,7 @@ def dssp(traj=None,
     out_1: ndarray, shape=(n_frames, n_residues)
         DSSP for each residue
     out_2 : pytraj.DatasetList
-        average value for each secondary structure type
+        fraction of residues in each secondary structure type, for each frame
 
     Examples
     --------
@@ -93,6 +99,9 @@ def dssp(traj=None,
         - 'C': include 'T', 'S' or '0' (coil)
 
     Simplified codes will be mostly used for visualization in other packages.
+
+    With pmap, chunks return a DSSPState and the codes are concatenated, so per-residue
+    fractions are the same as in serial.
     """
 
     command = mask
@@ -109,52 +118,250 @@ def dssp(traj=None,
             dset.key = key.lower()
     dtype = dtype.lower()
 
-    if dtype == 'ndarray':
-        # get all dataset from DatSetList if dtype == integer
-        arr0 = dslist.grep("integer", mode='dtype').values
-        keys = dslist.grep("integer", mode='dtype').keys()
-        avg_dict = DatasetList(dslist.grep('_avg'))
-        ss_array = np.asarray([
-            _to_string_secondary_structure(arr, simplified=simplified)
-            for arr in arr0
-        ]).T
-        return np.asarray(keys), ss_array, avg_dict
+    if dtype in ['ndarray', 'integer', 'state']:
+        return DSSPState._from_cpptraj(
+            dslist, simplified=simplified).to_dtype(dtype)
     else:
         return get_data_from_dtype(dslist, dtype=dtype)
 
 
 # _s0 = ['None', 'Para', 'Anti', '3-10', 'Alpha', 'Pi', 'Turn', 'Bend']
 _s1 = ["0", "b", "B", "G", "H", "I", "T", "S"]
+_SS_SYMBOLS = np.array(_s1)
+_SS_SIMPLIFIED_SYMBOLS = np.array(['C', 'E', 'E', 'H', 'H', 'H', 'C', 'C'])
+# 0: coil, 1: strand, 2: helix
+_SS_SIMPLIFIED_CLASSES = np.array([0, 1, 1, 2, 2, 2, 0, 0], dtype='u1')
+
+
+def decode_ss(codes, simplified=False):
+    '''convert DSSP integer codes to secondary structure symbols with a lookup table
+
+    Parameters
+    ----------
+    codes : array-like of int, any shape
+    simplified : bool, default False
+        if True, use 'H', 'E' and 'C' symbols
+
+    Examples
+    --------
+    >>> from pytraj.analysis.dssp_analysis import decode_ss
+    >>> decode_ss([[0, 4, 4, 6]]).tolist()
+    [['0', 'H', 'H', 'T']]
+    >>> decode_ss([[0, 4, 4, 6]], simplified=True).tolist()
+    [['C', 'H', 'H', 'C']]
+    '''
+    symbols = _SS_SIMPLIFIED_SYMBOLS if simplified else _SS_SYMBOLS
+    return symbols[np.asarray(codes)]
 
 
 def _to_string_secondary_structure(arr0, simplified=False):
     """
     arr0 : ndarray
     """
-    if not simplified:
-        ssdict = {
-            0: '0',
-            1: 'b',
-            2: 'B',
-            3: 'G',
-            4: 'H',
-            5: 'I',
-            6: 'T',
-            7: 'S'
-        }
-    else:
-        ssdict = {
-            0: 'C',
-            1: 'E',
-            2: 'E',
-            3: 'H',
-            4: 'H',
-            5: 'H',
-            6: 'C',
-            7: 'C'
-        }
+    return decode_ss(arr0, simplified=simplified)
+
 
-    return np.vectorize(lambda key: ssdict[key])(arr0)
+class DSSPState(_StateMixin):
+    '''compact DSSP result: secondary structure code of each residue in each frame, one
+    byte per value
+
+    Parameters
+    ----------
+    codes : 2D array-like of int, shape=(n_frames, n_residues)
+        DSSP integer codes (see :func:`dssp`)
+    residues : 1D array-like of str
+        residue labels (e.g 'LEU:2')
+    averages : {None, OrderedDict}
+        key -> fraction of residues in a secondary structure type for each frame
+    simplified : bool, default False
+        use simplified symbols in ``decode`` and ``to_dtype``
+
+    Examples
+    --------
+    >>> from pytraj.analysis.dssp_analysis import DSSPState
+    >>> state = DSSPState([[4, 0], [4, 0], [6, 0]], ['ALA:1', 'GLY:2'])
+    >>> state.codes.nbytes
+    6
+    >>> state.decode().tolist()
+    [['H', '0'], ['H', '0'], ['T', '0']]
+    >>> state.fractions[0].tolist()
+    [0.0, 0.0, 0.0, 0.0, 0.6666666666666666, 0.0, 0.3333333333333333, 0.0]
+    >>> segments = state.segments()
+    >>> segments['ss'].tolist(), segments['start'].tolist(), segments['length'].tolist()
+    (['H', 'T', '0'], [0, 2, 0], [2, 1, 3])
+    '''
+
+    def __init__(self, codes, residues, averages=None, simplified=False):
+        self.residues = np.asarray(residues)
+        self.codes = np.asarray(codes, dtype='u1').reshape(-1, len(self.residues))
+        self.averages = OrderedDict(
+            (key, np.asarray(values))
+            for key, values in (averages or {}).items())
+        self.simplified = simplified
+        # cpptraj's datasets of averages, to keep their metadata (aspect, legend, ...)
+        self._average_sets = None
+
+    @classmethod
+    def _from_cpptraj(cls, dslist, simplified=False):
+        int_sets = dslist.grep("integer", mode='dtype')
+        residues = int_sets.keys()
+        average_sets = DatasetList(dslist.grep('_avg'))
+        averages = OrderedDict((d.key, d.values) for d in average_sets)
+        if residues:
+            n_frames = len(int_sets[0].values)
+        elif averages:
+            n_frames = len(list(averages.values())[0])
+        else:
+            n_frames = 0
+
+        codes = np.empty((n_frames, len(residues)), dtype='u1')
+        for idx, dset in enumerate(int_sets):
+            codes[:, idx] = dset.values
+        state = cls(codes, residues, averages, simplified=simplified)
+        state._average_sets = average_sets
+        return state
+
+    def __repr__(self):
+        return '<DSSPState: {} residues, n_frames={}>'.format(self.n_residues,
+                                                               self.n_frames)
+
+    @property
+    def n_frames(self):
+        return self.codes.shape[0]
+
+    @property
+    def n_residues(self):
+        return self.codes.shape[1]
+
+    @property
+    def values(self):
+        return self.codes
+
+    def decode(self, simplified=None):
+        '''secondary structure symbols, shape=(n_frames, n_residues)
+        '''
+        if simplified is None:
+            simplified = self.simplified
+        return decode_ss(self.codes, simplified=simplified)
+
+    @property
+    def fractions(self):
+        '''fraction of frames in each secondary structure type (columns are DSSP codes
+        0 to 7) for each residue, shape=(n_residues, 8)
+        '''
+        n_types = len(_s1)
+        counts = np.zeros((self.n_residues, n_types), dtype='i8')
+        offsets = n_types * np.arange(self.n_residues)
+        # bound the size of temporary arrays
+        chunksize = max(1, 2**22 // max(1, self.n_residues))
+        for start in range(0, self.n_frames, chunksize):
+            block = self.codes[start:start + chunksize] + offsets
+            counts += np.bincount(
+                block.ravel(), minlength=counts.size).reshape(counts.shape)
+        return counts / float(max(1, self.n_frames))
+
+    def segments(self, simplified=None):
+        '''run-length summary of each residue: consecutive frames having the same
+        secondary structure
+
+        Returns
+        -------
+        OrderedDict of 1D arrays (one item per segment, sorted by residue and frame):
+        'residue' (label), 'ss' (symbol), 'start' (first frame), 'length' (number of
+        frames). Can be converted to a pandas.DataFrame
+        '''
+        if simplified is None:
+            simplified = self.simplified
+        classes = _SS_SIMPLIFIED_CLASSES[self.codes] if simplified else self.codes
+
+        is_start = np.ones(classes.shape, dtype=bool)
+        is_start[1:] = classes[1:] != classes[:-1]
+        res_indices, starts = np.nonzero(is_start.T)
+
+        ends = np.empty_like(starts)
+        ends[:-1] = starts[1:]
+        is_last = np.ones(len(starts), dtype=bool)
+        is_last[:-1] = res_indices[1:] != res_indices[:-1]
+        ends[is_last] = self.n_frames
+
+        return OrderedDict([
+            ('residue', self.residues[res_indices]),
+            ('ss', decode_ss(self.codes[starts, res_indices],
+                             simplified=simplified)),
+            ('start', starts),
+            ('length', ends - starts),
+        ])
+
+    def merge(self, other):
+        '''concatenate frames of two states (same residues)
+        '''
+        if not np.array_equal(self.residues, other.residues):
+            raise ValueError('states must have the same residues')
+        averages = OrderedDict(
+            (key, np.concatenate((values, other.averages[key])))
+            for key, values in self.averages.items())
+        state = DSSPState(
+            np.concatenate((self.codes, other.codes)),
+            self.residues,
+            averages,
+            simplified=self.simplified)
+        state._average_sets = self._average_sets
+        return state
+
+    def to_dict(self):
+        out = OrderedDict([('residues', self.residues), ('codes', self.codes)])
+        out.update(self.averages)
+        return out
+
+    def to_dtype(self, dtype='state'):
+        '''dtype : str, {'state', 'ndarray', 'integer', 'dict'}
+
+        'ndarray' and 'integer' return the same tuple as :func:`dssp`, with symbols or
+        uint8 codes
+        '''
+        dtype = dtype.lower()
+        if dtype == 'ndarray':
+            return self.residues, self.decode(), self._averages_dslist()
+        elif dtype == 'integer':
+            return self.residues, self.codes, self._averages_dslist()
+        return super(DSSPState, self).to_dtype(dtype)
+
+    def _averages_dslist(self):
+        templates = dict((d.key, d) for d in self._average_sets or [])
+        dslist = DatasetList()
+        for key, values in self.averages.items():
+            if key in templates:
+                # same metadata as cpptraj's dataset, values of this state
+                dset = DataArray(templates[key], copy=False)
+                dset.values = values
+            else:
+                dset = DataArray({key: values}, copy=False)
+            dslist.append(dset, copy=False)
+        return dslist
+
+    # codes and averages are per-frame: concatenated, not summed
+    def _reduce_arrays(self):
+        return []
+
+    def _gather_arrays(self):
+        return [self.codes] + list(self.averages.values())
+
+    def _from_reduced(self, summed, gathered):
+        state = DSSPState(gathered[0], self.residues,
+                          OrderedDict(zip(self.averages.keys(), gathered[1:])),
+                          simplified=self.simplified)
+        state._average_sets = self._average_sets
+        return state
+
+
+def _dssp_state(traj, *args, **kwd):
+    kwd = dict(kwd)
+    kwd['dtype'] = 'state'
+    return dssp(traj, *args, **kwd)
+
+
+def _residue_indices(res_labels):
+    return np.array([int(x.split(':')[-1]) - 1 for x in res_labels], dtype='i8')
 
 
 def get_ss_per_frame(arr, top, res_indices, simplified=False, all_atoms=False):
@@ -193,10 +400,6 @@ def dssp_allatoms(traj, *args, **kwd):
     -------
     ndarray, shape=(n_frames, n_atoms)
 
-    Notes
-    -----
-    this method is not well optimized for speed.
-
     Examples
     --------
     >>> import pytraj as pt
@@ -209,21 +412,13 @@ def dssp_allatoms(traj, *args, **kwd):
     --------
     dssp
     '''
-    res_labels, data = dssp(traj, *args, **kwd)[:2]
+    state = _dssp_state(traj, *args, **kwd)
     top = get_topology(traj, kwd.get('top'))
-    res_indices = [int(x.split(':')[-1]) - 1 for x in res_labels]
-
-    if not PY3:
-        new_data = np.empty((traj.n_frames, traj.n_atoms), dtype='S2')
-    else:  # pragma: no cover
-        new_data = np.empty((traj.n_frames, traj.n_atoms), dtype='U2')
 
-    simplified = kwd.get('simplified', False)
-    for fid, arr in enumerate(data):
-        new_data[fid][:] = tools.flatten(
-            get_ss_per_frame(
-                arr, top, res_indices, simplified, all_atoms=True))
-    return new_data
+    # residues that are not in the DSSP mask have code 0 (coil)
+    codes = np.zeros((state.n_frames, top.n_residues), dtype='u1')
+    codes[:, _residue_indices(state.residues)] = state.codes
+    return decode_ss(codes[:, top.arrays.resid], simplified=state.simplified)
 
 
 def dssp_allresidues(traj, *args, **kwd):
@@ -255,31 +450,18 @@ def dssp_allresidues(traj, *args, **kwd):
     >>> len(y[0])
     13
 
-    Notes
-    -----
-    this method is not well optimized for speed.
-
     See also
     --------
     dssp
     '''
-    res_labels, data = dssp(traj, *args, **kwd)[:2]
+    state = _dssp_state(traj, *args, **kwd)
     top = get_topology(traj, kwd.get('top', None))
 
     # do not need to compute again if there is no solvent or weird residues
-    if len(res_labels) == top.n_residues:
-        return data
-
-    res_indices = [int(x.split(':')[-1]) - 1 for x in res_labels]
-
-    if not PY3:
-        new_data = np.empty((traj.n_frames, traj.top.n_residues), dtype='S2')
-    else:  # pragma no cover
-        new_data = np.empty((traj.n_frames, traj.top.n_residues), dtype='U2')
-
-    simplified = kwd.get('simplified', False)
-    for fid, arr in enumerate(data):
-        new_data[fid][:] = tools.flatten(
-            get_ss_per_frame(
-                arr, top, res_indices, simplified, all_atoms=False))
-    return new_data
+    if state.n_residues == top.n_residues:
+        return state.decode()
+
+    # residues that are not in the DSSP mask have code 0 (coil)
+    codes = np.zeros((state.n_frames, top.n_residues), dtype='u1')
+    codes[:, _residue_indices(state.residues)] = state.codes
+    return decode_ss(codes, simplified=state.simplified)
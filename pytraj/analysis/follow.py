@@ -0,0 +1,336 @@
+"""follow growing trajectories of running simulations and only analyze new frames
+"""
+from __future__ import absolute_import
+import os
+import time
+from glob import glob
+from collections import OrderedDict
+
+import numpy as np
+
+from ..externals.six import string_types
+from ..utils.check_and_assert import _accept_dtype
+
+__all__ = ['follow', 'Follower']
+
+_STATS_KEYS = ['block_size', 'bins', 'hist_range', 'max_lag', 'quantile_capacity']
+
+
+class _Analysis(object):
+    '''one analysis of a Follower and its result so far
+
+    kind is 'state' (mergeable pytraj function, e.g density_profile), 'stats'
+    (StreamState of per-frame values) or 'series' (per-frame values, concatenated)
+    '''
+
+    def __init__(self, func, args, kwargs):
+        kwargs = dict(kwargs)
+        self.frame_axis = kwargs.pop('frame_axis', -1)
+        self.stats = {}
+        for key in _STATS_KEYS:
+            if key in kwargs:
+                self.stats[key] = kwargs.pop(key)
+        if kwargs.pop('stats', False) and not self.stats:
+            self.stats['quantile_capacity'] = 1024
+
+        if getattr(func, '_is_mergeable', False):
+            self.kind = 'state'
+            kwargs['dtype'] = 'state'
+        elif self.stats:
+            self.kind = 'stats'
+        else:
+            self.kind = 'series'
+        if self.kind != 'state' and 'dtype' not in kwargs and _accept_dtype(func):
+            kwargs['dtype'] = 'ndarray'
+
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self._is_setup = False
+
+    def update(self, traj, frame_indices):
+        from .streaming import StreamState, stream_stats
+
+        if not self._is_setup:
+            setup = getattr(self.func, '_pmap_setup', None)
+            if setup is not None:
+                # e.g. fix the grid with the first frames, so that later states can
+                # be merged
+                self.kwargs.update(setup(traj, *self.args, **self.kwargs))
+            self._is_setup = True
+
+        if self.kind == 'stats':
+            if self.result is None:
+                self.result = StreamState(**self.stats)
+            stream_stats(
+                self.func,
+                traj,
+                *self.args,
+                frame_indices=frame_indices,
+                chunksize=len(frame_indices),
+                frame_axis=self.frame_axis,
+                state=self.result,
+                **self.kwargs)
+            return
+        out = self.func(traj, *self.args, frame_indices=frame_indices, **self.kwargs)
+        if self.kind == 'state':
+            self.result = out if self.result is None else self.result + out
+        else:
+            out = np.asarray(out)
+            self.result = out if self.result is None else np.concatenate(
+                (self.result, out), axis=self.frame_axis)
+
+
+class Follower(object):
+    '''follow trajectory files that are still being written and keep analyses up to
+    date: each ``update`` only reads the frames (and files) added since the last one.
+    Use ``pytraj.follow`` to create a Follower.
+
+    Attributes
+    ----------
+    traj : TrajectoryIterator
+        all frames found by the last update
+    n_processed : int
+        number of frames already analyzed
+    results : OrderedDict
+        name -> result (state, StreamState or array of per-frame values)
+    '''
+
+    def __init__(self,
+                 filename,
+                 top=None,
+                 holdback=0,
+                 chunksize=1000,
+                 state_file=None):
+        from ..trajectory.trajectory_iterator import TrajectoryIterator
+
+        if isinstance(filename, TrajectoryIterator):
+            traj = filename
+            self._patterns = list(traj.filelist)
+            self._frame_slices = list(traj._frame_slice_list)
+            self._transform_commands = list(traj._transform_commands)
+            self.top = traj.top
+        else:
+            if top is None:
+                raise ValueError('must provide a Topology')
+            if isinstance(top, string_types):
+                from ..io import load_topology
+                top = load_topology(top)
+            self._patterns = [filename] if isinstance(filename,
+                                                      string_types) else list(filename)
+            self._frame_slices = []
+            self._transform_commands = []
+            self.top = top
+        self.holdback = holdback
+        self.chunksize = chunksize
+        self.state_file = state_file
+        self.n_processed = 0
+        self._analyses = OrderedDict()
+        self._filelist = []
+        self._file_stats = None
+        self.traj = None
+
+    def __repr__(self):
+        return '<Follower: {} files, {} frames processed, analyses={}>'.format(
+            len(self._filelist), self.n_processed, list(self._analyses))
+
+    def add(self, name, func, *args, **kwargs):
+        '''add an analysis, computed for all frames already processed and then for new
+        frames at each update
+
+        Parameters
+        ----------
+        name : str, key in ``results``
+        func : a pytraj function that supports ``frame_indices``
+            - mergeable functions (e.g pytraj.density_profile, pytraj.grid_occupancy,
+              pytraj.multirdf, pytraj.dssp): their states are merged
+            - others must return per-frame values, kept in an array (frames along
+              ``frame_axis``, default -1), or as a StreamState if ``stats=True`` or any
+              StreamState option (block_size, bins, hist_range, max_lag,
+              quantile_capacity) is given
+        *args, **kwargs : additional arguments for ``func``
+
+        Returns
+        -------
+        self
+        '''
+        if name in self._analyses:
+            raise KeyError('{} is already added'.format(name))
+        analysis = _Analysis(func, args, kwargs)
+        self._analyses[name] = analysis
+        if self.n_processed > 0:
+            self._run(analysis, 0, self.n_processed)
+        return self
+
+    @property
+    def results(self):
+        return OrderedDict((name, analysis.result)
+                           for name, analysis in self._analyses.items())
+
+    def __getitem__(self, name):
+        return self._analyses[name].result
+
+    def _find_files(self):
+        filelist = []
+        for pattern in self._patterns:
+            if os.path.exists(pattern):
+                names = [pattern]
+            else:
+                from ..trajectory.trajectory_iterator import sort_filename_by_number
+                names = sort_filename_by_number(glob(pattern))
+            for name in names:
+                if name not in filelist:
+                    filelist.append(name)
+        return filelist
+
+    def refresh(self):
+        '''reopen the files if they changed (new frames or new files), return the number
+        of frames ready to be analyzed
+        '''
+        from ..trajectory.trajectory_iterator import TrajectoryIterator
+
+        filelist = self._find_files()
+        if filelist[:len(self._filelist)] != self._filelist:
+            raise RuntimeError(
+                'files of the trajectory were removed or renamed, or a new file '
+                'comes before the existing ones')
+        stats = [(os.path.getsize(fname), os.path.getmtime(fname))
+                 for fname in filelist]
+        if self.traj is None or stats != self._file_stats:
+            traj = TrajectoryIterator(top=self.top)
+            for index, fname in enumerate(filelist):
+                frame_slice = (self._frame_slices[index]
+                               if index < len(self._frame_slices) else (0, -1, 1))
+                traj._load(fname, frame_slice=frame_slice)
+            if self._transform_commands:
+                traj._transform_commands = list(self._transform_commands)
+                traj._reset_transformation()
+            if traj.n_frames < self.n_processed:
+                raise RuntimeError('trajectory has fewer frames than processed')
+            self.traj = traj
+            self.top = traj.top
+            self._filelist = filelist
+            self._file_stats = stats
+        return max(self.traj.n_frames - self.holdback - self.n_processed, 0)
+
+    def _run(self, analysis, start, stop):
+        for index in range(start, stop, self.chunksize):
+            frame_indices = np.arange(index, min(index + self.chunksize, stop))
+            analysis.update(self.traj, frame_indices)
+
+    def update(self):
+        '''analyze new frames, save the state if ``state_file`` is given
+
+        Returns
+        -------
+        n_new : int, number of new frames
+        '''
+        n_new = self.refresh()
+        if n_new > 0:
+            start, stop = self.n_processed, self.n_processed + n_new
+            for analysis in self._analyses.values():
+                self._run(analysis, start, stop)
+            self.n_processed = stop
+            if self.state_file is not None:
+                self.save(self.state_file)
+        return n_new
+
+    def watch(self, interval=10., timeout=None):
+        '''update every ``interval`` seconds, yield the number of new frames after each
+        update having new frames. Stop if there were no new frames for ``timeout``
+        seconds (never stop if None).
+
+        Examples
+        --------
+        >>> for n_new in follower.watch(interval=60., timeout=3600.): # doctest: +SKIP
+        ...     print(follower.n_processed, follower['rmsd'][-1])
+        '''
+        last_change = time.time()
+        while True:
+            n_new = self.update()
+            if n_new > 0:
+                last_change = time.time()
+                yield n_new
+            elif timeout is not None and time.time() - last_change >= timeout:
+                return
+            time.sleep(interval)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # reopened from filenames by the next update
+        state['traj'] = None
+        state['_file_stats'] = None
+        state['_frame_slices'] = (self._frame_slices +
+                                  [(0, -1, 1)] * len(self._filelist))[:len(
+                                      self._filelist)]
+        return state
+
+    def save(self, filename):
+        '''save analysis states, processed frames and file names (pickle). The file is
+        replaced atomically, so a crash while saving keeps the previous state.
+        '''
+        from ..serialize.serialize import to_pickle
+
+        tmp = '{}.tmp.{}'.format(filename, os.getpid())
+        to_pickle(self, tmp)
+        getattr(os, 'replace', os.rename)(tmp, filename)
+
+    @classmethod
+    def load(cls, filename):
+        '''resume a Follower saved by ``save``
+        '''
+        from ..serialize.serialize import read_pickle
+        return read_pickle(filename)
+
+
+def follow(filename, top=None, *args, **kwargs):
+    '''follow trajectory files of a running simulation: analyses are updated with new
+    frames only (frames appended to the last file, or new files matching a pattern).
+
+    Parameters
+    ----------
+    filename : {str, list of str, TrajectoryIterator}
+        trajectory filename, file pattern (e.g 'md*.nc', checked for new files at each
+        update) or list of them. If a TrajectoryIterator, follow its files, keeping its
+        transformations (autoimage, superpose, ...)
+    top : {str, Topology}, required if filename is not a TrajectoryIterator
+    holdback : int, default 0
+        do not analyze the last ``holdback`` frames until more frames arrive (e.g 1
+        if the writer may flush a frame partially)
+    chunksize : int, default 1000
+        maximum number of frames given to an analysis at once
+    state_file : {None, str}, default None
+        if given, save the Follower to this file after each update. If the file exists,
+        resume from it (``filename`` and ``top`` are then ignored)
+
+    Returns
+    -------
+    Follower. Add analyses with ``add``, then call ``update`` or ``watch``.
+
+    Notes
+    -----
+    - frames already analyzed must not change: files only grow at the end, and new files
+      come after the existing ones (in pytraj.iterload's order).
+    - cpptraj's action accumulators live in C++ and can not be saved, so results are kept
+      as pytraj's mergeable states (grid, density, rdf, dssp) and StreamState (averages,
+      histograms, block averages, autocorrelation of per-frame values).
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.testing import get_fn
+    >>> fname, tname = get_fn('tz2')
+    >>> follower = pt.follow(fname, tname)
+    >>> follower = follower.add('rmsd', pt.rmsd, mask='@CA', ref=0)
+    >>> follower = follower.add('rg', pt.radgyr, '@CA', bins=20, hist_range=(5., 15.))
+    >>> n_new = follower.update() # only new frames next time
+    >>> rmsd = follower['rmsd']
+    >>> rg_mean = follower['rg'].mean
+    '''
+    state_file = kwargs.get('state_file')
+    if state_file is not None and os.path.exists(state_file):
+        follower = Follower.load(state_file)
+        follower.state_file = state_file
+        return follower
+    return Follower(filename, top, *args, **kwargs)
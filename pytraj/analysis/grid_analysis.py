@@ -0,0 +1,505 @@
+"""mergeable grid and density accumulation
+
+Functions in this module return a state (GridState, ProfileState) that holds raw sums and
+the number of frames instead of normalized values. States of different chunks of a
+trajectory are merged exactly (``state0 + state1`` or ``merge_states``), so the
+calculation can be split over cores with ``pytraj.pmap`` (or ``pytraj.pmap_mpi``) and
+reduced at the end.
+
+Examples
+--------
+>>> import pytraj as pt
+>>> traj = pt.load_sample_data('tz2')
+>>> state = pt.grid_occupancy(traj, ':WAT@O', grid_spacing=(0.5, 0.5, 0.5))
+>>> state.n_frames
+10
+>>> occupancy = state.occupancy
+>>> # same result with 4 cores
+>>> state = pt.pmap(pt.grid_occupancy, traj, ':WAT@O', grid_spacing=(0.5, 0.5, 0.5), n_cores=4)
+"""
+from __future__ import absolute_import
+from functools import reduce
+from collections import OrderedDict
+import numpy as np
+
+from ..externals.six import string_types
+from ..utils.get_common_objects import (super_dispatch, get_topology,
+                                        get_fiterator)
+from ..utils.decorators import register_mergeable, register_pmap_setup
+from ..trajectory.shared_methods import iterframe_master
+from .base_state import _StateMixin
+
+__all__ = [
+    'GridState',
+    'ProfileState',
+    'grid_occupancy',
+    'density_profile',
+    'merge_states',
+]
+
+
+def merge_states(states):
+    '''merge a list of GridState or ProfileState
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.analysis.grid_analysis import merge_states
+    >>> traj = pt.load_sample_data('tz2')
+    >>> kwargs = dict(origin=(-20., -20., -20.), shape=(80, 80, 80))
+    >>> s0 = pt.grid_occupancy(traj(0, 5), ':WAT@O', **kwargs)
+    >>> s1 = pt.grid_occupancy(traj(5, 10), ':WAT@O', **kwargs)
+    >>> merge_states([s0, s1]).n_frames
+    10
+    '''
+    return reduce(lambda x, y: x.merge(y), states)
+
+
+class GridState(_StateMixin):
+    '''number of atoms in each voxel, summed over frames
+
+    Parameters
+    ----------
+    counts : 3D array-like of int
+    n_frames : int
+    origin : array-like, shape=(3,)
+        coordinates of the corner of the first voxel
+    spacing : array-like, shape=(3,)
+    '''
+
+    def __init__(self, counts, n_frames, origin, spacing):
+        self.counts = np.asarray(counts)
+        self.n_frames = int(n_frames)
+        self.origin = np.asarray(origin, dtype='f8')
+        self.spacing = np.asarray(spacing, dtype='f8')
+
+    def __repr__(self):
+        return '<GridState: shape={}, n_frames={}>'.format(self.shape,
+                                                            self.n_frames)
+
+    @property
+    def shape(self):
+        return self.counts.shape
+
+    @property
+    def voxel_volume(self):
+        return float(np.prod(self.spacing))
+
+    @property
+    def centers(self):
+        '''tuple of coordinates of voxel centers in X, Y, Z
+        '''
+        return tuple(self.origin[i] + (np.arange(self.shape[i]) + 0.5) *
+                     self.spacing[i] for i in range(3))
+
+    @property
+    def occupancy(self):
+        '''average number of atoms in each voxel
+        '''
+        if self.n_frames == 0:
+            return np.zeros(self.shape)
+        return self.counts / float(self.n_frames)
+
+    @property
+    def density(self):
+        '''average number density (atoms/Angstrom^3)
+        '''
+        return self.occupancy / self.voxel_volume
+
+    @property
+    def values(self):
+        return self.occupancy
+
+    def merge(self, other):
+        '''return a new GridState
+        '''
+        if (self.shape != other.shape or
+                not np.allclose(self.origin, other.origin) or
+                not np.allclose(self.spacing, other.spacing)):
+            raise ValueError(
+                'can not merge grids having different origin, spacing or shape')
+        return GridState(self.counts + other.counts,
+                         self.n_frames + other.n_frames, self.origin,
+                         self.spacing)
+
+    def _reduce_arrays(self):
+        return [self.counts, np.array([self.n_frames])]
+
+    def _gather_arrays(self):
+        return []
+
+    def _from_reduced(self, summed, gathered):
+        return GridState(summed[0], summed[1][0], self.origin, self.spacing)
+
+    def to_dict(self):
+        return OrderedDict([
+            ('counts', self.counts),
+            ('n_frames', self.n_frames),
+            ('origin', self.origin),
+            ('spacing', self.spacing),
+        ])
+
+    @classmethod
+    def load(cls, filename):
+        data = np.load(filename)
+        return cls(data['counts'], data['n_frames'], data['origin'],
+                   data['spacing'])
+
+
+class ProfileState(_StateMixin):
+    '''density in each bin along an axis, summed over frames
+
+    Parameters
+    ----------
+    sums, sumsq : 2D array-like, shape=(n_masks, n_bins)
+        sum of density and sum of squared density over frames
+    n_frames : int
+    first_bin : int
+        bin i covers [(first_bin + i) * delta, (first_bin + i + 1) * delta)
+    delta : float
+    keys : list of str
+        masks
+    direction : str, {'x', 'y', 'z'}
+    '''
+
+    def __init__(self, sums, sumsq, n_frames, first_bin, delta, keys,
+                 direction='z'):
+        self.sums = np.asarray(sums, dtype='f8')
+        self.sumsq = np.asarray(sumsq, dtype='f8')
+        self.n_frames = int(n_frames)
+        self.first_bin = int(first_bin)
+        self.delta = float(delta)
+        self.keys = list(keys)
+        self.direction = str(direction)
+
+    def __repr__(self):
+        return '<ProfileState: {} bins, n_frames={}>'.format(self.n_bins,
+                                                             self.n_frames)
+
+    @property
+    def n_bins(self):
+        return self.sums.shape[1]
+
+    @property
+    def coordinates(self):
+        '''bin centers
+        '''
+        return (self.first_bin + np.arange(self.n_bins) + 0.5) * self.delta
+
+    @property
+    def mean(self):
+        if self.n_frames == 0:
+            return np.zeros_like(self.sums)
+        return self.sums / self.n_frames
+
+    @property
+    def std(self):
+        if self.n_frames == 0:
+            return np.zeros_like(self.sums)
+        var = self.sumsq / self.n_frames - self.mean**2
+        return np.sqrt(np.clip(var, 0., None))
+
+    @property
+    def values(self):
+        return self.mean
+
+    def _resized(self, first_bin, n_bins):
+        '''return (sums, sumsq) padded with zeros to cover given bins
+        '''
+        sums = np.zeros((len(self.keys), n_bins))
+        sumsq = np.zeros((len(self.keys), n_bins))
+        start = self.first_bin - first_bin
+        sums[:, start:start + self.n_bins] = self.sums
+        sumsq[:, start:start + self.n_bins] = self.sumsq
+        return sums, sumsq
+
+    def merge(self, other):
+        '''return a new ProfileState
+        '''
+        if (self.keys != other.keys or self.direction != other.direction or
+                not np.isclose(self.delta, other.delta)):
+            raise ValueError(
+                'can not merge profiles having different masks, direction or delta'
+            )
+        n_frames = self.n_frames + other.n_frames
+        if self.n_bins == 0 or other.n_bins == 0:
+            base = other if self.n_bins == 0 else self
+            return ProfileState(base.sums, base.sumsq, n_frames,
+                                base.first_bin, self.delta, self.keys,
+                                self.direction)
+        first_bin = min(self.first_bin, other.first_bin)
+        n_bins = max(self.first_bin + self.n_bins,
+                     other.first_bin + other.n_bins) - first_bin
+        sums0, sumsq0 = self._resized(first_bin, n_bins)
+        sums1, sumsq1 = other._resized(first_bin, n_bins)
+        return ProfileState(sums0 + sums1, sumsq0 + sumsq1, n_frames,
+                            first_bin, self.delta, self.keys, self.direction)
+
+    def _extent(self):
+        return (self.first_bin, self.n_bins)
+
+    def _aligned(self, extents):
+        extents = [(first, n) for (first, n) in extents if n > 0]
+        if not extents:
+            return self
+        first_bin = min(first for first, _ in extents)
+        n_bins = max(first + n for first, n in extents) - first_bin
+        if self.n_bins == 0:
+            sums = np.zeros((len(self.keys), n_bins))
+            sumsq = np.zeros((len(self.keys), n_bins))
+        else:
+            sums, sumsq = self._resized(first_bin, n_bins)
+        return ProfileState(sums, sumsq, self.n_frames, first_bin, self.delta,
+                            self.keys, self.direction)
+
+    def _reduce_arrays(self):
+        return [self.sums, self.sumsq, np.array([self.n_frames])]
+
+    def _gather_arrays(self):
+        return []
+
+    def _from_reduced(self, summed, gathered):
+        return ProfileState(summed[0], summed[1], summed[2][0],
+                            self.first_bin, self.delta, self.keys,
+                            self.direction)
+
+    def to_dict(self):
+        '''return OrderedDict of bin centers, average density and its standard deviation
+        for each mask
+        '''
+        out = OrderedDict()
+        out[self.direction] = self.coordinates
+        for key, mean, std in zip(self.keys, self.mean, self.std):
+            out[key] = mean
+            out[key + '[sd]'] = std
+        return out
+
+
+def _grid_dimension(frame,
+                    top,
+                    mask,
+                    grid_spacing,
+                    size=None,
+                    center=None,
+                    buffer=3.0,
+                    centermask=None):
+    '''return (origin, shape) of a grid for given frame
+
+    If size is None, the grid covers atoms in centermask (default: mask) with buffer.
+    If center is None, the grid is centered at the geometric center of centermask.
+    '''
+    spacing = np.asarray(grid_spacing, dtype='f8')
+    xyz = frame.xyz[top.select(centermask or mask or '*')]
+    if size is None:
+        lower = xyz.min(axis=0) - buffer
+        upper = xyz.max(axis=0) + buffer
+        size = upper - lower
+        if center is None:
+            center = (lower + upper) / 2.
+    elif center is None:
+        center = xyz.mean(axis=0)
+    shape = np.maximum(np.ceil(np.asarray(size, dtype='f8') / spacing), 1)
+    shape = shape.astype('i8')
+    origin = np.asarray(center, dtype='f8') - shape * spacing / 2.
+    return origin, tuple(int(x) for x in shape)
+
+
+def _grid_occupancy_setup(traj,
+                          mask='',
+                          grid_spacing=(0.5, 0.5, 0.5),
+                          size=None,
+                          center=None,
+                          buffer=3.0,
+                          centermask=None,
+                          origin=None,
+                          shape=None,
+                          frame_indices=None,
+                          **kwargs):
+    '''determine the grid from the first frame, so all pmap chunks use the same grid
+    '''
+    if origin is not None and shape is not None:
+        return {}
+    index = 0 if frame_indices is None else next(iter(frame_indices))
+    origin, shape = _grid_dimension(traj[index], traj.top, mask, grid_spacing,
+                                    size, center, buffer, centermask)
+    return {'origin': origin, 'shape': shape}
+
+
+@register_mergeable
+@register_pmap_setup(_grid_occupancy_setup)
+@super_dispatch()
+def grid_occupancy(traj,
+                   mask='',
+                   grid_spacing=(0.5, 0.5, 0.5),
+                   size=None,
+                   center=None,
+                   buffer=3.0,
+                   centermask=None,
+                   origin=None,
+                   shape=None,
+                   frame_indices=None,
+                   top=None,
+                   dtype='state'):
+    '''count atoms in each voxel of a fixed grid over frames. The result can be merged
+    exactly with results of other chunks of the trajectory (support ``pytraj.pmap``)
+
+    Parameters
+    ----------
+    traj : Trajectory-like
+    mask : str, default all atoms
+    grid_spacing : tuple of 3 floats, default (0.5, 0.5, 0.5)
+    size : {None, tuple}, default None
+        size of the grid (Angstrom) in X, Y, Z. If None, the grid covers all atoms in
+        centermask of the first frame plus ``buffer``
+    center : {None, tuple}, default None
+        if None, use the geometric center of centermask of the first frame
+    buffer : float, default 3.0
+    centermask : {None, str}, default None (same as mask)
+    origin, shape : {None, tuple}, default None
+        if both are given, use this grid (ignore size, center, buffer)
+    frame_indices : {None, array-like}
+    top : Topology, optional
+    dtype : str, {'state', 'ndarray', 'dict'}, default 'state'
+        'ndarray' returns occupancy (average number of atoms in each voxel)
+
+    Returns
+    -------
+    GridState
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> traj = pt.load_sample_data('tz2')
+    >>> state = pt.grid_occupancy(traj, ':WAT@O', grid_spacing=(1., 1., 1.), centermask=':1-13')
+    >>> density = state.density
+    '''
+    spacing = np.asarray(grid_spacing, dtype='f8')
+    indices = top.select(mask or '*')
+
+    flat_counts = None
+    n_frames = 0
+    for frame in iterframe_master(traj):
+        if flat_counts is None:
+            if origin is None or shape is None:
+                origin, shape = _grid_dimension(frame, top, mask, spacing,
+                                                size, center, buffer,
+                                                centermask)
+            origin = np.asarray(origin, dtype='f8')
+            shape = tuple(int(x) for x in shape)
+            flat_counts = np.zeros(int(np.prod(shape)), dtype='i8')
+        ijk = np.floor((frame.xyz[indices] - origin) / spacing).astype('i8')
+        inside = np.all((ijk >= 0) & (ijk < shape), axis=1)
+        flat_counts += np.bincount(
+            np.ravel_multi_index(ijk[inside].T, shape),
+            minlength=flat_counts.size)
+        n_frames += 1
+
+    if flat_counts is None:
+        # empty chunk
+        if origin is None or shape is None:
+            raise ValueError('empty trajectory, must provide origin and shape')
+        shape = tuple(int(x) for x in shape)
+        flat_counts = np.zeros(int(np.prod(shape)), dtype='i8')
+
+    state = GridState(flat_counts.reshape(shape), n_frames, origin, spacing)
+    return state.to_dtype(dtype)
+
+
+def _get_weights(top, density_type):
+    density_type = density_type.lower()
+    if density_type == 'number':
+        return np.ones(top.n_atoms)
+    elif density_type == 'mass':
+        return np.asarray(top.mass)
+    elif density_type == 'charge':
+        return np.asarray(top.charge)
+    elif density_type == 'electron':
+        atomic_numbers = top.arrays.atomic_number
+        return atomic_numbers - np.asarray(top.charge)
+    raise ValueError(
+        "density_type must be 'number', 'mass', 'charge' or 'electron'")
+
+
+@register_mergeable
+def density_profile(traj,
+                    mask='*',
+                    density_type='number',
+                    delta=0.25,
+                    direction='z',
+                    frame_indices=None,
+                    top=None,
+                    dtype='state'):
+    '''compute density (number, mass, charge, electron) along a coordinate. Same as
+    ``pytraj.density`` but the result can be merged exactly with results of other chunks
+    of the trajectory (support ``pytraj.pmap``)
+
+    Parameters
+    ----------
+    traj : Trajectory-like, must have an orthogonal box
+    mask : str or list of str, default '*'
+    density_type : str, {'number', 'mass', 'charge', 'electron'}, default 'number'
+    delta : float, default 0.25
+        bin width (Angstrom)
+    direction : str, {'x', 'y', 'z'}, default 'z'
+    frame_indices : {None, array-like}
+    top : Topology, optional
+    dtype : str, {'state', 'ndarray', 'dict'}, default 'state'
+        'dict' returns bin centers, average density and its standard deviation for
+        each mask
+
+    Returns
+    -------
+    ProfileState
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> traj = pt.load_sample_data('tz2')
+    >>> state = pt.density_profile(traj, [':WAT@O', ':1-13'], density_type='mass')
+    >>> data = state.to_dict()
+    '''
+    top = get_topology(traj, top)
+    masks = [mask] if isinstance(mask, string_types) else list(mask)
+    if direction not in ('x', 'y', 'z'):
+        raise ValueError("direction must be 'x', 'y' or 'z'")
+    axis = 'xyz'.index(direction)
+    weights = _get_weights(top, density_type)
+    selections = [top.select(m) for m in masks]
+
+    state = ProfileState(
+        np.zeros((len(masks), 0)),
+        np.zeros((len(masks), 0)), 0, 0, delta, masks, direction)
+
+    for frame in iterframe_master(get_fiterator(traj, frame_indices)):
+        lengths = np.asarray(frame.box.data[:3], dtype='f8')
+        if np.any(lengths[np.arange(3) != axis] <= 0.):
+            raise ValueError('density_profile requires box')
+        if not np.allclose(frame.box.data[3:6], 90.):
+            # slab volume would depend on the cell vectors
+            raise ValueError('density_profile requires an orthogonal box')
+        slab_volume = delta * np.prod(lengths[np.arange(3) != axis])
+        coords = frame.xyz[:, axis]
+        bins = [
+            np.floor(coords[indices] / delta).astype('i8')
+            for indices in selections
+        ]
+        non_empty = [b for b in bins if b.size]
+        if non_empty:
+            first_bin = min(b.min() for b in non_empty)
+            last_bin = max(b.max() for b in non_empty)
+        else:
+            first_bin = last_bin = state.first_bin
+        frame_state = ProfileState(
+            np.zeros((len(masks), last_bin - first_bin + 1)),
+            np.zeros((len(masks), last_bin - first_bin + 1)), 1, first_bin,
+            delta, masks, direction)
+        for k, (b, indices) in enumerate(zip(bins, selections)):
+            hist = np.bincount(
+                b - first_bin,
+                weights=weights[indices],
+                minlength=frame_state.n_bins) / slab_volume
+            frame_state.sums[k] = hist
+            frame_state.sumsq[k] = hist**2
+        state = state.merge(frame_state) if state.n_frames else frame_state
+
+    return state.to_dtype(dtype)
@@ -0,0 +1,208 @@
+"""progressive analysis: visit frames in stratified (coarse to fine) order and return
+early estimates
+"""
+from __future__ import absolute_import
+import numpy as np
+
+from ..utils.check_and_assert import _accept_dtype
+
+__all__ = ['progressive', 'ProgressiveResult', 'stratified_levels']
+
+
+def stratified_levels(n_frames, first_stride=None, min_frames=8):
+    '''split range(n_frames) into levels of a stratified (coarse to fine) order
+
+    The first level takes every ``first_stride``-th frame, each next level halves the
+    stride and only takes frames that were not visited yet. Each level is spread over
+    the whole trajectory.
+
+    Parameters
+    ----------
+    n_frames : int
+    first_stride : {None, int}, default None
+        must be a power of 2. If None, use the largest power of 2 that still gives at
+        least ``min_frames`` frames in the first level
+    min_frames : int, default 8
+
+    Returns
+    -------
+    levels : list of 1D arrays of frame indices
+
+    Examples
+    --------
+    >>> [level.tolist() for level in stratified_levels(10, first_stride=4)]
+    [[0, 4, 8], [2, 6], [1, 3, 5, 7, 9]]
+    >>> len(stratified_levels(1000))
+    7
+    '''
+    if first_stride is None:
+        first_stride = 1
+        while n_frames // (first_stride * 2) >= min_frames:
+            first_stride *= 2
+    if first_stride < 1 or first_stride & (first_stride - 1):
+        raise ValueError('first_stride must be a power of 2')
+
+    levels = [np.arange(0, n_frames, first_stride)]
+    stride = first_stride
+    while stride > 1:
+        levels.append(np.arange(stride // 2, n_frames, stride))
+        stride //= 2
+    return [level for level in levels if len(level) > 0]
+
+
+class ProgressiveResult(object):
+    '''partial result of ``progressive``, updated after each level
+
+    Attributes
+    ----------
+    frame_indices : 1D array
+        visited frames, sorted
+    data : ndarray
+        values of visited frames, frames are along ``frame_axis``
+    n_frames : int
+        total number of frames
+    level : int
+        number of finished levels
+    n_levels : int
+    fraction : float
+        fraction of visited frames
+    done : bool
+        True if all frames were visited
+    '''
+
+    def __init__(self, n_frames, n_levels, frame_axis=-1):
+        self.n_frames = n_frames
+        self.n_levels = n_levels
+        self.frame_axis = frame_axis
+        self.level = 0
+        self.frame_indices = np.array([], dtype='i8')
+        self.data = None
+
+    def __repr__(self):
+        return '<ProgressiveResult: level {}/{}, {:.1%} of {} frames>'.format(
+            self.level, self.n_levels, self.fraction, self.n_frames)
+
+    def _update(self, frame_indices, values):
+        values = np.asarray(values)
+        if self.data is None:
+            indices, data = np.asarray(frame_indices, dtype='i8'), values
+        else:
+            indices = np.concatenate((self.frame_indices, frame_indices))
+            data = np.concatenate((self.data, values), axis=self.frame_axis)
+        order = np.argsort(indices, kind='mergesort')
+        self.frame_indices = indices[order]
+        self.data = np.take(data, order, axis=self.frame_axis)
+        self.level += 1
+
+    @property
+    def fraction(self):
+        return len(self.frame_indices) / float(self.n_frames)
+
+    @property
+    def done(self):
+        return len(self.frame_indices) == self.n_frames
+
+    @property
+    def mean(self):
+        '''estimate of the average over all frames
+        '''
+        return np.mean(self.data, axis=self.frame_axis)
+
+    @property
+    def std_error(self):
+        '''standard error of ``mean`` (with finite population correction, 0 if all frames
+        were visited)
+
+        Notes
+        -----
+        Frames are assumed to be independent; for strongly correlated time series this
+        underestimates the error of early levels.
+        '''
+        n = len(self.frame_indices)
+        if n < 2:
+            return np.full(np.shape(self.mean), np.nan)
+        std = np.std(self.data, axis=self.frame_axis, ddof=1)
+        return std / np.sqrt(n) * np.sqrt(1. - n / float(self.n_frames))
+
+    def interpolate(self):
+        '''linear interpolation of ``data`` to all frames, e.g for plotting trends
+
+        Returns
+        -------
+        ndarray, same as ``data`` but with n_frames along ``frame_axis``
+        '''
+        data = np.moveaxis(self.data, self.frame_axis, -1)
+        flat = data.reshape(-1, data.shape[-1])
+        frames = np.arange(self.n_frames)
+        out = np.array([
+            np.interp(frames, self.frame_indices, series) for series in flat
+        ])
+        out = out.reshape(data.shape[:-1] + (self.n_frames, ))
+        return np.moveaxis(out, -1, self.frame_axis)
+
+
+def progressive(func, traj, *args, **kwargs):
+    '''run a per-frame analysis over frames in stratified order and yield an updating
+    result after each level. Stop iterating any time to use an early estimate.
+
+    Parameters
+    ----------
+    func : a pytraj function that supports ``frame_indices`` and returns one value per
+        frame (e.g pytraj.rmsd, pytraj.radgyr, pytraj.distance)
+    traj : Trajectory-like that supports ``frame_indices`` (Trajectory,
+        TrajectoryIterator, ...)
+    *args, **kwargs : additional arguments for ``func``
+    frame_axis : int, default -1
+        axis of frames in func's output (pytraj's functions return (n_frames,) or
+        (n_series, n_frames) arrays)
+    first_stride : {None, int}, default None
+        stride of the first level, must be a power of 2. See ``stratified_levels``
+    tol : {None, float}, default None
+        if given, stop after the level (the second or later) where all standard
+        errors of the mean are smaller than ``tol``
+    extract : {None, callable}, default None
+        function to convert func's output to an ndarray
+
+    Returns
+    -------
+    generator of ProgressiveResult. The same object is updated and yielded after each
+    level.
+
+    Notes
+    -----
+    Only analyses whose value for a frame does not depend on other frames are supported
+    (e.g not pytraj.diffusion or rmsd with ref='previous').
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> traj = pt.datafiles.load_tz2_ortho()
+    >>> for result in pt.progressive(pt.radgyr, traj, '@CA', first_stride=4):
+    ...     if result.fraction >= 0.5:
+    ...         break
+    >>> result.level
+    2
+    >>> result = list(pt.progressive(pt.rmsd, traj, mask='@CA', ref=0))[-1]
+    >>> result.done
+    True
+    '''
+    frame_axis = kwargs.pop('frame_axis', -1)
+    first_stride = kwargs.pop('first_stride', None)
+    tol = kwargs.pop('tol', None)
+    extract = kwargs.pop('extract', None)
+    if 'frame_indices' in kwargs:
+        raise ValueError('progressive chooses frame_indices')
+    if 'dtype' not in kwargs and _accept_dtype(func):
+        kwargs['dtype'] = 'ndarray'
+
+    levels = stratified_levels(traj.n_frames, first_stride=first_stride)
+    result = ProgressiveResult(traj.n_frames, len(levels), frame_axis=frame_axis)
+    for frame_indices in levels:
+        out = func(traj, *args, frame_indices=frame_indices, **kwargs)
+        if extract is not None:
+            out = extract(out)
+        result._update(frame_indices, out)
+        yield result
+        if tol is not None and result.level > 1 and np.all(
+                result.std_error <= tol):
+            break
@@ -0,0 +1,441 @@
+"""radial distribution function with cell-list pair binning
+
+``multirdf`` keeps raw pair counts per bin (RdfState), so results of different chunks of
+a trajectory are merged exactly and the calculation can be split over cores with
+``pytraj.pmap``. Many solute/solvent pair types are computed in a single pass over the
+trajectory.
+
+Examples
+--------
+>>> import pytraj as pt
+>>> traj = pt.datafiles.load_tz2_ortho()
+>>> state = pt.multirdf(traj, ':WAT@O', [':WAT@O', '@CA', ':1-13@N'], maximum=8.)
+>>> data = state.to_dict()
+>>> list(data.keys())
+['r', ':WAT@O', '@CA', ':1-13@N']
+>>> # same result with 4 cores
+>>> state = pt.pmap(pt.multirdf, traj, ':WAT@O', [':WAT@O', '@CA'], maximum=8., n_cores=4)
+"""
+from __future__ import absolute_import
+from itertools import product
+from collections import OrderedDict
+import numpy as np
+
+from ..externals.six import string_types
+from ..utils.get_common_objects import get_topology, get_fiterator
+from ..utils.decorators import register_mergeable
+from ..trajectory.shared_methods import iterframe_master
+from .base_state import _StateMixin
+
+__all__ = ['RdfState', 'multirdf']
+
+
+class RdfState(_StateMixin):
+    '''number of solute-solvent pairs in each distance bin, summed over frames
+
+    Parameters
+    ----------
+    counts : 2D array-like of int, shape=(n_pairs, n_bins)
+    n_frames : int
+    volume_sum : float
+        sum of box volumes over frames (0. if there is no box)
+    n_solute, n_solvent : array-like of int, shape=(n_pairs,)
+        number of atoms in solute and solvent masks of each pair type
+    n_common : {None, array-like of int}, shape=(n_pairs,)
+        number of atoms in both masks (those self pairs are not counted)
+    bin_spacing : float
+    maximum : float
+    keys : list of str
+    density : {None, float}
+        solvent number density (molecules / A^3) for normalization. If None, use
+        n_solvent / average box volume
+    '''
+
+    def __init__(self,
+                 counts,
+                 n_frames,
+                 volume_sum,
+                 n_solute,
+                 n_solvent,
+                 bin_spacing,
+                 maximum,
+                 keys,
+                 density=None,
+                 n_common=None):
+        self.counts = np.asarray(counts, dtype='i8')
+        self.n_frames = int(n_frames)
+        self.volume_sum = float(volume_sum)
+        self.n_solute = np.asarray(n_solute, dtype='i8')
+        self.n_solvent = np.asarray(n_solvent, dtype='i8')
+        self.bin_spacing = float(bin_spacing)
+        self.maximum = float(maximum)
+        self.keys = list(keys)
+        self.density = None if density is None else float(density)
+        self.n_common = (np.zeros(len(self.keys), dtype='i8')
+                         if n_common is None else np.asarray(
+                             n_common, dtype='i8'))
+
+    def __repr__(self):
+        return '<RdfState: {} pair types, {} bins, n_frames={}>'.format(
+            len(self.keys), self.n_bins, self.n_frames)
+
+    @property
+    def n_bins(self):
+        return self.counts.shape[1]
+
+    @property
+    def bin_centers(self):
+        return (np.arange(self.n_bins) + 0.5) * self.bin_spacing
+
+    @property
+    def shell_volumes(self):
+        edges = np.arange(self.n_bins + 1) * self.bin_spacing
+        return 4. / 3. * np.pi * (edges[1:]**3 - edges[:-1]**3)
+
+    @property
+    def solvent_density(self):
+        '''number density of solvent for each pair type, shape=(n_pairs,)
+        '''
+        if self.density is not None:
+            return np.full(len(self.keys), self.density)
+        if self.volume_sum <= 0.:
+            raise ValueError('need box to use average volume, provide density')
+        return self.n_solvent * self.n_frames / self.volume_sum
+
+    @property
+    def rdf(self):
+        '''g(r), shape=(n_pairs, n_bins)
+        '''
+        if self.n_frames == 0:
+            return np.zeros(self.counts.shape)
+        # number of counted pairs per frame divided by n_solvent
+        n_reference = (self.n_solute * self.n_solvent - self.n_common
+                       ) / np.maximum(self.n_solvent, 1).astype('f8')
+        norm = (self.n_frames * n_reference * self.solvent_density)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = self.counts / (norm * self.shell_volumes[None, :])
+        return np.nan_to_num(values)
+
+    @property
+    def values(self):
+        return self.rdf
+
+    def merge(self, other):
+        '''return a new RdfState
+        '''
+        if (self.keys != other.keys or self.counts.shape != other.counts.shape
+                or not np.isclose(self.bin_spacing, other.bin_spacing) or
+                self.density != other.density or
+                np.any(self.n_solute != other.n_solute) or
+                np.any(self.n_solvent != other.n_solvent)):
+            raise ValueError(
+                'can not merge rdf having different masks, bins or density')
+        return RdfState(self.counts + other.counts,
+                        self.n_frames + other.n_frames,
+                        self.volume_sum + other.volume_sum, self.n_solute,
+                        self.n_solvent, self.bin_spacing, self.maximum,
+                        self.keys, self.density, self.n_common)
+
+    def _reduce_arrays(self):
+        return [
+            self.counts,
+            np.array([self.n_frames]),
+            np.array([self.volume_sum])
+        ]
+
+    def _gather_arrays(self):
+        return []
+
+    def _from_reduced(self, summed, gathered):
+        return RdfState(summed[0], summed[1][0], summed[2][0], self.n_solute,
+                        self.n_solvent, self.bin_spacing, self.maximum,
+                        self.keys, self.density, self.n_common)
+
+    def to_dict(self):
+        '''return OrderedDict of bin centers ('r') and g(r) of each pair type
+        '''
+        out = OrderedDict()
+        out['r'] = self.bin_centers
+        for key, values in zip(self.keys, self.rdf):
+            out[key] = values
+        return out
+
+    def save(self, filename):
+        '''save raw counts to numpy npz file, use ``RdfState.load`` to read
+        '''
+        np.savez(
+            filename,
+            counts=self.counts,
+            n_frames=self.n_frames,
+            volume_sum=self.volume_sum,
+            n_solute=self.n_solute,
+            n_solvent=self.n_solvent,
+            bin_spacing=self.bin_spacing,
+            maximum=self.maximum,
+            keys=np.array(self.keys),
+            density=np.nan if self.density is None else self.density,
+            n_common=self.n_common)
+
+    @classmethod
+    def load(cls, filename):
+        data = np.load(filename)
+        density = float(data['density'])
+        return cls(data['counts'], data['n_frames'], data['volume_sum'],
+                   data['n_solute'], data['n_solvent'], data['bin_spacing'],
+                   data['maximum'], [str(key) for key in data['keys']],
+                   None if np.isnan(density) else density, data['n_common'])
+
+
+def _unitcell(box):
+    '''return 3x3 matrix, each row is a box vector
+    '''
+    a, b, c, alpha, beta, gamma = box
+    if alpha == beta == gamma == 90.:
+        return np.diag([a, b, c])
+    alpha, beta, gamma = np.radians([alpha, beta, gamma])
+    cx = c * np.cos(beta)
+    cy = c * (np.cos(alpha) - np.cos(beta) * np.cos(gamma)) / np.sin(gamma)
+    return np.array([[a, 0., 0.],
+                     [b * np.cos(gamma), b * np.sin(gamma), 0.],
+                     [cx, cy, np.sqrt(c * c - cx * cx - cy * cy)]])
+
+
+class _CellList(object):
+    '''bin solvent atoms into cells of width >= ``maximum`` so that neighbors of a point
+    are in the 27 surrounding cells.
+
+    With ``ucell``, cells are built in fractional coordinates and wrapped periodically;
+    distances use the minimum image convention.
+    '''
+
+    def __init__(self, xyz, maximum, ucell=None):
+        self.ucell = ucell
+        if ucell is not None:
+            self.inverse = np.linalg.inv(ucell)
+            volume = abs(np.linalg.det(ucell))
+            # perpendicular width of the cell along each box vector
+            widths = np.array([
+                volume / np.linalg.norm(np.cross(ucell[(k + 1) % 3], ucell[(
+                    k + 2) % 3])) for k in range(3)
+            ])
+            self.shape = np.maximum(1, np.floor(widths / maximum)).astype('i8')
+            self.coords = self._fractional(xyz)
+        else:
+            self.origin = xyz.min(axis=0) if len(xyz) else np.zeros(3)
+            self.maximum = maximum
+            self.coords = xyz
+            self.shape = (np.floor(
+                (xyz.max(axis=0) - self.origin) / maximum).astype('i8') + 1
+                          if len(xyz) else np.ones(3, dtype='i8'))
+
+        flat = self._flat_cells(self._cells(self.coords))
+        self.order = np.argsort(flat, kind='mergesort')
+        self.cell_counts = np.bincount(flat, minlength=np.prod(self.shape))
+        self.cell_starts = np.cumsum(self.cell_counts) - self.cell_counts
+
+        if ucell is not None:
+            # do not visit the same neighbor cell twice if there are less than 3 cells
+            self.offsets = [
+                np.array([0]) if n == 1 else np.array([0, 1])
+                if n == 2 else np.array([-1, 0, 1]) for n in self.shape
+            ]
+        else:
+            self.offsets = [np.array([-1, 0, 1])] * 3
+
+    def _fractional(self, xyz):
+        frac = np.dot(xyz, self.inverse)
+        return frac - np.floor(frac)
+
+    def _cells(self, coords):
+        if self.ucell is not None:
+            cells = np.floor(coords * self.shape).astype('i8')
+        else:
+            cells = np.floor((coords - self.origin) / self.maximum).astype('i8')
+        return np.clip(cells, 0, self.shape - 1)
+
+    def _flat_cells(self, cells):
+        return np.ravel_multi_index(cells.T, self.shape)
+
+    def pairs(self, xyz):
+        '''yield (i, j, distance) for points ``xyz`` and solvent atoms in the same or
+        neighbor cells (distances can be larger than ``maximum``)
+        '''
+        coords = self._fractional(xyz) if self.ucell is not None else xyz
+        cells = self._cells(coords)
+        index = np.arange(len(xyz))
+        for offset in product(*self.offsets):
+            neighbors = cells + offset
+            if self.ucell is not None:
+                neighbors %= self.shape
+                i = index
+            else:
+                inside = np.all((neighbors >= 0) & (neighbors < self.shape),
+                                axis=1)
+                neighbors = neighbors[inside]
+                i = index[inside]
+            flat = self._flat_cells(neighbors)
+            lengths = self.cell_counts[flat]
+            total = lengths.sum()
+            if total == 0:
+                continue
+            i = np.repeat(i, lengths)
+            local = np.arange(total) - np.repeat(
+                np.cumsum(lengths) - lengths, lengths)
+            j = self.order[np.repeat(self.cell_starts[flat], lengths) + local]
+            diff = self.coords[j] - coords[i]
+            if self.ucell is not None:
+                diff -= np.round(diff)
+                diff = np.dot(diff, self.ucell)
+            yield i, j, np.sqrt((diff * diff).sum(axis=1))
+
+
+@register_mergeable
+def multirdf(traj,
+             solvent_mask=':WAT@O',
+             solute_mask='',
+             maximum=10.,
+             bin_spacing=0.5,
+             image=True,
+             density=0.033456,
+             volume=False,
+             intramol=True,
+             frame_indices=None,
+             top=None,
+             dtype='state'):
+    '''compute radial distribution functions of many solute/solvent pair types in a
+    single pass. Pairs are found with a (periodic) cell list restricted to ``maximum``.
+    The result can be merged exactly with results of other chunks of the trajectory
+    (support ``pytraj.pmap``)
+
+    Parameters
+    ----------
+    traj : Trajectory-like
+    solvent_mask : str or list of str, default ':WAT@O'
+        if a list, must have the same length as solute_mask (one solvent mask for each
+        pair type)
+    solute_mask : str or list of str, default '' (same as solvent_mask)
+    maximum : float, default 10.
+    bin_spacing : float, default 0.5
+    image : bool, default True
+        if True and the trajectory has box, use minimum image distances
+    density : {None, float}, default 0.033456 molecules / A^3
+    volume : bool, default False
+        if True, determine density for normalization from the number of solvent atoms
+        and average volume of input frames (ignore ``density``)
+    intramol : bool, default True
+        if False, ignore intra-molecular distances
+    frame_indices : {None, array-like}
+    top : Topology, optional
+    dtype : str, {'state', 'ndarray', 'dict'}, default 'state'
+        'ndarray' returns g(r) with shape=(n_pairs, n_bins), 'dict' returns bin
+        centers ('r') and g(r) of each pair type
+
+    Returns
+    -------
+    RdfState
+
+    Notes
+    -----
+    - a pair of the same atom (distance 0) is not counted.
+    - for triclinic boxes, minimum image is done in fractional coordinates; this is
+      exact if ``maximum`` is smaller than half of the shortest perpendicular width of
+      the box.
+    - center_solvent and center_solute options of ``pytraj.rdf`` are not supported.
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> traj = pt.datafiles.load_tz2_ortho()
+    >>> ions = [':1-13@N', ':1-13@O', '@CA']
+    >>> state = pt.multirdf(traj, ':WAT@O', ions, maximum=8., volume=True)
+    >>> gr = state.rdf
+    >>> gr.shape
+    (3, 16)
+    '''
+    top = get_topology(traj, top)
+    single_solute = isinstance(solute_mask, string_types)
+    solute_masks = [solute_mask] if single_solute else list(solute_mask)
+    if isinstance(solvent_mask, string_types):
+        solvent_masks = [solvent_mask] * len(solute_masks)
+        keys = [m or solvent_mask for m in solute_masks]
+    else:
+        solvent_masks = list(solvent_mask)
+        if len(solvent_masks) != len(solute_masks):
+            raise ValueError(
+                'solvent_mask and solute_mask must have the same length')
+        keys = [
+            '{} {}'.format(v, u or v)
+            for v, u in zip(solvent_masks, solute_masks)
+        ]
+    solute_masks = [u or v for v, u in zip(solvent_masks, solute_masks)]
+
+    n_bins = int(np.ceil(maximum / bin_spacing - 1E-8))
+    n_pairs = len(solute_masks)
+
+    # group pair types by solvent mask: one cell list per solvent mask per frame
+    groups = OrderedDict()
+    for k, (v, u) in enumerate(zip(solvent_masks, solute_masks)):
+        groups.setdefault(v, []).append(k)
+
+    plans = []
+    n_solute = np.zeros(n_pairs, dtype='i8')
+    n_solvent = np.zeros(n_pairs, dtype='i8')
+    n_common = np.zeros(n_pairs, dtype='i8')
+    for v, pair_ids in groups.items():
+        solvent = top.select(v)
+        selections = [top.select(solute_masks[k]) for k in pair_ids]
+        union = np.unique(np.concatenate(selections))
+        membership = np.array(
+            [np.isin(union, sel) for sel in selections], dtype=bool)
+        for k, sel in zip(pair_ids, selections):
+            n_solute[k] = len(sel)
+            n_solvent[k] = len(solvent)
+            n_common[k] = len(np.intersect1d(sel, solvent))
+        # if solute masks do not overlap, bin all pair types with one bincount
+        labels = (membership.argmax(axis=0)
+                  if np.all(membership.sum(axis=0) == 1) else None)
+        plans.append((solvent, union, np.array(pair_ids), membership, labels))
+
+    molnums = (None if intramol else
+               np.array([atom.molnum for atom in top.atoms]))
+
+    counts = np.zeros((n_pairs, n_bins), dtype='i8')
+    n_frames = 0
+    volume_sum = 0.
+    for frame in iterframe_master(get_fiterator(traj, frame_indices)):
+        n_frames += 1
+        box = np.asarray(frame.box.data, dtype='f8')
+        ucell = None
+        if np.all(box[:3] > 0.):
+            volume_sum += abs(np.linalg.det(_unitcell(box)))
+            if image:
+                ucell = _unitcell(box)
+        xyz = frame.xyz
+
+        for solvent, union, pair_ids, membership, labels in plans:
+            if len(solvent) == 0 or len(union) == 0:
+                continue
+            cells = _CellList(xyz[solvent], maximum, ucell)
+            for i, j, r in cells.pairs(xyz[union]):
+                keep = (r < maximum) & (union[i] != solvent[j])
+                if molnums is not None:
+                    keep &= molnums[union[i]] != molnums[solvent[j]]
+                i = i[keep]
+                bins = np.minimum((r[keep] / bin_spacing).astype('i8'),
+                                  n_bins - 1)
+                if labels is not None:
+                    counts[pair_ids] += np.bincount(
+                        labels[i] * n_bins + bins,
+                        minlength=len(pair_ids) * n_bins).reshape(
+                            len(pair_ids), n_bins)
+                    continue
+                for k, member in zip(pair_ids, membership):
+                    counts[k] += np.bincount(
+                        bins[member[i]], minlength=n_bins)
+
+    if volume and n_frames > 0 and volume_sum <= 0.:
+        raise ValueError('volume=True requires box')
+    state = RdfState(counts, n_frames, volume_sum, n_solute, n_solvent,
+                     bin_spacing, maximum, keys, None if volume else density,
+                     n_common)
+    return state.to_dtype(dtype)
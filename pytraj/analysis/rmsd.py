@@ -1,17 +1,21 @@
 import numpy as np
+from collections import OrderedDict
 
 from ..externals.six import string_types
 from ..utils.get_common_objects import (
     get_topology, get_data_from_dtype, get_matrix_from_dataset, get_reference,
     get_fiterator, super_dispatch, get_iterator_from_dslist)
 from ..utils.convert import array_to_cpptraj_atommask
-from ..utils.decorators import register_pmap, register_openmp
+from ..utils.decorators import register_pmap, register_openmp, register_pmap_setup
 from .c_action import c_action
 from .c_action import do_action
 from .c_analysis import c_analysis
 from .c_action.actionlist import ActionList
 from ..datasets.datasetlist import DatasetList
+from ..trajectory.trajectory import Trajectory
 from ..datasets.c_datasetlist import DatasetList as CpptrajDatasetList
+from ..math.superposition import (superpose_xyz, DEFAULT_CHUNKSIZE,
+                                  _make_references, _pair_chunksize)
 
 __all__ = [
     'rotation_matrix',
@@ -19,6 +23,7 @@ __all__ = [
     'rmsd_perres',
     'rmsd_nofit',
     'rmsd',
+    'rmsd_to_references',
     'symmrmsd',
 ]
 
@@ -302,6 +307,10 @@ def rmsd(traj=None,
     -----
     if ``traj`` is mutable and update_coordinate=True, its coordinates will be updated.
 
+    If ``traj`` is an in-memory Trajectory, masks are plain atom masks and dtype='ndarray',
+    the fitting is done for all frames at once with a vectorized Kabsch kernel (see
+    ``pytraj.math.superposition.superpose_xyz``) instead of cpptraj's frame by frame loop.
+
     When comparing the same structures (e.g. small ligands), the atoms need to be in the exact same order in the trajectory and reference frames.
     The function `atom_map(traj, ref, rmsfit=False)` can be used to attempt to reorder the atoms in the correct way before a RMSD calculation.
     """
@@ -347,6 +356,26 @@ def rmsd(traj=None,
     top_ = get_topology(traj, top)
 
     ref = get_reference(traj, ref)
+
+    if (isinstance(traj, Trajectory) and traj.xyz is not None
+            and dtype == 'ndarray' and _is_plain_mask(ref_mask)
+            and all(_is_plain_mask(cm) for cm in command)):
+        # fast path: in-memory coordinates, no need to go through cpptraj
+        # actions are applied in order, the same as cpptraj's ActionList
+        data = [
+            _superpose_in_memory(
+                traj,
+                mask=cm,
+                ref=ref,
+                ref_mask=ref_mask,
+                mass=mass,
+                top=top_,
+                frame_indices=frame_indices,
+                fit=not nofit,
+                update_coordinate=update_coordinate) for cm in command
+        ]
+        return data[0] if len(data) == 1 else np.array(data)
+
     fi = get_fiterator(traj, frame_indices)
 
     alist = ActionList()
@@ -376,6 +405,220 @@ def rmsd(traj=None,
     return get_data_from_dtype(dnew, dtype=dtype)
 
 
+def _is_plain_mask(mask):
+    # cpptraj's rms command can carry extra keywords (perres, savematrices, ...)
+    # after the mask. A plain atom mask does not have any whitespace.
+    return isinstance(mask, string_types) and len(mask.split()) <= 1
+
+
+def _fit_indices(top, mask):
+    if not mask or mask.strip() == '*':
+        return None
+    return top.select(mask)
+
+
+def _superpose_in_memory(traj,
+                         mask='',
+                         ref=None,
+                         ref_mask='',
+                         mass=False,
+                         top=None,
+                         frame_indices=None,
+                         fit=True,
+                         update_coordinate=True):
+    '''superpose in-memory Trajectory with vectorized Kabsch algorithm.
+    Return 1D array of rmsd. This is for internal use.
+    '''
+    top_ = top if top is not None else traj.top
+    ref_top = ref.top if getattr(ref, 'top', None) else top_
+    indices = _fit_indices(top_, mask)
+    ref_indices = _fit_indices(ref_top, ref_mask if ref_mask else mask)
+    weights = None
+    if mass:
+        weights = top_.mass if indices is None else top_.mass[indices]
+
+    # make a copy since ref might be a view of traj.xyz
+    ref_xyz = np.array(ref.xyz, dtype='f8')
+
+    if frame_indices is None:
+        xyz = traj.xyz
+    else:
+        frame_indices = np.asarray(frame_indices, dtype='i8')
+        xyz = traj.xyz[frame_indices]
+
+    inplace = fit and update_coordinate
+    _, _, rmsd_ = superpose_xyz(
+        xyz,
+        ref_xyz,
+        atom_indices=indices,
+        ref_atom_indices=ref_indices,
+        weights=weights,
+        fit=fit,
+        inplace=inplace)
+
+    if inplace and frame_indices is not None:
+        traj.xyz[frame_indices] = xyz
+    return rmsd_
+
+
+def _atom_indices(top, mask):
+    # string mask or array of atom indices, None means all atoms
+    if mask is None or isinstance(mask, string_types):
+        return _fit_indices(top, mask)
+    return np.asarray(mask, dtype='i8')
+
+
+def _references_xyz(traj, refs, top):
+    '''return coordinates of references, shape=(n_refs, n_atoms, 3), and their Topology
+    '''
+    if refs is None:
+        raise ValueError('must provide refs')
+    if hasattr(refs, 'n_frames') and hasattr(refs, 'xyz'):
+        # Trajectory-like
+        return np.array(refs.xyz, dtype='f8'), getattr(refs, 'top', None) or top
+    if isinstance(refs, np.ndarray) and refs.dtype.kind == 'f':
+        refs_xyz = np.array(refs, dtype='f8')
+        return (refs_xyz[None] if refs_xyz.ndim == 2 else refs_xyz), top
+    if hasattr(refs, 'xyz'):
+        # single Frame
+        refs = [refs, ]
+
+    frames = [get_reference(traj, ref) for ref in refs]
+    if not frames:
+        raise ValueError('must provide at least one reference')
+    ref_top = getattr(frames[0], 'top', None) or top
+    return np.array([frame.xyz for frame in frames], dtype='f8'), ref_top
+
+
+def _rmsd_to_references_setup(traj, *args, **kwargs):
+    '''get coordinates of references from the original trajectory, so integer refs mean
+    the same frames in all pmap chunks
+    '''
+    if 'refs' not in kwargs:
+        refs = args[0] if args else None
+        if isinstance(refs, (list, tuple)) and not all(
+                hasattr(ref, 'xyz') for ref in refs):
+            raise ValueError(
+                'use refs=... keyword if refs are frame indices with pmap')
+        return {}
+    top = get_topology(traj, kwargs.get('top'))
+    refs_xyz, ref_top = _references_xyz(traj, kwargs['refs'], top)
+    updated = {'refs': refs_xyz}
+    ref_mask = kwargs.get('ref_mask')
+    if ref_mask is None:
+        ref_mask = kwargs.get('mask', '')
+    updated['ref_mask'] = _atom_indices(ref_top, ref_mask)
+    if updated['ref_mask'] is None:
+        updated['ref_mask'] = np.arange(refs_xyz.shape[1])
+    return updated
+
+
+@register_pmap
+@register_pmap_setup(_rmsd_to_references_setup)
+def rmsd_to_references(traj=None,
+                       refs=None,
+                       mask='',
+                       ref_mask=None,
+                       fit=True,
+                       mass=False,
+                       frame_indices=None,
+                       top=None,
+                       chunksize=DEFAULT_CHUNKSIZE,
+                       dtype='ndarray'):
+    '''rmsd of each frame to each reference in a single pass over the trajectory. Frame
+    coordinates are not updated.
+
+    Parameters
+    ----------
+    traj : Trajectory-like
+    refs : Trajectory, list of {Frame, int}, or array-like, shape=(n_refs, n_atoms, 3)
+        references (e.g. cluster centroids). int means a frame index of ``traj``
+    mask : str or 1D array-like of atom indices, default '' (all atoms)
+    ref_mask : {None, str, 1D array-like}, default None
+        atoms of references. If None, use ``mask``
+    fit : bool, default True
+        if False, compute rmsd without fitting
+    mass : bool, default False
+        if True, compute mass-weighted rmsd (atom masses of ``traj``)
+    frame_indices : {None, 1D array-like}, default None
+    top : {None, Topology}, default None
+    chunksize : int, default 1024
+        max number of frames superposed to all references with each vectorized step
+    dtype : str, {'ndarray', 'dict'}, default 'ndarray'
+
+    Returns
+    -------
+    2D array, shape=(n_frames, n_refs) (or OrderedDict with 'rmsd' key if dtype='dict')
+
+    Notes
+    -----
+    References are centered once. For each block of frames, the covariance matrices with
+    all references are computed by a single matrix product, then the rmsd comes from
+    their singular values (Kabsch). Supports ``pytraj.pmap``.
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> traj = pt.datafiles.load_tz2()
+    >>> data = pt.rmsd_to_references(traj, refs=[0, 5, 10], mask='@CA')
+    >>> data.shape
+    (101, 3)
+    >>> # assign each frame to its closest reference
+    >>> labels = data.argmin(axis=1)
+    >>> data = pt.pmap(pt.rmsd_to_references, traj, refs=[0, 5, 10], mask='@CA', n_cores=2)
+    >>> data['rmsd'].shape
+    (101, 3)
+
+    See also
+    --------
+    rmsd, pairwise_rmsd, pytraj.math.superposition.rmsd_to_references_xyz
+    '''
+    top_ = get_topology(traj, top)
+    refs_xyz, ref_top = _references_xyz(traj, refs, top_)
+
+    indices = _atom_indices(top_, mask)
+    ref_indices = _atom_indices(ref_top, mask if ref_mask is None else
+                                ref_mask)
+    weights = None
+    if mass:
+        weights = top_.mass if indices is None else top_.mass[indices]
+    n_sel = top_.n_atoms if indices is None else len(indices)
+    references = _make_references(refs_xyz, ref_indices, n_sel, weights, fit)
+    chunksize = _pair_chunksize(chunksize, references.n_refs)
+
+    if isinstance(traj, Trajectory) and traj.xyz is not None:
+        xyz = traj.xyz
+        if frame_indices is not None:
+            xyz = xyz[np.asarray(frame_indices, dtype='i8')]
+        blocks = (xyz[start:start + chunksize]
+                  for start in range(0, len(xyz), chunksize))
+        data = [
+            references.rmsd(block if indices is None else block[:, indices])
+            for block in blocks
+        ]
+    else:
+        data = []
+        block = np.empty((chunksize, n_sel, 3), dtype='f8')
+        n = 0
+        for frame in get_fiterator(traj, frame_indices):
+            block[n] = frame.xyz if indices is None else frame.xyz[indices]
+            n += 1
+            if n == chunksize:
+                data.append(references.rmsd(block))
+                n = 0
+        if n > 0:
+            data.append(references.rmsd(block[:n]))
+
+    data = (np.concatenate(data) if data else
+            np.empty((0, references.n_refs), dtype='f8'))
+    dtype = dtype.lower()
+    if dtype == 'ndarray':
+        return data
+    elif dtype == 'dict':
+        return OrderedDict(rmsd=data)
+    raise ValueError("dtype must be 'ndarray' or 'dict'")
+
+
 @super_dispatch()
 def symmrmsd(traj,
              mask='',
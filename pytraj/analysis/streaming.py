@@ -0,0 +1,605 @@
+"""online (streaming) statistics of per-frame analysis outputs
+
+A StreamState is updated with blocks of per-frame values and only keeps summaries (mean,
+variance, block averages, histogram, quantile sketch, autocorrelation up to a max lag),
+so long trajectories can be summarized without storing per-frame series. States of
+consecutive parts of a trajectory are merged exactly (``state0 + state1``).
+
+Examples
+--------
+>>> import pytraj as pt
+>>> traj = pt.datafiles.load_tz2_ortho()
+>>> state = pt.stream_stats(pt.radgyr, traj, '@CA', block_size=5, max_lag=3, chunksize=4)
+>>> state.n_frames
+10
+>>> state.block_means().shape
+(2,)
+>>> state.acf().shape
+(4,)
+"""
+from __future__ import absolute_import, division
+import copy
+from collections import OrderedDict
+import numpy as np
+
+from .base_state import _StateMixin
+from ..utils.check_and_assert import _accept_dtype
+
+__all__ = ['StreamState', 'stream_stats']
+
+
+def _last(values, n):
+    # last n rows (all rows if fewer)
+    return values[max(0, len(values) - n):]
+
+
+class _RunningStats(object):
+    '''count, mean, sum of squared deviations, min and max (pairwise update of Chan et
+    al., so blocks and states are combined without loss of precision)
+    '''
+
+    def __init__(self):
+        self.n = 0
+        self.mean = self.m2 = self.min = self.max = None
+
+    def _combine(self, n, mean, m2, min_, max_):
+        if self.n == 0:
+            self.n, self.mean, self.m2 = n, mean, m2
+            self.min, self.max = min_, max_
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self.m2 = self.m2 + m2 + delta**2 * (self.n * n / total)
+        self.min = np.minimum(self.min, min_)
+        self.max = np.maximum(self.max, max_)
+        self.n = total
+
+    def update(self, values, frame_indices):
+        mean = values.mean(axis=0)
+        self._combine(
+            len(values), mean, ((values - mean)**2).sum(axis=0),
+            values.min(axis=0), values.max(axis=0))
+
+    def merge(self, other):
+        if other.n > 0:
+            self._combine(other.n, other.mean, other.m2, other.min, other.max)
+
+
+class _BlockStats(object):
+    '''sums of values in blocks of ``block_size`` consecutive frames. Blocks are assigned
+    by frame index, so states of any parts of a trajectory are merged exactly.
+    '''
+
+    def __init__(self, block_size):
+        self.block_size = int(block_size)
+        if self.block_size < 1:
+            raise ValueError('block_size must be >= 1')
+        self.first = 0
+        self.sums = None
+        self.counts = np.zeros(0, dtype='i8')
+
+    def _add(self, first, sums, counts):
+        if self.sums is None:
+            self.first, self.sums, self.counts = first, sums, counts
+            return
+        new_first = min(self.first, first)
+        n_blocks = max(self.first + len(self.counts),
+                       first + len(counts)) - new_first
+        new_sums = np.zeros((n_blocks, ) + sums.shape[1:])
+        new_counts = np.zeros(n_blocks, dtype='i8')
+        for start, s, c in [(self.first, self.sums, self.counts),
+                            (first, sums, counts)]:
+            start -= new_first
+            new_sums[start:start + len(c)] += s
+            new_counts[start:start + len(c)] += c
+        self.first, self.sums, self.counts = new_first, new_sums, new_counts
+
+    def update(self, values, frame_indices):
+        block_ids = frame_indices // self.block_size
+        first = block_ids.min()
+        block_ids = block_ids - first
+        n_blocks = block_ids.max() + 1
+        sums = np.zeros((n_blocks, values.shape[1]))
+        np.add.at(sums, block_ids, values)
+        self._add(first, sums,
+                  np.bincount(block_ids, minlength=n_blocks).astype('i8'))
+
+    def merge(self, other):
+        if other.sums is not None:
+            self._add(other.first, other.sums, other.counts)
+
+    def means(self, complete=True):
+        if self.sums is None:
+            return np.zeros((0, 0))
+        mask = (self.counts == self.block_size) if complete else (self.counts
+                                                                  > 0)
+        return self.sums[mask] / self.counts[mask][:, None]
+
+
+class _Histogram(object):
+    '''counts in ``bins`` equal bins over ``hist_range`` (last edge included, as
+    numpy.histogram), plus counts of values below and above the range
+    '''
+
+    def __init__(self, bins, hist_range):
+        self.edges = np.linspace(hist_range[0], hist_range[1], int(bins) + 1)
+        self.counts = None
+        self.underflow = self.overflow = 0
+
+    def update(self, values, frame_indices):
+        n_bins, n_series = len(self.edges) - 1, values.shape[1]
+        lo, hi = self.edges[0], self.edges[-1]
+        indices = np.floor((values - lo) * (n_bins / (hi - lo))).astype('i8')
+        indices[values == hi] = n_bins - 1
+        inside = (values >= lo) & (values <= hi)
+        series = np.broadcast_to(np.arange(n_series), values.shape)
+        counts = np.bincount(
+            indices[inside] * n_series + series[inside],
+            minlength=n_bins * n_series).reshape(n_bins, n_series)
+        self.counts = counts if self.counts is None else self.counts + counts
+        self.underflow = self.underflow + (values < lo).sum(axis=0)
+        self.overflow = self.overflow + (values > hi).sum(axis=0)
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError('histograms must have the same bins')
+        if other.counts is not None:
+            self.counts = (other.counts if self.counts is None else
+                           self.counts + other.counts)
+        self.underflow = self.underflow + other.underflow
+        self.overflow = self.overflow + other.overflow
+
+
+class _QuantileSketch(object):
+    '''mergeable quantile sketch: level ``j`` keeps values that each stand for 2**j
+    frames. A level larger than ``capacity`` is sorted and every other value is promoted
+    to the next level, so memory grows with log(n_frames).
+    '''
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        if self.capacity < 2:
+            raise ValueError('quantile capacity must be >= 2')
+        self.levels = []
+        self._offsets = []
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            values = self.levels[level]
+            if len(values) > self.capacity:
+                values = np.sort(values, axis=0)
+                n_even = len(values) - len(values) % 2
+                # alternate between odd and even ranks to avoid a bias
+                offset = self._offsets[level]
+                self._offsets[level] = 1 - offset
+                promoted = values[offset:n_even:2]
+                self.levels[level] = values[n_even:]
+                if level + 1 == len(self.levels):
+                    self.levels.append(promoted)
+                    self._offsets.append(0)
+                else:
+                    self.levels[level + 1] = np.concatenate(
+                        (self.levels[level + 1], promoted))
+            level += 1
+
+    def _extend(self, levels):
+        for level, values in enumerate(levels):
+            if level == len(self.levels):
+                self.levels.append(values)
+                self._offsets.append(0)
+            else:
+                self.levels[level] = np.concatenate((self.levels[level],
+                                                     values))
+        self._compact()
+
+    def update(self, values, frame_indices):
+        self._extend([values])
+
+    def merge(self, other):
+        self._extend(other.levels)
+
+    def quantile(self, q):
+        q = np.atleast_1d(np.asarray(q, dtype='f8'))
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(values), 2.**level)
+            for level, values in enumerate(self.levels)
+        ])
+        order = np.argsort(values, axis=0)
+        values = np.take_along_axis(values, order, axis=0)
+        weights = weights[order]
+        # each value sits in the middle of the ranks it stands for (same as
+        # numpy.percentile with linear interpolation if all weights are 1)
+        ranks = np.cumsum(weights, axis=0) - 0.5 * weights - 0.5
+        targets = q * (weights[:, 0].sum() - 1)
+        return np.array([
+            np.interp(targets, ranks[:, i], values[:, i])
+            for i in range(values.shape[1])
+        ]).T
+
+
+class _Autocorr(object):
+    '''lagged product sums for lags 0..max_lag, plus the first and last ``max_lag``
+    values so that the mean can be removed at the end and consecutive states can be
+    merged exactly
+    '''
+
+    def __init__(self, max_lag):
+        self.max_lag = int(max_lag)
+        if self.max_lag < 0:
+            raise ValueError('max_lag must be >= 0')
+        self.n = 0
+        self.total = self.lagsums = self.head = self.tail = None
+
+    def _add_products(self, previous, values, only_cross=False):
+        # add x[t] * x[t - lag] for t in values and t - lag in (previous, values)
+        ext = np.concatenate((previous, values))
+        t0 = len(previous)
+        for lag in range(self.max_lag + 1):
+            start = max(t0, lag)
+            stop = min(len(ext), t0 + lag) if only_cross else len(ext)
+            if start < stop:
+                self.lagsums[lag] += np.einsum(
+                    'ij,ij->j', ext[start:stop], ext[start - lag:stop - lag])
+
+    def update(self, values, frame_indices):
+        if self.lagsums is None:
+            n_series = values.shape[1]
+            self.total = np.zeros(n_series)
+            self.lagsums = np.zeros((self.max_lag + 1, n_series))
+            self.head = self.tail = np.zeros((0, n_series))
+        self._add_products(self.tail, values)
+        self.n += len(values)
+        self.total = self.total + values.sum(axis=0)
+        self.head = np.concatenate((self.head, values))[:self.max_lag]
+        self.tail = _last(np.concatenate((self.tail, values)), self.max_lag)
+
+    def merge(self, other):
+        # ``other`` follows this state in time
+        if other.lagsums is None:
+            return
+        if self.lagsums is None:
+            self.__dict__.update(copy.deepcopy(other.__dict__))
+            return
+        self._add_products(self.tail, other.head, only_cross=True)
+        self.lagsums = self.lagsums + other.lagsums
+        self.n += other.n
+        self.total = self.total + other.total
+        self.head = np.concatenate((self.head, other.head))[:self.max_lag]
+        self.tail = _last(
+            np.concatenate((self.tail, other.tail)), self.max_lag)
+
+    def autocovariance(self):
+        mean = self.total / self.n
+        out = np.full(self.lagsums.shape, np.nan)
+        for lag in range(min(self.max_lag, self.n - 1) + 1):
+            n_pairs = self.n - lag
+            # sums of x[t] over t >= lag and over t < n - lag
+            later = self.total - self.head[:lag].sum(axis=0)
+            earlier = self.total - self.tail[len(self.tail) - lag:].sum(axis=0)
+            out[lag] = (self.lagsums[lag] - mean * (later + earlier) +
+                        n_pairs * mean**2) / n_pairs
+        return out
+
+
+class StreamState(_StateMixin):
+    '''online statistics of a series of per-frame values
+
+    Parameters
+    ----------
+    block_size : {None, int}, default None
+        if given, keep averages of blocks of ``block_size`` frames (by frame index)
+    bins : {None, int}, default None
+        if given, keep a histogram with ``bins`` bins over ``hist_range``
+    hist_range : {None, (float, float)}, default None
+        required if ``bins`` is given
+    max_lag : {None, int}, default None
+        if given, keep the autocorrelation function up to ``max_lag`` frames
+    quantile_capacity : {None, int}, default 1024
+        number of values per level of the quantile sketch. Larger is more accurate. Use
+        None to not keep quantiles
+
+    Notes
+    -----
+    - values of a frame can be a scalar or an array (e.g. several distances); all
+      results have the same trailing shape.
+    - merging is exact for all statistics; for the autocorrelation, ``other`` must hold
+      the frames right after the frames of this state.
+    - quantiles are approximate (rank error of order log2(n_frames / capacity) /
+      capacity in the worst case).
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pytraj.analysis.streaming import StreamState
+    >>> state = StreamState(block_size=2, bins=4, hist_range=(0, 8))
+    >>> state = state.update(np.arange(4.)).update(np.arange(4., 8.))
+    >>> state.mean.tolist(), state.n_frames
+    (3.5, 8)
+    >>> state.block_means().tolist()
+    [0.5, 2.5, 4.5, 6.5]
+    >>> state.histogram()[0].tolist()
+    [2, 2, 2, 2]
+    >>> float(state.quantile(0.5))
+    3.5
+    '''
+
+    def __init__(self,
+                 block_size=None,
+                 bins=None,
+                 hist_range=None,
+                 max_lag=None,
+                 quantile_capacity=1024):
+        if bins is not None and hist_range is None:
+            raise ValueError('must provide hist_range if bins is given')
+        self.shape = None
+        self.next_index = 0
+        self._stats = _RunningStats()
+        self._blocks = _BlockStats(
+            block_size) if block_size is not None else None
+        self._histogram = _Histogram(
+            bins, hist_range) if bins is not None else None
+        self._quantiles = _QuantileSketch(
+            quantile_capacity) if quantile_capacity is not None else None
+        self._autocorr = _Autocorr(max_lag) if max_lag is not None else None
+
+    def __repr__(self):
+        return '<StreamState: n_frames={}, shape={}>'.format(self.n_frames,
+                                                             self.shape)
+
+    @property
+    def _accumulators(self):
+        return [
+            acc
+            for acc in (self._stats, self._blocks, self._histogram,
+                        self._quantiles, self._autocorr) if acc is not None
+        ]
+
+    def _reshape(self, values):
+        values = np.asarray(values)
+        return values.reshape(values.shape[:-1] + self.shape)
+
+    def update(self, values, frame_indices=None):
+        '''add values of new frames (in place)
+
+        Parameters
+        ----------
+        values : array-like, shape=(n_frames, ...)
+            frames along the first axis
+        frame_indices : {None, 1D array-like}, default None
+            frame indices of ``values`` (used for block averages). If None, frames follow
+            the last updated frame
+
+        Returns
+        -------
+        self
+        '''
+        values = np.asarray(values, dtype='f8')
+        if values.ndim == 0:
+            values = values.reshape(1)
+        if self.shape is None:
+            self.shape = values.shape[1:]
+        elif values.shape[1:] != self.shape:
+            raise ValueError('values of a frame must have shape {}'.format(
+                self.shape))
+        if len(values) == 0:
+            return self
+        if frame_indices is None:
+            frame_indices = np.arange(self.next_index,
+                                      self.next_index + len(values))
+        frame_indices = np.asarray(frame_indices, dtype='i8')
+        if len(frame_indices) != len(values):
+            raise ValueError('len(frame_indices) must be equal to n_frames')
+
+        block = values.reshape(len(values), -1)
+        for acc in self._accumulators:
+            acc.update(block, frame_indices)
+        self.next_index = int(frame_indices[-1]) + 1
+        return self
+
+    def merge(self, other):
+        '''return a new state of frames of ``self`` followed by frames of ``other``
+        '''
+        if len(self._accumulators) != len(other._accumulators):
+            raise ValueError('states must keep the same statistics')
+        if None not in (self.shape, other.shape) and self.shape != other.shape:
+            raise ValueError('values of states must have the same shape')
+        new = copy.deepcopy(self)
+        for acc, other_acc in zip(new._accumulators, other._accumulators):
+            if type(acc) is not type(other_acc):
+                raise ValueError('states must keep the same statistics')
+            acc.merge(other_acc)
+        if new.shape is None:
+            new.shape = other.shape
+        new.next_index = max(self.next_index, other.next_index)
+        return new
+
+    @property
+    def n_frames(self):
+        return self._stats.n
+
+    @property
+    def mean(self):
+        return self._reshape(self._stats.mean)
+
+    @property
+    def var(self):
+        '''variance (ddof=0, same as numpy.var)'''
+        return self._reshape(self._stats.m2 / self._stats.n)
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    @property
+    def std_error(self):
+        '''standard error of the mean, assuming independent frames (see also
+        ``block_std_error``)
+        '''
+        n = self._stats.n
+        return self._reshape(np.sqrt(self._stats.m2 / (n - 1) / n))
+
+    @property
+    def min(self):
+        return self._reshape(self._stats.min)
+
+    @property
+    def max(self):
+        return self._reshape(self._stats.max)
+
+    @property
+    def values(self):
+        return self.mean
+
+    def _require(self, acc, name):
+        if acc is None:
+            raise ValueError('{} was not requested for this state'.format(
+                name))
+        return acc
+
+    def block_means(self, complete=True):
+        '''averages of blocks, shape=(n_blocks, ...)
+
+        Parameters
+        ----------
+        complete : bool, default True
+            if True, only use blocks having ``block_size`` frames
+        '''
+        return self._reshape(
+            self._require(self._blocks, 'block_size').means(complete))
+
+    def block_std_error(self):
+        '''standard error of the mean from the scatter of complete block averages, which
+        accounts for correlation shorter than a block
+        '''
+        means = self._require(self._blocks, 'block_size').means()
+        return self._reshape(
+            np.std(means, axis=0, ddof=1) / np.sqrt(len(means)))
+
+    def histogram(self, density=False):
+        '''return (counts, edges). counts has shape=(n_bins, ...); values outside of
+        ``hist_range`` are not counted (see ``to_dict``)
+        '''
+        hist = self._require(self._histogram, 'bins')
+        counts = self._reshape(hist.counts)
+        if density:
+            counts = counts / (np.diff(hist.edges).reshape(
+                (-1, ) + (1, ) * len(self.shape)) * self.n_frames)
+        return counts, hist.edges
+
+    def quantile(self, q):
+        '''approximate quantiles, q in [0, 1]. Returns shape=q.shape + value shape'''
+        out = self._require(self._quantiles,
+                            'quantile_capacity').quantile(q)
+        return self._reshape(out.reshape(np.shape(q) + (-1, )))
+
+    def acf(self, normalize=True):
+        '''autocorrelation function for lags 0..max_lag, shape=(max_lag + 1, ...)
+
+        The mean of all frames is removed and products at each lag are averaged over
+        their n_frames - lag pairs. If normalize is True, divide by the value at lag 0.
+        '''
+        cov = self._require(self._autocorr, 'max_lag').autocovariance()
+        if normalize:
+            cov = cov / cov[0]
+        return self._reshape(cov)
+
+    def to_dict(self):
+        out = OrderedDict()
+        out['n_frames'] = self.n_frames
+        for key in ['mean', 'std', 'min', 'max']:
+            out[key] = getattr(self, key)
+        if self._blocks is not None:
+            out['block_means'] = self.block_means()
+        if self._histogram is not None:
+            out['hist_counts'], out['hist_edges'] = self.histogram()
+            out['hist_underflow'] = self._reshape(self._histogram.underflow)
+            out['hist_overflow'] = self._reshape(self._histogram.overflow)
+        if self._quantiles is not None:
+            out['quartiles'] = self.quantile([0.25, 0.5, 0.75])
+        if self._autocorr is not None:
+            out['acf'] = self.acf()
+        return out
+
+
+def stream_stats(func, traj, *args, **kwargs):
+    '''run a per-frame analysis over chunks of frames and only keep online statistics of
+    its output (no per-frame series are stored)
+
+    Parameters
+    ----------
+    func : a pytraj function that supports ``frame_indices`` and returns one value per
+        frame (e.g pytraj.distance, pytraj.radgyr, pytraj.rmsd, pytraj.dihedral)
+    traj : Trajectory-like that supports ``frame_indices``
+    *args, **kwargs : additional arguments for ``func``
+    frame_indices : {None, 1D array-like}, default None
+    chunksize : int, default 1000
+        number of frames given to ``func`` at once
+    frame_axis : int, default -1
+        axis of frames in func's output
+    extract : {None, callable}, default None
+        function to convert func's output to an ndarray
+    block_size, bins, hist_range, max_lag, quantile_capacity :
+        see :class:`StreamState`
+    state : {None, StreamState}, default None
+        if given, update this state (e.g. with new frames of a running simulation)
+        instead of creating a new one. If ``frame_indices`` is None, only frames from
+        ``state.next_index`` to the end are added
+
+    Returns
+    -------
+    StreamState
+
+    Notes
+    -----
+    Only analyses whose value for a frame does not depend on other frames are supported
+    (e.g not rmsd with ref='previous'). States of different parts of a trajectory can be
+    merged with ``+``.
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> traj = pt.datafiles.load_tz2_ortho()
+    >>> state = pt.stream_stats(pt.distance, traj, [':1@CA :3@CA', ':2@CA :5@CA'],
+    ...                         bins=20, hist_range=(0., 20.))
+    >>> state.mean.shape, state.histogram()[0].shape
+    ((2,), (20, 2))
+    >>> # summary of the second half, merged
+    >>> s0 = pt.stream_stats(pt.radgyr, traj, frame_indices=range(5))
+    >>> s1 = pt.stream_stats(pt.radgyr, traj, frame_indices=range(5, 10))
+    >>> (s0 + s1).n_frames
+    10
+    '''
+    frame_indices = kwargs.pop('frame_indices', None)
+    chunksize = int(kwargs.pop('chunksize', 1000))
+    frame_axis = kwargs.pop('frame_axis', -1)
+    extract = kwargs.pop('extract', None)
+    state = kwargs.pop('state', None)
+    state_kwargs = {}
+    for key in [
+            'block_size', 'bins', 'hist_range', 'max_lag', 'quantile_capacity'
+    ]:
+        if key in kwargs:
+            state_kwargs[key] = kwargs.pop(key)
+    if state is None:
+        state = StreamState(**state_kwargs)
+    elif state_kwargs:
+        raise ValueError('can not change the statistics of an existing state')
+    if chunksize < 1:
+        raise ValueError('chunksize must be >= 1')
+    if 'dtype' not in kwargs and _accept_dtype(func):
+        kwargs['dtype'] = 'ndarray'
+
+    if frame_indices is None:
+        # resume after the frames already in state
+        frame_indices = np.arange(state.next_index, traj.n_frames)
+    frame_indices = np.asarray(frame_indices, dtype='i8')
+    for start in range(0, len(frame_indices), chunksize):
+        chunk = frame_indices[start:start + chunksize]
+        out = func(traj, *args, frame_indices=chunk, **kwargs)
+        if extract is not None:
+            out = extract(out)
+        state.update(np.moveaxis(np.asarray(out), frame_axis, 0), chunk)
+    return state
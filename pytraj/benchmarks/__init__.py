@@ -0,0 +1,27 @@
+"""benchmark suite for pytraj
+
+Run all benchmarks and compare to a stored baseline::
+
+    $ python -m pytraj.benchmarks --output results.json --baseline baseline.json
+"""
+from __future__ import absolute_import
+
+from .runner import benchmark
+from .runner import run_benchmarks
+from .runner import compare_results
+from .runner import save_results
+from .runner import load_results
+from .runner import BENCHMARKS
+from .synthetic import make_synthetic_trajectory
+from .importtime import measure_import_time
+
+__all__ = [
+    'benchmark',
+    'run_benchmarks',
+    'compare_results',
+    'save_results',
+    'load_results',
+    'make_synthetic_trajectory',
+    'measure_import_time',
+    'BENCHMARKS',
+]
@@ -0,0 +1,76 @@
+"""python -m pytraj.benchmarks --help
+"""
+from __future__ import absolute_import, print_function
+import sys
+import argparse
+from importlib import import_module
+
+from .runner import (run_benchmarks, compare_results, save_results,
+                     load_results, BENCHMARKS)
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pytraj.benchmarks',
+        description='run pytraj benchmarks and check for regressions')
+    parser.add_argument(
+        'names',
+        nargs='*',
+        help='benchmarks to run (default: all). Use --list to see them')
+    parser.add_argument(
+        '--list', action='store_true', help='list available benchmarks')
+    parser.add_argument(
+        '--data',
+        default='tz2',
+        help='bundled data for synthetic trajectory (default: tz2)')
+    parser.add_argument(
+        '--scale',
+        type=int,
+        default=10,
+        help='number of copies of bundled data (default: 10)')
+    parser.add_argument(
+        '--repeat', type=int, default=3, help='number of runs (default: 3)')
+    parser.add_argument('-o', '--output', help='save results to JSON file')
+    parser.add_argument('-b', '--baseline', help='baseline JSON file')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='allowed slowdown compared to baseline (default: 0.2)')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    opt = parse_args(args)
+
+    if opt.list:
+        # register built-in benchmarks
+        import_module('.suite', __package__)
+        for name in BENCHMARKS:
+            print(name)
+        return 0
+
+    results = run_benchmarks(
+        opt.names or None,
+        data=opt.data,
+        scale=opt.scale,
+        repeat=opt.repeat)
+
+    if opt.output:
+        save_results(results, opt.output)
+
+    if opt.baseline:
+        report = compare_results(
+            results, load_results(opt.baseline), tolerance=opt.tolerance)
+        regressions = [name for name, val in report.items() if val['regression']]
+        print('')
+        for name, val in report.items():
+            print('{:<25s} {:>8.2f}x {}'.format(
+                name, val['ratio'], 'REGRESSION' if val['regression'] else ''))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
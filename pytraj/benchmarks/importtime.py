@@ -0,0 +1,73 @@
+"""measure ``import pytraj`` time with ``python -X importtime``
+"""
+from __future__ import absolute_import
+import sys
+import subprocess
+from collections import OrderedDict
+
+__all__ = ['measure_import_time', 'LAZY_MODULES']
+
+# must not be imported by ``import pytraj``, see pytraj/__init__.py
+LAZY_MODULES = [
+    'pytraj.all_actions',
+    'pytraj.cluster',
+    'pytraj.parallel',
+    'pytraj.visualization',
+    'pytraj.analysis.nmr',
+    'pytraj.analysis.matrix',
+    'pytraj.analysis.vector',
+    'pytraj.analysis.dihedral_analysis',
+    'pytraj.analysis.energy_analysis',
+    'pytraj.analysis.c_analysis.c_analysis',
+]
+
+
+def measure_import_time(module='pytraj', python=None):
+    '''run ``python -X importtime -c "import module"`` in a new process
+
+    Parameters
+    ----------
+    module : str, default 'pytraj'
+    python : {None, str}, default None (sys.executable)
+
+    Returns
+    -------
+    OrderedDict[name, (self_us, cumulative_us)], in import order.
+    The total time is result[module][1]
+
+    Requires
+    --------
+    python >= 3.7
+
+    Examples
+    --------
+    >>> from pytraj.benchmarks.importtime import measure_import_time
+    >>> times = measure_import_time('pytraj') # doctest: +SKIP
+    >>> times['pytraj'][1] # cumulative time in microseconds # doctest: +SKIP
+    '''
+    if sys.version_info < (3, 7):
+        raise RuntimeError('-X importtime requires python >= 3.7')
+    cmd = [python or sys.executable, '-X', 'importtime', '-c',
+           'import ' + module]
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    _, err = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError('can not import {}\n{}'.format(module, err))
+
+    times = OrderedDict()
+    for line in err.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # header
+            continue
+        times[fields[2].strip()] = (self_us, cumulative_us)
+    return times
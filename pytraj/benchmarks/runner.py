@@ -0,0 +1,249 @@
+"""registry, runner and regression check for pytraj benchmarks
+"""
+from __future__ import absolute_import, print_function
+import json
+import time
+import shutil
+import tempfile
+import platform
+from collections import OrderedDict
+
+__all__ = [
+    'benchmark',
+    'run_benchmarks',
+    'compare_results',
+    'save_results',
+    'load_results',
+    'BENCHMARKS',
+]
+
+# name -> function(traj) -> int (number of processed frames)
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    '''register a benchmark. The function takes a TrajectoryIterator and returns the
+    number of processed frames (used to compute frames/s)
+    '''
+
+    def inner(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return inner
+
+
+def _max_rss_mb():
+    '''peak resident memory (MB) of this process
+    '''
+    try:
+        # linux: peak of this process image only. ru_maxrss survives exec, so a new
+        # process would report the peak of its parent
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.
+    except (IOError, OSError):
+        pass
+    import sys
+    import resource
+    # kilobytes on linux, bytes on macos
+    unit = 1024.**2 if sys.platform == 'darwin' else 1024.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+
+
+def _measure_rss(func, traj, folder):
+    # run in a new process by _peak_rss_mb
+    from . import suite
+
+    suite.set_output_folder(folder)
+    before = _max_rss_mb()
+    func(traj)
+    return max(_max_rss_mb() - before, 0.)
+
+
+def _peak_rss_mb(func, traj, folder):
+    '''peak resident memory (MB) added by one call of ``func(traj)``, measured in a new
+    process (the peak is per process). Memory allocated by cpptraj (C++) is counted.
+    None if the ``resource`` module is not available (Windows).
+    '''
+    import multiprocessing
+    from pytraj.utils.check_and_assert import has_
+
+    if not has_('resource'):
+        return None
+
+    try:
+        # a forked process starts with the memory (and the peak) of its parent
+        Pool = multiprocessing.get_context('spawn').Pool
+    except AttributeError:
+        # python 2
+        Pool = multiprocessing.Pool
+    pool = Pool(1)
+    try:
+        return pool.apply(_measure_rss, (func, traj, folder))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _metadata():
+    import pytraj as pt
+    return OrderedDict([
+        ('pytraj_version', pt.__version__),
+        ('cpptraj_version', pt.__cpptraj_version__),
+        ('compiled_info', pt.compiled_info()),
+        ('python_version', platform.python_version()),
+        ('platform', platform.platform()),
+        ('date', time.strftime('%Y-%m-%d %H:%M:%S')),
+    ])
+
+
+def _run_one(func, traj, repeat=3, memory=True, folder=None):
+    '''return best wall time of ``repeat`` runs and other measurements. If ``memory``,
+    run once more in a new process to measure the peak memory of this benchmark only
+    '''
+    times = []
+    n_frames = None
+    for _ in range(repeat):
+        t0 = time.time()
+        n_frames = func(traj)
+        times.append(time.time() - t0)
+
+    wall_time = min(times)
+    result = OrderedDict()
+    result['wall_time'] = wall_time
+    result['mean_wall_time'] = sum(times) / len(times)
+    result['n_frames'] = n_frames
+    result['frames_per_second'] = (n_frames / wall_time
+                                   if n_frames and wall_time > 0 else None)
+    result['peak_memory_mb'] = (_peak_rss_mb(func, traj, folder)
+                                if memory else None)
+    return result
+
+
+def run_benchmarks(names=None,
+                   data='tz2',
+                   scale=10,
+                   repeat=3,
+                   folder=None,
+                   memory=True,
+                   verbose=True):
+    '''run registered benchmarks
+
+    Parameters
+    ----------
+    names : {None, list of str}, default None (all benchmarks)
+    data : str, default 'tz2'
+        name of bundled data to build synthetic trajectory
+    scale : int, default 10
+        synthetic trajectory has scale times the frames of bundled data
+    repeat : int, default 3
+        take the best wall time of ``repeat`` runs
+    folder : {None, str}
+        folder for synthetic trajectory and temporary output. If None, use a temporary
+        folder, removed at the end
+    memory : bool, default True
+        measure peak resident memory (``peak_memory_mb``, including memory allocated
+        by cpptraj) of each benchmark in an extra, untimed run in a new process
+        (not on Windows)
+    verbose : bool, default True
+
+    Returns
+    -------
+    results : OrderedDict with 'metadata' and 'results' keys
+
+    Examples
+    --------
+    >>> from pytraj.benchmarks import run_benchmarks
+    >>> results = run_benchmarks(['iterframe'], scale=1, repeat=1, verbose=False)
+    '''
+    from .synthetic import make_synthetic_trajectory
+    # register built-in benchmarks
+    from . import suite
+
+    if names is None:
+        names = list(BENCHMARKS.keys())
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError('unknown benchmark(s) {}. Available: {}'.format(
+            unknown, list(BENCHMARKS.keys())))
+
+    own_folder = folder is None
+    if own_folder:
+        folder = tempfile.mkdtemp(prefix='pytraj_benchmark_')
+    try:
+        traj = make_synthetic_trajectory(data, scale=scale, folder=folder)
+        suite.set_output_folder(folder)
+
+        results = OrderedDict()
+        for name in names:
+            result = _run_one(BENCHMARKS[name], traj, repeat=repeat, memory=memory,
+                              folder=folder)
+            results[name] = result
+            if verbose:
+                print('{:<25s} {:>10.4f} s {:>12s} frames/s'.format(
+                    name, result['wall_time'], '%.1f' % result['frames_per_second']
+                    if result['frames_per_second'] else '-'))
+
+        metadata = _metadata()
+        metadata['data'] = data
+        metadata['scale'] = scale
+        metadata['n_frames'] = traj.n_frames
+        metadata['n_atoms'] = traj.n_atoms
+        metadata['repeat'] = repeat
+        del traj
+    finally:
+        if own_folder:
+            shutil.rmtree(folder, ignore_errors=True)
+    return OrderedDict([('metadata', metadata), ('results', results)])
+
+
+def save_results(results, filename):
+    with open(filename, 'w') as fh:
+        json.dump(results, fh, indent=2)
+
+
+def load_results(filename):
+    with open(filename) as fh:
+        return json.load(fh, object_pairs_hook=OrderedDict)
+
+
+def compare_results(results, baseline, tolerance=0.2):
+    '''compare wall times to a baseline
+
+    Parameters
+    ----------
+    results, baseline : dict (output of run_benchmarks or load_results)
+    tolerance : float, default 0.2
+        a benchmark is a regression if its wall time is larger than
+        (1 + tolerance) * baseline's wall time
+
+    Returns
+    -------
+    report : OrderedDict[name, dict]
+        each value has 'baseline', 'current', 'ratio' and 'regression' keys.
+        Benchmarks that are not in baseline are skipped.
+
+    Examples
+    --------
+    >>> baseline = {'results': {'rmsd': {'wall_time': 1.0}}}
+    >>> results = {'results': {'rmsd': {'wall_time': 1.5}}}
+    >>> compare_results(results, baseline)['rmsd']['regression']
+    True
+    '''
+    report = OrderedDict()
+    base_results = baseline.get('results', baseline)
+    for name, result in results.get('results', results).items():
+        if name not in base_results:
+            continue
+        old = base_results[name]['wall_time']
+        new = result['wall_time']
+        ratio = new / old if old > 0 else float('inf')
+        report[name] = OrderedDict([
+            ('baseline', old),
+            ('current', new),
+            ('ratio', ratio),
+            ('regression', ratio > 1. + tolerance),
+        ])
+    return report
@@ -0,0 +1,98 @@
+"""built-in benchmarks. Each benchmark returns the number of processed frames
+(None if it does not process frames).
+"""
+from __future__ import absolute_import
+import os
+import sys
+import tempfile
+import subprocess
+
+import pytraj as pt
+from .runner import benchmark
+
+_output_folder = {'path': tempfile.gettempdir()}
+
+
+def set_output_folder(folder):
+    _output_folder['path'] = folder
+
+
+def _output(name):
+    return os.path.join(_output_folder['path'], name)
+
+
+@benchmark('iterframe')
+def bench_iterframe(traj):
+    for _ in traj:
+        pass
+    return traj.n_frames
+
+
+@benchmark('iterframe_mask')
+def bench_iterframe_mask(traj):
+    for _ in traj.iterframe(mask='@CA'):
+        pass
+    return traj.n_frames
+
+
+@benchmark('iterchunk')
+def bench_iterchunk(traj):
+    for _ in traj.iterchunk(chunksize=100):
+        pass
+    return traj.n_frames
+
+
+@benchmark('get_coordinates')
+def bench_get_coordinates(traj):
+    pt.get_coordinates(traj, mask='!:WAT')
+    return traj.n_frames
+
+
+@benchmark('rmsd')
+def bench_rmsd(traj):
+    pt.rmsd(traj, mask='@CA', ref=0)
+    return traj.n_frames
+
+
+@benchmark('rmsd_in_memory')
+def bench_rmsd_in_memory(traj):
+    t0 = traj['@CA,C,N,O']
+    pt.rmsd(t0, mask='@CA', ref=0)
+    return traj.n_frames
+
+
+@benchmark('pairwise_rmsd')
+def bench_pairwise_rmsd(traj):
+    # O(n_frames^2): use at most 200 frames
+    n_frames = min(traj.n_frames, 200)
+    pt.pairwise_rmsd(traj(stop=n_frames), mask='@CA')
+    return n_frames
+
+
+@benchmark('radgyr')
+def bench_radgyr(traj):
+    pt.radgyr(traj, mask='@CA')
+    return traj.n_frames
+
+
+def _pmap(n_cores):
+    def func(traj):
+        pt.pmap(pt.rmsd, traj, mask='@CA', ref=traj[0], n_cores=n_cores)
+        return traj.n_frames
+
+    return func
+
+
+for _n_cores in (1, 2, 4):
+    benchmark('pmap_rmsd_{}cores'.format(_n_cores))(_pmap(_n_cores))
+
+
+@benchmark('write_traj')
+def bench_write_traj(traj):
+    pt.write_traj(_output('benchmark_write.nc'), traj, overwrite=True)
+    return traj.n_frames
+
+
+@benchmark('import_pytraj')
+def bench_import_pytraj(traj):
+    subprocess.check_call([sys.executable, '-c', 'import pytraj'])
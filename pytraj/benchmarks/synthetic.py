@@ -0,0 +1,73 @@
+"""build scaled-up trajectories from bundled sample data
+"""
+from __future__ import absolute_import
+import os
+import atexit
+import shutil
+import tempfile
+import numpy as np
+
+__all__ = ['make_synthetic_trajectory', 'SAMPLE_NAMES']
+
+SAMPLE_NAMES = ['tz2', 'tz2_dry', 'trpcage', 'dpdp']
+
+
+def make_synthetic_trajectory(name='tz2',
+                              scale=10,
+                              noise=0.05,
+                              seed=1,
+                              folder=None,
+                              overwrite=True):
+    '''write a NetCDF trajectory having ``scale`` times the frames of the bundled
+    sample ``name`` (each copy is perturbed by gaussian noise) and return a
+    TrajectoryIterator for it.
+
+    Parameters
+    ----------
+    name : str, {'tz2', 'tz2_dry', 'trpcage', 'dpdp'}
+        name of bundled data (see ``pytraj.load_sample_data``)
+    scale : int, default 10
+        the output has scale * n_frames frames
+    noise : float, default 0.05
+        standard deviation (Angstrom) of noise added to each copy
+    seed : int, default 1
+        random seed, so results are reproducible
+    folder : {None, str}, default None
+        output folder, owned by the caller. If None, use a new temporary folder, removed
+        when the Python process exits
+
+    Returns
+    -------
+    TrajectoryIterator
+
+    Examples
+    --------
+    >>> from pytraj.benchmarks import make_synthetic_trajectory
+    >>> traj = make_synthetic_trajectory('tz2', scale=2)
+    >>> traj.n_frames
+    20
+    '''
+    from pytraj import load_sample_data, TrajectoryIterator
+    from pytraj.trajectory.c_traj.c_trajout import TrajectoryWriter
+
+    if name not in SAMPLE_NAMES:
+        raise ValueError('name must be one of {}'.format(SAMPLE_NAMES))
+
+    if folder is None:
+        folder = tempfile.mkdtemp(prefix='pytraj_benchmark_')
+        atexit.register(shutil.rmtree, folder, True)
+    filename = os.path.join(folder, '{}_x{}.nc'.format(name, scale))
+
+    orig = load_sample_data(name)
+    top = orig.top
+
+    if overwrite or not os.path.exists(filename):
+        rng = np.random.RandomState(seed)
+        # write copy by copy to keep memory small
+        with TrajectoryWriter(filename, top=top) as writer:
+            for _ in range(scale):
+                for frame in orig:
+                    frame.xyz[:] += rng.normal(
+                        0., noise, size=(frame.n_atoms, 3))
+                    writer.write(frame)
+    return TrajectoryIterator(filename, top)
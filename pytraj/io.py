@@ -12,6 +12,10 @@ from .topology.topology import Topology, ParmFile
 from .trajectory.shared_methods import iterframe_master
 from .trajectory.trajectory import Trajectory
 from .trajectory.trajectory_iterator import TrajectoryIterator
+from .trajectory.remd_index import build_remd_index
+from .trajectory.compressed_trajectory import (
+    CompressedTrajectory, is_compressed_trajectory,
+    write_compressed_trajectory)
 from .trajectory.frameiter import iterframe
 from .trajectory.c_traj.c_trajout import TrajectoryWriter
 from .utils.decorators import ensure_exist
@@ -27,6 +31,7 @@ __all__ = [
     'iterload',
     'load_remd',
     'iterload_remd',
+    'build_remd_index',
     'load_pdb_rcsb',
     'load_sample_data',
     'load_parmed',
@@ -235,7 +240,17 @@ def load_traj(filename=None, top=None, *args, **kwd):
     -------
     TrajectoryIterator : if frame_indices is None
     Trajectory : if there is indices
+    CompressedTrajectory : if filename is a pytraj compressed trajectory (.ptz)
     """
+    if is_compressed_trajectory(filename):
+        if kwd.get('stride') is not None or kwd.get('frame_slice') is not None:
+            raise ValueError(
+                'stride and frame_slice are not supported for .ptz file, '
+                'use slicing instead')
+        if top is None:
+            raise ValueError('must provide Topology for .ptz file')
+        return CompressedTrajectory(
+            filename, top, n_threads=kwd.get('n_threads', 4))
     if isinstance(top, string_types):
         top = load_topology(top)
     if top is None or top.is_empty():
@@ -258,7 +273,7 @@ def _load_from_frame_iter(iterable, top=None):
     return Trajectory.from_iterable(iterable, top)
 
 
-def iterload_remd(filename, top=None, T="300.0"):
+def iterload_remd(filename, top=None, T="300.0", index=None):
     """Load temperature remd trajectory for single temperature.
     e.g: Suppose you have replica trajectoris remd.x.00{1-4}.
     You want to load and extract only frames at 300 K, use this method
@@ -268,15 +283,36 @@ def iterload_remd(filename, top=None, T="300.0"):
     filename : str
     top : {str, Topology}
     T : {float, str}, default=300.0
+    index : {None, str, RemdIndex}, default None
+        if None, use cpptraj to scan all replica files.
+        if a string, use it as the index filename: build and save the index if the file
+        does not exist (or is outdated), otherwise reuse it.
+        if a RemdIndex object, use it directly (see ``pytraj.build_remd_index``)
 
     Returns
     -------
-    pytraj.traj.TrajectoryCpptraj
+    pytraj.traj.TrajectoryCpptraj if index is None, otherwise a lazy FrameIterator
 
     Notes
     -----
+    Using an index is much faster if you need to extract many temperatures from the
+    same replica files since the replica files are scanned only once.
 
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.testing import get_remd_fn
+    >>> filenames, tn = get_remd_fn('remd_ala2')
+    >>> fi = pt.iterload_remd(filenames[0], tn, T=300.0, index='output/remd_ala2.npz')
     """
+    if index is not None:
+        from pytraj.trajectory.remd_index import RemdIndex, build_remd_index
+        if isinstance(top, string_types):
+            top = load_topology(top)
+        if not isinstance(index, RemdIndex):
+            index = build_remd_index(filename, top, index_file=index)
+        return index.iterload_temperature(T, top)
+
     from pytraj.core.c_core import CpptrajState, Command
 
     state = CpptrajState()
@@ -304,8 +340,11 @@ def iterload_remd(filename, top=None, T="300.0"):
     return traj
 
 
-def load_remd(filename, top=None, T="300.0"):
-    return iterload_remd(filename, top, T)[:]
+def load_remd(filename, top=None, T="300.0", index=None):
+    traj = iterload_remd(filename, top, T, index=index)
+    if index is None:
+        return traj[:]
+    return Trajectory.from_iterable(traj)
 
 
 def _files_exist(filename, n_frames, options):
@@ -390,8 +429,15 @@ def write_traj(filename,
     Scripps              .binpos
     Gromacs              .trr
     SQM Input            .sqm
+    pytraj compressed    .ptz
     ===================  =========
 
+    'options' for writing to pytraj compressed format (.ptz, format='ptz')::
+
+        precision <value>: quantize coordinates to this precision (Angstrom, default 0.001)
+        lossless:          store coordinates without quantization
+        chunksize <n>:     number of frames in each compressed chunk (default 100)
+
     'options' for writing to pdb format (cptraj manual)::
 
         dumpq:       Write atom charge/GB radius in occupancy/B-factor columns (PQR format)."
@@ -455,6 +501,22 @@ def write_traj(filename,
             print("{} exists. Use overwrite=True or remove the file".format(fn))
         raise IOError()
 
+    if format == 'ptz' or (format == 'infer' and
+                           filename.endswith('.ptz')):
+        words = options.split()
+        precision = (float(words[words.index('precision') + 1])
+                     if 'precision' in words else 0.001)
+        chunksize = (int(words[words.index('chunksize') + 1])
+                     if 'chunksize' in words else 100)
+        write_compressed_trajectory(
+            filename,
+            traj,
+            precision=None if 'lossless' in words else precision,
+            chunksize=chunksize,
+            frame_indices=frame_indices,
+            overwrite=True)
+        return
+
     if hasattr(traj, '_crdinfo'):
         crdinfo = traj._crdinfo
     else:
@@ -470,8 +532,20 @@ def write_traj(filename,
             format=format,
             crdinfo=crdinfo,
             options=options) as writer:
-        for frame in iterframe(traj, frame_indices=frame_indices):
-            writer.write(frame)
+        if isinstance(traj, Trajectory):
+            # bulk path: no Frame view for each snapshot
+            if frame_indices is not None:
+                frame_indices = np.asarray(list(frame_indices), dtype='i8')
+            writer.write_xyz(
+                traj.xyz,
+                box=traj.unitcells,
+                time=traj.time,
+                velocity=traj.velocities if velocity else None,
+                force=traj.forces if force else None,
+                frame_indices=frame_indices)
+        else:
+            for frame in iterframe(traj, frame_indices=frame_indices):
+                writer.write(frame)
 
 
 def write_parm(filename=None, top=None, format='amberparm', overwrite=False):
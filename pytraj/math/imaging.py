@@ -0,0 +1,346 @@
+"""vectorized, molecule-aware imaging (autoimage, wrap, unwrap) for blocks of coordinates
+
+This module only needs numpy. Molecule membership and anchor atoms are computed from the
+Topology once; then whole (n_frames, n_atoms, 3) blocks are imaged with a few numpy calls
+for orthorhombic and triclinic boxes.
+"""
+from __future__ import absolute_import
+import numpy as np
+
+__all__ = ['unitcells_to_matrices', 'Imager', 'Unwrapper', 'wrap_xyz',
+           'parse_autoimage_command']
+
+# number of frames processed per numpy call. Keep temporary arrays small.
+DEFAULT_CHUNKSIZE = 256
+
+# neighbor cells, used to find the closest image in triclinic boxes
+_OFFSETS = np.array(
+    [[i, j, k] for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)],
+    dtype='f8')
+
+
+def unitcells_to_matrices(boxes):
+    '''convert box lengths and angles to box vectors
+
+    Parameters
+    ----------
+    boxes : 2D array-like, shape=(n_frames, 6), (a, b, c, alpha, beta, gamma)
+
+    Returns
+    -------
+    ucell : 3D array, shape=(n_frames, 3, 3), each row is a box vector
+
+    Examples
+    --------
+    >>> ucell = unitcells_to_matrices([[10., 20., 30., 90., 90., 90.]])
+    >>> ucell.shape
+    (1, 3, 3)
+    >>> ucell[0].diagonal()
+    array([ 10.,  20.,  30.])
+    '''
+    boxes = np.asarray(boxes, dtype='f8').reshape(-1, 6)
+    a, b, c = boxes[:, 0], boxes[:, 1], boxes[:, 2]
+    angles = np.radians(boxes[:, 3:])
+    # exact zeros for right angles
+    cos = np.where(boxes[:, 3:] == 90., 0., np.cos(angles))
+    sin_gamma = np.where(boxes[:, 5] == 90., 1., np.sin(angles[:, 2]))
+    cos_alpha, cos_beta, cos_gamma = cos[:, 0], cos[:, 1], cos[:, 2]
+
+    ucell = np.zeros((len(boxes), 3, 3))
+    ucell[:, 0, 0] = a
+    ucell[:, 1, 0] = b * cos_gamma
+    ucell[:, 1, 1] = b * sin_gamma
+    ucell[:, 2, 0] = c * cos_beta
+    ucell[:, 2, 1] = c * (cos_alpha - cos_beta * cos_gamma) / sin_gamma
+    ucell[:, 2, 2] = np.sqrt(
+        np.clip(c * c - ucell[:, 2, 0]**2 - ucell[:, 2, 1]**2, 0., None))
+    return ucell
+
+
+def _is_ortho(boxes):
+    return np.all(np.asarray(boxes)[:, 3:] == 90.)
+
+
+def _to_fractional(xyz, recip):
+    return np.einsum('fak,fkl->fal', xyz, recip)
+
+
+def _to_cartesian(frac, ucell):
+    return np.einsum('fal,flk->fak', frac, ucell)
+
+
+def _check_boxes(xyz, boxes):
+    boxes = np.asarray(boxes, dtype='f8').reshape(-1, 6)
+    if len(boxes) == 1 and len(xyz) > 1:
+        boxes = np.repeat(boxes, len(xyz), axis=0)
+    if len(boxes) != len(xyz):
+        raise ValueError('must have a box for each frame')
+    if np.any(boxes[:, :3] <= 0.):
+        raise ValueError('imaging requires box')
+    return boxes
+
+
+def wrap_xyz(xyz, boxes, atom_indices=None, origin=False):
+    '''wrap each atom into the primary cell (in place)
+
+    Parameters
+    ----------
+    xyz : 3D array, shape=(n_frames, n_atoms, 3)
+    boxes : 2D array, shape=(n_frames, 6)
+    atom_indices : {None, array-like}, default None (all atoms)
+    origin : bool, default False
+        if True, the primary cell is centered at the origin
+
+    Returns
+    -------
+    xyz
+    '''
+    boxes = _check_boxes(xyz, boxes)
+    ucell = unitcells_to_matrices(boxes)
+    recip = np.linalg.inv(ucell)
+    low = -0.5 if origin else 0.
+    sel = xyz if atom_indices is None else xyz[:, atom_indices]
+    frac = _to_fractional(sel, recip)
+    shift = -np.floor(frac - low)
+    if atom_indices is None:
+        xyz += _to_cartesian(shift, ucell)
+    else:
+        xyz[:, atom_indices] += _to_cartesian(shift, ucell)
+    return xyz
+
+
+def parse_autoimage_command(command):
+    '''convert cpptraj's autoimage command to keyword arguments of ``Imager``
+
+    Examples
+    --------
+    >>> parse_autoimage_command('anchor :1-13 origin') == {'anchor': ':1-13', 'origin': True}
+    True
+    '''
+    words = command.split()
+    kwargs = {}
+    while words:
+        word = words.pop(0)
+        if word == 'origin':
+            kwargs['origin'] = True
+        elif word in ('anchor', 'fixed', 'mobile') and words:
+            kwargs[word] = words.pop(0)
+        else:
+            raise ValueError(
+                'engine="numpy" does not support "{}" in autoimage command'.format(word))
+    return kwargs
+
+
+class Imager(object):
+    '''vectorized version of cpptraj's autoimage
+
+    The anchor is moved to the center of the box (or the origin), "fixed" molecules are
+    moved to their closest image to the anchor, "mobile" molecules (solvent and ions) are
+    wrapped into the primary cell by their geometric centers. Molecules are never
+    split.
+
+    Parameters
+    ----------
+    top : Topology
+    anchor : {None, str}, default None (first molecule)
+    fixed : {None, str}, default None (molecules that are not mobile)
+    mobile : {None, str}, default None (solvent molecules and single-atom molecules)
+    origin : bool, default False
+        if True, center at origin instead of box center
+
+    Notes
+    -----
+    - For triclinic boxes the primary cell of mobile molecules is the parallelepiped
+      spanned by the box vectors (cpptraj's 'familiar' truncated octahedron shape is
+      not supported).
+    - The result is a valid periodic image of the input; it can differ from cpptraj's
+      result by lattice vectors for molecules at the cell border.
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.math.imaging import Imager
+    >>> traj = pt.datafiles.load_tz2_ortho()[:]
+    >>> imager = Imager(traj.top)
+    >>> xyz = imager.autoimage(traj.xyz, traj.unitcells)
+    '''
+
+    def __init__(self, top, anchor=None, fixed=None, mobile=None,
+                 origin=False):
+        self.n_atoms = top.n_atoms
+        self.origin = origin
+        begins = top.arrays.mol_first
+        ends = top.arrays.mol_last
+        counts = ends - begins
+        n_mols = len(begins)
+
+        self._mol_of_atom = np.empty(top.n_atoms, dtype='i8')
+        for k, (begin, end) in enumerate(zip(begins, ends)):
+            self._mol_of_atom[begin:end] = k
+        order = np.argsort(self._mol_of_atom, kind='mergesort')
+        # molecules are contiguous in most topologies: no need to reorder atoms
+        self._order = (None if np.array_equal(order, np.arange(top.n_atoms))
+                       else order)
+        self._starts = np.cumsum(counts) - counts
+        self._counts = counts.astype('f8')
+
+        def mols_in(mask):
+            selected = np.zeros(n_mols, dtype=bool)
+            selected[self._mol_of_atom[top.select(mask)]] = True
+            return selected
+
+        if anchor is None:
+            self._anchor_atoms = np.arange(begins[0], ends[0])
+        else:
+            self._anchor_atoms = np.asarray(top.select(anchor), dtype='i8')
+            if len(self._anchor_atoms) == 0:
+                raise ValueError('anchor mask does not select any atom')
+        is_anchor = np.zeros(n_mols, dtype=bool)
+        is_anchor[self._mol_of_atom[self._anchor_atoms]] = True
+
+        if mobile is None:
+            is_mobile = top.arrays.mol_is_solvent | (counts == 1)
+        else:
+            is_mobile = mols_in(mobile)
+        is_fixed = ~is_mobile if fixed is None else mols_in(fixed)
+        self._mobile = np.flatnonzero(is_mobile & ~is_anchor)
+        self._fixed = np.flatnonzero(is_fixed & ~is_mobile & ~is_anchor)
+
+    def _centers(self, xyz):
+        '''geometric center of each molecule, shape=(n_frames, n_mols, 3)
+        '''
+        if self._order is not None:
+            xyz = xyz[:, self._order]
+        return np.add.reduceat(
+            xyz, self._starts, axis=1) / self._counts[None, :, None]
+
+    def _autoimage_block(self, xyz, boxes):
+        ucell = unitcells_to_matrices(boxes)
+        recip = np.linalg.inv(ucell)
+        center_frac = 0. if self.origin else 0.5
+
+        # move anchor to box center
+        anchor_center = xyz[:, self._anchor_atoms].mean(axis=1)
+        target = center_frac * ucell.sum(axis=1)
+        xyz += (target - anchor_center)[:, None, :]
+
+        frac = _to_fractional(self._centers(xyz), recip)
+        shift = np.zeros_like(frac)
+        if len(self._mobile):
+            shift[:, self._mobile] = -np.floor(
+                frac[:, self._mobile] - (center_frac - 0.5))
+        if len(self._fixed):
+            diff = frac[:, self._fixed] - center_frac
+            base = -np.round(diff)
+            if not _is_ortho(boxes):
+                # search neighbor cells for the closest image
+                candidates = (diff + base)[:, :, None, :] + _OFFSETS
+                cart = np.einsum('fmol,flk->fmok', candidates, ucell)
+                best = np.argmin((cart * cart).sum(axis=-1), axis=-1)
+                base += _OFFSETS[best]
+            shift[:, self._fixed] = base
+        xyz += _to_cartesian(shift, ucell)[:, self._mol_of_atom]
+        return xyz
+
+    def autoimage(self, xyz, boxes, n_threads=1,
+                  chunksize=DEFAULT_CHUNKSIZE):
+        '''autoimage coordinates in place
+
+        Parameters
+        ----------
+        xyz : 3D array of float64, shape=(n_frames, n_atoms, 3)
+        boxes : 2D array, shape=(n_frames, 6) or (6,)
+        n_threads : int, default 1
+            process blocks of frames with threads (numpy releases the GIL)
+        chunksize : int, default 256
+            number of frames in each block
+
+        Returns
+        -------
+        xyz
+        '''
+        if xyz.ndim != 3 or xyz.shape[1] != self.n_atoms:
+            raise ValueError('xyz must have shape (n_frames, {}, 3)'.format(
+                self.n_atoms))
+        boxes = _check_boxes(xyz, boxes)
+        blocks = [(start, min(start + chunksize, len(xyz)))
+                  for start in range(0, len(xyz), chunksize)]
+
+        def work(block):
+            start, stop = block
+            # slices are views: update xyz in place
+            self._autoimage_block(xyz[start:stop], boxes[start:stop])
+
+        if n_threads > 1 and len(blocks) > 1:
+            from multiprocessing.pool import ThreadPool
+            pool = ThreadPool(n_threads)
+            try:
+                pool.map(work, blocks)
+            finally:
+                pool.close()
+        else:
+            for block in blocks:
+                work(block)
+        return xyz
+
+
+class Unwrapper(object):
+    '''remove jumps across box boundaries so that atoms move continuously. The last
+    frame is kept so consecutive blocks (e.g. from ``iterchunk``) are unwrapped
+    continuously.
+
+    Parameters
+    ----------
+    reference : {None, 2D array}, shape=(n_atoms, 3)
+        if given, unwrapping starts from this frame
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.math.imaging import Unwrapper
+    >>> traj = pt.datafiles.load_tz2_ortho()
+    >>> unwrapper = Unwrapper()
+    >>> blocks = [unwrapper.unwrap(chunk.xyz, chunk.unitcells) for chunk in traj.iterchunk(4)]
+    '''
+
+    def __init__(self, reference=None):
+        self._last_raw = None
+        self._last_unwrapped = None
+        if reference is not None:
+            reference = np.array(reference, dtype='f8')
+            self._last_raw = reference
+            self._last_unwrapped = reference.copy()
+
+    def reset(self):
+        self._last_raw = None
+        self._last_unwrapped = None
+
+    def unwrap(self, xyz, boxes):
+        '''return unwrapped coordinates (new array)
+
+        Parameters
+        ----------
+        xyz : 3D array, shape=(n_frames, n_atoms, 3)
+        boxes : 2D array, shape=(n_frames, 6) or (6,)
+        '''
+        xyz = np.asarray(xyz, dtype='f8')
+        if len(xyz) == 0:
+            return xyz.copy()
+        boxes = _check_boxes(xyz, boxes)
+        ucell = unitcells_to_matrices(boxes)
+        recip = np.linalg.inv(ucell)
+
+        if self._last_raw is None:
+            previous_raw = np.concatenate((xyz[:1], xyz[:-1]))
+            start = xyz[0]
+        else:
+            previous_raw = np.concatenate((self._last_raw[None], xyz[:-1]))
+            start = self._last_unwrapped
+        frac = _to_fractional(xyz - previous_raw, recip)
+        frac -= np.round(frac)
+        steps = _to_cartesian(frac, ucell)
+        out = start + np.cumsum(steps, axis=0)
+
+        self._last_raw = xyz[-1].copy()
+        self._last_unwrapped = out[-1].copy()
+        return out
@@ -0,0 +1,372 @@
+"""vectorized superposition (Kabsch) for blocks of coordinates
+
+This module only needs numpy. It works on (n_frames, n_atoms, 3) arrays that are already
+in memory (or memory-mapped) so we do not need to go through cpptraj's Action_Rmsd frame
+by frame.
+"""
+from __future__ import absolute_import
+import numpy as np
+
+__all__ = ['superpose_xyz', 'rmsd_to_references_xyz']
+
+# number of frames processed per numpy call. Keep temporary arrays small.
+DEFAULT_CHUNKSIZE = 1024
+# max number of (frame, reference) pairs processed per numpy call
+_MAX_PAIRS = 2**19
+
+
+def _as_indices(indices, n_atoms):
+    if indices is None:
+        return None
+    indices = np.asarray(indices, dtype='i8')
+    if indices.ndim != 1:
+        raise ValueError('atom indices must be 1D array-like')
+    if len(indices) == n_atoms and np.array_equal(indices,
+                                                  np.arange(n_atoms)):
+        # avoid fancy indexing copy
+        return None
+    return indices
+
+
+def _fit_block(sel, ref_centered, ref_sq, weights, w_total):
+    '''return rotations, centers and rmsd for a block of selected coordinates
+
+    Parameters
+    ----------
+    sel : 3D array, shape=(n_frames, n_sel, 3), selected coordinates
+    ref_centered : 2D array, shape=(n_sel, 3)
+    ref_sq : float, weighted sum of squares of ref_centered
+    weights : 1D array or None
+    w_total : float
+    '''
+    if weights is None:
+        center = sel.mean(axis=1)
+    else:
+        center = np.einsum('j,ijk->ik', weights, sel) / w_total
+    x = sel - center[:, None, :]
+
+    if weights is None:
+        x_sq = np.einsum('ijk,ijk->i', x, x)
+        # covariance matrix, shape=(n_frames, 3, 3)
+        cov = np.einsum('ijk,jl->ikl', x, ref_centered)
+    else:
+        x_sq = np.einsum('j,ijk,ijk->i', weights, x, x)
+        cov = np.einsum('j,ijk,jl->ikl', weights, x, ref_centered)
+
+    # numpy's linalg functions loop over the stacked matrices in C
+    u, s, vt = np.linalg.svd(cov)
+    d = np.sign(np.linalg.det(np.matmul(u, vt)))
+    d[d == 0] = 1.
+    s[:, -1] *= d
+    u[:, :, -1] *= d[:, None]
+    # rotation that moves frame onto reference: x_fit = R.dot(x)
+    rotations = np.transpose(np.matmul(u, vt), (0, 2, 1))
+
+    msd = (x_sq + ref_sq - 2. * s.sum(axis=1)) / w_total
+    rmsd = np.sqrt(np.clip(msd, 0., None))
+    return rotations, center, rmsd
+
+
+def superpose_xyz(xyz,
+                  ref_xyz,
+                  atom_indices=None,
+                  ref_atom_indices=None,
+                  weights=None,
+                  fit=True,
+                  inplace=False,
+                  chunksize=DEFAULT_CHUNKSIZE):
+    '''superpose a block of frames to a single reference (Kabsch algorithm)
+
+    Parameters
+    ----------
+    xyz : 3D array-like, shape=(n_frames, n_atoms, 3)
+        coordinates. Can be memory-mapped array. Must be writable if inplace=True
+    ref_xyz : 2D array-like, shape=(n_ref_atoms, 3)
+    atom_indices : {None, 1D array-like}, default None (all atoms)
+        atoms in ``xyz`` used for fitting
+    ref_atom_indices : {None, 1D array-like}, default None
+        atoms in ``ref_xyz`` used for fitting. If None, use ``atom_indices``
+    weights : {None, 1D array-like}, default None
+        weight for each fitted atom (e.g. atom masses). len(weights) must be equal to
+        the number of fitted atoms
+    fit : bool, default True
+        if False, only compute rmsd without translation and rotation
+    inplace : bool, default False
+        if True, apply the fitting to all atoms of ``xyz``
+    chunksize : int, default 1024
+        number of frames for each vectorized step
+
+    Returns
+    -------
+    out : Tuple[rotations, translations, rmsd]
+        rotations : 3D array, shape=(n_frames, 3, 3)
+        translations : 2D array, shape=(n_frames, 3)
+        rmsd : 1D array, shape=(n_frames,)
+
+        the fitted coordinates are ``np.dot(xyz[i], rotations[i].T) + translations[i]``
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.math.superposition import superpose_xyz
+    >>> traj = pt.datafiles.load_tz2()[:]
+    >>> indices = traj.top.select('@CA')
+    >>> mat, trans, rmsd = superpose_xyz(traj.xyz, traj.xyz[0], atom_indices=indices)
+    >>> mat.shape
+    (101, 3, 3)
+    '''
+    xyz = np.asarray(xyz)
+    ref_xyz = np.asarray(ref_xyz, dtype='f8')
+
+    if xyz.ndim != 3 or xyz.shape[2] != 3:
+        raise ValueError('xyz must have shape (n_frames, n_atoms, 3)')
+    if ref_xyz.ndim != 2 or ref_xyz.shape[1] != 3:
+        raise ValueError('ref_xyz must have shape (n_atoms, 3)')
+    if inplace and not xyz.flags['WRITEABLE']:
+        raise ValueError('xyz must be writable if inplace=True')
+
+    n_frames, n_atoms, _ = xyz.shape
+
+    indices = _as_indices(atom_indices, n_atoms)
+    ref_indices = _as_indices(
+        atom_indices if ref_atom_indices is None else ref_atom_indices,
+        ref_xyz.shape[0])
+
+    ref_sel = ref_xyz if ref_indices is None else ref_xyz[ref_indices]
+    n_sel = n_atoms if indices is None else len(indices)
+    if ref_sel.shape[0] != n_sel:
+        raise ValueError(
+            'number of fitted atoms in frame ({}) and reference ({}) '
+            'must be equal'.format(n_sel, ref_sel.shape[0]))
+    if n_sel == 0:
+        raise ValueError('empty atom selection')
+
+    if weights is not None:
+        weights = np.asarray(weights, dtype='f8')
+        if weights.shape != (n_sel, ):
+            raise ValueError('len(weights) must be equal to number of '
+                             'fitted atoms')
+        w_total = weights.sum()
+        ref_center = weights.dot(ref_sel) / w_total
+    else:
+        w_total = float(n_sel)
+        ref_center = ref_sel.mean(axis=0)
+
+    ref_centered = ref_sel - ref_center
+    if weights is None:
+        ref_sq = np.einsum('jk,jk->', ref_centered, ref_centered)
+    else:
+        ref_sq = np.einsum('j,jk,jk->', weights, ref_centered, ref_centered)
+
+    rotations = np.empty((n_frames, 3, 3), dtype='f8')
+    translations = np.empty((n_frames, 3), dtype='f8')
+    rmsd = np.empty(n_frames, dtype='f8')
+
+    chunksize = max(int(chunksize), 1)
+    for start in range(0, n_frames, chunksize):
+        stop = min(start + chunksize, n_frames)
+        block = xyz[start:stop]
+        sel = block if indices is None else block[:, indices]
+        sel = np.asarray(sel, dtype='f8')
+
+        if fit:
+            mat, center, rmsd_ = _fit_block(sel, ref_centered, ref_sq,
+                                            weights, w_total)
+            trans = ref_center - np.einsum('ikl,il->ik', mat, center)
+            if inplace:
+                block[:] = np.matmul(block, np.transpose(
+                    mat, (0, 2, 1))) + trans[:, None, :]
+        else:
+            mat = np.tile(np.eye(3), (stop - start, 1, 1))
+            trans = np.zeros((stop - start, 3))
+            diff = sel - ref_sel
+            if weights is None:
+                sq = np.einsum('ijk,ijk->i', diff, diff)
+            else:
+                sq = np.einsum('j,ijk,ijk->i', weights, diff, diff)
+            rmsd_ = np.sqrt(sq / w_total)
+
+        rotations[start:stop] = mat
+        translations[start:stop] = trans
+        rmsd[start:stop] = rmsd_
+
+    return rotations, translations, rmsd
+
+
+class _ReferenceSet(object):
+    '''precentered references for computing rmsd of blocks of frames to all references
+
+    Parameters
+    ----------
+    refs_sel : 3D array, shape=(n_refs, n_sel, 3), selected reference coordinates
+    weights : 1D array or None
+    fit : bool
+    '''
+
+    def __init__(self, refs_sel, weights=None, fit=True):
+        refs_sel = np.asarray(refs_sel, dtype='f8')
+        self.n_refs, self.n_sel, _ = refs_sel.shape
+        self.weights = weights
+        self.fit = fit
+        self.w_total = float(
+            self.n_sel) if weights is None else float(weights.sum())
+
+        if fit:
+            if weights is None:
+                centers = refs_sel.mean(axis=1)
+            else:
+                centers = np.einsum('j,rjk->rk', weights,
+                                    refs_sel) / self.w_total
+            refs_sel = refs_sel - centers[:, None, :]
+        if weights is None:
+            self.ref_sq = np.einsum('rjk,rjk->r', refs_sel, refs_sel)
+        else:
+            self.ref_sq = np.einsum('j,rjk,rjk->r', weights, refs_sel,
+                                    refs_sel)
+
+        if fit:
+            # (n_sel, 3 * n_refs): covariance matrices of a block are one matrix product
+            self._gemm_refs = np.ascontiguousarray(
+                refs_sel.transpose(1, 0, 2).reshape(self.n_sel,
+                                                    3 * self.n_refs))
+        else:
+            # (3 * n_sel, n_refs)
+            self._gemm_refs = np.ascontiguousarray(
+                refs_sel.reshape(self.n_refs, 3 * self.n_sel).T)
+
+    def rmsd(self, sel):
+        '''rmsd of each frame in a block to each reference
+
+        Parameters
+        ----------
+        sel : 3D array, shape=(n_frames, n_sel, 3)
+
+        Returns
+        -------
+        2D array, shape=(n_frames, n_refs)
+        '''
+        sel = np.asarray(sel, dtype='f8')
+        n_frames = sel.shape[0]
+        weights = self.weights
+
+        if self.fit:
+            if weights is None:
+                center = sel.mean(axis=1)
+            else:
+                center = np.einsum('j,ijk->ik', weights, sel) / self.w_total
+            sel = sel - center[:, None, :]
+        if weights is None:
+            x_sq = np.einsum('ijk,ijk->i', sel, sel)
+            x_w = sel
+        else:
+            x_sq = np.einsum('j,ijk,ijk->i', weights, sel, sel)
+            x_w = sel * weights[None, :, None]
+
+        if self.fit:
+            # cov[i, r] = x_w[i].T.dot(ref[r]), shape=(n_frames, n_refs, 3, 3)
+            cov = x_w.transpose(0, 2, 1).reshape(3 * n_frames, self.n_sel).dot(
+                self._gemm_refs).reshape(n_frames, 3, self.n_refs,
+                                         3).transpose(0, 2, 1, 3)
+            s = np.linalg.svd(cov, compute_uv=False)
+            # sign of det(U.dot(Vt)) is the sign of det(cov)
+            d = np.sign(np.linalg.det(cov))
+            d[d == 0] = 1.
+            s[..., -1] *= d
+            cross = s.sum(axis=-1)
+        else:
+            cross = x_w.reshape(n_frames, 3 * self.n_sel).dot(self._gemm_refs)
+
+        msd = (x_sq[:, None] + self.ref_sq[None, :] - 2. * cross) / self.w_total
+        return np.sqrt(np.clip(msd, 0., None))
+
+
+def rmsd_to_references_xyz(xyz,
+                           refs_xyz,
+                           atom_indices=None,
+                           ref_atom_indices=None,
+                           weights=None,
+                           fit=True,
+                           chunksize=DEFAULT_CHUNKSIZE):
+    '''rmsd of each frame to each reference in a single pass (Kabsch algorithm, without
+    updating coordinates)
+
+    Parameters
+    ----------
+    xyz : 3D array-like, shape=(n_frames, n_atoms, 3)
+        coordinates. Can be memory-mapped array
+    refs_xyz : 3D array-like, shape=(n_refs, n_ref_atoms, 3)
+    atom_indices : {None, 1D array-like}, default None (all atoms)
+        atoms in ``xyz`` used for fitting
+    ref_atom_indices : {None, 1D array-like}, default None
+        atoms in ``refs_xyz`` used for fitting. If None, use ``atom_indices``
+    weights : {None, 1D array-like}, default None
+        weight for each fitted atom (e.g. atom masses)
+    fit : bool, default True
+        if False, compute rmsd without translation and rotation
+    chunksize : int, default 1024
+        max number of frames for each vectorized step
+
+    Returns
+    -------
+    2D array, shape=(n_frames, n_refs)
+
+    Notes
+    -----
+    References are centered once; for each block of frames, the covariance matrices
+    with all references are computed by a single matrix product.
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.math.superposition import rmsd_to_references_xyz
+    >>> traj = pt.datafiles.load_tz2()[:]
+    >>> indices = traj.top.select('@CA')
+    >>> mat = rmsd_to_references_xyz(traj.xyz, traj.xyz[[0, 5, 10]], atom_indices=indices)
+    >>> mat.shape
+    (101, 3)
+    '''
+    xyz = np.asarray(xyz)
+    refs_xyz = np.asarray(refs_xyz, dtype='f8')
+
+    if xyz.ndim != 3 or xyz.shape[2] != 3:
+        raise ValueError('xyz must have shape (n_frames, n_atoms, 3)')
+    if refs_xyz.ndim != 3 or refs_xyz.shape[2] != 3:
+        raise ValueError('refs_xyz must have shape (n_refs, n_atoms, 3)')
+
+    n_frames, n_atoms, _ = xyz.shape
+    indices = _as_indices(atom_indices, n_atoms)
+    ref_indices = _as_indices(
+        atom_indices if ref_atom_indices is None else ref_atom_indices,
+        refs_xyz.shape[1])
+    references = _make_references(refs_xyz, ref_indices, n_atoms
+                                  if indices is None else len(indices),
+                                  weights, fit)
+
+    out = np.empty((n_frames, references.n_refs), dtype='f8')
+    chunksize = _pair_chunksize(chunksize, references.n_refs)
+    for start in range(0, n_frames, chunksize):
+        block = xyz[start:start + chunksize]
+        sel = block if indices is None else block[:, indices]
+        out[start:start + chunksize] = references.rmsd(sel)
+    return out
+
+
+def _make_references(refs_xyz, ref_indices, n_sel, weights, fit):
+    refs_sel = refs_xyz if ref_indices is None else refs_xyz[:, ref_indices]
+    if refs_sel.shape[1] != n_sel:
+        raise ValueError(
+            'number of fitted atoms in frame ({}) and reference ({}) '
+            'must be equal'.format(n_sel, refs_sel.shape[1]))
+    if n_sel == 0:
+        raise ValueError('empty atom selection')
+    if weights is not None:
+        weights = np.asarray(weights, dtype='f8')
+        if weights.shape != (n_sel, ):
+            raise ValueError('len(weights) must be equal to number of '
+                             'fitted atoms')
+    return _ReferenceSet(refs_sel, weights=weights, fit=fit)
+
+
+def _pair_chunksize(chunksize, n_refs):
+    # bound the size of (n_frames, n_refs, 3, 3) temporary arrays
+    return max(1, min(int(chunksize), _MAX_PAIRS // max(1, n_refs)))
@@ -2,6 +2,9 @@ import numpy as np
 from functools import partial
 from pytraj import Frame
 from pytraj import pipe
+from pytraj import ActionList
+from pytraj.trajectory.c_traj.c_trajectory import TrajectoryCpptraj
+from pytraj.utils import split_range
 from pytraj.utils.tools import concat_dict, WrapBareIterator
 from pytraj.datasets import CpptrajDatasetList
 from pytraj.externals.six import string_types
@@ -140,6 +143,8 @@ def worker_by_func(rank,
     rmsfit = iter_options.get('rmsfit')
     autoimage = iter_options.get('autoimage', False)
     iter_func = apply
+    # copy: kwargs is shared by all workers in the threads backend
+    kwargs = dict(kwargs)
     frame_indices = kwargs.pop('frame_indices', None)
 
     if frame_indices is None:
@@ -185,15 +190,13 @@ def worker_by_actlist(rank,
     # Note: dtype is a dummy argument, it is always 'dict'
     if lines is None:
         lines = []
+    kwargs = dict(kwargs)
     frame_indices = kwargs.pop('frame_indices', None)
 
     new_lines, need_ref = check_valid_command(lines)
 
-    if frame_indices is None:
-        my_iter = traj._split_iterators(n_cores, rank=rank)
-    else:
-        my_iter = traj.iterframe(frame_indices=np.array_split(
-            frame_indices, n_cores)[rank])
+    if frame_indices is not None:
+        frame_indices = np.array_split(frame_indices, n_cores)[rank]
 
     if ref is not None:
         if isinstance(ref, Frame):
@@ -216,15 +219,54 @@ def worker_by_actlist(rank,
             ref_dset.top = traj.top
             ref_dset.add_frame(ref_)
 
-    # create Frame generator
-    fi = pipe(my_iter, commands=new_lines, dslist=dslist)
+    if isinstance(traj, TrajectoryCpptraj):
+        # fast path: read frames and perform actions in C++
+        actlist = ActionList(new_lines, top=traj.top, dslist=dslist)
+        if frame_indices is None:
+            start, stop = split_range(n_cores, 0, traj.n_frames)[rank]
+            actlist.run(traj, start=start, stop=stop)
+        else:
+            actlist.run(traj, frame_indices=frame_indices)
+    else:
+        if frame_indices is None:
+            my_iter = traj._split_iterators(n_cores, rank=rank)
+        else:
+            my_iter = traj.iterframe(frame_indices=frame_indices)
+        # create Frame generator
+        fi = pipe(my_iter, commands=new_lines, dslist=dslist)
 
-    # just iterate Frame to trigger calculation.
-    consume_iterator(fi)
+        # just iterate Frame to trigger calculation.
+        consume_iterator(fi)
     # remove ref
     return (dslist[len(reflist):].to_dict(), )
 
 
+def _map_threads(worker, traj, n_workers):
+    '''call ``worker(rank, traj=traj_copy)`` for each rank in a thread pool. Each thread
+    gets its own file handles: rank 0 uses ``traj`` (the calling thread only waits), other
+    ranks use a copy of it.
+    '''
+    from multiprocessing.pool import ThreadPool
+    from pytraj.utils.context import capture_stdout, _no_capture
+
+    trajs = [traj] + [traj.copy() for _ in range(n_workers - 1)]
+
+    def run(rank):
+        with _no_capture():
+            return worker(rank, traj=trajs[rank])
+
+    pool = ThreadPool(n_workers)
+    try:
+        # worker threads do not capture cpptraj's output (that would serialize them),
+        # hide it here
+        with capture_stdout():
+            data = pool.map(run, range(n_workers))
+    finally:
+        pool.close()
+        pool.join()
+    return data
+
+
 def _load_batch_pmap(n_cores=4,
                      lines=None,
                      traj=None,
@@ -232,8 +274,13 @@ def _load_batch_pmap(n_cores=4,
                      root=0,
                      mode='multiprocessing',
                      ref=None,
+                     allreduce=False,
                      **kwargs):
-    '''mpi or multiprocessing
+    '''mpi, multiprocessing or threads
+
+    For 'mpi', data of all ranks are concatenated with Gatherv (if possible) and ``root``
+    gets a list of one tuple (dict, ), other ranks get None (or the same list if
+    ``allreduce``). Others return a list of (dict, ) for each core.
     '''
     if lines is None:
         lines = []
@@ -252,8 +299,18 @@ def _load_batch_pmap(n_cores=4,
         pool.close()
         pool.join()
         return data
+    elif mode == 'threads':
+        pfuncs = partial(
+            worker_by_actlist,
+            n_cores=n_cores,
+            dtype=dtype,
+            lines=lines,
+            ref=ref,
+            kwargs=kwargs)
+        return _map_threads(pfuncs, traj, n_cores)
     elif mode == 'mpi':
         from mpi4py import MPI
+        from .mpi import _gather_dict
         comm = MPI.COMM_WORLD
         rank = comm.rank
         data_chunk = worker_by_actlist(
@@ -264,12 +321,11 @@ def _load_batch_pmap(n_cores=4,
             lines=lines,
             ref=ref,
             kwargs=kwargs)
-        # it's ok to use python level `gather` method since we only do this once
-        # only gather data to root, other cores get None
-        data = comm.gather(data_chunk, root=root)
-        return data
+        data = _gather_dict(
+            comm, data_chunk[0], root=root, allgather=allreduce)
+        return None if data is None else [(data, )]
     else:
-        raise ValueError('only support multiprocessing or mpi')
+        raise ValueError('only support multiprocessing, threads or mpi')
 
 
 def worker_by_state(rank, n_cores=1, traj=None, lines=None, dtype='dict'):
@@ -0,0 +1,179 @@
+'''checkpointed pmap: each finished block of frames is saved to a job directory, a rerun
+only computes missing blocks
+'''
+from __future__ import absolute_import
+import os
+import pickle
+import tempfile
+import traceback
+from collections import Counter
+
+__all__ = ['map_checkpointed', 'job_key']
+
+_MANIFEST = 'key'
+
+
+def job_key(*inputs):
+    '''sha1 of pmap's inputs (function, trajectory, arguments, ...), or None if some of
+    them can not be identified (e.g a lambda for ``apply``)
+    '''
+    from pytraj import __version__
+    from pytraj.utils.result_cache import _Hasher, _Uncacheable, _func_name
+
+    hasher = _Hasher()
+    try:
+        hasher.feed(__version__)
+        for obj in inputs:
+            if callable(obj):
+                obj = _func_name(obj)
+                if '<' in obj:
+                    # lambda or local function
+                    raise _Uncacheable(obj)
+            hasher.feed(obj)
+    except _Uncacheable:
+        return None
+    return hasher.hexdigest()
+
+
+class _JobDirectory(object):
+    '''directory/<key>/block_<rank>.pkl, one file per finished block
+    '''
+
+    def __init__(self, directory, key, inputs_key=None):
+        self.path = os.path.join(directory, key)
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        manifest = os.path.join(self.path, _MANIFEST)
+        if inputs_key is not None:
+            if os.path.exists(manifest):
+                with open(manifest) as fh:
+                    if fh.read().strip() != inputs_key:
+                        raise ValueError(
+                            'job {} was run with other inputs, use another job_key '
+                            'or remove {}'.format(key, self.path))
+            else:
+                with open(manifest, 'w') as fh:
+                    fh.write(inputs_key)
+
+    def _block(self, rank):
+        return os.path.join(self.path, 'block_{:05d}.pkl'.format(rank))
+
+    def has(self, rank):
+        return os.path.exists(self._block(rank))
+
+    def save(self, rank, data):
+        # write to a temporary file then rename: a killed job never leaves a partial
+        # block
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                pickle.dump(data, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            getattr(os, 'replace', os.rename)(tmp, self._block(rank))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def load(self, rank):
+        with open(self._block(rank), 'rb') as fh:
+            return pickle.load(fh)
+
+
+def _run_block(worker, rank):
+    try:
+        return worker(rank), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def _run_pool(worker, ranks, n_workers, job):
+    '''run blocks in a new pool of processes and save the finished ones
+
+    Returns
+    -------
+    errors : dict, rank -> traceback of blocks that raised
+    lost : dict, rank -> traceback of blocks that did not finish because the pool broke
+        (a worker process died, e.g. OOM or signal)
+    '''
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+
+    errors, lost = {}, {}
+    executor = ProcessPoolExecutor(n_workers)
+    try:
+        futures = dict((executor.submit(_run_block, worker, rank), rank)
+                       for rank in ranks)
+        for future in as_completed(futures):
+            rank = futures[future]
+            try:
+                data, error = future.result()
+            except BrokenProcessPool:
+                lost[rank] = traceback.format_exc()
+                continue
+            except Exception:
+                # e.g. the result can not be pickled
+                data, error = None, traceback.format_exc()
+            if error is None:
+                job.save(rank, data)
+            else:
+                errors[rank] = error
+    finally:
+        executor.shutdown(wait=True)
+    return errors, lost
+
+
+def map_checkpointed(worker,
+                     n_blocks,
+                     n_cores,
+                     directory,
+                     key,
+                     inputs_key=None,
+                     retries=2):
+    '''call ``worker(rank)`` for rank in range(n_blocks) with a pool of ``n_cores``
+    processes. Results of finished blocks are saved to ``directory/key``; blocks
+    already saved are not computed again. Failed blocks (exception or crashed process)
+    are retried ``retries`` times.
+
+    Notes
+    -----
+    A crashed worker process breaks the whole pool, without telling which block caused
+    it. Blocks lost this way are rerun in a new pool of ``n_cores`` processes. If that
+    pool breaks too, they are rerun one at a time, so only the block that crashes again
+    is counted as failed.
+
+    Returns
+    -------
+    list of worker's results, ordered by rank
+    '''
+    job = _JobDirectory(directory, key, inputs_key=inputs_key)
+    missing = [rank for rank in range(n_blocks) if not job.has(rank)]
+    attempts = Counter()
+
+    while missing:
+        failures, lost = _run_pool(worker, missing,
+                                   min(n_cores, len(missing)), job)
+        # blocks that raised are charged. Blocks lost with a broken pool are rerun in a
+        # new pool; only if it breaks again they are run one at a time, and only the
+        # block that crashes alone is charged
+        if lost and len(missing) > 1:
+            ranks = sorted(lost)
+            errors, lost = _run_pool(worker, ranks, min(n_cores, len(ranks)), job)
+            failures.update(errors)
+            if lost and len(ranks) > 1:
+                for rank in sorted(lost):
+                    errors, crashed = _run_pool(worker, [rank], 1, job)
+                    failures.update(errors)
+                    failures.update(crashed)
+                lost = {}
+        failures.update(lost)
+
+        attempts.update(list(failures))
+        exhausted = sorted(rank for rank in failures if attempts[rank] > retries)
+        if exhausted:
+            raise RuntimeError(
+                '{} block(s) failed after {} retries, finished blocks are kept in {} '
+                '(rerun to resume). First error (block {}):\n{}'.format(
+                    len(exhausted), retries, job.path, exhausted[0],
+                    failures[exhausted[0]]))
+        missing = sorted(failures)
+
+    return [job.load(rank) for rank in range(n_blocks)]
@@ -4,10 +4,12 @@ from collections import OrderedDict
 from pytraj import matrix
 from pytraj import mean_structure
 from pytraj import volmap
+from pytraj import hbond
 from pytraj import Frame
 from pytraj import ired_vector_and_matrix
 from pytraj import rotation_matrix
 from pytraj.utils.tools import concat_dict
+from pytraj.analysis.grid_analysis import merge_states
 
 from .base import concat_hbond
 
@@ -35,7 +37,10 @@ class PmapDataset(object):
     def process(self):
         # val : Tuple[OrdereDict, n_frames]
 
-        if self.func in [matrix.dist, matrix.idea, volmap]:
+        if getattr(self.func, '_is_mergeable', False):
+            # val : Tuple[state, n_frames]
+            return merge_states([val[0] for val in self.data])
+        elif self.func in [matrix.dist, matrix.idea, volmap]:
             mat = np.sum((val[0] * val[1]
                           for val in self.data)) / self.traj.n_frames
             return mat
@@ -65,7 +70,7 @@ class PmapDataset(object):
             frame = Frame(xyz.shape[0])
             frame.xyz[:] = xyz
             return frame
-        elif 'hbond' in self.func.__name__:
+        elif self.func is hbond:
             return concat_hbond(self.data)
         else:
             return concat_dict((x[0] for x in self.data))
@@ -0,0 +1,209 @@
+'''run an analysis over many independent trajectories, one trajectory per task
+'''
+from __future__ import absolute_import
+import os
+import traceback
+from glob import glob
+from collections import OrderedDict
+from multiprocessing import cpu_count
+
+from pytraj.externals.six import string_types
+
+__all__ = ['map_ensemble', 'EnsembleResults']
+
+# per worker process: shared Topology, func, args and kwargs (sent once per worker)
+_WORKER_STATE = {}
+
+
+class EnsembleResults(OrderedDict):
+    '''results of ``map_ensemble``: key -> result for trajectories that succeeded, in
+    input order
+
+    Attributes
+    ----------
+    errors : OrderedDict
+        key -> traceback (str) for trajectories that failed
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super(EnsembleResults, self).__init__(*args, **kwargs)
+        self.errors = OrderedDict()
+
+    def __repr__(self):
+        return '<EnsembleResults: {} succeeded, {} failed>'.format(
+            len(self), len(self.errors))
+
+    @property
+    def failed(self):
+        '''keys of failed trajectories'''
+        return list(self.errors)
+
+    def raise_errors(self):
+        '''raise RuntimeError if any trajectory failed'''
+        if self.errors:
+            key, tb = next(iter(self.errors.items()))
+            raise RuntimeError('{} of {} trajectories failed, first failure ({!r}):\n{}'.
+                               format(
+                                   len(self.errors),
+                                   len(self) + len(self.errors), key, tb))
+
+
+def _expand_files(item):
+    files = [item] if isinstance(item, string_types) else list(item)
+    expanded = []
+    for filename in files:
+        if os.path.exists(filename):
+            expanded.append(filename)
+        else:
+            # pattern, sorted as in pytraj.iterload
+            from pytraj.trajectory.trajectory_iterator import sort_filename_by_number
+            expanded.extend(sort_filename_by_number(glob(filename)))
+    return expanded
+
+
+def _estimate_cost(item):
+    '''bigger trajectories first: file size, or n_frames * n_atoms of a loaded
+    trajectory
+    '''
+    if hasattr(item, 'n_frames') and hasattr(item, 'n_atoms'):
+        return item.n_frames * item.n_atoms * 12
+    try:
+        return sum(os.path.getsize(fname) for fname in _expand_files(item))
+    except (OSError, TypeError):
+        return 0
+
+
+def _make_state(top, func, args, kwargs):
+    from pytraj.io import load_topology
+    from pytraj.topology.topology import Topology
+
+    if isinstance(top, string_types):
+        # parse once per worker, not once per trajectory
+        top = load_topology(top)
+    elif top is not None and not isinstance(top, Topology):
+        raise ValueError('top must be None, a filename or a Topology')
+    return dict(top=top, func=func, args=args, kwargs=kwargs)
+
+
+def _init_worker(top, func, args, kwargs):
+    _WORKER_STATE.update(_make_state(top, func, args, kwargs))
+
+
+def _run_task(task, state=None):
+    '''return (index, result, traceback or None)
+    '''
+    from pytraj.io import iterload
+
+    state = _WORKER_STATE if state is None else state
+    index, item = task
+    try:
+        if hasattr(item, 'n_frames'):
+            traj = item
+        else:
+            files = _expand_files(item)
+            if not files:
+                raise ValueError('no trajectory file for {!r}'.format(item))
+            traj = iterload(files, top=state['top'])
+        result = state['func'](traj, *state['args'], **state['kwargs'])
+        return index, result, None
+    except Exception:
+        return index, None, traceback.format_exc()
+
+
+def map_ensemble(func, trajs, top=None, *args, **kwargs):
+    '''apply ``func`` to many independent trajectories, each trajectory is one task
+    for a pool of processes. Bigger trajectories are scheduled first so the pool ends at
+    about the same time.
+
+    Parameters
+    ----------
+    func : callable, ``func(traj, *args, **kwargs)``, e.g pytraj.rmsd
+        must be picklable (a module level function) if n_cores > 1
+    trajs : list or dict
+        each item is a trajectory filename (or file pattern), a list of filenames
+        (one trajectory from a group of files), or a TrajectoryIterator. If a dict,
+        use its keys as result keys
+    top : {None, str, Topology}, default None
+        Topology shared by all trajectories. A filename is parsed once per worker
+    n_cores : int, default 2
+        number of processes, -1 to use all cores. If 1, run in this process
+    backend : str, {'multiprocessing', 'threads'}, default 'multiprocessing'
+        if 'threads', use a pool of threads (see ``pytraj.pmap``)
+    *args, **kwargs : additional arguments for ``func``
+
+    Returns
+    -------
+    EnsembleResults (OrderedDict), key -> result. Keys are items of ``trajs`` (tuple for
+    a list of filenames) or keys of ``trajs`` if it is a dict. A failed trajectory does
+    not stop others: its traceback is in ``results.errors``.
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.testing import get_fn
+    >>> fname, tname = get_fn('tz2')
+    >>> results = pt.map_ensemble(pt.radgyr, [fname, [fname, fname], 'missing.nc'], tname,
+    ...                           '@CA', n_cores=2)
+    >>> len(results), results.failed
+    (2, ['missing.nc'])
+
+    See also
+    --------
+    pytraj.pmap : split frames of a single trajectory
+    '''
+    n_cores = kwargs.pop('n_cores', 2)
+    backend = kwargs.pop('backend', 'multiprocessing')
+    if backend not in ('multiprocessing', 'threads'):
+        raise ValueError('backend must be "multiprocessing" or "threads"')
+    if n_cores <= 0:
+        n_cores = cpu_count()
+
+    if isinstance(trajs, dict):
+        keys, items = list(trajs.keys()), list(trajs.values())
+    else:
+        items = list(trajs)
+        keys = [
+            tuple(item) if isinstance(item, list) else item for item in items
+        ]
+
+    # longest first, stable for equal costs
+    order = sorted(
+        range(len(items)), key=lambda i: _estimate_cost(items[i]), reverse=True)
+    tasks = [(i, items[i]) for i in order]
+    n_cores = max(1, min(n_cores, len(tasks)))
+
+    if n_cores == 1 or backend == 'threads':
+        state = _make_state(top, func, args, kwargs)
+        if n_cores == 1:
+            outputs = [_run_task(task, state) for task in tasks]
+        else:
+            from multiprocessing.pool import ThreadPool
+            pool = ThreadPool(n_cores)
+            try:
+                outputs = pool.map(
+                    lambda task: _run_task(task, state), tasks, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+    else:
+        from multiprocessing import Pool
+        pool = Pool(
+            n_cores,
+            initializer=_init_worker,
+            initargs=(top, func, args, kwargs))
+        try:
+            # chunksize=1: a free worker takes the next biggest trajectory
+            outputs = list(pool.imap_unordered(_run_task, tasks, chunksize=1))
+        finally:
+            pool.close()
+            pool.join()
+
+    by_index = dict((index, (result, tb)) for index, result, tb in outputs)
+    results = EnsembleResults()
+    for index, key in enumerate(keys):
+        result, tb = by_index[index]
+        if tb is None:
+            results[key] = result
+        else:
+            results.errors[key] = tb
+    return results
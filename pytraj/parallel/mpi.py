@@ -1,12 +1,281 @@
 import numpy as np
+from collections import OrderedDict
 
 # use absolute import
 from pytraj.utils import split_range
 from pytraj.utils.tools import concat_dict
 from pytraj.utils.get_common_objects import get_reference
+from pytraj.utils.check_and_assert import _default_dtype
 
 from .dataset import PmapDataset
 
+__all__ = ['pmap_mpi', 'iterload_mpi']
+
+
+def _staggered(comm, stagger):
+    '''yield once for each rank, ``stagger`` ranks at a time (all ranks if None)
+    '''
+    if not stagger or stagger >= comm.size:
+        yield
+        return
+    n_waves = (comm.size + stagger - 1) // stagger
+    for wave in range(n_waves):
+        if comm.rank // stagger == wave:
+            yield
+        comm.Barrier()
+
+
+def iterload_mpi(filename,
+                 top=None,
+                 comm=None,
+                 stagger=None,
+                 bcast_top=True,
+                 **kwargs):
+    '''load TrajectoryIterator on every MPI rank. The topology file is read once by
+    rank 0 and broadcast; trajectory files are opened by ``stagger`` ranks at a time to
+    avoid metadata storms on parallel filesystems.
+
+    Parameters
+    ----------
+    filename : str or list of str
+    top : {None, str, Topology}
+    comm : {None, mpi4py communicator}, default MPI.COMM_WORLD
+    stagger : {None, int}, default None
+        number of ranks that open the trajectory files at the same time. If None, all
+        ranks open the files at once
+    bcast_top : bool, default True
+        if True, rank 0 reads the topology file and broadcasts it. The broadcast
+        Topology has atoms, residues, molecules, bonds, dihedrals and box but no force
+        field parameters. Set to False to read the topology file on every rank
+        (staggered too)
+    **kwargs : additional keywords for pytraj.iterload
+
+    Returns
+    -------
+    TrajectoryIterator
+
+    Examples
+    --------
+    .. code-block:: python
+
+        import pytraj as pt
+        from pytraj.parallel.mpi import iterload_mpi
+        traj = iterload_mpi('md*.nc', 'prmtop', stagger=16)
+        data = pt.pmap_mpi(pt.radgyr, traj, '@CA')
+    '''
+    import pytraj as pt
+    from pytraj import Topology
+    from pytraj.externals.six import string_types
+
+    if comm is None:
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+
+    if bcast_top and (top is None or isinstance(top, string_types)):
+        top_state = None
+        if comm.rank == 0:
+            top_ = pt.load_topology(top) if top is not None else None
+            if top_ is None:
+                # get topology from trajectory file (e.g. pdb)
+                top_ = pt.iterload(filename, **kwargs).top
+            top_state = top_.to_dict()
+        top = Topology.from_dict(comm.bcast(top_state, root=0))
+
+    traj = None
+    for _ in _staggered(comm, stagger):
+        traj = pt.iterload(filename, top=top, **kwargs)
+    return traj
+
+
+def _gatherv(comm, array, root=0, allgather=False):
+    '''concatenate arrays of all ranks along the first axis with Gatherv (Allgatherv)
+
+    Arrays must have the same dtype and the same shape except the first axis.
+    Return None for non-root ranks if allgather is False.
+    '''
+    array = np.ascontiguousarray(array)
+    sizes = np.zeros(comm.size, dtype='i8')
+    comm.Allgather(np.array([array.size], dtype='i8'), sizes)
+    displacements = np.cumsum(sizes) - sizes
+    trailing_shape = array.shape[1:]
+
+    if allgather:
+        out = np.empty(sizes.sum(), dtype=array.dtype)
+        comm.Allgatherv(array.ravel(), [out, (sizes, displacements)])
+    elif comm.rank == root:
+        out = np.empty(sizes.sum(), dtype=array.dtype)
+        comm.Gatherv(array.ravel(), [out, (sizes, displacements)], root=root)
+    else:
+        comm.Gatherv(array.ravel(), None, root=root)
+        return None
+    return out.reshape((-1, ) + trailing_shape)
+
+
+def _reduce_sum(comm, array, root=0, allreduce=False):
+    '''element-wise sum of arrays of all ranks with Reduce (Allreduce)
+
+    Return None for non-root ranks if allreduce is False.
+    '''
+    from mpi4py import MPI
+    array = np.ascontiguousarray(array)
+    out = np.empty_like(array)
+    if allreduce:
+        comm.Allreduce(array, out, op=MPI.SUM)
+    elif comm.rank == root:
+        comm.Reduce(array, out, op=MPI.SUM, root=root)
+    else:
+        comm.Reduce(array, None, op=MPI.SUM, root=root)
+        return None
+    return out
+
+
+def _reduce_state(comm, state, root=0, allreduce=False):
+    '''merge states of all ranks (see pytraj.analysis.base_state): arrays are summed
+    (Reduce) or concatenated (Gatherv)
+    '''
+    extents = comm.allgather(state._extent())
+    state = state._aligned(extents)
+    summed = [
+        _reduce_sum(comm, arr, root=root, allreduce=allreduce)
+        for arr in state._reduce_arrays()
+    ]
+    gathered = [
+        _gatherv(comm, arr, root=root, allgather=allreduce)
+        for arr in state._gather_arrays()
+    ]
+    if allreduce or comm.rank == root:
+        return state._from_reduced(summed, gathered)
+
+
+def _reduce_mean(comm, array, n_frames, root=0, allreduce=False):
+    '''average over all frames of all ranks, given per-rank averages
+    '''
+    total = _reduce_sum(
+        comm,
+        np.append(np.asarray(array, dtype='f8').ravel() * n_frames, n_frames),
+        root=root,
+        allreduce=allreduce)
+    if total is not None:
+        return (total[:-1] / total[-1]).reshape(np.shape(array))
+
+
+def _array_metadata(data):
+    '''return a description of ``data`` if it is OrderedDict of arrays that can be
+    gathered with Gatherv, else None. Must be the same for all ranks.
+    '''
+    if not isinstance(data, dict):
+        return None
+    metadata = []
+    for key, value in data.items():
+        if (not isinstance(value, np.ndarray) or value.ndim == 0 or
+                value.dtype.hasobject):
+            return None
+        metadata.append((key, value.dtype.str, value.shape[1:]))
+    return metadata
+
+
+def _can_gatherv(comm, data):
+    '''True if ``data`` of all ranks are OrderedDict of arrays with the same keys, dtypes
+    and trailing shapes (same value for all ranks)
+    '''
+    all_metadata = comm.allgather(_array_metadata(data))
+    return all_metadata[0] is not None and all(metadata == all_metadata[0]
+                                               for metadata in all_metadata)
+
+
+def _gatherv_dict(comm, data, root=0, allgather=False):
+    '''concatenate OrderedDict of arrays of all ranks key by key with Gatherv. Must check
+    ``_can_gatherv`` first.
+
+    Return None for non-root ranks if allgather is False.
+    '''
+    out = [(key, _gatherv(comm, value, root=root, allgather=allgather))
+           for key, value in data.items()]
+    if allgather or comm.rank == root:
+        return OrderedDict(out)
+    return None
+
+
+def _gather_dict(comm, data, root=0, allgather=False):
+    '''concatenate OrderedDict of arrays of all ranks, with Gatherv if possible, else
+    gather pickled data.
+
+    Return None for non-root ranks if allgather is False.
+    '''
+    if _can_gatherv(comm, data):
+        return _gatherv_dict(comm, data, root=root, allgather=allgather)
+
+    total = comm.gather(data, root=root)
+    result = concat_dict(total) if comm.rank == root else None
+    if allgather:
+        result = comm.bcast(result, root=root)
+    return result
+
+
+def _process_func_results(comm, func, data, n_frames, my_iter_func, args,
+                          kwargs, traj, root, allreduce):
+    '''merge results of all ranks with MPI collectives (Gatherv, Reduce) if possible,
+    else gather pickled data to root.
+    '''
+    from pytraj import Frame
+    from pytraj import mean_structure, volmap, hbond
+    from pytraj.analysis import matrix
+
+    rank = comm.rank
+
+    if getattr(func, '_is_mergeable', False):
+        return _reduce_state(comm, data, root=root, allreduce=allreduce)
+
+    if func in [matrix.dist, matrix.idea, volmap]:
+        return _reduce_mean(
+            comm, data, n_frames, root=root, allreduce=allreduce)
+
+    if func is mean_structure and kwargs.get('dtype', 'frame') == 'frame':
+        xyz = _reduce_mean(
+            comm, data.xyz, n_frames, root=root, allreduce=allreduce)
+        if xyz is not None:
+            frame = Frame(xyz.shape[0])
+            frame.xyz[:] = xyz
+            return frame
+        return None
+
+    if (func is matrix.covar and kwargs.get('dtype', 'ndarray') == 'ndarray'
+            and kwargs.get('mat_type', 'full') == 'full'):
+        # covar = <x x^T> - <x><x>^T: reduce second moments and means of all ranks
+        mask = args[0] if args else kwargs.get('mask', '')
+        mean = mean_structure(my_iter_func(), mask).xyz.ravel()
+        moments = _reduce_mean(
+            comm,
+            np.concatenate((np.ravel(data + np.outer(mean, mean)), mean)),
+            n_frames,
+            root=root,
+            allreduce=allreduce)
+        if moments is not None:
+            size = len(mean)
+            mean = moments[size * size:]
+            return moments[:size * size].reshape(size,
+                                                 size) - np.outer(mean, mean)
+        return None
+
+    # hbond: ranks may find different hbonds, see concat_hbond
+    if func is not hbond and _can_gatherv(comm, data):
+        return _gatherv_dict(comm, data, root=root, allgather=allreduce)
+
+    # fallback: gather pickled data
+    total = comm.gather(data, root=root)
+    n_frames_collection = comm.gather(n_frames, root=root)
+    result = None
+    if rank == root:
+        data_collection = [(val, n_frames_)
+                           for (val, n_frames_) in zip(
+                               total, n_frames_collection)]
+        dataset_processor = PmapDataset(
+            data_collection, func=func, traj=traj, kwargs=kwargs)
+        result = dataset_processor.process()
+    if allreduce:
+        result = comm.bcast(result, root=root)
+    return result
+
 
 def pmap_mpi(func, traj, *args, **kwargs):
     """parallel with MPI (mpi4py)
@@ -16,6 +285,18 @@ def pmap_mpi(func, traj, *args, **kwargs):
     func : a function
     traj : pytraj.TrajectoryIterator
     *args, **kwargs: additional arguments
+    root : int, default 0
+        rank that gets the result
+    allreduce : bool, default False
+        if True, every rank gets the result. If False, non-root ranks get None
+
+    Notes
+    -----
+    - numpy results are collected with buffer-based collectives (Gatherv for time
+      series, Reduce for averaged matrices, mean_structure, covar and mergeable states
+      such as grid_occupancy) instead of pickling whole results to the root rank.
+    - use ``pytraj.parallel.mpi.iterload_mpi`` to read the topology once and open the
+      trajectory files on a limited number of ranks at a time.
 
     Examples
     --------
@@ -46,9 +327,15 @@ def pmap_mpi(func, traj, *args, **kwargs):
                 6.24139008,  6.48994552])]
     """
     from mpi4py import MPI
+    from pytraj import mean_structure, volmap
+    from pytraj import ired_vector_and_matrix, rotation_matrix
+    from pytraj.analysis import matrix
+
     comm = MPI.COMM_WORLD
     n_cores = comm.size
     rank = comm.rank
+    root = kwargs.pop('root', 0)
+    allreduce = kwargs.pop('allreduce', False)
 
     # update reference
     if 'ref' in kwargs:
@@ -57,29 +344,56 @@ def pmap_mpi(func, traj, *args, **kwargs):
     if not isinstance(func, (list, tuple)):
         # split traj to ``n_cores`` chunks, perform calculation
         # for rank-th chunk
-        if 'dtype' not in kwargs:
+        is_mergeable = getattr(func, '_is_mergeable', False)
+        if is_mergeable:
+            # ranks return states, merge them and then convert to the given dtype
+            # (or the default dtype of func, to return the same as the serial call)
+            dtype = kwargs.pop('dtype', None) or _default_dtype(func, 'state')
+            kwargs['dtype'] = 'state'
+        elif 'dtype' not in kwargs and func not in [
+                mean_structure,
+                matrix.dist,
+                matrix.idea,
+                matrix.covar,
+                ired_vector_and_matrix,
+                rotation_matrix,
+                volmap,
+        ]:
             kwargs['dtype'] = 'dict'
 
+        if getattr(func, '_pmap_setup', None) is not None:
+            # e.g. make sure all ranks use the same grid
+            kwargs.update(func._pmap_setup(traj, *args, **kwargs))
+
         frame_indices = kwargs.pop('frame_indices', None)
         if frame_indices is None:
             start, stop = split_range(n_cores, 0, traj.n_frames)[rank]
-            my_iter = traj.iterframe(start=start, stop=stop)
+
+            def my_iter_func():
+                return traj.iterframe(start=start, stop=stop)
         else:
             my_indices = np.array_split(frame_indices, n_cores)[rank]
-            my_iter = traj.iterframe(frame_indices=my_indices)
+
+            def my_iter_func():
+                return traj.iterframe(frame_indices=my_indices)
+
+        my_iter = my_iter_func()
         n_frames = my_iter.n_frames
         data = func(my_iter, *args, **kwargs)
-        # total : List[OrderedDict or Any]
-        total = comm.gather(data, root=0)
-        n_frames_collection = comm.gather(n_frames, root=0)
-        if rank == 0:
-            data_collection = [
-                (val, n_frames_)
-                for (val, n_frames_) in zip(total, n_frames_collection)
-            ]
-            dataset_processor = PmapDataset(
-                data_collection, func=func, traj=traj, kwargs=kwargs)
-            return dataset_processor.process()
+        result = _process_func_results(
+            comm,
+            func,
+            data,
+            n_frames,
+            my_iter_func,
+            args,
+            kwargs,
+            traj,
+            root=root,
+            allreduce=allreduce)
+        if is_mergeable and result is not None:
+            return result.to_dtype(dtype)
+        return result
     else:
         # cpptraj command style
         from pytraj.parallel.base import _load_batch_pmap
@@ -88,10 +402,11 @@ def pmap_mpi(func, traj, *args, **kwargs):
             traj=traj,
             lines=func,
             dtype='dict',
-            root=0,
+            root=root,
             mode='mpi',
+            allreduce=allreduce,
             **kwargs)
-        if rank == 0:
-            # otherwise, total=None
-            total = concat_dict((x[0] for x in total))
+        if total is not None:
+            # otherwise (non-root rank), total=None
+            total = total[0][0]
     return total
@@ -10,8 +10,9 @@ from multiprocessing import cpu_count
 from pytraj.utils.tools import concat_dict
 from pytraj.externals.six import string_types
 from pytraj.utils.get_common_objects import get_reference
+from pytraj.utils.check_and_assert import _default_dtype
 
-from .base import worker_by_func
+from .base import worker_by_func, _map_threads
 from .dataset import PmapDataset
 
 
@@ -29,6 +30,26 @@ def _pmap(func, traj, *args, **kwargs):
         if provided, pytraj will split this frame_indices into different chunks and let
         cpptraj perform calculation for specific indices.
         frame_indices must be pickable so is can be sent to different cores.
+    backend : str, {'multiprocessing', 'threads'}, default 'multiprocessing'
+        if 'threads', use a pool of threads in this process. Each thread owns a copy of
+        the TrajectoryIterator (no pickling, no Topology reloading, no result pickling).
+        Reading frames and cpptraj's actions run with the GIL released, so this only
+        speeds up functions that compute with cpptraj actions (pytraj.radgyr,
+        pytraj.distance, ..., and cpptraj command strings) and no iter_options. Python
+        code in ``func`` runs one thread at a time. cpptraj's output is not shown.
+    checkpoint : {None, str}, default None
+        if given, a job directory. Frames are split into ``n_blocks`` blocks; the result
+        of each finished block is saved to ``checkpoint/<job_key>``. Running the same job
+        again (e.g. after the node was preempted) only computes missing blocks. Blocks
+        that fail (exception, killed worker) are retried ``retries`` times. Blocks are
+        kept after the job ends; remove the directory to free disk space.
+    job_key : {None, str}, default None
+        name of the job in ``checkpoint``. If None, use a hash of func, traj (filenames,
+        sizes, modification times), arguments and n_blocks
+    n_blocks : {None, int}, default None (4 * n_cores)
+        number of blocks of a checkpointed job. Keep it when resuming a job
+    retries : int, default 2
+        number of times a failed block is retried in a checkpointed job
 
     *args, **kwargs: additional keywords
 
@@ -130,6 +151,13 @@ def _pmap(func, traj, *args, **kwargs):
     >>> # serial version
     >>> data = pt.radgyr(traj, '@CA', frame_indices=range(10, 50))
 
+    >>> # use threads instead of processes
+    >>> data = pt.pmap(pt.radgyr, traj, '@CA', n_cores=4, backend='threads')
+    >>> data = pt.pmap(['radgyr @CA', 'distance :3 :7'], traj, n_cores=4, backend='threads')
+
+    >>> # save finished blocks, rerun the same call to resume after a crash
+    >>> data = pt.pmap(pt.radgyr, traj, '@CA', n_cores=4, checkpoint='output/job') # doctest: +SKIP
+
 
     See also
     --------
@@ -145,10 +173,23 @@ def _pmap(func, traj, *args, **kwargs):
     progress = kwargs.pop('progress') if 'progress' in kwargs else None
     progress_params = kwargs.pop(
         'progress_params') if 'progress_params' in kwargs else dict()
+    backend = kwargs.pop(
+        'backend') if 'backend' in kwargs else 'multiprocessing'
+    if backend not in ('multiprocessing', 'threads'):
+        raise ValueError('backend must be "multiprocessing" or "threads"')
+    checkpoint = kwargs.pop('checkpoint') if 'checkpoint' in kwargs else None
+    job_key = kwargs.pop('job_key') if 'job_key' in kwargs else None
+    n_blocks = kwargs.pop('n_blocks') if 'n_blocks' in kwargs else None
+    retries = kwargs.pop('retries') if 'retries' in kwargs else 2
+    if checkpoint is not None and backend != 'multiprocessing':
+        raise ValueError('checkpoint requires backend="multiprocessing"')
 
     if n_cores <= 0:
         # use all available cores
         n_cores = cpu_count()
+    if checkpoint is not None and n_blocks is None:
+        # smaller blocks lose less work when a job is stopped
+        n_blocks = max(1, min(4 * n_cores, traj.n_frames))
 
     # update reference
     if 'ref' in kwargs:
@@ -156,16 +197,30 @@ def _pmap(func, traj, *args, **kwargs):
 
     if isinstance(func, (list, tuple, string_types)):
         # assume using _load_batch_pmap
-        from pytraj.parallel.base import _load_batch_pmap
+        from pytraj.parallel.base import _load_batch_pmap, worker_by_actlist
         #check_valid_command(func)
-        data = _load_batch_pmap(
-            n_cores=n_cores,
-            traj=traj,
-            lines=func,
-            dtype='dict',
-            root=0,
-            mode='multiprocessing',
-            **kwargs)
+        if checkpoint is not None:
+            ref = kwargs.pop('ref') if 'ref' in kwargs else None
+            worker = partial(
+                worker_by_actlist,
+                n_cores=n_blocks,
+                traj=traj,
+                lines=func,
+                dtype='dict',
+                ref=ref,
+                kwargs=kwargs)
+            data = _map_checkpointed(worker, n_blocks, n_cores, checkpoint,
+                                     job_key, retries,
+                                     (func, traj, ref, kwargs, n_blocks))
+        else:
+            data = _load_batch_pmap(
+                n_cores=n_cores,
+                traj=traj,
+                lines=func,
+                dtype='dict',
+                root=0,
+                mode=backend,
+                **kwargs)
         data = concat_dict((x[0] for x in data))
         return data
     else:
@@ -189,6 +244,13 @@ def _pmap(func, traj, *args, **kwargs):
         if not isinstance(traj, TrajectoryIterator):
             raise ValueError('only support TrajectoryIterator')
 
+        is_mergeable = getattr(func, '_is_mergeable', False)
+        if is_mergeable:
+            # workers return states, merge them and then convert to the given dtype
+            # (or the default dtype of func, to return the same as the serial call)
+            dtype = kwargs.pop('dtype', None) or _default_dtype(func, 'state')
+            kwargs['dtype'] = 'state'
+
         if 'dtype' not in kwargs and func not in [
                 mean_structure,
                 matrix.dist,
@@ -199,15 +261,13 @@ def _pmap(func, traj, *args, **kwargs):
         ]:
             kwargs['dtype'] = 'dict'
 
-        # keyword
-        if func is volmap:
-            assert kwargs.get('size') is not None, 'must provide "size" value'
-
-        p = Pool(n_cores)
+        if getattr(func, '_pmap_setup', None) is not None:
+            # e.g. make sure all cores use the same grid
+            kwargs.update(func._pmap_setup(traj, *args, **kwargs))
 
         pfuncs = partial(
             worker_by_func,
-            n_cores=n_cores,
+            n_cores=n_cores if checkpoint is None else n_blocks,
             func=func,
             traj=traj,
             args=args,
@@ -217,14 +277,45 @@ def _pmap(func, traj, *args, **kwargs):
             progress=progress,
             progress_params=progress_params)
 
-        data = p.map(pfuncs, [rank for rank in range(n_cores)])
-        p.close()
+        if checkpoint is not None:
+            data = _map_checkpointed(pfuncs, n_blocks, n_cores, checkpoint,
+                                     job_key, retries,
+                                     (func, traj, args, kwargs, iter_options,
+                                      apply, n_blocks))
+        elif backend == 'threads':
+            data = _map_threads(pfuncs, traj, n_cores)
+        else:
+            p = Pool(n_cores)
+            data = p.map(pfuncs, [rank for rank in range(n_cores)])
+            p.close()
 
         dataset_processor = PmapDataset(
             data, func=func, kwargs=kwargs, traj=traj)
+        if is_mergeable:
+            return dataset_processor.process().to_dtype(dtype)
         return dataset_processor.process()
 
 
+def _map_checkpointed(worker, n_blocks, n_cores, directory, key, retries,
+                      inputs):
+    from pytraj.parallel.checkpoint import map_checkpointed, job_key
+
+    inputs_key = job_key(*inputs)
+    if key is None:
+        if inputs_key is None:
+            raise ValueError(
+                'can not identify the inputs of this job, please provide job_key')
+        key = inputs_key
+    return map_checkpointed(
+        worker,
+        n_blocks,
+        n_cores,
+        directory,
+        key,
+        inputs_key=inputs_key,
+        retries=retries)
+
+
 def pmap(func=None, traj=None, *args, **kwargs):
     if func != NH_order_parameters:
         return _pmap(func, traj, *args, **kwargs)
@@ -147,7 +147,10 @@ cdef extern from "Topology.h":
 cdef class Topology:
     cdef _Topology* thisptr
     cdef public bint _own_memory
+    cdef object _arrays
+    cdef object _arrays_key
     cdef cppvector[int] _get_atom_bond_indices(self, _Atom)
+    cdef object _cache_key(self)
 
 cdef extern from "ParmFile.h": 
     ctypedef enum ParmFormatType "ParmFile::ParmFormatType":
@@ -27,7 +27,27 @@ if PY3:
 else:
     string_types = basestring
 
-__all__ = ['Topology', 'ParmFile', 'SimplifiedTopology', 'SimplifiedAtom', 'SimplifiedResidue']
+__all__ = ['Topology', 'ParmFile', 'SimplifiedTopology', 'SimplifiedAtom', 'SimplifiedResidue',
+           'TopologyArrays']
+
+_ATOM_COLUMNS = ('mass', 'charge', 'atomic_number', 'element', 'resid', 'molnum')
+_ATOM_NAME_COLUMNS = ('name', 'type')
+_RESIDUE_COLUMNS = ('res_name', 'res_first', 'res_last', 'res_number')
+_MOL_COLUMNS = ('mol_first', 'mol_last', 'mol_is_solvent')
+_ELEMENT_NAMES = None
+
+
+def _element_names():
+    '''lookup table: cpptraj's element enum -> lower case element name
+    '''
+    global _ELEMENT_NAMES
+    if _ELEMENT_NAMES is None:
+        names = {}
+        for key, value in AtomicElementDict.items():
+            names.setdefault(int(value), key.lower())
+        _ELEMENT_NAMES = np.array([names.get(i, 'unknown_element')
+                                   for i in range(max(names) + 1)])
+    return _ELEMENT_NAMES
 
 
 class SimplifiedAtom(object):
@@ -126,6 +146,70 @@ class SimplifiedTopology(object):
         return self._top.select(mask)
 
 
+class TopologyArrays(object):
+    '''read-only, columnar view of a Topology: each attribute is a numpy array, built on
+    first access and cached by the Topology until it is modified.
+
+    Columns
+    -------
+    per atom, shape=(n_atoms,)
+        name, type, element, atomic_number, mass, charge, resid (0-based residue index),
+        resname, molnum
+    per residue, shape=(n_residues,)
+        res_name, res_first, res_last (first and last+1 atom index), res_number (original
+        residue number)
+    per molecule, shape=(n_mols,)
+        mol_first, mol_last (first and last+1 atom index), mol_is_solvent
+    connectivity
+        bond_indices (n_bonds, 2), angle_indices (n_angles, 3), dihedral_indices
+        (n_dihedrals, 4)
+
+    Notes
+    -----
+    Changes made through mutable Atom views (``Topology.atom``) after a column was built
+    are not detected, call ``Topology._invalidate_arrays`` in that case.
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> top = pt.load_topology('data/tz2.parm7')
+    >>> arrays = top.arrays
+    >>> arrays.resname[0]
+    'SER'
+    >>> arrays.mass is top.arrays.mass
+    True
+    >>> arrays.mass.flags.writeable
+    False
+    >>> arrays.bond_indices.shape
+    (230, 2)
+    '''
+    columns = (_ATOM_COLUMNS + _ATOM_NAME_COLUMNS + ('resname',) + _RESIDUE_COLUMNS +
+               _MOL_COLUMNS + ('bond_indices', 'angle_indices', 'dihedral_indices'))
+
+    def __init__(self, top):
+        self._top = top
+
+    def __getattr__(self, name):
+        if name not in TopologyArrays.columns:
+            raise AttributeError(name)
+        return self._top._get_array(name)
+
+    def __getitem__(self, name):
+        if name not in TopologyArrays.columns:
+            raise KeyError(name)
+        return self._top._get_array(name)
+
+    def __dir__(self):
+        return list(TopologyArrays.columns)
+
+    def keys(self):
+        return list(TopologyArrays.columns)
+
+    def __repr__(self):
+        return '<TopologyArrays: {} atoms, {} residues, {} mols>'.format(
+            self._top.n_atoms, self._top.n_residues, self._top.n_mols)
+
+
 cdef class Topology:
     def __cinit__(self, *args):
         """
@@ -173,6 +257,7 @@ cdef class Topology:
             box_txt)
 
     def add_atom(self, Atom atom, Residue residue):
+        self._invalidate_arrays()
         self.thisptr.AddTopAtom(atom.thisptr[0], residue.thisptr[0])
 
     def __repr__(self):
@@ -249,6 +334,7 @@ cdef class Topology:
             # no error? really?
             other = args[0]
             self.thisptr[0] = other.thisptr[0]
+            self._invalidate_arrays()
 
     def __getitem__(self, idx):
         """ Return an Atom, a list of Atom or a new Topology
@@ -324,6 +410,8 @@ cdef class Topology:
         cdef int n_atoms = self.n_atoms
         cdef int idx = 0
 
+        # atoms can be updated
+        self._invalidate_arrays()
         for idx in range(n_atoms):
             atom = Atom()
             atom.thisptr = &(self.thisptr.GetAtomView(idx))
@@ -401,53 +489,50 @@ cdef class Topology:
         >>> # get all atoms for 1st residue
         >>> atoms = simp_top.atoms[res.first:res.last]
         '''
-        cdef _Atom atom
-        cdef atom_iterator ait
-        cdef res_iterator rit
-        cdef int idx = 0
-        cdef _Residue res
-        cdef list atoms, residues
-
-        atoms = []
-        residues = []
+        cdef int idx
+        cdef list atoms = []
+        cdef list residues = []
 
         simplified_top = SimplifiedTopology()
 
         # get atoms
-        ait = self.thisptr.begin()
-        while ait != self.thisptr.end():
-            atom = deref(ait)
-            res = self.thisptr.Res(atom.ResNum())
-            sim_atom = SimplifiedAtom(name=atom.c_str().strip(),
-                                        type=atom.Type().Truncated(),
-                                        element=get_key(
-                                            atom.Element(), AtomicElementDict).lower(),
-                                        charge=atom.Charge(),
-                                        mass=atom.Mass(),
-                                        index=idx,
-                                        atomic_number=atom.AtomicNumber(),
-                                        resname=res.c_str().strip(),
-                                        resid=res.OriginalResNum() - 1,
-                                        molnum=atom.MolNum(),
-                                        simplified_top=simplified_top)
-            sim_atom._bond_indices = np.asarray(self._get_atom_bond_indices(atom), dtype='int')
+        names = self._get_array('name').tolist()
+        types = self._get_array('type').tolist()
+        elements = self._get_array('element').tolist()
+        charges = self._get_array('charge').tolist()
+        masses = self._get_array('mass').tolist()
+        atomic_numbers = self._get_array('atomic_number').tolist()
+        resnames = self._get_array('resname').tolist()
+        resids = (self._get_array('res_number')[self._get_array('resid')] - 1).tolist()
+        molnums = self._get_array('molnum').tolist()
+
+        for idx in range(self.thisptr.Natom()):
+            sim_atom = SimplifiedAtom(name=names[idx],
+                                      type=types[idx],
+                                      element=elements[idx],
+                                      charge=charges[idx],
+                                      mass=masses[idx],
+                                      index=idx,
+                                      atomic_number=atomic_numbers[idx],
+                                      resname=resnames[idx],
+                                      resid=resids[idx],
+                                      molnum=molnums[idx],
+                                      simplified_top=simplified_top)
+            sim_atom._bond_indices = np.asarray(
+                self._get_atom_bond_indices(self.thisptr.index_opr(idx)), dtype='int')
             atoms.append(sim_atom)
-            idx += 1
-            incr(ait)
+        simplified_top.atoms = np.asarray(atoms)
 
         # get residues
-        rit = self.thisptr.ResStart()
-        idx = 0
-        simplified_top.atoms = np.asarray(atoms)
-        while rit != self.thisptr.ResEnd():
-            res = deref(rit)
-            residues.append(SimplifiedResidue(name=res.c_str().strip(),
+        for idx, (name, first, last) in enumerate(zip(
+                self._get_array('res_name').tolist(),
+                self._get_array('res_first').tolist(),
+                self._get_array('res_last').tolist())):
+            residues.append(SimplifiedResidue(name=name,
                                               index=idx,
-                                              first=res.FirstAtom(),
-                                              last=res.LastAtom(),
+                                              first=first,
+                                              last=last,
                                               associated_topology=simplified_top))
-            idx += 1
-            incr(rit)
         simplified_top.residues = np.asarray(residues)
         simplified_top._top = self
         return simplified_top
@@ -487,6 +572,7 @@ cdef class Topology:
         print(out)
 
     def start_new_mol(self):
+        self._invalidate_arrays()
         self.thisptr.StartNewMol()
 
     property filename:
@@ -593,6 +679,7 @@ cdef class Topology:
             return new_top
         else:
             self.thisptr[0] = new_top.thisptr[0]
+            self._invalidate_arrays()
 
     def is_empty(self):
         return self.n_atoms == 0
@@ -619,21 +706,185 @@ cdef class Topology:
         if top is self:
             raise ValueError('must not be your self')
         self.thisptr.AppendTop(top.thisptr[0])
+        self._invalidate_arrays()
         return self
 
     property mass:
         '''return a copy of atom masses (numpy 1D array)'''
 
         def __get__(self):
-            """return python array of atom masses"""
-            cdef Atom atom
-            return np.asarray([atom.mass for atom in self.atoms])
+            return self._get_array('mass').copy()
 
     property charge:
         '''return a copy of atom charges (numpy 1D array)'''
 
         def __get__(self):
-            return np.asarray([atom.charge for atom in self.atoms])
+            return self._get_array('charge').copy()
+
+    property arrays:
+        '''columnar, cached view of atom, residue and molecule attributes.
+        See :class:`TopologyArrays`
+        '''
+
+        def __get__(self):
+            return TopologyArrays(self)
+
+    cdef object _cache_key(self):
+        # cheap to compute, to catch updates done directly on the C++ Topology
+        return (<size_t> self.thisptr, self.thisptr.Natom(), self.thisptr.Nres(),
+                self.thisptr.Nmol(), self.thisptr.Bonds().size(),
+                self.thisptr.BondsH().size(), self.thisptr.Angles().size(),
+                self.thisptr.AnglesH().size(), self.thisptr.Dihedrals().size(),
+                self.thisptr.DihedralsH().size())
+
+    def _invalidate_arrays(self):
+        '''drop cached arrays, must be called after updating the Topology
+        '''
+        self._arrays = None
+
+    def _get_array(self, name):
+        '''return a cached column (see :class:`TopologyArrays`), build it if needed
+        '''
+        key = self._cache_key()
+        if self._arrays is None or self._arrays_key != key:
+            self._arrays = {}
+            self._arrays_key = key
+        cdef dict cache = self._arrays
+
+        if name in cache:
+            return cache[name]
+        if name in _ATOM_COLUMNS:
+            columns = self._atom_columns()
+        elif name in _ATOM_NAME_COLUMNS:
+            columns = self._atom_name_columns()
+        elif name in _RESIDUE_COLUMNS:
+            columns = self._residue_columns()
+        elif name in _MOL_COLUMNS:
+            columns = self._mol_columns()
+        elif name == 'resname':
+            columns = {'resname': self._get_array('res_name')[self._get_array('resid')]}
+        elif name == 'bond_indices':
+            columns = {name: self._bond_array()}
+        elif name == 'angle_indices':
+            columns = {name: self._angle_array()}
+        elif name == 'dihedral_indices':
+            columns = {name: self._dihedral_array()}
+        else:
+            raise KeyError(name)
+
+        for column, arr in columns.items():
+            arr.setflags(write=False)
+            cache[column] = arr
+        return cache[name]
+
+    def _atom_columns(self):
+        cdef int i
+        cdef int n_atoms = self.thisptr.Natom()
+        cdef double[:] mass = np.empty(n_atoms, dtype='f8')
+        cdef double[:] charge = np.empty(n_atoms, dtype='f8')
+        cdef int[:] atomic_number = np.empty(n_atoms, dtype='i4')
+        cdef int[:] element = np.empty(n_atoms, dtype='i4')
+        cdef int[:] resid = np.empty(n_atoms, dtype='i4')
+        cdef int[:] molnum = np.empty(n_atoms, dtype='i4')
+
+        for i in range(n_atoms):
+            mass[i] = self.thisptr.index_opr(i).Mass()
+            charge[i] = self.thisptr.index_opr(i).Charge()
+            atomic_number[i] = self.thisptr.index_opr(i).AtomicNumber()
+            element[i] = <int> self.thisptr.index_opr(i).Element()
+            resid[i] = self.thisptr.index_opr(i).ResNum()
+            molnum[i] = self.thisptr.index_opr(i).MolNum()
+
+        return {'mass': np.asarray(mass),
+                'charge': np.asarray(charge),
+                'atomic_number': np.asarray(atomic_number, dtype='i8'),
+                'element': _element_names()[np.asarray(element)],
+                'resid': np.asarray(resid, dtype='i8'),
+                'molnum': np.asarray(molnum, dtype='i8')}
+
+    def _atom_name_columns(self):
+        cdef int i
+        cdef list names = []
+        cdef list types = []
+
+        for i in range(self.thisptr.Natom()):
+            names.append(self.thisptr.index_opr(i).c_str().rstrip())
+            types.append(self.thisptr.index_opr(i).Type().Truncated())
+        return {'name': np.array(names, dtype='U'),
+                'type': np.array(types, dtype='U')}
+
+    def _residue_columns(self):
+        cdef int i
+        cdef int n_residues = self.thisptr.Nres()
+        cdef int[:] first = np.empty(n_residues, dtype='i4')
+        cdef int[:] last = np.empty(n_residues, dtype='i4')
+        cdef int[:] number = np.empty(n_residues, dtype='i4')
+        cdef list names = []
+
+        for i in range(n_residues):
+            first[i] = self.thisptr.Res(i).FirstAtom()
+            last[i] = self.thisptr.Res(i).LastAtom()
+            number[i] = self.thisptr.Res(i).OriginalResNum()
+            names.append(self.thisptr.Res(i).c_str().rstrip())
+        return {'res_name': np.array(names, dtype='U'),
+                'res_first': np.asarray(first, dtype='i8'),
+                'res_last': np.asarray(last, dtype='i8'),
+                'res_number': np.asarray(number, dtype='i8')}
+
+    def _mol_columns(self):
+        cdef int i
+        cdef int n_mols = self.thisptr.Nmol()
+        cdef int[:] first = np.empty(n_mols, dtype='i4')
+        cdef int[:] last = np.empty(n_mols, dtype='i4')
+        is_solvent = np.empty(n_mols, dtype=bool)
+
+        for i in range(n_mols):
+            first[i] = self.thisptr.Mol(i).BeginAtom()
+            last[i] = self.thisptr.Mol(i).EndAtom()
+            is_solvent[i] = self.thisptr.Mol(i).IsSolvent()
+        return {'mol_first': np.asarray(first, dtype='i8'),
+                'mol_last': np.asarray(last, dtype='i8'),
+                'mol_is_solvent': is_solvent}
+
+    def _bond_array(self):
+        # both noh and with-h bonds
+        cdef BondArray bondarray = self.thisptr.Bonds()
+        cdef BondArray bondarray_h = self.thisptr.BondsH()
+        cdef int i
+
+        bondarray.insert(bondarray.end(), bondarray_h.begin(), bondarray_h.end())
+        cdef int[:, ::1] out = np.empty((bondarray.size(), 2), dtype='i4')
+        for i in range(bondarray.size()):
+            out[i, 0] = bondarray[i].A1()
+            out[i, 1] = bondarray[i].A2()
+        return np.asarray(out, dtype='i8')
+
+    def _angle_array(self):
+        cdef AngleArray anglearray = self.thisptr.Angles()
+        cdef AngleArray anglearray_h = self.thisptr.AnglesH()
+        cdef int i
+
+        anglearray.insert(anglearray.end(), anglearray_h.begin(), anglearray_h.end())
+        cdef int[:, ::1] out = np.empty((anglearray.size(), 3), dtype='i4')
+        for i in range(anglearray.size()):
+            out[i, 0] = anglearray[i].A1()
+            out[i, 1] = anglearray[i].A2()
+            out[i, 2] = anglearray[i].A3()
+        return np.asarray(out, dtype='i8')
+
+    def _dihedral_array(self):
+        cdef DihedralArray dharr = self.thisptr.Dihedrals()
+        cdef DihedralArray dharr_h = self.thisptr.DihedralsH()
+        cdef int i
+
+        dharr.insert(dharr.end(), dharr_h.begin(), dharr_h.end())
+        cdef int[:, ::1] out = np.empty((dharr.size(), 4), dtype='i4')
+        for i in range(dharr.size()):
+            out[i, 0] = dharr[i].A1()
+            out[i, 1] = dharr[i].A2()
+            out[i, 2] = dharr[i].A3()
+            out[i, 3] = dharr[i].A4()
+        return np.asarray(out, dtype='i8')
 
     def _indices_bonded_to(self, atom_name):
         """return indices of the number of atoms that each atom bonds to
@@ -642,20 +893,16 @@ cdef class Topology:
         ----------
         atom_name : name of the atom
         """
-        cdef list arr0 = []
-        cdef int i, count = 0
-
-        # convert to lower case
+        # convert to upper case
         atom_name = atom_name.upper()
 
-        for atom in self:
-            bond_indices = atom.bonded_indices()
-            count = 0
-            for i in bond_indices:
-                if self[i].name.startswith(atom_name):
-                    count += 1
-            arr0.append(count)
-        return np.array(arr0)
+        is_target = np.char.startswith(self._get_array('name'), atom_name)
+        bonds = self._get_array('bond_indices')
+        counts = (np.bincount(bonds[:, 0], weights=is_target[bonds[:, 1]],
+                              minlength=self.n_atoms) +
+                  np.bincount(bonds[:, 1], weights=is_target[bonds[:, 0]],
+                              minlength=self.n_atoms))
+        return counts.astype('i8')
 
     def add_bonds(self, cython.integral[:, ::1] indices):
         """add bond for pairs of atoms.
@@ -671,6 +918,7 @@ cdef class Topology:
         for i in range(indices.shape[0]):
             j, k = indices[i, :]
             self.thisptr.AddBond(j, k)
+        self._invalidate_arrays()
 
     def add_angles(self, cython.integral[:, ::1] indices):
         """add angle for a group of 3 atoms.
@@ -686,6 +934,7 @@ cdef class Topology:
         for i in range(indices.shape[0]):
             j, k, n = indices[i, :]
             self.thisptr.AddAngle(j, k, n)
+        self._invalidate_arrays()
 
     def add_dihedrals(self, cython.integral[:, ::1] indices):
         """add dihedral for a group of 4 atoms.
@@ -701,6 +950,7 @@ cdef class Topology:
         for i in range(indices.shape[0]):
             j, k, n, m = indices[i, :]
             self.thisptr.AddDihedral(j, k, n, m)
+        self._invalidate_arrays()
 
     property bonds:
         def __get__(self):
@@ -744,15 +994,15 @@ cdef class Topology:
 
     property bond_indices:
         def __get__(self):
-            return np.asarray([b.indices for b in self.bonds], dtype=np.int64)
+            return self._get_array('bond_indices').copy()
 
     property angle_indices:
         def __get__(self):
-            return np.asarray([b.indices for b in self.angles], dtype=np.int64)
+            return self._get_array('angle_indices').copy()
 
     property dihedral_indices:
         def __get__(self):
-            return np.asarray([b.indices for b in self.dihedrals], dtype=np.int64)
+            return self._get_array('dihedral_indices').copy()
 
     def __getstate__(self):
         return self.to_dict()
@@ -793,46 +1043,24 @@ cdef class Topology:
     def to_dict(self):
         '''convert Topology to Python dict
         '''
-        cdef:
-            int n_atoms = self.n_atoms
-            int idx
-            Atom atom
-
         d = {}
 
-        short_resnamelist = np.asarray([res.name for res in self.residues])
-        resids = []
-
-        atomnames = []
-        atomtypes = []
-        atomcharges = []
-        molnums = []
-        resnames = []
-
-        for idx, atom in enumerate(self.atoms):
-            resids.append(atom.resid)
-            atomnames.append(atom.name)
-            atomtypes.append(atom.type)
-            atomcharges.append(atom.charge)
-            molnums.append(atom.molnum)
-            resnames.append(short_resnamelist[atom.resid])
-
-        d['atom_name'] = atomnames
-        d['atom_type'] = atomtypes
-        d['atom_charge'] = atomcharges
+        d['atom_name'] = self._get_array('name').tolist()
+        d['atom_type'] = self._get_array('type').tolist()
+        d['atom_charge'] = self._get_array('charge').tolist()
         d['atom_mass'] = self.mass
-        d['resname'] = resnames
-        d['resid'] = resids
+        d['resname'] = self._get_array('resname').tolist()
+        d['resid'] = self._get_array('resid').tolist()
         d['bond_index'] = self.bond_indices
-        d['dihedral_index'] = self.dihedral_indices
-        d['mol_number'] = molnums
+        d['dihedral_index'] = self.dihedral_indices.copy()
+        d['mol_number'] = self._get_array('molnum').tolist()
         d['box'] = self.box.values
 
         return d
 
     property _total_charge:
         def __get__(self):
-            return sum([atom.charge for atom in self.atoms])
+            return self._get_array('charge').sum()
 
     def save(self, filename=None, format='AMBERPARM'):
         """save to given file format (parm7, psf, ...)
@@ -845,6 +1073,7 @@ cdef class Topology:
         '''
         mask = mask.encode()
         self.thisptr.SetSolvent(mask)
+        self._invalidate_arrays()
 
     def residue(self, int idx, bint atom=False):
         '''
@@ -860,6 +1089,8 @@ cdef class Topology:
         Make this method private for now.
         '''
         cdef Atom atom = Atom()
+        # the Atom can be updated
+        self._invalidate_arrays()
         atom.own_memory = False
         atom.thisptr = &self.thisptr.GetAtomView(idx)
         atom.resname = self.thisptr.Res(atom.resid).c_str().strip()
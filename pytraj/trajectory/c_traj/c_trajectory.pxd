@@ -10,6 +10,7 @@ from ...topology.topology cimport _Topology, Topology
 from ...datasets.c_datasets cimport _DatasetCoords
 from ...datasets.c_datasetlist cimport DatasetList as CpptrajDatasetList, _DatasetList as _CpptrajDatasetList
 from ...analysis.c_action.actionlist cimport _ActionList, ActionList
+from ...analysis.c_action.c_action cimport _ActionFrame, Action
 
 
 cdef extern from "DataSet_Coords_TRJ.h": 
@@ -17,7 +18,7 @@ cdef extern from "DataSet_Coords_TRJ.h":
         _TrajectoryCpptraj() 
         int AddSingleTrajin(const string&, _ArgList&, _Topology *)
         #size_t Size() const 
-        void GetFrame(int idx, _Frame& fIn)
+        void GetFrame(int idx, _Frame& fIn) nogil
         #void GetFrame(int idx, _Frame& fIn, _AtomMask& mIn)
         #void CoordsSetup(const _Topology&, const CoordinateInfo &)
         #const _Topology& Top() const 
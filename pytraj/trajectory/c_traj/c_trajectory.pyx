@@ -1,4 +1,5 @@
 # distutils: language = c++
+cimport cython
 import os
 import numpy as np
 from ..trajectory import Trajectory
@@ -494,6 +495,89 @@ cdef class TrajectoryCpptraj:
                 self._do_transformation(frame)
             yield frame
 
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def _run_actionlist(self, ActionList actlist, frame_indices):
+        '''perform all actions in ``actlist`` for given frame indices. Reading frames,
+        transformations (autoimage, superpose, ...) and actions are done in C++ with
+        the GIL released.
+
+        Parameters
+        ----------
+        actlist : ActionList, must be already setup
+        frame_indices : array-like of non-negative int, smaller than n_frames
+        '''
+        cdef Frame frame = Frame()
+        cdef ActionList translist = self._actionlist
+        cdef _ActionFrame actionframe_
+        cdef int[:] indices = np.ascontiguousarray(frame_indices, dtype='i4')
+        cdef int i
+        cdef int n_indices = indices.shape[0]
+        cdef int n_done = actlist.n_frames
+        cdef int n_transformed = translist.n_frames
+        cdef bint being_transformed = self._being_transformed
+
+        if being_transformed and not translist.is_setup:
+            # same as translist.compute
+            translist.setup(translist.top)
+            translist.is_setup = True
+
+        frame.thisptr[0] = self.thisptr.AllocateFrame()
+
+        with nogil:
+            for i in range(n_indices):
+                self.thisptr.GetFrame(indices[i], frame.thisptr[0])
+                if being_transformed:
+                    actionframe_ = _ActionFrame(frame.thisptr, n_transformed)
+                    translist.thisptr.DoActions(n_transformed, actionframe_)
+                    n_transformed += 1
+                actionframe_ = _ActionFrame(frame.thisptr, n_done)
+                actlist.thisptr.DoActions(n_done, actionframe_)
+                n_done += 1
+
+        translist.n_frames = n_transformed
+        actlist.n_frames = n_done
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def _run_action(self, Action act, frame_indices):
+        '''same as ``_run_actionlist`` but for a single Action (used by ``do_action``)
+
+        Parameters
+        ----------
+        act : Action, must be already setup
+        frame_indices : array-like of non-negative int, smaller than n_frames
+        '''
+        cdef Frame frame = Frame()
+        cdef ActionList translist = self._actionlist
+        cdef _ActionFrame actionframe_
+        cdef int[:] indices = np.ascontiguousarray(frame_indices, dtype='i4')
+        cdef int i
+        cdef int n_indices = indices.shape[0]
+        cdef int n_done = act.n_frames
+        cdef int n_transformed = translist.n_frames
+        cdef bint being_transformed = self._being_transformed
+
+        if being_transformed and not translist.is_setup:
+            translist.setup(translist.top)
+            translist.is_setup = True
+
+        frame.thisptr[0] = self.thisptr.AllocateFrame()
+
+        with nogil:
+            for i in range(n_indices):
+                self.thisptr.GetFrame(indices[i], frame.thisptr[0])
+                if being_transformed:
+                    actionframe_ = _ActionFrame(frame.thisptr, n_transformed)
+                    translist.thisptr.DoActions(n_transformed, actionframe_)
+                    n_transformed += 1
+                actionframe_ = _ActionFrame(frame.thisptr, n_done)
+                act.baseptr.DoAction(n_done, actionframe_)
+                n_done += 1
+
+        translist.n_frames = n_transformed
+        act.n_frames = n_done
+
     def translate(self, command):
         return self._add_transformation('translate', command)
 
@@ -2,6 +2,7 @@
 from libcpp.string cimport string
 from ..frame cimport _Frame, Frame
 from ...core.c_core cimport _ArgList, ArgList, Box
+from ...core.box cimport _Box
 from ...core.coordinfo cimport _CoordinateInfo, CoordinateInfo
 from ...core.c_dict cimport TrajFormatType
 from ...topology.topology cimport _Topology, Topology
@@ -19,3 +20,4 @@ cdef extern from "TrajoutList.h":
 cdef class TrajectoryWriter:
     cdef _Trajout* thisptr
     cdef unsigned int count
+    cdef int n_atoms
@@ -1,4 +1,6 @@
 # distutils: language = c++
+from libc.string cimport memcpy
+import numpy as np
 from pytraj.externals.six import string_types
 from pytraj.core.c_dict import TrajFormatDict
 from pytraj.utils.check_and_assert import file_exist
@@ -8,6 +10,7 @@ cdef class TrajectoryWriter:
     def __cinit__(self, *args, **kwd):
         self.thisptr = new _Trajout()
         self.count = 0
+        self.n_atoms = 0
 
         if args or kwd:
             self.open(*args, **kwd)
@@ -79,6 +82,7 @@ cdef class TrajectoryWriter:
 
         # real open
         self.thisptr.SetupTrajWrite(top_.thisptr, crdinfo_.thisptr[0], 0)
+        self.n_atoms = top_.n_atoms
 
     def close(self):
         self.thisptr.EndTraj()
@@ -95,6 +99,99 @@ cdef class TrajectoryWriter:
         self.thisptr.WriteFrame(self.count, frame.thisptr[0])
         self.count += 1
 
+    def write_xyz(self, xyz, box=None, time=None, velocity=None, force=None,
+                  frame_indices=None, int chunksize=1000):
+        '''write many snapshots from arrays without creating a Frame for each of them
+
+        Parameters
+        ----------
+        xyz : array-like, shape=(n_frames, n_atoms, 3), dtype float32 or float64
+        box : {None, array-like}, shape=(n_frames, 6) or (6,)
+            unitcells (a, b, c, alpha, beta, gamma)
+        time : {None, array-like}, shape=(n_frames,)
+        velocity, force : {None, array-like}, shape=(n_frames, n_atoms, 3)
+            only written if the writer was opened with has_velocity (has_force) in crdinfo
+        frame_indices : {None, array-like}, default None
+            if given, only write those frames
+        chunksize : int, default 1000
+            number of frames converted to contiguous float64 at a time
+            (no copy if the input is already contiguous float64)
+
+        Examples
+        --------
+        >>> import pytraj as pt
+        >>> from pytraj import TrajectoryWriter
+        >>> traj = pt.datafiles.load_tz2_ortho()
+        >>> xyz = traj.xyz.astype('f4')
+        >>> with TrajectoryWriter('output/test_xyz.nc', top=traj.top) as writer:
+        ...     writer.write_xyz(xyz, box=traj.unitcells)
+        '''
+        cdef Frame frame
+        cdef double[:, :, ::1] xyz_chunk
+        cdef double[:, ::1] box_chunk
+        cdef double[::1] time_chunk
+        cdef double[:, :, ::1] velocity_chunk
+        cdef double[:, :, ::1] force_chunk
+        cdef int i, n_atoms
+        cdef size_t nbytes
+
+        xyz = np.asarray(xyz)
+        if xyz.ndim == 2:
+            xyz = xyz[None]
+        if xyz.ndim != 3 or xyz.shape[2] != 3:
+            raise ValueError('xyz must have shape of (n_frames, n_atoms, 3)')
+        n_frames, n_atoms = xyz.shape[:2]
+        if self.n_atoms > 0 and n_atoms != self.n_atoms:
+            raise ValueError('number of atoms does not match Topology ({} vs {})'.format(
+                n_atoms, self.n_atoms))
+
+        if box is not None:
+            box = np.asarray(box, dtype='f8')
+            if box.ndim == 1:
+                box = np.repeat(box[None], n_frames, axis=0)
+        for name, values in [('box', box), ('time', time), ('velocity', velocity),
+                             ('force', force)]:
+            if values is not None and len(values) != n_frames:
+                raise ValueError('{} must have {} frames'.format(name, n_frames))
+
+        if frame_indices is None:
+            chunks = (slice(start, min(start + chunksize, n_frames))
+                      for start in range(0, n_frames, chunksize))
+        else:
+            frame_indices = np.asarray(frame_indices, dtype='i8')
+            chunks = (frame_indices[start:start + chunksize]
+                      for start in range(0, len(frame_indices), chunksize))
+
+        nbytes = n_atoms * 3 * sizeof(double)
+        frame = Frame(n_atoms)
+        for chunk in chunks:
+            xyz_chunk = np.ascontiguousarray(xyz[chunk], dtype='f8')
+            if box is not None:
+                box_chunk = np.ascontiguousarray(box[chunk], dtype='f8')
+            if time is not None:
+                time_chunk = np.ascontiguousarray(np.asarray(time)[chunk], dtype='f8')
+            if velocity is not None:
+                velocity_chunk = np.ascontiguousarray(np.asarray(velocity)[chunk], dtype='f8')
+                if not frame.has_velocity():
+                    frame.velocity = np.asarray(velocity_chunk[0])
+            if force is not None:
+                force_chunk = np.ascontiguousarray(np.asarray(force)[chunk], dtype='f8')
+                if not frame.has_force():
+                    frame.force = np.asarray(force_chunk[0])
+
+            for i in range(xyz_chunk.shape[0]):
+                memcpy(frame.thisptr.xAddress(), &xyz_chunk[i, 0, 0], nbytes)
+                if box is not None:
+                    frame.thisptr.SetBox(_Box(&box_chunk[i, 0]))
+                if time is not None:
+                    frame.thisptr.SetTime(time_chunk[i])
+                if velocity is not None:
+                    memcpy(frame.thisptr.vAddress(), &velocity_chunk[i, 0, 0], nbytes)
+                if force is not None:
+                    memcpy(frame.thisptr.fAddress(), &force_chunk[i, 0, 0], nbytes)
+                self.thisptr.WriteFrame(self.count, frame.thisptr[0])
+                self.count += 1
+
     @classmethod
     def get_formats(cls):
         return list(TrajFormatDict.keys())
@@ -0,0 +1,620 @@
+"""pytraj-native chunked and compressed trajectory (.ptz) for fast analysis re-reads
+
+Layout of a .ptz file::
+
+    magic (8 bytes)
+    chunk 0: compressed coordinates, compressed box and time
+    chunk 1: ...
+    metadata (JSON) and chunk index (offset and size of each chunk)
+    footer: metadata offset, metadata size (2 x uint64), magic (8 bytes)
+
+Coordinates in each chunk are quantized to integers with a given ``precision`` (like
+XTC), stored as deltas (between atoms for the first frame, between frames for the
+others) with the smallest integer type that fits, byte-shuffled and zlib-compressed.
+With ``precision=None`` coordinates are stored losslessly (float64, byte-shuffled and
+zlib-compressed).
+
+Examples
+--------
+>>> import pytraj as pt
+>>> traj = pt.datafiles.load_tz2_ortho()
+>>> pt.write_traj('output/tz2.ptz', traj, overwrite=True, options='precision 0.001')
+>>> cache = pt.iterload('output/tz2.ptz', traj.top)
+>>> cache.n_frames
+10
+>>> data = pt.rmsd(cache, ref=0, mask='@CA')
+"""
+from __future__ import absolute_import
+import os
+import json
+import zlib
+import struct
+import numpy as np
+
+from ..externals.six import string_types
+from ..utils.convert import array_to_cpptraj_atommask
+
+__all__ = [
+    'CompressedTrajectory',
+    'CompressedTrajectoryWriter',
+    'write_compressed_trajectory',
+    'is_compressed_trajectory',
+]
+
+MAGIC = b'PTZTRAJ1'
+EXTENSION = '.ptz'
+_FOOTER = struct.Struct('<QQ')
+_INDEX_DTYPE = np.dtype([('offset', '<u8'), ('n_frames', '<u8'),
+                         ('coord_nbytes', '<u8'), ('extra_nbytes', '<u8'),
+                         ('itemsize', '<u8')])
+_INT_TYPES = [(1, np.int8), (2, np.int16), (4, np.int32), (8, np.int64)]
+
+
+def is_compressed_trajectory(filename):
+    '''True if ``filename`` is a .ptz file (check extension or magic bytes)
+
+    Examples
+    --------
+    >>> is_compressed_trajectory('md.ptz')
+    True
+    >>> is_compressed_trajectory(['md.nc'])
+    False
+    '''
+    if not isinstance(filename, string_types):
+        return False
+    if filename.endswith(EXTENSION):
+        return True
+    try:
+        with open(filename, 'rb') as fh:
+            return fh.read(len(MAGIC)) == MAGIC
+    except (IOError, OSError):
+        return False
+
+
+def _shuffle(array):
+    '''group bytes of the same significance together: better compression
+    '''
+    array = np.ascontiguousarray(array)
+    return array.view('u1').reshape(-1, array.itemsize).T.tobytes()
+
+
+def _unshuffle(data, dtype):
+    dtype = np.dtype(dtype)
+    raw = np.frombuffer(data, dtype='u1').reshape(dtype.itemsize, -1)
+    return np.ascontiguousarray(raw.T).view(dtype).ravel()
+
+
+def _encode_coordinates(xyz, precision, level):
+    '''return (compressed bytes, itemsize). itemsize=0 means lossless float64
+    '''
+    if not precision:
+        return zlib.compress(_shuffle(xyz.astype('f8')), level), 0
+    q = np.round(xyz / precision).astype('i8')
+    delta = q.copy()
+    delta[1:] -= q[:-1]
+    delta[0, 1:] -= q[0, :-1]
+    largest = max(abs(int(delta.max())), abs(int(delta.min()))) if delta.size else 0
+    for itemsize, int_type in _INT_TYPES:
+        if largest < 2**(8 * itemsize - 1):
+            break
+    return zlib.compress(_shuffle(delta.astype(int_type)), level), itemsize
+
+
+def _decode_coordinates(data, itemsize, shape, precision):
+    if itemsize == 0:
+        return _unshuffle(zlib.decompress(data), 'f8').reshape(shape)
+    int_type = dict(_INT_TYPES)[itemsize]
+    delta = _unshuffle(zlib.decompress(data), int_type).astype('i8').reshape(
+        shape)
+    delta[0] = np.cumsum(delta[0], axis=0)
+    q = np.cumsum(delta, axis=0)
+    return q * precision
+
+
+class CompressedTrajectoryWriter(object):
+    '''write .ptz file chunk by chunk. Frames are buffered until ``chunksize`` frames
+    are collected.
+
+    Parameters
+    ----------
+    filename : str
+    n_atoms : int
+    precision : {None, float}, default 0.001 (Angstrom)
+        if None, store coordinates losslessly
+    chunksize : int, default 100
+        number of frames in each chunk (the unit of random access)
+    compresslevel : int, default 1
+        zlib compression level (1-9)
+    overwrite : bool, default False
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> traj = pt.datafiles.load_tz2_ortho()
+    >>> with CompressedTrajectoryWriter('output/test.ptz', traj.n_atoms, overwrite=True) as writer:
+    ...     writer.write_xyz(traj.xyz, box=traj.unitcells, time=traj.time)
+    '''
+
+    def __init__(self,
+                 filename,
+                 n_atoms,
+                 precision=0.001,
+                 chunksize=100,
+                 compresslevel=1,
+                 overwrite=False):
+        if os.path.exists(filename) and not overwrite:
+            raise IOError(
+                '{} exists. Use overwrite=True or remove the file'.format(
+                    filename))
+        if chunksize < 1:
+            raise ValueError('chunksize must be positive')
+        self.filename = filename
+        self.n_atoms = int(n_atoms)
+        self.precision = float(precision) if precision else None
+        self.chunksize = int(chunksize)
+        self.compresslevel = compresslevel
+        self.n_frames = 0
+        self._index = []
+        self._has_box = None
+        self._has_time = None
+        self._buffer = []
+        self._n_buffered = 0
+        self._fh = open(filename, 'wb')
+        self._fh.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write_xyz(self, xyz, box=None, time=None):
+        '''append frames
+
+        Parameters
+        ----------
+        xyz : 3D array, shape=(n_frames, n_atoms, 3)
+        box : {None, 2D array}, shape=(n_frames, 6)
+        time : {None, 1D array}, shape=(n_frames,)
+        '''
+        xyz = np.asarray(xyz, dtype='f8')
+        if xyz.ndim != 3 or xyz.shape[1:] != (self.n_atoms, 3):
+            raise ValueError('xyz must have shape (n_frames, {}, 3)'.format(
+                self.n_atoms))
+        has_box = box is not None and np.any(np.asarray(box)[:, :3] > 0.)
+        has_time = time is not None
+        if self._has_box is None:
+            self._has_box, self._has_time = has_box, has_time
+        elif (has_box, has_time) != (self._has_box, self._has_time):
+            raise ValueError('all frames must have (or not have) box and time')
+        box = np.asarray(box, dtype='f8').reshape(-1, 6) if has_box else None
+        time = np.asarray(time, dtype='f8').ravel() if has_time else None
+
+        start = 0
+        while start < len(xyz):
+            n = min(self.chunksize - self._n_buffered, len(xyz) - start)
+            stop = start + n
+            # copy: input can be a view of a Frame that is reused by an iterator
+            self._buffer.append(
+                (xyz[start:stop].copy(), box[start:stop].copy()
+                 if has_box else None, time[start:stop].copy()
+                 if has_time else None))
+            self._n_buffered += n
+            start = stop
+            if self._n_buffered == self.chunksize:
+                self._flush()
+
+    def write(self, frame):
+        '''append a single Frame
+        '''
+        time = None if frame.time is None else [frame.time]
+        box = frame.box.data[None] if frame.has_box() else None
+        self.write_xyz(frame.xyz[None], box=box, time=time)
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        xyz = np.concatenate([b[0] for b in self._buffer])
+        extras = []
+        if self._has_box:
+            extras.append(np.concatenate([b[1] for b in self._buffer]).ravel())
+        if self._has_time:
+            extras.append(np.concatenate([b[2] for b in self._buffer]))
+        coord_data, itemsize = _encode_coordinates(xyz, self.precision,
+                                                   self.compresslevel)
+        extra_data = (zlib.compress(
+            _shuffle(np.concatenate(extras)), self.compresslevel)
+                      if extras else b'')
+        offset = self._fh.tell()
+        self._fh.write(coord_data)
+        self._fh.write(extra_data)
+        self._index.append((offset, len(xyz), len(coord_data),
+                            len(extra_data), itemsize))
+        self.n_frames += len(xyz)
+        self._buffer = []
+        self._n_buffered = 0
+
+    def close(self):
+        if self._fh is None:
+            return
+        self._flush()
+        index = np.array(self._index, dtype=_INDEX_DTYPE)
+        metadata = json.dumps({
+            'version': 1,
+            'n_atoms': self.n_atoms,
+            'n_frames': self.n_frames,
+            'chunksize': self.chunksize,
+            'precision': self.precision,
+            'has_box': bool(self._has_box),
+            'has_time': bool(self._has_time),
+            'n_chunks': len(index),
+        }).encode('utf-8')
+        meta_offset = self._fh.tell()
+        self._fh.write(metadata)
+        self._fh.write(index.tobytes())
+        self._fh.write(_FOOTER.pack(meta_offset, len(metadata)))
+        self._fh.write(MAGIC)
+        self._fh.close()
+        self._fh = None
+
+
+def write_compressed_trajectory(filename,
+                                traj,
+                                precision=0.001,
+                                chunksize=100,
+                                frame_indices=None,
+                                compresslevel=1,
+                                overwrite=False):
+    '''write Trajectory-like to .ptz file. Use ``pytraj.write_traj`` with '.ptz' extension
+    for short.
+
+    Parameters
+    ----------
+    filename : str
+    traj : Trajectory-like
+    precision : {None, float}, default 0.001 (Angstrom)
+        if None, store coordinates losslessly
+    chunksize : int, default 100
+    frame_indices : {None, array-like}
+    compresslevel : int, default 1
+    overwrite : bool, default False
+    '''
+    from .trajectory import Trajectory
+    from .shared_methods import iterframe_master
+    from ..utils.get_common_objects import get_fiterator
+
+    with CompressedTrajectoryWriter(
+            filename,
+            traj.top.n_atoms,
+            precision=precision,
+            chunksize=chunksize,
+            compresslevel=compresslevel,
+            overwrite=overwrite) as writer:
+        if isinstance(traj, Trajectory):
+            indices = (slice(None) if frame_indices is None else np.asarray(
+                list(frame_indices), dtype='i8'))
+            writer.write_xyz(
+                traj.xyz[indices],
+                box=traj.unitcells[indices]
+                if traj.unitcells is not None else None,
+                time=traj.time[indices] if traj.time is not None else None)
+        elif frame_indices is None and hasattr(traj, 'iterchunk'):
+            for chunk in traj.iterchunk(chunksize=chunksize):
+                writer.write_xyz(
+                    chunk.xyz, box=chunk.unitcells, time=chunk.time)
+        else:
+            for frame in iterframe_master(get_fiterator(traj, frame_indices)):
+                writer.write(frame)
+
+
+class CompressedTrajectory(object):
+    '''read-only, random access out-of-core trajectory for .ptz files. Use
+    ``pytraj.iterload`` for short.
+
+    Only the chunk index is kept in memory; each chunk is read and decompressed on
+    demand. Reading many chunks (``xyz``, ``iterchunk``, slicing) decompresses chunks
+    with ``n_threads`` threads (zlib and numpy release the GIL).
+
+    Parameters
+    ----------
+    filename : str
+    top : Topology
+    n_threads : int, default 4
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> traj = pt.datafiles.load_tz2_ortho()
+    >>> pt.write_traj('output/tz2.ptz', traj, overwrite=True)
+    >>> cache = CompressedTrajectory('output/tz2.ptz', traj.top)
+    >>> frame = cache[3]
+    >>> sub = cache[2:8:2, '@CA']
+    >>> sub.n_frames
+    3
+    >>> for frame in cache(0, 8, 2, mask='@CA'): pass
+    '''
+
+    def __init__(self, filename, top, n_threads=4):
+        if isinstance(top, string_types):
+            from ..io import load_topology
+            top = load_topology(top)
+        self.filename = filename
+        self.top = top
+        self.n_threads = n_threads
+
+        with open(filename, 'rb') as fh:
+            if fh.read(len(MAGIC)) != MAGIC:
+                raise ValueError('{} is not a .ptz file'.format(filename))
+            fh.seek(-_FOOTER.size - len(MAGIC), os.SEEK_END)
+            meta_offset, meta_nbytes = _FOOTER.unpack(fh.read(_FOOTER.size))
+            if fh.read(len(MAGIC)) != MAGIC:
+                raise ValueError('{} is truncated (writer was not closed)'.
+                                 format(filename))
+            fh.seek(meta_offset)
+            self.metadata = json.loads(fh.read(meta_nbytes).decode('utf-8'))
+            self._index = np.frombuffer(
+                fh.read(self.metadata['n_chunks'] * _INDEX_DTYPE.itemsize),
+                dtype=_INDEX_DTYPE)
+        if self.metadata['n_atoms'] != top.n_atoms:
+            raise ValueError('Topology has {} atoms, file has {} atoms'.format(
+                top.n_atoms, self.metadata['n_atoms']))
+        # first frame of each chunk
+        self._chunk_starts = np.append(0, np.cumsum(
+            self._index['n_frames']))[:-1].astype('i8')
+
+    @property
+    def n_frames(self):
+        return self.metadata['n_frames']
+
+    @property
+    def n_atoms(self):
+        return self.top.n_atoms
+
+    @property
+    def shape(self):
+        return (self.n_frames, self.n_atoms, 3)
+
+    @property
+    def precision(self):
+        return self.metadata['precision']
+
+    def __len__(self):
+        return self.n_frames
+
+    def __repr__(self):
+        return '<pytraj.CompressedTrajectory, {} frames, {} atoms, precision={}>'.format(
+            self.n_frames, self.n_atoms, self.precision)
+
+    def _read_chunk(self, k):
+        '''return (xyz, box, time) of k-th chunk
+        '''
+        offset, n_frames, coord_nbytes, extra_nbytes, itemsize = [
+            int(x) for x in self._index[k]
+        ]
+        with open(self.filename, 'rb') as fh:
+            fh.seek(offset)
+            coord_data = fh.read(coord_nbytes)
+            extra_data = fh.read(extra_nbytes)
+        xyz = _decode_coordinates(coord_data, itemsize,
+                                  (n_frames, self.n_atoms, 3), self.precision)
+        box, time = None, None
+        if extra_data:
+            extras = _unshuffle(zlib.decompress(extra_data), 'f8')
+            if self.metadata['has_box']:
+                box = extras[:6 * n_frames].reshape(n_frames, 6)
+                extras = extras[6 * n_frames:]
+            if self.metadata['has_time']:
+                time = extras
+        return xyz, box, time
+
+    def _iter_chunks(self, chunk_ids):
+        '''yield (chunk_id, (xyz, box, time)), decompress ahead with threads
+        '''
+        chunk_ids = list(chunk_ids)
+        executor = None
+        if self.n_threads > 1 and len(chunk_ids) > 1:
+            try:
+                from concurrent.futures import ThreadPoolExecutor
+                executor = ThreadPoolExecutor(self.n_threads)
+            except ImportError:
+                executor = None
+        if executor is None:
+            for k in chunk_ids:
+                yield k, self._read_chunk(k)
+            return
+        try:
+            # keep at most n_threads chunks in flight
+            futures = []
+            ahead = iter(chunk_ids)
+            for k in ahead:
+                futures.append((k, executor.submit(self._read_chunk, k)))
+                if len(futures) >= self.n_threads:
+                    break
+            while futures:
+                k, future = futures.pop(0)
+                for k_next in ahead:
+                    futures.append(
+                        (k_next, executor.submit(self._read_chunk, k_next)))
+                    break
+                yield k, future.result()
+        finally:
+            executor.shutdown(wait=False)
+
+    def _iter_indices(self, indices):
+        '''yield (index, xyz, box, time) for given frame indices, decompress each needed
+        chunk once (consecutive indices in the same chunk share the decompression)
+        '''
+        indices = np.asarray(indices, dtype='i8')
+        if indices.size == 0:
+            return
+        indices = np.where(indices < 0, indices + self.n_frames, indices)
+        if np.any((indices < 0) | (indices >= self.n_frames)):
+            raise IndexError('frame index out of range')
+        chunks = np.searchsorted(self._chunk_starts, indices, side='right') - 1
+        # group consecutive indices in the same chunk
+        breaks = np.flatnonzero(np.diff(chunks)) + 1
+        groups = np.split(np.arange(len(indices)), breaks)
+        for group, (k, (xyz, box, time)) in zip(
+                groups, self._iter_chunks(chunks[g[0]] for g in groups)):
+            local = indices[group] - self._chunk_starts[k]
+            yield (xyz[local], box[local] if box is not None else None,
+                   time[local] if time is not None else None)
+
+    def _to_trajectory(self, xyz, box, time, top=None, atom_indices=None):
+        from .trajectory import Trajectory
+        if atom_indices is not None:
+            xyz = xyz[:, atom_indices]
+        traj = Trajectory(
+            xyz=np.ascontiguousarray(xyz),
+            top=self.top if top is None else top,
+            time=time)
+        if box is not None:
+            traj.unitcells = box
+        return traj
+
+    def _get_indices(self, start=0, stop=None, step=1, frame_indices=None):
+        if frame_indices is not None:
+            return np.asarray(list(frame_indices), dtype='i8')
+        start, stop, step = slice(start, stop, step).indices(self.n_frames)
+        return np.arange(start, stop, step)
+
+    def load(self, frame_indices=None, mask=None):
+        '''load given frames to a Trajectory
+
+        Parameters
+        ----------
+        frame_indices : {None, array-like}, default None (all frames)
+        mask : {None, str, array-like}, default None (all atoms)
+        '''
+        if frame_indices is None:
+            frame_indices = np.arange(self.n_frames)
+        top, atom_indices = self.top, None
+        if mask is not None:
+            if not isinstance(mask, string_types):
+                mask = array_to_cpptraj_atommask(mask)
+            atom_indices = self.top.select(mask)
+            top = self.top._get_new_from_mask(mask)
+        parts = [
+            self._to_trajectory(xyz, box, time, top, atom_indices)
+            for xyz, box, time in self._iter_indices(frame_indices)
+        ]
+        if not parts:
+            from .trajectory import Trajectory
+            return Trajectory(top=top)
+        traj = parts[0]
+        if len(parts) > 1:
+            traj._xyz = np.concatenate([t.xyz for t in parts])
+            if parts[0].unitcells is not None:
+                traj._boxes = np.concatenate([t.unitcells for t in parts])
+            if parts[0].time is not None:
+                traj.time = np.concatenate([t.time for t in parts])
+        return traj
+
+    @property
+    def xyz(self):
+        '''coordinates of all frames, shape=(n_frames, n_atoms, 3)
+        '''
+        return self.load().xyz
+
+    @property
+    def unitcells(self):
+        return self.load().unitcells if self.metadata['has_box'] else None
+
+    def __getitem__(self, index):
+        if isinstance(index, string_types):
+            return self.load(mask=index)
+        if isinstance(index, tuple):
+            frame_index, mask = index
+            if isinstance(frame_index, (int, np.integer)):
+                return self.load([frame_index], mask=mask)[0].copy()
+            return self.load(self._frame_indices(frame_index), mask=mask)
+        if isinstance(index, (int, np.integer)):
+            frame = self.load([index])[0]
+            return frame.copy()
+        return self.load(self._frame_indices(index))
+
+    def _frame_indices(self, index):
+        if isinstance(index, slice):
+            return np.arange(*index.indices(self.n_frames))
+        index = np.asarray(index)
+        if index.dtype == bool:
+            return np.flatnonzero(index)
+        return index
+
+    def __iter__(self):
+        return self.iterframe()
+
+    def __call__(self, *args, **kwd):
+        return self.iterframe(*args, **kwd)
+
+    def iterframe(self,
+                  start=0,
+                  stop=None,
+                  step=1,
+                  mask=None,
+                  autoimage=False,
+                  rmsfit=None,
+                  frame_indices=None):
+        '''iterate frames, same as ``pytraj.TrajectoryIterator.iterframe``
+        '''
+        from .frameiter import FrameIterator, FramePool
+
+        if mask is None:
+            top = self.top
+        else:
+            if not isinstance(mask, string_types):
+                mask = array_to_cpptraj_atommask(mask)
+            top = self.top._get_new_from_mask(mask)
+
+        if rmsfit is not None:
+            if isinstance(rmsfit, tuple):
+                assert len(rmsfit) == 2, (
+                    "rmsfit must be a tuple of one (frame,) "
+                    "or two elements (frame, mask)")
+            else:
+                rmsfit = (rmsfit, '*')
+            if isinstance(rmsfit[0], (int, np.integer)):
+                rmsfit = (self[rmsfit[0]], rmsfit[1])
+
+        indices = self._get_indices(start, stop, step, frame_indices)
+
+        def frame_iter():
+            # frames of a chunk are views: copy them to a reused buffer so they do not
+            # outlive the chunk
+            pool = FramePool()
+            for xyz, box, time in self._iter_indices(indices):
+                chunk = self._to_trajectory(xyz, box, time)
+                for frame in chunk:
+                    yield pool.take(frame)
+
+        return FrameIterator(
+            frame_iter(),
+            original_top=self.top,
+            new_top=top,
+            start=start,
+            stop=stop,
+            step=step,
+            mask=mask,
+            autoimage=autoimage,
+            rmsfit=rmsfit,
+            n_frames=len(indices),
+            copy=False,
+            frame_indices=frame_indices)
+
+    def iterchunk(self, chunksize=None, start=0, stop=-1):
+        '''iterate Trajectory chunks
+
+        Parameters
+        ----------
+        chunksize : {None, int}, default None (chunk size of the file)
+        start : int, default 0
+        stop : int, default -1 (last frame)
+        '''
+        stop = self.n_frames if stop in (None, -1) else stop
+        indices = np.arange(start, stop)
+        if chunksize is None:
+            for xyz, box, time in self._iter_indices(indices):
+                yield self._to_trajectory(xyz, box, time)
+        else:
+            for i in range(0, len(indices), chunksize):
+                yield self.load(indices[i:i + chunksize])
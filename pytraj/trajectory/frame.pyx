@@ -321,6 +321,27 @@ cdef class Frame (object):
         count = self.thisptr.Natom() * 3 * sizeof(double)
         memcpy(<void*> ptr_dest, <void*> ptr_src, count)
 
+    def _set_frame(self, Frame other, AtomMask atm=None):
+        """copy coordinates, velocities, box and time of ``other`` (only atoms in ``atm`` if
+        given) to this Frame without allocating new memory.
+
+        This Frame must have the same layout as the new data, e.g created by ``other.copy()``
+        or ``Frame(other, atm)``.
+        """
+        cdef int n_atoms = other.thisptr.Natom() if atm is None else atm.n_atoms
+
+        if n_atoms != self.thisptr.Natom():
+            raise ValueError("must have the same number of atoms")
+        if atm is None:
+            self._fast_copy_from_frame(other)
+            if other.thisptr.HasVelocity() and self.thisptr.HasVelocity():
+                memcpy(<void*> self.thisptr.vAddress(), <void*> other.thisptr.vAddress(),
+                       n_atoms * 3 * sizeof(double))
+            self.thisptr.SetBox(other.thisptr.BoxCrd())
+            self.thisptr.SetTime(other.thisptr.Time())
+        else:
+            self.thisptr.SetFrame(other.thisptr[0], atm.thisptr[0])
+
     def _fast_copy_from_xyz(self, double[:, :] xyz, indices=None):
         """only copy coords
 
@@ -2,7 +2,7 @@ from __future__ import absolute_import
 from pytraj.trajectory.frame import Frame
 from .shared_methods import iterframe_master
 
-__all__ = ['iterframe', 'iterchunk', 'FrameIterator']
+__all__ = ['iterframe', 'iterchunk', 'FrameIterator', 'FramePool']
 
 
 def iterframe(traj, *args, **kwd):
@@ -78,6 +78,57 @@ def iterchunk(traj, *args, **kwd):
     return traj.iterchunk(*args, **kwd)
 
 
+class FramePool(object):
+    """a fixed ring of preallocated Frames that are refilled during iteration
+
+    The first ``size`` calls of ``take`` allocate new Frames, later calls overwrite the
+    oldest one. A Frame returned by ``take`` is only valid until ``size`` more Frames
+    are taken; use ``Frame.copy`` to keep it.
+
+    Parameters
+    ----------
+    size : int, default 1
+        number of Frames in the pool
+    atm : {None, AtomMask}, default None
+        if given, only copy atoms in ``atm``
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.trajectory.frameiter import FramePool
+    >>> traj = pt.datafiles.load_tz2_ortho()
+    >>> pool = FramePool(size=2, atm=traj.top('@CA'))
+    >>> frames = [pool.take(frame) for frame in traj]
+    >>> frames[0] is frames[2]
+    True
+    >>> frames[0].n_atoms
+    12
+    """
+
+    def __init__(self, size=1, atm=None):
+        if size < 1:
+            raise ValueError('size must be at least 1')
+        self.size = size
+        self.atm = atm
+        self._frames = []
+        self._index = 0
+
+    def take(self, frame):
+        """copy ``frame`` to the next buffer and return the buffer
+        """
+        if len(self._frames) < self.size:
+            if self.atm is None:
+                new_frame = Frame(frame)
+            else:
+                new_frame = Frame(frame, self.atm)
+            self._frames.append(new_frame)
+            return new_frame
+        buffer_frame = self._frames[self._index]
+        self._index = (self._index + 1) % self.size
+        buffer_frame._set_frame(frame, self.atm)
+        return buffer_frame
+
+
 class FrameIterator(object):
     """
     create this class to hold all iterating information. This class is for internal use.
@@ -99,8 +150,15 @@ class FrameIterator(object):
         to given frame with given mask. if both ``autoimage`` and ``rmsfit`` are specified,
         do ``autoimage`` first.
     n_frames : total number of frame. read-only
+    source : {None, TrajectoryIterator}, default None
+        the iterated trajectory. If given, analyses can read frames of ``source`` directly
+        in C++ when there is no mask, autoimage or rmsfit.
     copy : bool, defaul: True
-        if True, always make a copy of Frame when iterating.
+        if True, always make an independent copy of Frame when iterating. Use this if
+        you want to keep the Frames (e.g ``list(fi)``).
+        if False, the yielded Frame is only valid until the next iteration. With a mask,
+        the atoms are copied to a reused Frame buffer (see FramePool) instead of
+        allocating a new Frame for each step.
 
     Notes
     -----
@@ -178,7 +236,8 @@ class FrameIterator(object):
                  rmsfit=None,
                  n_frames=None,
                  copy=True,
-                 frame_indices=None):
+                 frame_indices=None,
+                 source=None):
         self.top = new_top
         self.original_top = original_top
         self.frame_iter = fi_generator
@@ -192,11 +251,29 @@ class FrameIterator(object):
         self._n_frames = n_frames
         self.copy = copy
         self.frame_indices = frame_indices
+        self.source = source
 
     @property
     def n_frames(self):
         return self._n_frames
 
+    def _source_frame_indices(self):
+        '''return (source, frame_indices) if frames can be read directly from ``source``
+        without any modification, else (None, None)
+        '''
+        if (self.source is None or self.mask is not None or self.autoimage
+                or self.rmsfit is not None):
+            return None, None
+        if self.frame_indices is None:
+            indices = range(*slice(self.start, self.stop, self.step).indices(
+                self.source.n_frames))
+        elif hasattr(self.frame_indices, '__len__'):
+            indices = self.frame_indices
+        else:
+            # e.g itertools.chain
+            return None, None
+        return self.source, indices
+
     @property
     def n_atoms(self):
         return self.top.n_atoms
@@ -248,6 +325,7 @@ class FrameIterator(object):
 
     def __iter__(self):
         from pytraj.analysis.c_action import c_action
+        from pytraj.utils.profiling import get_profiler
         # do not import c_action in the top to avoid circular importing
         if self.autoimage:
             image_act = c_action.Action_AutoImage()
@@ -274,23 +352,50 @@ class FrameIterator(object):
             mask = self.mask
             atm = self.original_top(mask)
 
-        for frame0 in self.frame_iter:
-            if self.copy:
+        frame_iter = self.frame_iter
+        # only need a full copy if the frame is modified
+        need_full_copy = self.copy and (self.autoimage or need_align
+                                        or self.mask is None)
+        copy_frame = Frame.copy
+        if self.mask is not None and self.copy:
+            make_frame = lambda frame: Frame(frame, atm)
+        elif self.mask is not None:
+            make_frame = FramePool(atm=atm).take
+        if self.autoimage:
+            autoimage_frame = image_act.compute
+        if need_align:
+            rmsfit_frame = rmsd_act.compute
+
+        prof = get_profiler()
+        if prof is not None:
+            # only wrap stages when profiling, no overhead otherwise
+            name = 'FrameIterator'
+            frame_iter = prof.timed_iter(frame_iter, name, 'read')
+            copy_frame = prof.timed(copy_frame, name, 'copy')
+            if self.mask is not None:
+                make_frame = prof.timed(make_frame, name, 'mask')
+            if self.autoimage:
+                autoimage_frame = prof.timed(autoimage_frame, name,
+                                             'autoimage')
+            if need_align:
+                rmsfit_frame = prof.timed(rmsfit_frame, name, 'rmsfit')
+
+        for frame0 in frame_iter:
+            if need_full_copy:
                 # use copy for TrajectoryIterator
                 # so [f for f in traj()] will return a list of different
                 # frames
-                frame = frame0.copy()
+                frame = copy_frame(frame0)
             else:
                 frame = frame0
             if self.autoimage:
                 # from pytraj.c_action.c_action import Action_AutoImage
                 # Action_AutoImage()("", frame, self.top)
-                image_act.compute(frame)
+                autoimage_frame(frame)
             if need_align:
                 # trick cpptraj to fit to 1st frame (=ref)
-                rmsd_act.compute(frame)
+                rmsfit_frame(frame)
             if self.mask is not None:
-                frame2 = Frame(frame, atm)
-                yield frame2
+                yield make_frame(frame)
             else:
                 yield frame
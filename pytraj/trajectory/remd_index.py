@@ -0,0 +1,307 @@
+"""index of temperature replica exchange (REMD) trajectories
+
+Reading replica temperatures for every frame of every replica file is done only once.
+The index is small (one entry per frame) and can be saved to disk and reused.
+"""
+from __future__ import absolute_import
+import os
+import re
+from glob import glob
+import numpy as np
+
+from ..externals.six import string_types
+from .trajectory_iterator import sort_filename_by_number
+
+__all__ = ['RemdIndex', 'build_remd_index']
+
+
+def _find_replica_files(filename):
+    '''mimic cpptraj's behavior: rem.nc.000 -> rem.nc.000, rem.nc.001, ...
+
+    Examples
+    --------
+    >>> _find_replica_files(['rem.nc.001', 'rem.nc.000'])
+    ['rem.nc.001', 'rem.nc.000']
+    '''
+    if isinstance(filename, (list, tuple)):
+        return list(filename)
+    if not isinstance(filename, string_types):
+        raise ValueError('filename must be a string or a list of strings')
+
+    if any(c in filename for c in '*?['):
+        flist = sort_filename_by_number(glob(filename))
+    else:
+        match = re.match(r'(.*\.)([0-9]+)$', filename)
+        if match is None:
+            flist = [filename, ]
+        else:
+            prefix, digits = match.groups()
+            flist = sort_filename_by_number([
+                fname for fname in glob(prefix + '*')
+                if re.match(re.escape(prefix) + '[0-9]{%d}$' % len(digits),
+                            fname)
+            ])
+    if not flist:
+        raise ValueError('can not find replica files from {}'.format(filename))
+    return flist
+
+
+def _read_temperatures(filename, top):
+    '''return 1D array of replica temperatures for each frame in filename
+    '''
+    try:
+        # fast path: only read 'temp0' variable, do not read coordinates
+        from scipy.io import netcdf_file
+        with netcdf_file(filename, 'r', mmap=False) as fh:
+            return np.array(fh.variables['temp0'][:], dtype='f8')
+    except (ImportError, KeyError, TypeError, ValueError, OSError):
+        from .trajectory_iterator import TrajectoryIterator
+        return TrajectoryIterator(filename, top).temperatures
+
+
+def _file_stamp(filename):
+    st = os.stat(filename)
+    return st.st_size, st.st_mtime
+
+
+class RemdIndex(object):
+    '''table of (replica file, frame, temperature) for a set of replica files.
+    Use ``build_remd_index`` to create it.
+
+    Parameters
+    ----------
+    filelist : list of str
+    file_ids : 1D array, replica file index of each frame
+    frame_ids : 1D array, frame index in its replica file
+    temperatures : 1D array, temperature of each frame
+    stamps : list of (size, mtime) of each file, used to check if the index is outdated
+    '''
+
+    def __init__(self, filelist, file_ids, frame_ids, temperatures, stamps):
+        self.filelist = list(filelist)
+        self.file_ids = np.asarray(file_ids, dtype='i4')
+        self.frame_ids = np.asarray(frame_ids, dtype='i8')
+        self.temperatures = np.asarray(temperatures, dtype='f8')
+        self.stamps = [tuple(stamp) for stamp in stamps]
+        n_frames_per_file = np.bincount(
+            self.file_ids, minlength=len(self.filelist))
+        # offset of each file in concatenated trajectory
+        self._offsets = np.concatenate(([0, ], np.cumsum(n_frames_per_file)))
+
+    def __str__(self):
+        return '<RemdIndex: {} replicas, {} frames, {} temperatures>'.format(
+            self.n_replicas, len(self.temperatures),
+            len(self.unique_temperatures))
+
+    def __repr__(self):
+        return self.__str__()
+
+    @property
+    def n_replicas(self):
+        return len(self.filelist)
+
+    @property
+    def unique_temperatures(self):
+        '''sorted 1D array of temperatures
+        '''
+        return np.unique(np.round(self.temperatures, 2))
+
+    def is_outdated(self):
+        '''return True if any replica file was changed after building the index
+        '''
+        try:
+            return any(
+                _file_stamp(fname) != stamp
+                for fname, stamp in zip(self.filelist, self.stamps))
+        except OSError:
+            return True
+
+    def frame_indices(self, T, tol=0.01):
+        '''return frame indices in the concatenated replica files for temperature T,
+        ordered by simulation time
+
+        Parameters
+        ----------
+        T : float
+        tol : float, default 0.01
+        '''
+        selected = np.where(np.abs(self.temperatures - float(T)) <= tol)[0]
+        if selected.size == 0:
+            raise ValueError('T={} is not in {}'.format(
+                T, self.unique_temperatures))
+        order = np.lexsort((self.file_ids[selected],
+                            self.frame_ids[selected]))
+        selected = selected[order]
+        return self._offsets[self.file_ids[selected]] + self.frame_ids[
+            selected]
+
+    def _iterload_all(self, top):
+        from .trajectory_iterator import TrajectoryIterator
+        return TrajectoryIterator(self.filelist, top)
+
+    def iterload_temperature(self, T, top, mask=None):
+        '''return a lazy FrameIterator for all frames at temperature T
+
+        Parameters
+        ----------
+        T : float
+        top : {str, Topology}
+        mask : {None, str}
+        '''
+        traj = self._iterload_all(top)
+        return traj.iterframe(frame_indices=self.frame_indices(T), mask=mask)
+
+    def iterload_replica(self, replica, top):
+        '''return a TrajectoryIterator for a single replica (no demultiplexing)
+        '''
+        from .trajectory_iterator import TrajectoryIterator
+        return TrajectoryIterator(self.filelist[replica], top)
+
+    def extract(self, T, top, filename, overwrite=False, options=''):
+        '''write all frames at temperature T to filename
+        '''
+        from pytraj.io import write_traj
+        write_traj(
+            filename,
+            self.iterload_temperature(T, top),
+            overwrite=overwrite,
+            options=options)
+        return filename
+
+    def extract_all(self,
+                    top,
+                    filename_template='remd.T{T:.2f}.nc',
+                    n_cores=1,
+                    overwrite=False,
+                    options=''):
+        '''write frames for each temperature to its own file
+
+        Parameters
+        ----------
+        top : {str, Topology}
+            use a filename if n_cores > 1 (Topology will be reloaded in each process)
+        filename_template : str, must have '{T}' field
+        n_cores : int, default 1
+            number of processes. Each process handles different temperatures.
+
+        Returns
+        -------
+        filenames : list of str
+        '''
+        from functools import partial
+        from multiprocessing import Pool, cpu_count
+
+        temperatures = list(self.unique_temperatures)
+        filenames = [filename_template.format(T=T) for T in temperatures]
+        if n_cores <= 0:
+            n_cores = cpu_count()
+        n_cores = min(n_cores, len(temperatures))
+
+        func = partial(
+            _extract_worker,
+            index=self,
+            top=top,
+            overwrite=overwrite,
+            options=options)
+        jobs = list(zip(temperatures, filenames))
+        if n_cores == 1:
+            return [func(job) for job in jobs]
+        pool = Pool(n_cores)
+        try:
+            return pool.map(func, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+    def save(self, filename):
+        '''save index to numpy's npz file
+        '''
+        sizes, mtimes = zip(*self.stamps)
+        with open(filename, 'wb') as fh:
+            np.savez(
+                fh,
+                filelist=np.array(self.filelist),
+                file_ids=self.file_ids,
+                frame_ids=self.frame_ids,
+                temperatures=self.temperatures,
+                sizes=np.array(sizes, dtype='i8'),
+                mtimes=np.array(mtimes, dtype='f8'))
+
+    @classmethod
+    def load(cls, filename):
+        '''load index from npz file
+        '''
+        with np.load(filename) as data:
+            return cls(
+                [str(fname) for fname in data['filelist']],
+                data['file_ids'],
+                data['frame_ids'],
+                data['temperatures'],
+                zip(data['sizes'].tolist(), data['mtimes'].tolist()))
+
+
+def _extract_worker(job, index=None, top=None, overwrite=False, options=''):
+    T, filename = job
+    return index.extract(
+        T, top, filename, overwrite=overwrite, options=options)
+
+
+def build_remd_index(filename, top=None, index_file=None, n_cores=1):
+    '''read temperature of each frame in all replica files once and build an index.
+
+    Parameters
+    ----------
+    filename : {str, list of str}
+        a replica filename (other replicas will be searched as cpptraj does, e.g
+        rem.nc.000 -> rem.nc.*), a glob pattern or a list of filenames
+    top : {str, Topology}, optional
+        only needed if the temperatures can not be read directly from NetCDF files
+    index_file : {None, str}, default None
+        if given and the file exists and is up to date, load the index from it.
+        Otherwise build the index and save it to index_file.
+    n_cores : int, default 1
+        number of processes to read replica files
+
+    Returns
+    -------
+    RemdIndex
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.testing import get_remd_fn
+    >>> filenames, tn = get_remd_fn('remd_ala2')
+    >>> index = pt.build_remd_index(filenames, tn)
+    >>> fi = index.iterload_temperature(300., tn)
+    '''
+    if index_file is not None and os.path.exists(index_file):
+        index = RemdIndex.load(index_file)
+        if not index.is_outdated():
+            return index
+
+    filelist = _find_replica_files(filename)
+    if n_cores == 1:
+        all_temperatures = [_read_temperatures(fname, top) for fname in filelist]
+    else:
+        from functools import partial
+        from multiprocessing import Pool, cpu_count
+        pool = Pool(n_cores if n_cores > 0 else cpu_count())
+        try:
+            all_temperatures = pool.map(
+                partial(_read_temperatures, top=top), filelist)
+        finally:
+            pool.close()
+            pool.join()
+
+    file_ids = np.concatenate([
+        np.full(len(temps), idx, dtype='i4')
+        for idx, temps in enumerate(all_temperatures)
+    ])
+    frame_ids = np.concatenate(
+        [np.arange(len(temps)) for temps in all_temperatures])
+    index = RemdIndex(filelist, file_ids, frame_ids,
+                      np.concatenate(all_temperatures),
+                      [_file_stamp(fname) for fname in filelist])
+    if index_file is not None:
+        index.save(index_file)
+    return index
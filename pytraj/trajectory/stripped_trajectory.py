@@ -1,6 +1,7 @@
 from .shared_trajectory import SharedTrajectory
 from .shared_methods import _xyz, _box
 from .frame import Frame
+from .frameiter import FramePool
 
 
 class StrippedTrajectoryIterator(SharedTrajectory):
@@ -26,8 +27,10 @@ class StrippedTrajectoryIterator(SharedTrajectory):
         self._mask = mask
 
     def __iter__(self):
+        # reuse a Frame buffer: each Frame is only valid until the next iteration
+        pool = FramePool(atm=self._atm)
         for frame in self._traj:
-            yield Frame(frame, self._atm)
+            yield pool.take(frame)
 
     def __getitem__(self, index):
         traj = self._traj[index]
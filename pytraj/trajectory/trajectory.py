@@ -259,6 +259,52 @@ class Trajectory(SharedTrajectory):
                 frame.time = self.time[index]
             yield frame
 
+    def _iterframe_indices_with_rmsfit(self,
+                                       indices,
+                                       ref,
+                                       mask='*',
+                                       chunksize=1024):
+        """superpose frames to ``ref`` and return a Frame view of coordinates. Rotations
+        are computed for blocks of frames, but each frame of Trajectory.xyz is only
+        updated right before it is returned (stopping early leaves other frames intact).
+
+        Parameters
+        ----------
+        indices : iterable of int
+        ref : Frame or 2D array, coordinates are copied when iteration starts
+        mask : {str, array-like of int, AtomMask}, atoms used for fitting
+
+        Examples
+        --------
+        >>> import pytraj as pt
+        >>> traj = pt.load_sample_data('tz2')[:]
+        >>> for frame in traj._iterframe_indices_with_rmsfit(range(4), traj[0], '@CA'): pass
+        """
+        from itertools import islice
+        from pytraj.math.superposition import superpose_xyz
+
+        ref_xyz = np.array(getattr(ref, 'xyz', ref), dtype='f8')
+        if mask is None or (isinstance(mask, string_types)
+                            and mask.strip() in ('', '*')):
+            atom_indices = None
+        elif isinstance(mask, string_types):
+            atom_indices = self.top.select(mask)
+        else:
+            atom_indices = np.asarray(getattr(mask, 'indices', mask), dtype='i8')
+
+        indices_iter = iter(indices)
+        while True:
+            block = np.asarray(
+                list(islice(indices_iter, chunksize)), dtype='i8')
+            if block.size == 0:
+                break
+            # fancy indexing: a scratch copy of the block
+            xyz = self._xyz[block]
+            superpose_xyz(xyz, ref_xyz, atom_indices=atom_indices, inplace=True)
+            for i, frame in enumerate(self._iterframe_indices(block)):
+                self._xyz[block[i]] = xyz[i]
+                yield frame
+
     def _handle_setting_box_force_velocity(self, frame, index):
         if self._boxes is not None:
             frame.box = Box(self._boxes[index])
@@ -320,24 +366,23 @@ class Trajectory(SharedTrajectory):
             if isinstance(index, (string_types, AtomMask)):
                 # return a copy
                 # traj['@CA']
+                # (use traj.subset('@CA') to get a view without copying)
                 atm = self.top(index) if isinstance(index,
                                                     string_types) else index
                 traj.top = self.top._modify_state_by_mask(atm)
-                arr0 = self._xyz[:, atm.indices]
+                # np.take returns a new contiguous array, no extra copy needed
                 if self.forces is not None:
-                    forces = self.forces[:, atm.indices]
-                    traj.forces = forces.copy()
+                    traj.forces = np.take(self.forces, atm.indices, axis=1)
                 if self.velocities is not None:
-                    velocities = self.velocities[:, atm.indices]
-                    traj.velocities = velocities.copy()
-                # make copy to create contigous memory block
+                    traj.velocities = np.take(
+                        self.velocities, atm.indices, axis=1)
                 if self._boxes is not None:
                     # always make a copy in this case
                     traj._boxes = self._boxes.copy()
                 if self.time is not None:
                     # always make a copy in this case
                     traj.time = self.time.copy()
-                traj._xyz = arr0.copy()
+                traj._xyz = np.take(self._xyz, atm.indices, axis=1)
             elif not isinstance(index, tuple):
                 # might return a view or a copy
                 # based on numpy array rule
@@ -611,9 +656,18 @@ class Trajectory(SharedTrajectory):
         else:
             raise ValueError('filename must be string or a list of strings')
 
-    def autoimage(self, command=''):
+    def autoimage(self, command='', engine='cpptraj'):
         '''perform autoimage
 
+        Parameters
+        ----------
+        command : str, default ''
+            cpptraj's autoimage command
+        engine : str, {'cpptraj', 'numpy'}, default 'cpptraj'
+            if 'numpy', image all frames with vectorized numpy code (see
+            pytraj.math.imaging.Imager). Only 'anchor', 'fixed', 'mobile' and 'origin'
+            keywords are supported.
+
         Returns
         -------
         self
@@ -625,7 +679,17 @@ class Trajectory(SharedTrajectory):
         >>> t0.top.has_box()
         True
         >>> t0 = t0.autoimage()
+        >>> t0 = t0.autoimage(engine='numpy')
         '''
+        if engine == 'numpy':
+            from pytraj.math.imaging import Imager, parse_autoimage_command
+
+            imager = Imager(self.top, **parse_autoimage_command(command))
+            imager.autoimage(self.xyz, self.unitcells)
+            return self
+        elif engine != 'cpptraj':
+            raise ValueError('engine must be "cpptraj" or "numpy"')
+
         from pytraj.analysis.c_action import c_action
 
         act = c_action.Action_AutoImage()
@@ -870,9 +934,36 @@ class Trajectory(SharedTrajectory):
         atm.invert_mask()
         self.top.strip(mask)
 
-        self._xyz = np.ascontiguousarray(self._xyz[:, atm.indices])
+        self._xyz = np.take(self._xyz, atm.indices, axis=1)
         return self
 
+    def subset(self, mask=None, frame_indices=None):
+        '''return a lazy view of given atoms and frames, no coordinates are copied
+
+        Parameters
+        ----------
+        mask : {None, str, AtomMask, array-like of atom indices}, default None (all atoms)
+        frame_indices : {None, slice, array-like}, default None (all frames)
+
+        Returns
+        -------
+        TrajectoryView
+
+        Examples
+        --------
+        >>> import pytraj as pt
+        >>> traj = pt.datafiles.load_tz2_ortho()[:]
+        >>> view = traj.subset('!:WAT', frame_indices=slice(0, 8, 2))
+        >>> view.shape
+        (4, 223, 3)
+        >>> data = pt.rmsd(view, mask='@CA', ref=0)
+        >>> solute = view.copy()
+        '''
+        from .trajectory_view import TrajectoryView
+
+        view = TrajectoryView(self, frame_indices=frame_indices)
+        return view if mask is None else view._with_atoms(mask)
+
     def iterframe(self,
                   start=0,
                   stop=None,
@@ -959,7 +1050,14 @@ class Trajectory(SharedTrajectory):
                 n_frames = None
             indices = frame_indices
 
-        frame_iter_super = self._iterframe_indices(indices)
+        if rmsfit is not None and not autoimage:
+            # superpose blocks of in-memory frames with vectorized kernel
+            # so FrameIterator does not need to call cpptraj's Action_Rmsd
+            frame_iter_super = self._iterframe_indices_with_rmsfit(
+                indices, ref=rmsfit[0], mask=rmsfit[1])
+            rmsfit = None
+        else:
+            frame_iter_super = self._iterframe_indices(indices)
 
         return FrameIterator(
             frame_iter_super,
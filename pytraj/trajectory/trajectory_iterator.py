@@ -176,13 +176,17 @@ class TrajectoryIterator(TrajectoryCpptraj, SharedTrajectory):
 
     def copy(self):
         '''return a deep copy. Use this method with care since the copied traj just reuse
-        the filenames
+        the filenames. Transformations (autoimage, superpose, ...) are copied too.
         '''
         other = self.__class__()
-        other.top = self.top.copy()
+        # the setter copies the Topology to the new C++ trajectory
+        other.top = self.top
 
         for fname, frame_slice in zip(self.filelist, self._frame_slice_list):
             other._load(fname, frame_slice=frame_slice)
+        if self._transform_commands:
+            other._transform_commands = self._transform_commands[:]
+            other._reset_transformation()
         return other
 
     def _load(self,
@@ -379,7 +383,8 @@ class TrajectoryIterator(TrajectoryCpptraj, SharedTrajectory):
             rmsfit=rmsfit,
             n_frames=n_frames,
             copy=copy,
-            frame_indices=frame_indices)
+            frame_indices=frame_indices,
+            source=self)
 
     def iterchunk(self,
                   chunksize=2,
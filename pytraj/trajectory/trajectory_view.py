@@ -0,0 +1,284 @@
+from __future__ import absolute_import
+
+import numpy as np
+
+from ..externals.six import string_types
+from ..core.c_core import AtomMask
+from ..utils.check_and_assert import is_int
+from ..utils.convert import array_to_cpptraj_atommask
+from .shared_trajectory import SharedTrajectory
+from .frame import Frame
+from .frameiter import FrameIterator, FramePool
+
+__all__ = ['TrajectoryView']
+
+
+def _as_basic_index(frames):
+    # numpy returns a view (no copy) for a slice
+    if isinstance(frames, range):
+        stop = frames.stop if frames.stop >= 0 else None
+        return slice(frames.start, stop, frames.step)
+    return frames
+
+
+class TrajectoryView(SharedTrajectory):
+    '''lazy subset of frames and atoms of an in-memory Trajectory. No coordinates are
+    copied until ``xyz`` or ``copy`` is called: iterating only copies the selected atoms
+    of one frame at a time. Use ``pytraj.Trajectory.subset`` to create a view.
+
+    Views compose: indexing a view by frames (int, slice, array) or atoms (mask) returns
+    a new view of the same Trajectory. Analysis functions read frames through the view.
+
+    Parameters
+    ----------
+    traj : Trajectory
+    frame_indices : {None, slice, range, array-like}, default None (all frames)
+    atom_indices : {None, array-like}, default None (all atoms)
+
+    Notes
+    -----
+    Like numpy views, a view is invalid if the Trajectory's coordinates are replaced
+    (e.g by ``strip`` or ``append``). Frames of a view having all atoms share memory with
+    the Trajectory; frames of an atom subset are copies.
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> traj = pt.datafiles.load_tz2_ortho()[:]
+    >>> view = traj.subset('!:WAT', frame_indices=range(0, 10, 2))
+    >>> view.n_frames, view.n_atoms
+    (5, 223)
+    >>> view['@CA'][1:].shape
+    (4, 12, 3)
+    >>> rg = pt.radgyr(view, '@CA')
+    >>> solute = view.copy() # materialize a new Trajectory
+    '''
+
+    def __init__(self, traj, frame_indices=None, atom_indices=None):
+        self._traj = traj
+        n_frames = traj.n_frames
+        if frame_indices is None:
+            frames = range(n_frames)
+        elif isinstance(frame_indices, slice):
+            frames = range(n_frames)[frame_indices]
+        elif isinstance(frame_indices, range):
+            frames = frame_indices
+        else:
+            frames = np.asarray(frame_indices)
+            if frames.dtype == bool:
+                frames = np.flatnonzero(frames)
+            frames = frames.astype('i8')
+            frames = np.where(frames < 0, frames + n_frames, frames)
+            if np.any((frames < 0) | (frames >= n_frames)):
+                raise IndexError('frame index out of range')
+        self._frames = frames
+        self._atoms = None if atom_indices is None else np.asarray(
+            atom_indices, dtype='i8')
+        self._top = None
+        self._atm = None
+
+    @property
+    def top(self):
+        '''Topology of selected atoms (built on first use)
+        '''
+        if self._atoms is None:
+            return self._traj.top
+        if self._top is None:
+            self._top = self._traj.top._modify_state_by_mask(self._atom_mask)
+        return self._top
+
+    @property
+    def topology(self):
+        return self.top
+
+    @property
+    def _atom_mask(self):
+        if self._atm is None:
+            self._atm = AtomMask(self._atoms, self._traj.n_atoms)
+        return self._atm
+
+    @property
+    def n_frames(self):
+        return len(self._frames)
+
+    @property
+    def n_atoms(self):
+        if self._atoms is None:
+            return self._traj.n_atoms
+        return len(self._atoms)
+
+    @property
+    def shape(self):
+        return (self.n_frames, self.n_atoms, 3)
+
+    def __len__(self):
+        return self.n_frames
+
+    def _take(self, values):
+        '''select frames and atoms of a per-atom array of the Trajectory
+        (n_frames, n_atoms, ...), with a single copy at most
+        '''
+        frames = _as_basic_index(self._frames)
+        if self._atoms is None:
+            return values[frames]
+        if isinstance(frames, slice):
+            return np.take(values[frames], self._atoms, axis=1)
+        return values[np.ix_(frames, self._atoms)]
+
+    @property
+    def xyz(self):
+        '''coordinates, shape=(n_frames, n_atoms, 3). A numpy view of the Trajectory's
+        coordinates if the view has all atoms and frames are a slice, else a new array
+        '''
+        return self._take(self._traj.xyz)
+
+    @property
+    def unitcells(self):
+        boxes = self._traj.unitcells
+        return None if boxes is None else boxes[_as_basic_index(self._frames)]
+
+    @property
+    def time(self):
+        time = self._traj.time
+        return None if time is None else time[_as_basic_index(self._frames)]
+
+    def _with_frames(self, index):
+        if isinstance(index, slice):
+            frames = self._frames[index]
+        else:
+            index = np.asarray(index)
+            if index.dtype == bool:
+                index = np.flatnonzero(index)
+            frames = np.asarray(self._frames)[index]
+        return self.__class__(self._traj, frames, self._atoms)
+
+    def _with_atoms(self, mask):
+        if isinstance(mask, string_types):
+            indices = self.top.select(mask)
+        elif isinstance(mask, AtomMask):
+            indices = mask.indices
+        else:
+            indices = np.asarray(mask, dtype='i8')
+        if self._atoms is not None:
+            indices = self._atoms[indices]
+        return self.__class__(self._traj, self._frames, indices)
+
+    def __getitem__(self, index):
+        '''int -> Frame, str or AtomMask -> view of atoms, (frames, mask) -> view,
+        other -> view of frames
+
+        Examples
+        --------
+        >>> import pytraj as pt
+        >>> traj = pt.datafiles.load_tz2_ortho()[:]
+        >>> view = traj.subset('!:WAT')
+        >>> frame = view[-1]
+        >>> view[::2, '@CA'].shape
+        (5, 12, 3)
+        '''
+        if is_int(index):
+            frame = self._traj[int(self._frames[index])]
+            if self._atoms is None:
+                return frame
+            return Frame(frame, self._atom_mask)
+        elif isinstance(index, (string_types, AtomMask)):
+            return self._with_atoms(index)
+        elif isinstance(index, tuple):
+            if len(index) == 1:
+                return self[index[0]]
+            frame_index, mask = index
+            if is_int(frame_index):
+                return Frame(self[frame_index], self.top(mask))
+            return self._with_frames(frame_index)._with_atoms(mask)
+        return self._with_frames(index)
+
+    def __iter__(self):
+        return self.iterframe()
+
+    def __call__(self, *args, **kwd):
+        return self.iterframe(*args, **kwd)
+
+    def iterframe(self,
+                  start=0,
+                  stop=None,
+                  step=1,
+                  mask=None,
+                  autoimage=False,
+                  rmsfit=None,
+                  frame_indices=None):
+        '''iterate frames, same as ``pytraj.Trajectory.iterframe``
+
+        Frames are only valid until the next iteration, use ``Frame.copy`` to keep them.
+        '''
+        if mask is None:
+            top = self.top
+        else:
+            if not isinstance(mask, string_types):
+                mask = array_to_cpptraj_atommask(mask)
+            top = self.top._get_new_from_mask(mask)
+
+        if rmsfit is not None:
+            if isinstance(rmsfit, tuple):
+                assert len(rmsfit) == 2, (
+                    "rmsfit must be a tuple of one (frame,) "
+                    "or two elements (frame, mask)")
+            else:
+                rmsfit = (rmsfit, '*')
+            if is_int(rmsfit[0]):
+                rmsfit = (self[rmsfit[0]].copy(), rmsfit[1])
+
+        if frame_indices is None:
+            indices = self._frames[slice(start, stop, step)]
+        else:
+            if not hasattr(frame_indices, '__len__'):
+                # e.g. itertools.chain
+                frame_indices = list(frame_indices)
+            indices = np.asarray(self._frames)[np.asarray(
+                frame_indices, dtype='i8')]
+
+        def frame_iter():
+            frames = self._traj._iterframe_indices(indices)
+            if self._atoms is None:
+                for frame in frames:
+                    yield frame
+            else:
+                pool = FramePool(atm=self._atom_mask)
+                for frame in frames:
+                    yield pool.take(frame)
+
+        return FrameIterator(
+            frame_iter(),
+            original_top=self.top,
+            new_top=top,
+            start=start,
+            stop=stop,
+            step=step,
+            mask=mask,
+            autoimage=autoimage,
+            rmsfit=rmsfit,
+            n_frames=len(indices),
+            copy=False,
+            frame_indices=frame_indices)
+
+    def copy(self):
+        '''return a new Trajectory with a copy of the selected frames and atoms
+        '''
+        from .trajectory import Trajectory
+
+        traj = Trajectory()
+        # own Topology: never shared with the parent (or the cached view Topology)
+        traj._top = self.top.copy()
+        xyz = np.ascontiguousarray(self.xyz)
+        if np.may_share_memory(xyz, self._traj.xyz):
+            xyz = xyz.copy()
+        traj._xyz = xyz
+        boxes = self.unitcells
+        if boxes is not None:
+            traj._boxes = np.array(boxes)
+        if self.time is not None:
+            traj.time = np.array(self.time)
+        if self._traj.velocities is not None:
+            traj.velocities = np.array(self._take(self._traj.velocities))
+        if self._traj.forces is not None:
+            traj.forces = np.array(self._take(self._traj.forces))
+        return traj
@@ -97,6 +97,48 @@ def ensure_not_none_or_string(obj):
         raise ValueError(msg)
 
 
+def _accept_dtype(func):
+    '''True if ``func`` has a ``dtype`` parameter (e.g most pytraj analysis functions)
+    '''
+    import inspect
+
+    try:
+        return 'dtype' in inspect.signature(func).parameters
+    except AttributeError:
+        # py2
+        return 'dtype' in inspect.getargspec(func).args
+    except (TypeError, ValueError):
+        return False
+
+
+def _default_dtype(func, default=None):
+    '''default value of the ``dtype`` parameter of ``func``, ``default`` if there is none
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.utils.check_and_assert import _default_dtype
+    >>> _default_dtype(pt.dssp)
+    'ndarray'
+    >>> _default_dtype(pt.multirdf)
+    'state'
+    '''
+    import inspect
+
+    try:
+        parameter = inspect.signature(func).parameters.get('dtype')
+        if parameter is None or parameter.default is parameter.empty:
+            return default
+        return parameter.default
+    except AttributeError:
+        # py2
+        spec = inspect.getargspec(func)
+        defaults = dict(zip(spec.args[::-1], (spec.defaults or ())[::-1]))
+        return defaults.get('dtype', default)
+    except (TypeError, ValueError):
+        return default
+
+
 def _import(modname):
     """has_numpy, np = _import('numpy')
     >>> has_np, np = _import('numpy')
@@ -1,7 +1,9 @@
 import os
+import threading
 from contextlib import contextmanager
 import tempfile
 from shutil import rmtree
+from ..externals.six import StringIO
 
 try:
     from ..externals.wurlitzer import pipes
@@ -12,7 +14,38 @@ except ImportError:
         yield "", ""
 
 
-capture_stdout = pipes
+# file descriptors are shared by all threads: only one redirection at a time
+_CAPTURE_LOCK = threading.RLock()
+_thread_state = threading.local()
+
+
+@contextmanager
+def capture_stdout():
+    '''capture C-level stdout and stderr
+
+    File descriptors are shared by all threads, so redirections from different threads
+    are serialized with a process-wide lock. Workers of ``pmap(..., backend='threads')``
+    (see ``_no_capture``) do not redirect and get empty outputs: their output is captured
+    once by the thread running the pool.
+    '''
+    if getattr(_thread_state, 'no_capture', False):
+        yield StringIO(), StringIO()
+        return
+    with _CAPTURE_LOCK:
+        with pipes() as out:
+            yield out
+
+
+@contextmanager
+def _no_capture():
+    '''capture_stdout does not redirect in this thread (thread pool workers)
+    '''
+    previous = getattr(_thread_state, 'no_capture', False)
+    _thread_state.no_capture = True
+    try:
+        yield
+    finally:
+        _thread_state.no_capture = previous
 
 
 @contextmanager
@@ -23,6 +23,33 @@ def register_openmp(f):
     return inner
 
 
+def register_pmap_setup(setup):
+    '''``setup(traj, *args, **kwargs)`` is called by pmap and pmap_mpi in the master process,
+    before splitting ``traj``. It returns a dict to update ``kwargs`` so all chunks use the
+    same data dependent parameters (e.g. grid dimension determined from the first frame).
+    '''
+
+    def inner(f):
+        f._pmap_setup = setup
+        return f
+
+    return inner
+
+
+def register_mergeable(f):
+    '''``f`` returns a state having ``merge`` method and ``to_dtype`` method.
+    pmap and pmap_mpi merge the states of all chunks instead of concatenating data.
+    '''
+
+    @wraps(f)
+    def inner(*args, **kwd):
+        return f(*args, **kwd)
+
+    inner._is_parallelizable = True
+    inner._is_mergeable = True
+    return inner
+
+
 def ensure_exist(f):
     @wraps(f)
     def inner(*args, **kwd):
@@ -0,0 +1,228 @@
+"""opt-in timing of frame pipelines
+
+Examples
+--------
+>>> import pytraj as pt
+>>> traj = pt.datafiles.load_tz2_ortho()
+>>> with pt.profile() as prof:
+...     data = pt.radgyr(traj(autoimage=True, rmsfit=(0, '@CA')))
+>>> print(prof.to_table()) # doctest: +SKIP
+"""
+from __future__ import absolute_import
+import os
+import json
+import threading
+from time import time
+from collections import OrderedDict
+
+__all__ = ['profile', 'Profiler', 'get_profiler']
+
+_local = threading.local()
+
+
+def get_profiler():
+    '''return the active Profiler of this thread, None if profiling is off
+
+    Instrumented code calls this once per pipeline (not per frame), so there is no
+    overhead when profiling is off.
+    '''
+    return getattr(_local, 'profiler', None)
+
+
+class _Stat(object):
+    __slots__ = ['total', 'count', 'min', 'max']
+
+    def __init__(self):
+        self.total = 0.
+        self.count = 0
+        self.min = float('inf')
+        self.max = 0.
+
+    def add(self, dt):
+        self.total += dt
+        self.count += 1
+        if dt < self.min:
+            self.min = dt
+        if dt > self.max:
+            self.max = dt
+
+
+class Profiler(object):
+    '''hold cumulative time and call counts for each (pipeline, stage).
+    Use ``pytraj.profile`` to create it.
+
+    Parameters
+    ----------
+    trace : bool, default False
+        if True, also keep every single call as an event to export Chrome trace
+        (chrome://tracing or https://ui.perfetto.dev). This uses more memory.
+    '''
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.stats = OrderedDict()
+        self.events = []
+        self._t0 = time()
+
+    def add(self, pipeline, stage, start, dt):
+        key = (pipeline, stage)
+        try:
+            stat = self.stats[key]
+        except KeyError:
+            stat = self.stats[key] = _Stat()
+        stat.add(dt)
+        if self.trace:
+            self.events.append((pipeline, stage, start, dt,
+                                threading.current_thread().ident))
+
+    def timed(self, func, pipeline, stage):
+        '''return a wrapper of ``func`` that records its run time
+        '''
+        add = self.add
+
+        def inner(*args, **kwargs):
+            t0 = time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(pipeline, stage, t0, time() - t0)
+
+        return inner
+
+    def timed_iter(self, iterable, pipeline, stage):
+        '''iterate ``iterable`` and record the time to produce each item
+        '''
+        add = self.add
+        iterator = iter(iterable)
+        while True:
+            t0 = time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            add(pipeline, stage, t0, time() - t0)
+            yield item
+
+    def reset(self):
+        self.stats.clear()
+        del self.events[:]
+        self._t0 = time()
+
+    def to_dict(self):
+        '''return OrderedDict[pipeline, OrderedDict[stage, dict]]
+        '''
+        out = OrderedDict()
+        for (pipeline, stage), stat in self.stats.items():
+            out.setdefault(pipeline, OrderedDict())[stage] = OrderedDict([
+                ('total', stat.total),
+                ('count', stat.count),
+                ('mean', stat.total / stat.count if stat.count else 0.),
+                ('min', stat.min if stat.count else 0.),
+                ('max', stat.max),
+            ])
+        return out
+
+    def to_table(self):
+        '''return a text table, sorted by total time in each pipeline
+        '''
+        header = '{:<30s} {:<40s} {:>10s} {:>10s} {:>12s}'.format(
+            'pipeline', 'stage', 'total (s)', 'count', 'mean (ms)')
+        lines = [header, '-' * len(header)]
+        for pipeline, stages in self.to_dict().items():
+            for stage, val in sorted(
+                    stages.items(), key=lambda x: -x[1]['total']):
+                lines.append('{:<30s} {:<40s} {:>10.4f} {:>10d} {:>12.4f}'.
+                             format(pipeline[:30], stage[:40], val['total'],
+                                    val['count'], val['mean'] * 1000.))
+        return '\n'.join(lines)
+
+    def to_dataframe(self):
+        '''return pandas DataFrame
+
+        Requires
+        --------
+        pandas
+        '''
+        import pandas
+        rows = []
+        for pipeline, stages in self.to_dict().items():
+            for stage, val in stages.items():
+                row = OrderedDict([('pipeline', pipeline), ('stage', stage)])
+                row.update(val)
+                rows.append(row)
+        return pandas.DataFrame(rows)
+
+    def to_chrome_trace(self):
+        '''return dict in Chrome trace event format. Need trace=True to have events
+        for each call, otherwise each stage is exported as a single summary event.
+        '''
+        pid = os.getpid()
+        events = []
+        if self.trace:
+            for pipeline, stage, start, dt, tid in self.events:
+                events.append(
+                    OrderedDict([('name', stage), ('cat', pipeline), ('ph',
+                                                                      'X'),
+                                 ('ts', (start - self._t0) * 1e6),
+                                 ('dur', dt * 1e6), ('pid', pid), ('tid',
+                                                                   tid)]))
+        else:
+            ts = 0.
+            for (pipeline, stage), stat in self.stats.items():
+                events.append(
+                    OrderedDict([('name', stage), ('cat', pipeline), ('ph',
+                                                                      'X'),
+                                 ('ts', ts), ('dur', stat.total * 1e6),
+                                 ('pid', pid), ('tid', 0), ('args', {
+                                     'count': stat.count
+                                 })]))
+                ts += stat.total * 1e6
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, filename):
+        with open(filename, 'w') as fh:
+            json.dump(self.to_chrome_trace(), fh)
+
+    def __str__(self):
+        return self.to_table()
+
+    def __repr__(self):
+        return '<pytraj.Profiler: {} stages>'.format(len(self.stats))
+
+
+class profile(object):
+    '''context manager to record time of each stage in frame pipelines (reading frames,
+    copying, autoimage, rmsfit, mask stripping, cpptraj actions, python callbacks).
+
+    Parameters
+    ----------
+    trace : bool, default False
+        if True, record each call to export Chrome trace JSON
+
+    Notes
+    -----
+    - Profiling is per thread and does not include work done in other processes
+      (e.g. pmap workers).
+    - cpptraj's ActionList runs all of its actions in a single C++ call, so it is reported
+      as one stage named after its commands.
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> traj = pt.datafiles.load_tz2_ortho()
+    >>> with pt.profile(trace=True) as prof:
+    ...     data = pt.compute(['autoimage', 'radgyr @CA'], traj)
+    >>> prof.save_chrome_trace('output/trace.json')
+    '''
+
+    def __init__(self, trace=False):
+        self.profiler = Profiler(trace=trace)
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = get_profiler()
+        _local.profiler = self.profiler
+        return self.profiler
+
+    def __exit__(self, *args):
+        _local.profiler = self._previous
@@ -0,0 +1,426 @@
+"""opt-in on-disk memoization of analysis results
+
+Results are keyed on the function name, pytraj version, trajectory identity (file
+names plus size and modification time, or content hashes, frame slices and registered
+transformations for TrajectoryIterator; coordinate hashes for in-memory Trajectory),
+Topology hash and normalized arguments (including ``frame_indices``). They are pickled
+to a directory whose total size is bounded by evicting the least recently used entries.
+
+Examples
+--------
+>>> import pytraj as pt
+>>> from pytraj.utils.result_cache import ResultCache
+>>> traj = pt.datafiles.load_tz2_ortho()
+>>> cache = ResultCache('output/pytraj_cache', max_bytes=10 * 1024**2)
+>>> data = cache.call(pt.rmsd, traj, mask='@CA', ref=0) # compute and store
+>>> data = cache.call(pt.rmsd, traj, '@CA', ref=0) # same arguments: loaded from disk
+>>> cache.hits
+1
+>>> rg = cache.actions.radgyr(traj, '@CA') # any function in pytraj.all_actions
+>>> out = cache.compute(['radgyr @CA', 'distance :3 :7'], traj)
+"""
+from __future__ import absolute_import
+import os
+import hashlib
+import pickle
+import inspect
+import tempfile
+from functools import wraps
+import numpy as np
+
+from ..externals.six import string_types
+
+__all__ = ['ResultCache', 'memoize']
+
+_SUFFIX = '.pkl'
+# (path, size, mtime) -> sha1 of file content
+_CONTENT_HASHES = {}
+
+
+class _Uncacheable(Exception):
+    '''an argument can not be identified, call the function without cache'''
+
+
+def _default_directory():
+    return os.environ.get('PYTRAJ_CACHE_DIR',
+                          os.path.join(
+                              os.path.expanduser('~'), '.cache', 'pytraj'))
+
+
+def _file_content_hash(filename):
+    stat = os.stat(filename)
+    key = (os.path.abspath(filename), stat.st_size, stat.st_mtime)
+    if key not in _CONTENT_HASHES:
+        h = hashlib.sha1()
+        with open(filename, 'rb') as fh:
+            for block in iter(lambda: fh.read(1 << 20), b''):
+                h.update(block)
+        _CONTENT_HASHES[key] = h.hexdigest()
+    return _CONTENT_HASHES[key]
+
+
+class _Hasher(object):
+    '''feed a canonical representation of (nested) arguments to sha1
+    '''
+
+    def __init__(self, check_content=False):
+        self.check_content = check_content
+        self._sha = hashlib.sha1()
+
+    def hexdigest(self):
+        return self._sha.hexdigest()
+
+    def _tag(self, *tokens):
+        for token in tokens:
+            self._sha.update(repr(token).encode('utf-8'))
+            self._sha.update(b'\0')
+
+    def _array(self, values):
+        values = np.ascontiguousarray(values)
+        if values.dtype.hasobject:
+            self.feed(values.tolist())
+            return
+        self._tag('ndarray', values.dtype.str, values.shape)
+        self._sha.update(values.view(np.uint8).reshape(-1).data)
+
+    def _file(self, filename):
+        if self.check_content:
+            self._tag('content', _file_content_hash(filename))
+        else:
+            stat = os.stat(filename)
+            self._tag('file',
+                      os.path.abspath(filename), stat.st_size, stat.st_mtime)
+
+    def _topology(self, top):
+        arrays = top.arrays
+        self._tag('Topology', top.n_atoms, top.n_residues)
+        for name in ['name', 'type', 'resname', 'resid', 'molnum', 'mass',
+                     'charge', 'bond_indices']:
+            self._array(arrays[name])
+        self._array(top.box.values)
+
+    def feed(self, obj):
+        from ..topology.topology import Topology
+        from ..trajectory.frame import Frame
+        from ..trajectory.compressed_trajectory import CompressedTrajectory
+        from ..core.c_core import AtomMask
+
+        if obj is None or isinstance(obj, (bool, float) + string_types):
+            self._tag(obj)
+        elif isinstance(obj, (int, np.integer, np.floating, np.bool_)):
+            self._tag(obj.item() if hasattr(obj, 'item') else obj)
+        elif isinstance(obj, bytes):
+            self._tag('bytes')
+            self._sha.update(obj)
+        elif isinstance(obj, np.ndarray):
+            self._array(obj)
+        elif isinstance(obj, (list, tuple, range)):
+            self._tag(type(obj).__name__, len(obj))
+            for item in obj:
+                self.feed(item)
+        elif isinstance(obj, dict):
+            self._tag('dict', len(obj))
+            for key in sorted(obj, key=repr):
+                self.feed(key)
+                self.feed(obj[key])
+        elif isinstance(obj, slice):
+            self._tag('slice', obj.start, obj.stop, obj.step)
+        elif isinstance(obj, Topology):
+            self._topology(obj)
+        elif isinstance(obj, AtomMask):
+            self._tag('AtomMask')
+            self._array(obj.indices)
+        elif isinstance(obj, Frame):
+            self._tag('Frame')
+            self._array(obj.xyz)
+            self._array(obj.box.values)
+        elif hasattr(obj, '_frame_slice_list') and hasattr(obj, 'filelist'):
+            # TrajectoryIterator: files are not read
+            self._tag('TrajectoryIterator', obj.n_frames)
+            self._topology(obj.top)
+            for filename in obj.filelist:
+                self._file(filename)
+            self.feed(list(obj._frame_slice_list))
+            if obj._being_transformed:
+                self.feed(list(obj._transform_commands))
+        elif isinstance(obj, CompressedTrajectory):
+            self._tag('CompressedTrajectory')
+            self._topology(obj.top)
+            self._file(obj.filename)
+        elif hasattr(obj, 'xyz') and hasattr(obj, 'top') and hasattr(
+                obj, 'n_frames') and hasattr(obj, 'unitcells'):
+            # in-memory Trajectory, TrajectoryView
+            self._tag('Trajectory')
+            self._topology(obj.top)
+            self._array(obj.xyz)
+            if obj.unitcells is not None:
+                self._array(obj.unitcells)
+        else:
+            # e.g. frame iterators (consumed when read) or callables
+            raise _Uncacheable(type(obj).__name__)
+
+
+def _is_iterator(obj):
+    '''True for one-shot iterators (generator, itertools.chain, ...): reading them
+    consumes them
+    '''
+    try:
+        return iter(obj) is obj
+    except TypeError:
+        return False
+
+
+def _func_name(func):
+    name = getattr(func, '__qualname__', None) or func.__name__
+    return '{}.{}'.format(getattr(func, '__module__', ''), name)
+
+
+class ResultCache(object):
+    '''on-disk cache of analysis results with size-bounded LRU eviction
+
+    Parameters
+    ----------
+    directory : {None, str}, default None
+        where results are stored. If None, use $PYTRAJ_CACHE_DIR or ~/.cache/pytraj
+    max_bytes : int, default 2 GB
+        total size of stored results. The least recently used results are removed when
+        the size is exceeded
+    check_content : bool, default False
+        if True, identify trajectory files by hashing their content (slower for big
+        files, but survives copies and touched files). If False, use path, size and
+        modification time
+
+    Notes
+    -----
+    - Results are only cached if all arguments can be identified. Frame iterators
+      (``traj(0, 8, 2)``, ``traj.iterframe(...)``) are consumed when read and are not
+      cached: use ``frame_indices`` instead. A ``frame_indices`` iterator (e.g a
+      generator) given as keyword is read once and passed to the function as an array.
+    - Returned results are new objects loaded from disk, so modifying them does not
+      change the cache.
+
+    See also
+    --------
+    memoize
+    '''
+
+    def __init__(self, directory=None, max_bytes=2 * 1024**3,
+                 check_content=False):
+        self.directory = os.path.abspath(
+            os.path.expanduser(directory or _default_directory()))
+        self.max_bytes = int(max_bytes)
+        self.check_content = check_content
+        self.hits = 0
+        self.misses = 0
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+    def __repr__(self):
+        return '<ResultCache: {}, {} entries, {:.1f}/{:.1f} MB>'.format(
+            self.directory,
+            len(self), self.size / 1024.**2, self.max_bytes / 1024.**2)
+
+    def _entries(self):
+        '''list of (mtime, size, path)'''
+        entries = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def __len__(self):
+        return len(self._entries())
+
+    @property
+    def size(self):
+        '''total size of stored results in bytes'''
+        return sum(size for _, size, _ in self._entries())
+
+    def key(self, func, *args, **kwargs):
+        '''return the cache key of ``func(*args, **kwargs)``, or None if some arguments
+        can not be identified
+        '''
+        from pytraj import __version__
+
+        try:
+            bound = inspect.signature(func).bind(*args, **kwargs)
+        except AttributeError:
+            # py2
+            bound = None
+        except TypeError:
+            return None
+        if bound is not None:
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+        else:
+            arguments = {'args': args, 'kwargs': kwargs}
+        if arguments.get('frame_indices') is not None:
+            if _is_iterator(arguments['frame_indices']):
+                # reading it here would leave nothing for func
+                return None
+            # list, range and array of the same frames have the same key
+            arguments['frame_indices'] = np.asarray(
+                list(arguments['frame_indices']), dtype='i8')
+
+        hasher = _Hasher(check_content=self.check_content)
+        try:
+            hasher.feed([_func_name(func), __version__])
+            hasher.feed(arguments)
+        except _Uncacheable:
+            return None
+        return hasher.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as fh:
+                result = pickle.load(fh)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+        try:
+            # mark as recently used
+            os.utime(path, None)
+        except OSError:
+            pass
+        return True, result
+
+    def _store(self, key, result):
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # e.g. cpptraj's datasets (dtype='dataset')
+            return
+        if len(data) > self.max_bytes:
+            return
+        # write to a temporary file then rename, so readers never see partial results
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            getattr(os, 'replace', os.rename)(tmp, self._path(key))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def call(self, func, *args, **kwargs):
+        '''return ``func(*args, **kwargs)``, from disk if it was computed before
+        '''
+        if _is_iterator(kwargs.get('frame_indices')):
+            # read once, the same frames are used for the key and by func
+            kwargs['frame_indices'] = np.asarray(
+                list(kwargs['frame_indices']), dtype='i8')
+        key = self.key(func, *args, **kwargs)
+        if key is None:
+            return func(*args, **kwargs)
+        found, result = self._load(key)
+        if found:
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = func(*args, **kwargs)
+        self._store(key, result)
+        return result
+
+    def wrap(self, func):
+        '''return a cached version of ``func``
+
+        Examples
+        --------
+        >>> import pytraj as pt
+        >>> from pytraj.utils.result_cache import ResultCache
+        >>> cache = ResultCache('output/pytraj_cache')
+        >>> rmsd = cache.wrap(pt.rmsd)
+        >>> data = rmsd(pt.datafiles.load_tz2(), mask='@CA')
+        '''
+
+        @wraps(func)
+        def inner(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+
+        inner.cache = self
+        return inner
+
+    def compute(self, *args, **kwargs):
+        '''cached ``pytraj.compute``
+        '''
+        from pytraj import compute
+        return self.call(compute, *args, **kwargs)
+
+    @property
+    def actions(self):
+        '''cached functions of ``pytraj.all_actions``, e.g ``cache.actions.rmsd``
+        '''
+        return _CachedActions(self)
+
+    def clear(self):
+        '''remove all stored results
+        '''
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class _CachedActions(object):
+    def __init__(self, cache):
+        self._cache = cache
+
+    def __dir__(self):
+        from pytraj import all_actions
+        return list(all_actions.__all__)
+
+    def __getattr__(self, name):
+        from pytraj import all_actions
+        if name not in all_actions.__all__:
+            raise AttributeError(name)
+        return self._cache.wrap(getattr(all_actions, name))
+
+
+_CACHES = {}
+
+
+def memoize(func=None, directory=None, max_bytes=2 * 1024**3):
+    '''cache results of ``func`` on disk (see ResultCache). Can be used as a decorator.
+
+    Examples
+    --------
+    >>> import pytraj as pt
+    >>> from pytraj.utils.result_cache import memoize
+    >>> rmsd = memoize(pt.rmsd, directory='output/pytraj_cache')
+    >>> data = rmsd(pt.datafiles.load_tz2(), mask='@CA')
+    >>> @memoize(directory='output/pytraj_cache')
+    ... def my_analysis(traj, mask):
+    ...     return pt.radgyr(traj, mask)
+    '''
+    if func is None:
+        return lambda f: memoize(f, directory=directory, max_bytes=max_bytes)
+    directory = os.path.abspath(
+        os.path.expanduser(directory or _default_directory()))
+    if directory not in _CACHES:
+        _CACHES[directory] = ResultCache(directory, max_bytes=max_bytes)
+    return _CACHES[directory].wrap(func)
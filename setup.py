@@ -198,6 +198,7 @@ packages = [
     'pytraj.analysis',
     'pytraj.analysis.c_action',
     'pytraj.analysis.c_analysis',
+    'pytraj.benchmarks',
     'pytraj.datasets',
     'pytraj.externals',
     'pytraj.trajectory',
@@ -0,0 +1,6 @@
+import sys
+
+# async syntax (async generators): can not be collected by older python
+collect_ignore = []
+if sys.version_info < (3, 6):
+    collect_ignore.append('test_aio.py')
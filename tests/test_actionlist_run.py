@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+from threading import Thread
+import numpy as np
+import pytraj as pt
+from pytraj import ActionList
+from pytraj.datasets import CpptrajDatasetList
+from pytraj.testing import aa_eq
+
+from utils import tz2_ortho_trajin, tz2_ortho_top
+
+commands = ['autoimage', 'radgyr @CA nomax', 'distance :2 :3', 'angle :2 :3 :4']
+
+
+def run(traj, **kwargs):
+    dslist = CpptrajDatasetList()
+    actlist = ActionList(commands, top=traj.top, dslist=dslist)
+    actlist.run(traj, **kwargs)
+    return dslist.values
+
+
+def compute(traj):
+    dslist = CpptrajDatasetList()
+    actlist = ActionList(commands, top=traj.top, dslist=dslist)
+    actlist.compute(traj)
+    return dslist.values
+
+
+class TestActionListRun(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(tz2_ortho_trajin, tz2_ortho_top)
+
+    def test_run(self):
+        traj = self.traj
+        aa_eq(run(traj), compute(traj))
+        aa_eq(run(traj, start=2, stop=8, step=2), compute(traj(2, 8, 2)))
+        aa_eq(
+            run(traj, frame_indices=[0, 5, -1]),
+            compute(traj.iterframe(frame_indices=[0, 5, 9])))
+
+        # in memory: fall back to compute
+        aa_eq(run(traj[:], start=1), compute(traj(1)))
+
+        with self.assertRaises(IndexError):
+            run(traj, frame_indices=[0, traj.n_frames])
+
+    def test_transformation(self):
+        traj = pt.iterload(tz2_ortho_trajin, tz2_ortho_top)
+        traj.autoimage().superpose(ref=0, mask='@CA')
+        aa_eq(run(traj), compute(traj))
+        # run twice
+        aa_eq(run(traj), compute(traj))
+
+    def test_compute_and_pmap(self):
+        traj = self.traj
+        expected = compute(traj)
+        data = pt.compute(commands, traj)
+        aa_eq(np.array(list(data.values())), expected)
+
+        data = pt.pmap(commands, traj, n_cores=2)
+        aa_eq(np.array(list(data.values())), expected)
+
+    def test_threads(self):
+        trajs = [
+            pt.iterload(tz2_ortho_trajin, tz2_ortho_top) for _ in range(4)
+        ]
+        results = [None] * len(trajs)
+
+        def target(i):
+            results[i] = run(trajs[i])
+
+        threads = [Thread(target=target, args=(i, )) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        expected = compute(self.traj)
+        for values in results:
+            aa_eq(values, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
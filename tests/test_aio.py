@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import asyncio
+import time
+import unittest
+import numpy as np
+import pytraj as pt
+from utils import fn
+from pytraj.testing import aa_eq
+from pytraj import aio
+
+
+def run(coro):
+    # asyncio.run requires python 3.7
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+class TestAio(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_calls(self):
+        fname, tname = fn('tz2.ortho.nc'), fn('tz2.ortho.parm7')
+
+        async def main():
+            traj = await aio.iterload(fname, tname)
+            loaded = await aio.load(fname, tname, frame_indices=[1, 3])
+            top = await aio.load_topology(tname)
+            rmsd, rg, data, pdata = await asyncio.gather(
+                aio.run(pt.rmsd, traj, mask='@CA', ref=0),
+                aio.run(pt.radgyr, traj, '@CA'),
+                aio.compute(['radgyr @CA', 'distance :3 :7'], traj),
+                aio.pmap(pt.radgyr, traj, '@CA', n_cores=2))
+            return traj, loaded, top, rmsd, rg, data, pdata
+
+        traj, loaded, top, rmsd, rg, data, pdata = run(main())
+        assert top.n_atoms == traj.top.n_atoms
+        aa_eq(loaded.xyz, self.traj[[1, 3]].xyz)
+        aa_eq(rmsd, pt.rmsd(self.traj, mask='@CA', ref=0))
+        aa_eq(rg, pt.radgyr(self.traj, '@CA'))
+        aa_eq(pt.tools.dict_to_ndarray(data)[0], rg)
+        aa_eq(pdata['RoG_00000'], rg)
+
+    def test_iter(self):
+        traj = self.traj
+        ref = traj[0]
+
+        async def main():
+            chunks = [
+                chunk.xyz.copy()
+                async for chunk in aio.iterchunk(
+                    traj, 4, mask='@CA', autoimage=True, rmsfit=(0, '@CA'))
+            ]
+            frames = [
+                frame.xyz.copy()
+                async for frame in aio.iterframe(traj, 3, start=2, stop=9)
+            ]
+            return chunks, frames
+
+        chunks, frames = run(main())
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        expected = pt.get_coordinates(
+            traj, mask='@CA', autoimage=True, rmsfit=(0, '@CA'))
+        aa_eq(np.vstack(chunks), expected)
+        aa_eq(np.array(frames), traj.xyz[2:9])
+        aa_eq(traj[0].xyz, ref.xyz)
+
+    def test_executor(self):
+        executor = aio.AsyncExecutor(max_workers=2)
+        order = []
+
+        def work(name, duration):
+            order.append(name)
+            time.sleep(duration)
+            return name
+
+        async def main():
+            # the first call takes both slots: other calls wait, in order
+            results = await asyncio.gather(
+                executor._run(2, work, ('first', 0.1), {}),
+                executor.run(work, 'second', 0.01),
+                executor.run(work, 'third', 0.01))
+            assert results == ['first', 'second', 'third']
+            assert order[0] == 'first'
+
+            # cancel a waiting call and a running call
+            running = asyncio.ensure_future(
+                executor._run(2, work, ('running', 0.2), {}))
+            await asyncio.sleep(0.05)
+            waiting = asyncio.ensure_future(executor.run(work, 'waiting', 0.))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            running.cancel()
+            await asyncio.sleep(0.3)
+            assert 'waiting' not in order
+            assert executor._limiter.used == 0
+
+            # stop iterating early
+            async for chunk in aio.iterchunk(
+                    self.traj, 2, prefetch=1, executor=executor):
+                break
+            await asyncio.sleep(0.2)
+            assert executor._limiter.used == 0
+
+        run(main())
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+import unittest
+import numpy as np
+import pytraj as pt
+from numpy.testing import assert_equal
+from utils import fn
+from pytraj.testing import aa_eq
+from pytraj.analysis.dssp_analysis import DSSPState, decode_ss
+
+
+class TestDSSPState(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('Tc5b.x'), fn('Tc5b.top'))
+
+    def test_integer(self):
+        traj = self.traj
+        residues, ss, avg = pt.dssp(traj)
+        residues_int, codes, avg_int = pt.dssp(traj, dtype='integer')
+        assert codes.dtype == np.uint8
+        assert_equal(residues_int, residues)
+        assert_equal(decode_ss(codes), ss)
+        assert_equal(
+            decode_ss(codes, simplified=True),
+            pt.dssp(traj, simplified=True)[1])
+        assert avg_int.keys() == avg.keys()
+        aa_eq(avg_int.values, avg.values)
+
+        # vs cpptraj
+        cpp_data = np.loadtxt(fn("dssp.Tc5b.dat"), skiprows=1)[:, 1:]
+        aa_eq(codes, cpp_data)
+
+    def test_state(self):
+        state = pt.dssp(self.traj, dtype='state')
+        assert isinstance(state, DSSPState)
+        assert state.codes.shape == (self.traj.n_frames, self.traj.top.n_residues)
+
+        # per-residue fractions (Para, Anti, ..., Bend) vs cpptraj
+        cpp_sum = np.loadtxt(fn("dssp.Tc5b.dat.sum"), skiprows=1)[:, 1:]
+        aa_eq(state.fractions[:, 1:], cpp_sum, decimal=4)
+        aa_eq(state.fractions.sum(axis=1), np.ones(state.n_residues))
+
+        # run-length segments cover all frames and decode back to codes
+        segments = state.segments()
+        rebuilt = np.empty(state.codes.shape, dtype='U1')
+        for residue, ss, start, length in zip(*segments.values()):
+            col = state.residues.tolist().index(residue)
+            rebuilt[start:start + length, col] = ss
+        assert_equal(rebuilt, state.decode())
+        assert np.all(segments['length'] > 0)
+
+        segments = state.segments(simplified=True)
+        aa_eq(segments['length'].sum(), state.codes.size)
+        assert set(segments['ss']) <= set('HEC')
+
+        # merge
+        s0 = pt.dssp(self.traj, frame_indices=list(range(4)), dtype='state')
+        s1 = pt.dssp(self.traj, frame_indices=list(range(4, 10)), dtype='state')
+        merged = s0 + s1
+        assert_equal(merged.codes, state.codes)
+        aa_eq(merged.fractions, state.fractions)
+        for key in state.averages:
+            aa_eq(merged.averages[key], state.averages[key])
+
+    def test_pmap(self):
+        if 'OPENMP' in pt.compiled_info():
+            self.assertRaises(RuntimeError,
+                              lambda: pt.pmap(pt.dssp, self.traj, n_cores=2))
+            return
+        state = pt.dssp(self.traj, dtype='state')
+        residues, ss, averages = pt.dssp(self.traj)
+        for n_cores in [2, 3]:
+            pstate = pt.pmap(pt.dssp, self.traj, n_cores=n_cores, dtype='state')
+            assert_equal(pstate.codes, state.codes)
+            aa_eq(pstate.fractions, state.fractions)
+
+            # same default dtype as the serial call
+            presidues, pss, paverages = pt.pmap(pt.dssp, self.traj, n_cores=n_cores)
+            assert_equal(presidues, residues)
+            assert_equal(pss, ss)
+            assert paverages.keys() == averages.keys()
+            for pdset, dset in zip(paverages, averages):
+                aa_eq(pdset.values, dset.values)
+                assert pdset.aspect == dset.aspect
+
+    def test_averages_metadata(self):
+        _, _, averages = pt.dssp(self.traj)
+        cpp_averages = pt.dssp(self.traj, dtype='dataset').grep('_avg')
+        assert averages.keys() == cpp_averages.keys()
+        for dset, cpp_dset in zip(averages, cpp_averages):
+            assert dset.aspect == cpp_dset.aspect
+            assert dset.name == cpp_dset.name
+            aa_eq(dset.values, cpp_dset.values)
+
+        merged = pt.dssp(self.traj(0, 5), dtype='state') + pt.dssp(
+            self.traj(5, self.traj.n_frames), dtype='state')
+        _, _, merged_averages = merged.to_dtype('ndarray')
+        for dset, cpp_dset in zip(merged_averages, cpp_averages):
+            assert dset.aspect == cpp_dset.aspect
+            aa_eq(dset.values, cpp_dset.values)
+
+    def test_all_residues(self):
+        traj = pt.datafiles.load_tz2_ortho()
+        protein_residues = pt.dssp(traj, simplified=True)[1]
+        data = pt.dssp_allresidues(traj, simplified=True)
+        assert data.shape == (traj.n_frames, traj.top.n_residues)
+        assert_equal(data[:, :protein_residues.shape[1]], protein_residues)
+        assert np.all(data[:, protein_residues.shape[1]:] == 'C')
+
+        data_atoms = pt.dssp_allatoms(traj)
+        assert data_atoms.shape == (traj.n_frames, traj.n_atoms)
+        assert np.all(data_atoms[:, -1] == '0')
+
+
+if __name__ == "__main__":
+    unittest.main()
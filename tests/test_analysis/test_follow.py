@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import os
+import unittest
+import pytraj as pt
+from utils import fn
+from pytraj.testing import aa_eq, tempfolder
+from pytraj.analysis.follow import Follower
+
+
+class TestFollow(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.load(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def _add_analyses(self, follower):
+        follower.add('rmsd', pt.rmsd, mask='@CA', ref=0)
+        follower.add('rg', pt.radgyr, '@CA', bins=10, hist_range=(5., 15.))
+        follower.add('density', pt.density_profile, ':WAT@O')
+
+    def _check(self, follower, n_frames):
+        traj = self.traj[:n_frames]
+        assert follower.n_processed == n_frames
+        aa_eq(follower['rmsd'], pt.rmsd(traj, mask='@CA', ref=0))
+        rg = pt.radgyr(traj, '@CA')
+        aa_eq(follower['rg'].mean, rg.mean())
+        assert follower['rg'].n_frames == n_frames
+        aa_eq(follower['density'].mean,
+              pt.density_profile(traj, ':WAT@O').mean)
+
+    def test_follow(self):
+        traj = self.traj
+        with tempfolder():
+            # a running simulation: the file grows, then a new file is written
+            pt.write_traj('md1.nc', traj[:4])
+            follower = pt.follow('md*.nc', fn('tz2.ortho.parm7'))
+            assert isinstance(follower, Follower)
+            self._add_analyses(follower)
+            assert follower.update() == 4
+            self._check(follower, 4)
+            assert follower.update() == 0
+
+            pt.write_traj('md1.nc', traj[:7], overwrite=True)
+            assert follower.update() == 3
+            self._check(follower, 7)
+
+            pt.write_traj('md2.nc', traj[7:], overwrite=True)
+            assert follower.update() == 3
+            assert follower.traj.n_frames == 10
+            self._check(follower, 10)
+
+            # analysis added later is computed for processed frames
+            follower.add('distance', pt.distance, ':1@CA :5@CA')
+            aa_eq(follower['distance'], pt.distance(traj, ':1@CA :5@CA'))
+
+            os.remove('md1.nc')
+            self.assertRaises(RuntimeError, follower.update)
+
+    def test_resume(self):
+        traj = self.traj
+        with tempfolder():
+            pt.write_traj('md.nc', traj[:5])
+            follower = pt.follow('md.nc', fn('tz2.ortho.parm7'),
+                                 state_file='state.pk', holdback=1)
+            self._add_analyses(follower)
+            assert follower.update() == 4
+            assert os.path.exists('state.pk')
+
+            # new process: resume from saved states, only read new frames
+            pt.write_traj('md.nc', traj, overwrite=True)
+            follower = pt.follow('md.nc', fn('tz2.ortho.parm7'),
+                                 state_file='state.pk')
+            assert follower.n_processed == 4
+            assert follower.update() == 5
+            self._check(follower, 9)
+
+    def test_transformations(self):
+        traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+        traj.autoimage().superpose(mask='@CA', ref=0)
+        follower = pt.follow(traj)
+        follower.add('xyz', pt.get_coordinates, mask='@CA', frame_axis=0)
+        follower.update()
+        aa_eq(follower['xyz'], traj['@CA'].xyz)
+
+
+if __name__ == "__main__":
+    unittest.main()
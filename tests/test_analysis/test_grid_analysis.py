@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+import pytraj as pt
+from numpy.testing import assert_almost_equal
+from pytraj.testing import aa_eq, tempfolder
+from pytraj.analysis.grid_analysis import (GridState, ProfileState,
+                                           merge_states)
+
+from utils import fn
+
+
+class TestGridOccupancy(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_merge_chunks(self):
+        traj = self.traj
+        state = pt.grid_occupancy(traj, ':WAT@O', grid_spacing=(1., 1., 1.))
+        assert isinstance(state, GridState)
+        assert state.n_frames == traj.n_frames
+        n_atoms = len(traj.top.select(':WAT@O'))
+        # all atoms are in the grid (buffer)
+        assert state.counts.sum() == n_atoms * traj.n_frames
+
+        kwargs = dict(
+            grid_spacing=(1., 1., 1.),
+            origin=state.origin,
+            shape=state.shape)
+        states = [
+            pt.grid_occupancy(traj, ':WAT@O', frame_indices=range(i, i + 5),
+                              **kwargs) for i in range(0, traj.n_frames, 5)
+        ]
+        merged = merge_states(states)
+        assert merged.n_frames == state.n_frames
+        aa_eq(merged.counts, state.counts)
+        aa_eq(sum(states).counts, state.counts)
+        aa_eq(merged.occupancy, state.occupancy)
+
+    def test_pmap(self):
+        traj = self.traj
+        state = pt.grid_occupancy(traj, ':WAT@O', grid_spacing=(1., 1., 1.))
+        for n_cores in (2, 3):
+            pstate = pt.pmap(
+                pt.grid_occupancy,
+                traj,
+                ':WAT@O',
+                grid_spacing=(1., 1., 1.),
+                n_cores=n_cores)
+            assert pstate.n_frames == state.n_frames
+            aa_eq(pstate.origin, state.origin)
+            aa_eq(pstate.counts, state.counts)
+
+        occupancy = pt.pmap(
+            pt.grid_occupancy,
+            traj,
+            ':WAT@O',
+            grid_spacing=(1., 1., 1.),
+            dtype='ndarray',
+            n_cores=2)
+        aa_eq(occupancy, state.occupancy)
+
+    def test_save_load(self):
+        state = pt.grid_occupancy(self.traj, ':WAT@O')
+        with tempfolder():
+            state.save('grid.npz')
+            state2 = GridState.load('grid.npz')
+            assert state2.n_frames == state.n_frames
+            aa_eq(state2.counts, state.counts)
+            aa_eq(state2.origin, state.origin)
+
+    def test_merge_mismatched_grid(self):
+        s0 = pt.grid_occupancy(self.traj, ':WAT@O', grid_spacing=(1., 1., 1.))
+        s1 = pt.grid_occupancy(self.traj, ':WAT@O', grid_spacing=(0.5, 0.5,
+                                                                  0.5))
+        self.assertRaises(ValueError, lambda: s0 + s1)
+
+
+class TestDensityProfile(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_serial_vs_pmap(self):
+        traj = self.traj
+        masks = [':WAT@O', ':1-13']
+        state = pt.density_profile(traj, masks, density_type='mass')
+        assert isinstance(state, ProfileState)
+        assert state.n_frames == traj.n_frames
+
+        states = [
+            pt.density_profile(
+                traj, masks, density_type='mass', frame_indices=[i])
+            for i in range(traj.n_frames)
+        ]
+        merged = merge_states(states)
+        aa_eq(merged.coordinates, state.coordinates)
+        aa_eq(merged.mean, state.mean)
+        aa_eq(merged.std, state.std)
+
+        pstate = pt.pmap(
+            pt.density_profile, traj, masks, density_type='mass', n_cores=3)
+        aa_eq(pstate.mean, state.mean)
+        aa_eq(pstate.std, state.std)
+
+        data = state.to_dict()
+        assert list(data.keys()) == ['z', ':WAT@O', ':WAT@O[sd]', ':1-13',
+                                     ':1-13[sd]']
+
+    def test_number_density(self):
+        traj = self.traj
+        state = pt.density_profile(traj, ':WAT@O', delta=0.5)
+        n_atoms = len(traj.top.select(':WAT@O'))
+        # integrate number density over slabs -> number of atoms
+        box = traj[0].box.data[:3]
+        total = state.mean[0].sum() * 0.5 * box[0] * box[1]
+        aa_eq(total, n_atoms, decimal=3)
+
+    def test_compare_to_density(self):
+        traj = self.traj
+        masks = [':WAT@O', '@CA']
+        delta = 0.5
+        for density_type in ['number', 'mass']:
+            state = pt.density_profile(
+                traj, masks, density_type=density_type, delta=delta)
+            data = pt.density(
+                traj, masks, density_type=density_type, delta=delta)
+            # cpptraj may output more (empty) bins: align by bin centers
+            bins = (data['z'] / delta - 0.5).round().astype('i8') - state.first_bin
+            inside = (bins >= 0) & (bins < state.n_bins)
+            for k, mask in enumerate(masks):
+                aa_eq(state.mean[k][bins[inside]], data[mask][inside])
+                aa_eq(data[mask][~inside], 0.)
+            aa_eq(state.mean.sum(axis=1),
+                  [data[mask].sum() for mask in masks])
+
+    def test_require_box(self):
+        traj = pt.iterload(fn('tz2.nc'), fn('tz2.parm7'))
+        self.assertRaises(ValueError,
+                          lambda: pt.density_profile(traj, '@CA'))
+
+        # truncated octahedron
+        traj = pt.iterload(fn('tz2.truncoct.nc'), fn('tz2.truncoct.parm7'))
+        self.assertRaises(ValueError,
+                          lambda: pt.density_profile(traj, '@CA'))
+
+
+class TestVolmapPmap(unittest.TestCase):
+    def test_volmap(self):
+        traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+        # chunks would not use the same grid
+        self.assertRaises(
+            AssertionError,
+            lambda: pt.pmap(pt.volmap, traj, ':WAT@O', grid_spacing=(0.5, 0.5, 0.5),
+                            n_cores=2))
+
+        kwargs = dict(grid_spacing=(0.5, 0.5, 0.5), size=(20, 20, 20),
+                      center=(0., 0., 0.))
+        serial = pt.volmap(traj, ':WAT@O', **kwargs)
+        for n_cores in (2, 3):
+            parallel = pt.pmap(pt.volmap, traj, ':WAT@O', n_cores=n_cores, **kwargs)
+            assert_almost_equal(parallel, serial)
+
+
+if __name__ == "__main__":
+    unittest.main()
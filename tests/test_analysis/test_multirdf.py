@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+import numpy as np
+import pytraj as pt
+from pytraj.testing import aa_eq, tempfolder
+from pytraj.analysis.rdf_analysis import RdfState, _CellList, _unitcell
+
+from utils import fn
+
+
+def _brute_force_pairs(solute, solvent, ucell, maximum):
+    inverse = np.linalg.inv(ucell)
+    diff = np.dot(solvent[None, :] - solute[:, None], inverse)
+    diff -= np.round(diff)
+    distances = np.sqrt((np.dot(diff, ucell)**2).sum(axis=2))
+    return set(zip(*np.where(distances < maximum)))
+
+
+class TestCellList(unittest.TestCase):
+    def test_pairs(self):
+        rng = np.random.RandomState(1)
+        for box in [(30., 32., 35., 90., 90., 90.),
+                    (30., 32., 35., 70., 80., 100.),
+                    (40., 40., 40., 109.47, 109.47, 109.47)]:
+            ucell = _unitcell(np.array(box))
+            xyz = np.dot(rng.rand(400, 3), ucell)
+            cells = _CellList(xyz[:300], 7., ucell)
+            pairs = set()
+            for i, j, r in cells.pairs(xyz[300:]):
+                pairs.update(zip(i[r < 7.], j[r < 7.]))
+            assert pairs == _brute_force_pairs(xyz[300:], xyz[:300], ucell,
+                                               7.)
+
+    def test_no_box(self):
+        rng = np.random.RandomState(2)
+        xyz = rng.rand(400, 3) * 20.
+        cells = _CellList(xyz[:300], 5.)
+        n_pairs = sum((r < 5.).sum() for _, _, r in cells.pairs(xyz[300:]))
+        distances = np.sqrt(
+            ((xyz[300:, None] - xyz[None, :300])**2).sum(axis=2))
+        assert n_pairs == (distances < 5.).sum()
+
+
+class TestMultiRdf(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_vs_cpptraj(self):
+        traj = self.traj
+        for solute_mask in [':1-13@CA', ':5@CA']:
+            bins, expected = pt.rdf(
+                traj,
+                solvent_mask=':WAT@O',
+                solute_mask=solute_mask,
+                maximum=8.,
+                bin_spacing=0.5)
+            state = pt.multirdf(
+                traj, ':WAT@O', solute_mask, maximum=8., bin_spacing=0.5)
+            aa_eq(state.bin_centers, bins)
+            aa_eq(state.rdf[0], expected, decimal=3)
+
+    def test_many_pairs_single_pass(self):
+        traj = self.traj
+        masks = [':1-13@CA', ':1-13@N', ':1-13@O', ':1-13@C,CA']
+        state = pt.multirdf(traj, ':WAT@O', masks, maximum=8.)
+        assert state.counts.shape == (4, 16)
+        for k, mask in enumerate(masks):
+            single = pt.multirdf(traj, ':WAT@O', mask, maximum=8.)
+            aa_eq(state.counts[k], single.counts[0])
+
+        data = pt.multirdf(traj, ':WAT@O', masks, maximum=8., dtype='dict')
+        assert list(data.keys()) == ['r'] + masks
+
+    def test_merge_and_pmap(self):
+        traj = self.traj
+        masks = [':WAT@O', ':1-13@CA']
+        state = pt.multirdf(traj, ':WAT@O', masks, maximum=8., volume=True)
+        states = [
+            pt.multirdf(
+                traj,
+                ':WAT@O',
+                masks,
+                maximum=8.,
+                volume=True,
+                frame_indices=range(i, min(i + 3, traj.n_frames)))
+            for i in range(0, traj.n_frames, 3)
+        ]
+        merged = sum(states)
+        aa_eq(merged.counts, state.counts)
+        aa_eq(merged.rdf, state.rdf)
+
+        for n_cores in (2, 3):
+            pstate = pt.pmap(
+                pt.multirdf,
+                traj,
+                ':WAT@O',
+                masks,
+                maximum=8.,
+                volume=True,
+                n_cores=n_cores)
+            aa_eq(pstate.counts, state.counts)
+
+    def test_save_load(self):
+        state = pt.multirdf(self.traj, ':WAT@O', [':WAT@O', '@CA'])
+        with tempfolder():
+            state.save('rdf.npz')
+            state2 = RdfState.load('rdf.npz')
+            assert state2.keys == state.keys
+            aa_eq(state2.rdf, state.rdf)
+
+
+if __name__ == "__main__":
+    unittest.main()
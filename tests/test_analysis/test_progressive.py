@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+import numpy as np
+import pytraj as pt
+from pytraj.testing import aa_eq
+from pytraj.analysis.progressive import stratified_levels
+
+# local
+from utils import fn
+
+
+class TestProgressive(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_stratified_levels(self):
+        for n_frames in [1, 5, 10, 101, 1024]:
+            levels = stratified_levels(n_frames)
+            aa_eq(np.sort(np.concatenate(levels)), np.arange(n_frames))
+        levels = stratified_levels(10, first_stride=4)
+        aa_eq(levels[0], [0, 4, 8])
+        aa_eq(levels[1], [2, 6])
+        self.assertRaises(ValueError,
+                          lambda: stratified_levels(10, first_stride=3))
+
+    def test_progressive(self):
+        traj = self.traj
+        rg = pt.radgyr(traj, '@CA')
+        results = []
+        for result in pt.progressive(
+                pt.radgyr, traj, '@CA', first_stride=4):
+            aa_eq(result.data, rg[result.frame_indices])
+            results.append((result.fraction, result.std_error))
+        assert result.done
+        assert result.n_levels == 3
+        aa_eq([fraction for fraction, _ in results], [0.3, 0.5, 1.0])
+        aa_eq(result.mean, rg.mean())
+        aa_eq(result.std_error, 0.)
+        aa_eq(result.interpolate(), rg)
+
+        # early stop
+        gen = pt.progressive(pt.rmsd, traj, mask='@CA', ref=0, first_stride=8)
+        result = next(gen)
+        aa_eq(result.frame_indices, [0, 8])
+        aa_eq(result.data, pt.rmsd(traj, mask='@CA', ref=0)[[0, 8]])
+        assert not result.done
+        assert result.interpolate().shape == (traj.n_frames, )
+
+        # 2D output, frames in last axis
+        dist = pt.distance(traj, [':1@CA :3@CA', ':2@CA :5@CA'])
+        result = list(
+            pt.progressive(pt.distance, traj,
+                           [':1@CA :3@CA', ':2@CA :5@CA']))[-1]
+        aa_eq(result.data, dist)
+        assert result.mean.shape == (2, )
+
+        # tolerance
+        results = list(pt.progressive(pt.radgyr, traj, first_stride=4, tol=100.))
+        assert len(results) == 2
+
+        self.assertRaises(ValueError, lambda: next(
+            pt.progressive(pt.radgyr, traj, frame_indices=[0, 1])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+import unittest
+import numpy as np
+import pytraj as pt
+from utils import fn
+from pytraj.testing import aa_eq
+from pytraj.math.superposition import rmsd_to_references_xyz
+
+
+class TestRmsdToReferences(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.nc'), fn('tz2.parm7'))
+        self.refs = [0, 3, 7]
+
+    def test_vs_rmsd(self):
+        traj = self.traj
+        for mass in [False, True]:
+            expected = np.array([
+                pt.rmsd(traj, ref=i, mask='@CA', mass=mass) for i in self.refs
+            ]).T
+            for fi in [traj, traj[:]]:
+                data = pt.rmsd_to_references(
+                    fi, refs=self.refs, mask='@CA', mass=mass)
+                assert data.shape == (traj.n_frames, len(self.refs))
+                aa_eq(data, expected)
+
+        # nofit
+        expected = np.array([
+            pt.rmsd_nofit(traj, ref=i, mask='@CA') for i in self.refs
+        ]).T
+        aa_eq(
+            pt.rmsd_to_references(
+                traj, refs=self.refs, mask='@CA', fit=False),
+            expected)
+
+        # Trajectory and Frames as references, small chunksize
+        frame_indices = [1, 2, 5, 8]
+        expected = np.array([
+            pt.rmsd(traj, ref=i, mask='@CA', frame_indices=frame_indices)
+            for i in self.refs
+        ]).T
+        for refs in [traj[self.refs], [traj[i] for i in self.refs]]:
+            data = pt.rmsd_to_references(
+                traj,
+                refs=refs,
+                mask='@CA',
+                frame_indices=frame_indices,
+                chunksize=3)
+            aa_eq(data, expected)
+
+    def test_ref_mask(self):
+        traj = self.traj
+        ca_indices = pt.select_atoms('@CA', traj.top)
+        refs = traj[self.refs, '@CA']
+        data = pt.rmsd_to_references(traj, refs=refs, mask='@CA', ref_mask='*')
+        aa_eq(data, pt.rmsd_to_references(traj, refs=self.refs, mask='@CA'))
+        aa_eq(data,
+              rmsd_to_references_xyz(
+                  traj.xyz, refs.xyz, atom_indices=ca_indices))
+
+        self.assertRaises(
+            ValueError,
+            lambda: pt.rmsd_to_references(traj, refs=refs, mask='@CB'))
+
+    def test_pmap(self):
+        traj = self.traj
+        expected = pt.rmsd_to_references(traj, refs=self.refs, mask='@CA')
+        for n_cores in [2, 3]:
+            data = pt.pmap(
+                pt.rmsd_to_references,
+                traj,
+                refs=self.refs,
+                mask='@CA',
+                n_cores=n_cores)
+            aa_eq(data['rmsd'], expected)
+
+        self.assertRaises(
+            ValueError,
+            lambda: pt.pmap(pt.rmsd_to_references, traj, self.refs, n_cores=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+import numpy as np
+import pytraj as pt
+from pytraj.testing import aa_eq
+from pytraj.analysis.streaming import StreamState
+
+# local
+from utils import fn
+
+
+class TestStreamStats(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_stream_stats(self):
+        traj = self.traj
+        rg = pt.radgyr(traj, '@CA')
+        state = pt.stream_stats(
+            pt.radgyr,
+            traj,
+            '@CA',
+            chunksize=3,
+            block_size=4,
+            bins=5,
+            hist_range=(rg.min(), rg.max()),
+            max_lag=3)
+        assert state.n_frames == traj.n_frames
+        aa_eq(state.mean, rg.mean())
+        aa_eq(state.std, rg.std())
+        aa_eq(state.min, rg.min())
+        aa_eq(state.max, rg.max())
+        aa_eq(state.block_means(), [rg[:4].mean(), rg[4:8].mean()])
+        aa_eq(state.block_means(complete=False)[-1], rg[8:].mean())
+        aa_eq(state.histogram()[0], np.histogram(rg, bins=5)[0])
+        aa_eq(state.quantile([0.1, 0.5]), np.percentile(rg, [10, 50]))
+
+        x = rg - rg.mean()
+        acf = [(x[k:] * x[:len(x) - k]).mean() for k in range(4)]
+        aa_eq(state.acf(normalize=False), acf)
+        aa_eq(state.acf()[0], 1.)
+
+        # frames in last axis of func's output
+        masks = [':1@CA :3@CA', ':2@CA :5@CA']
+        dist = pt.distance(traj, masks)
+        state = pt.stream_stats(pt.distance, traj, masks, chunksize=4)
+        aa_eq(state.mean, dist.mean(axis=1))
+        assert state.quantile([0.25, 0.75]).shape == (2, 2)
+
+        self.assertRaises(ValueError, lambda: state.acf())
+        self.assertRaises(
+            ValueError,
+            lambda: pt.stream_stats(pt.radgyr, traj, bins=3))
+
+    def test_merge(self):
+        traj = self.traj
+        kwargs = dict(block_size=3, max_lag=4, bins=4, hist_range=(0., 10.))
+        rmsd = pt.rmsd(traj, ref=0, mask='@CA')
+        full = pt.stream_stats(pt.rmsd, traj, ref=0, mask='@CA', **kwargs)
+        s0 = pt.stream_stats(
+            pt.rmsd, traj, ref=0, mask='@CA', frame_indices=range(4), **kwargs)
+        s1 = pt.stream_stats(
+            pt.rmsd,
+            traj,
+            ref=0,
+            mask='@CA',
+            frame_indices=range(4, 10),
+            **kwargs)
+        merged = s0 + s1
+        for key, value in full.to_dict().items():
+            aa_eq(merged.to_dict()[key], value)
+        aa_eq(merged.mean, rmsd.mean())
+
+        # update an existing state with new frames
+        state = pt.stream_stats(
+            pt.rmsd, traj, ref=0, mask='@CA', frame_indices=range(4), **kwargs)
+        pt.stream_stats(
+            pt.rmsd,
+            traj,
+            ref=0,
+            mask='@CA',
+            frame_indices=range(4, 10),
+            state=state)
+        aa_eq(state.acf(), full.acf())
+        aa_eq(state.block_means(), full.block_means())
+
+        # resume without frame_indices: only frames after state.next_index
+        state = pt.stream_stats(
+            pt.rmsd, traj, ref=0, mask='@CA', frame_indices=range(6), **kwargs)
+        pt.stream_stats(pt.rmsd, traj, ref=0, mask='@CA', state=state)
+        assert state.n_frames == traj.n_frames
+        aa_eq(state.mean, full.mean)
+        aa_eq(state.acf(), full.acf())
+        # nothing new
+        pt.stream_stats(pt.rmsd, traj, ref=0, mask='@CA', state=state)
+        assert state.n_frames == traj.n_frames
+
+    def test_state(self):
+        values = np.random.RandomState(1).normal(size=(5000, 2))
+        state = StreamState(quantile_capacity=128)
+        for chunk in np.array_split(values, 7):
+            state.update(chunk)
+        aa_eq(state.mean, values.mean(axis=0))
+        aa_eq(state.var, values.var(axis=0))
+        aa_eq(
+            state.quantile([0.1, 0.5, 0.9]),
+            np.percentile(values, [10, 50, 90], axis=0),
+            decimal=1)
+        self.assertRaises(ValueError, lambda: state.update(np.zeros((2, 3))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import os
+import unittest
+import numpy as np
+import pytraj as pt
+from pytraj.testing import tempfolder
+from pytraj.benchmarks import (run_benchmarks, compare_results, save_results,
+                               load_results, make_synthetic_trajectory)
+from pytraj.benchmarks.__main__ import main
+from pytraj.benchmarks.runner import _peak_rss_mb
+
+
+def _allocate_50mb(traj):
+    return np.ones(50 * 1024**2 // 8).sum()
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_synthetic_trajectory(self):
+        with tempfolder():
+            traj = make_synthetic_trajectory('tz2_dry', scale=3, folder='.')
+            orig = pt.load_sample_data('tz2_dry')
+            assert traj.n_frames == 3 * orig.n_frames
+            assert traj.n_atoms == orig.n_atoms
+
+    def test_run_and_compare(self):
+        with tempfolder():
+            results = run_benchmarks(
+                ['iterframe', 'rmsd', 'write_traj'],
+                data='tz2_dry',
+                scale=1,
+                repeat=1,
+                folder='.',
+                verbose=False)
+            assert set(results['results'].keys()) == set(
+                ['iterframe', 'rmsd', 'write_traj'])
+            assert results['results']['rmsd']['n_frames'] == results[
+                'metadata']['n_frames']
+
+            save_results(results, 'baseline.json')
+            baseline = load_results('baseline.json')
+            report = compare_results(results, baseline)
+            assert not any(val['regression'] for val in report.values())
+
+            baseline['results']['rmsd']['wall_time'] /= 10.
+            report = compare_results(results, baseline, tolerance=0.2)
+            assert report['rmsd']['regression']
+
+            peak = results['results']['rmsd']['peak_memory_mb']
+            assert peak is None or peak >= 0.
+
+        self.assertRaises(ValueError, lambda: run_benchmarks(['not_exist']))
+
+    def test_peak_memory(self):
+        # resident memory, not only Python's heap
+        with tempfolder():
+            peak = _peak_rss_mb(_allocate_50mb, None, '.')
+        if peak is not None:
+            assert 40. < peak < 200., peak
+
+    def test_temporary_folder_is_removed(self):
+        import tempfile
+        from glob import glob
+        pattern = os.path.join(tempfile.gettempdir(), 'pytraj_benchmark_*')
+        before = set(glob(pattern))
+        run_benchmarks(['iterframe'], data='tz2_dry', scale=1, repeat=1, verbose=False)
+        assert set(glob(pattern)) == before
+
+    def test_main(self):
+        with tempfolder():
+            assert main(['iterframe', '--data', 'tz2_dry', '--scale', '1',
+                         '--repeat', '1', '-o', 'out.json']) == 0
+            assert os.path.exists('out.json')
+            assert main(['iterframe', '--data', 'tz2_dry', '--scale', '1',
+                         '--repeat', '1', '-b', 'out.json',
+                         '--tolerance', '100']) == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
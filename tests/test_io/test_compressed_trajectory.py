@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+import os
+import unittest
+import numpy as np
+import pytraj as pt
+from pytraj import CompressedTrajectory
+from pytraj.trajectory.compressed_trajectory import (
+    CompressedTrajectoryWriter, _encode_coordinates, _decode_coordinates)
+from pytraj.testing import aa_eq, tempfolder
+
+# local
+from utils import fn
+
+
+class TestCompressedTrajectory(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn("tz2.ortho.nc"), fn("tz2.ortho.parm7"))
+
+    def test_encode_decode(self):
+        rng = np.random.RandomState(0)
+        xyz = np.cumsum(rng.randn(20, 50, 3), axis=0) * 10.
+        for precision in [0.001, 0.01, 0.1]:
+            data, itemsize = _encode_coordinates(xyz, precision, 1)
+            new_xyz = _decode_coordinates(data, itemsize, xyz.shape, precision)
+            assert np.abs(new_xyz - xyz).max() <= precision / 2. + 1E-8
+
+        data, itemsize = _encode_coordinates(xyz, None, 1)
+        assert itemsize == 0
+        aa_eq(_decode_coordinates(data, itemsize, xyz.shape, None), xyz)
+
+        # large values need wider integer type
+        data, itemsize = _encode_coordinates(xyz * 1E6, 0.001, 1)
+        assert itemsize == 8
+
+    def test_write_iterload(self):
+        traj = self.traj
+        with tempfolder():
+            pt.write_traj('test.ptz', traj, options='chunksize 3')
+            cache = pt.iterload('test.ptz', traj.top)
+            assert isinstance(cache, CompressedTrajectory)
+            assert cache.n_frames == traj.n_frames
+            assert cache.n_atoms == traj.n_atoms
+            aa_eq(cache.xyz, traj.xyz, decimal=3)
+            aa_eq(cache.unitcells, traj.unitcells)
+
+            # lossless, from in-memory Trajectory
+            pt.write_traj(
+                'lossless.ptz', traj[:], options='lossless', overwrite=True)
+            aa_eq(pt.iterload('lossless.ptz', traj.top).xyz, traj.xyz)
+
+            # overwrite
+            self.assertRaises(IOError,
+                              lambda: pt.write_traj('test.ptz', traj))
+
+    def test_random_access(self):
+        traj = self.traj
+        with tempfolder():
+            pt.write_traj('test.ptz', traj, options='chunksize 4')
+            cache = pt.iterload('test.ptz', fn("tz2.ortho.parm7"))
+            aa_eq(cache[5].xyz, traj[5].xyz, decimal=3)
+            aa_eq(cache[-1].xyz, traj[-1].xyz, decimal=3)
+            aa_eq(cache[[7, 2, 3, 9]].xyz, traj[[7, 2, 3, 9]].xyz, decimal=3)
+            aa_eq(cache[2:9:3].xyz, traj[2:9:3].xyz, decimal=3)
+            aa_eq(cache['@CA'].xyz, traj['@CA'].xyz, decimal=3)
+            aa_eq(cache[1:5, '@CA'].xyz, traj[1:5, '@CA'].xyz, decimal=3)
+            aa_eq(cache[3, '@CA'].xyz, traj[3, '@CA'].xyz, decimal=3)
+
+            sub = pt.load('test.ptz', traj.top, frame_indices=[1, 8])
+            aa_eq(sub.xyz, traj[[1, 8]].xyz, decimal=3)
+
+    def test_analysis(self):
+        traj = self.traj
+        with tempfolder():
+            pt.write_traj('test.ptz', traj, options='precision 0.0001')
+            cache = pt.iterload('test.ptz', traj.top)
+            aa_eq(pt.radgyr(cache), pt.radgyr(traj), decimal=3)
+            aa_eq(
+                pt.rmsd(cache, ref=0, mask='@CA'),
+                pt.rmsd(traj, ref=0, mask='@CA'),
+                decimal=3)
+            aa_eq(
+                pt.radgyr(cache(1, 8, 2, mask='@CA')),
+                pt.radgyr(traj(1, 8, 2, mask='@CA')),
+                decimal=3)
+            aa_eq(
+                pt.radgyr(cache, frame_indices=[0, 4, 9]),
+                pt.radgyr(traj, frame_indices=[0, 4, 9]),
+                decimal=3)
+            for chunk, chunk2 in zip(cache.iterchunk(4), traj.iterchunk(4)):
+                aa_eq(chunk.xyz, chunk2.xyz, decimal=3)
+
+    def test_writer_and_threads(self):
+        traj = self.traj
+        xyz = np.concatenate([traj.xyz] * 5)
+        with tempfolder():
+            with CompressedTrajectoryWriter(
+                    'big.ptz', traj.n_atoms, precision=0.01,
+                    chunksize=7) as writer:
+                for frame in traj:
+                    writer.write(frame)
+                for _ in range(4):
+                    writer.write_xyz(
+                        traj.xyz,
+                        box=traj.unitcells,
+                        time=[frame.time for frame in traj])
+            assert os.path.getsize('big.ptz') < xyz.nbytes / 3
+            for n_threads in [1, 4]:
+                cache = CompressedTrajectory('big.ptz', traj.top,
+                                             n_threads=n_threads)
+                assert cache.n_frames == 50
+                aa_eq(cache.xyz, xyz, decimal=2)
+
+            with CompressedTrajectoryWriter('bad.ptz', traj.n_atoms) as writer:
+                self.assertRaises(ValueError,
+                                  lambda: writer.write_xyz(xyz[:, :10]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import os
+import unittest
+import numpy as np
+import pytraj as pt
+from pytraj.testing import aa_eq
+from pytraj.testing import tempfolder
+from pytraj.trajectory.remd_index import RemdIndex, build_remd_index
+
+from utils import fn
+
+remd_fn = fn("Test_RemdTraj/rem.nc.000")
+remd_top = fn("Test_RemdTraj/ala2.99sb.mbondi2.parm7")
+
+
+class TestRemdIndex(unittest.TestCase):
+    def test_same_as_cpptraj(self):
+        index = build_remd_index(remd_fn, remd_top)
+        assert index.n_replicas == 4
+        top = pt.load_topology(remd_top)
+
+        for T in index.unique_temperatures:
+            traj = pt.iterload_remd(remd_fn, remd_top, T=T)
+            fi = index.iterload_temperature(T, top)
+            assert fi.n_frames == traj.n_frames
+            xyz = np.array([frame.xyz.copy() for frame in fi])
+            aa_eq(xyz, traj.xyz)
+            for frame in fi:
+                assert abs(frame.temperature - T) < 0.01
+
+    def test_iterload_remd_with_index(self):
+        with tempfolder():
+            traj = pt.iterload_remd(remd_fn, remd_top, T=300.0)
+            fi = pt.iterload_remd(
+                remd_fn, remd_top, T=300.0, index='remd_index.npz')
+            assert os.path.exists('remd_index.npz')
+            aa_eq(pt.distance(fi, '@10 @20'), pt.distance(traj, '@10 @20'))
+
+            # reuse saved index
+            index = RemdIndex.load('remd_index.npz')
+            assert not index.is_outdated()
+            traj2 = pt.load_remd(remd_fn, remd_top, T=300.0, index=index)
+            aa_eq(traj2.xyz, traj.xyz)
+
+    def test_extract_all(self):
+        index = build_remd_index(remd_fn, remd_top)
+        with tempfolder():
+            filenames = index.extract_all(remd_top, n_cores=2)
+            assert len(filenames) == len(index.unique_temperatures)
+            for T, filename in zip(index.unique_temperatures, filenames):
+                traj = pt.iterload_remd(remd_fn, remd_top, T=T)
+                aa_eq(pt.iterload(filename, remd_top).xyz, traj.xyz)
+
+    def test_replica(self):
+        index = build_remd_index(remd_fn, remd_top)
+        aa_eq(
+            index.iterload_replica(1, remd_top).xyz,
+            pt.iterload(index.filelist[1], remd_top).xyz)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+import unittest
+import numpy as np
+import pytraj as pt
+from pytraj import TrajectoryWriter
+from pytraj.testing import aa_eq, tempfolder
+
+# local
+from utils import fn
+
+
+class TestWriteXYZ(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn("tz2.ortho.nc"), fn("tz2.ortho.parm7"))
+
+    def test_write_xyz(self):
+        traj = self.traj
+        with tempfolder():
+            for dtype in ['f4', 'f8']:
+                xyz = traj.xyz.astype(dtype)
+                with TrajectoryWriter('test.nc', top=traj.top) as writer:
+                    writer.write_xyz(xyz, box=traj.unitcells, chunksize=3)
+                t0 = pt.iterload('test.nc', traj.top)
+                aa_eq(t0.xyz, xyz, decimal=3)
+                aa_eq(t0.unitcells, traj.unitcells, decimal=3)
+
+            # single box, time, frame_indices
+            with TrajectoryWriter(
+                    'test.nc', top=traj.top,
+                    crdinfo={'has_time': True}) as writer:
+                writer.write_xyz(
+                    traj.xyz,
+                    box=traj.unitcells[0],
+                    time=np.arange(traj.n_frames) * 2.,
+                    frame_indices=[1, 3, 5])
+            t0 = pt.iterload('test.nc', traj.top)
+            aa_eq(t0.xyz, traj.xyz[[1, 3, 5]], decimal=3)
+            aa_eq(t0.time, [2., 6., 10.])
+
+            with TrajectoryWriter('test.nc', top=traj.top) as writer:
+                self.assertRaises(ValueError, writer.write_xyz,
+                                  traj.xyz[:, :10])
+                self.assertRaises(ValueError, writer.write_xyz, traj.xyz,
+                                  box=traj.unitcells[:2])
+
+    def test_write_traj_in_memory(self):
+        traj = self.traj[:]
+        with tempfolder():
+            pt.write_traj('test.nc', traj, overwrite=True)
+            aa_eq(pt.iterload('test.nc', traj.top).xyz, traj.xyz, decimal=3)
+
+            pt.write_traj('test.nc', traj, frame_indices=range(0, 10, 3),
+                          overwrite=True)
+            aa_eq(
+                pt.iterload('test.nc', traj.top).xyz,
+                traj.xyz[::3],
+                decimal=3)
+
+            # same output as Frame by Frame writing
+            pt.write_traj('test1.nc', traj, overwrite=True)
+            pt.write_traj('test2.nc', self.traj, overwrite=True)
+            aa_eq(
+                pt.iterload('test1.nc', traj.top).xyz,
+                pt.iterload('test2.nc', traj.top).xyz)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+from __future__ import print_function
+import unittest
+import numpy as np
+import pytraj as pt
+from utils import fn
+from pytraj.testing import aa_eq
+from pytraj.trajectory.frameiter import FramePool
+
+
+class TestFramePool(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_pool(self):
+        traj = self.traj
+        atm = traj.top('@CA')
+        pool = FramePool(size=3, atm=atm)
+        frames = []
+        for idx, frame in enumerate(traj):
+            new_frame = pool.take(frame)
+            aa_eq(new_frame.xyz, traj[idx, '@CA'].xyz)
+            aa_eq(new_frame.box.values, traj.unitcells[idx])
+            frames.append(new_frame)
+        # ring buffer
+        assert frames[0] is frames[3]
+        assert len(set(id(frame) for frame in frames)) == 3
+
+        # all atoms
+        pool = FramePool()
+        for idx, frame in enumerate(traj):
+            new_frame = pool.take(frame)
+            assert not new_frame.is_(frame)
+            aa_eq(new_frame.xyz, traj[idx].xyz)
+            aa_eq(new_frame.time, frame.time)
+
+        self.assertRaises(ValueError, lambda: FramePool(size=0))
+        self.assertRaises(ValueError,
+                          lambda: traj[0]._set_frame(traj['@CA'][0]))
+
+    def test_frame_iterator(self):
+        traj = self.traj
+        for fi in [traj(mask='@CA'), traj[:](mask='@CA')]:
+            frames = list(fi)
+            # reused buffer
+            assert frames[0] is frames[-1]
+            aa_eq(frames[0].xyz, traj[-1, '@CA'].xyz)
+
+        # opt-in independent copies
+        frames = list(traj.iterframe(mask='@CA', copy=True))
+        assert frames[0] is not frames[1]
+        aa_eq(np.array([frame.xyz for frame in frames]), traj['@CA'].xyz)
+
+        # analysis
+        aa_eq(pt.radgyr(traj(mask='@CA')), pt.radgyr(traj, '@CA'))
+        aa_eq(
+            pt.radgyr(traj(mask='@CA', autoimage=True, rmsfit=0)),
+            pt.radgyr(traj, '@CA'))
+        aa_eq(pt.radgyr(traj(mask='@CA', copy=True)), pt.radgyr(traj, '@CA'))
+
+    def test_closest(self):
+        traj = self.traj
+        fi, top = pt.closest(traj, mask='@CA', n_solvents=10)
+        xyz = np.array([frame.xyz.copy() for frame in fi])
+        new_traj = pt.closest(
+            traj, mask='@CA', n_solvents=10, dtype='trajectory')
+        aa_eq(new_traj.xyz, xyz)
+        assert new_traj.n_atoms == top.n_atoms
+
+    def test_stripped_iterator(self):
+        from pytraj.trajectory.stripped_trajectory import StrippedTrajectoryIterator
+        straj = StrippedTrajectoryIterator(self.traj, ':WAT')
+        xyz = np.array([frame.xyz.copy() for frame in straj])
+        aa_eq(xyz, self.traj['!:WAT'].xyz)
+
+
+if __name__ == "__main__":
+    unittest.main()
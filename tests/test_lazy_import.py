@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import sys
+import subprocess
+import unittest
+import pytraj as pt
+from pytraj.benchmarks.importtime import measure_import_time, LAZY_MODULES
+
+need_py37 = unittest.skipIf(sys.version_info < (3, 7),
+                            'module __getattr__ requires python >= 3.7')
+
+
+class TestLazyImport(unittest.TestCase):
+    @need_py37
+    def test_heavy_modules_not_imported(self):
+        code = ('import sys, pytraj; '
+                'print(",".join(name for name in {} if name in sys.modules))'
+                .format(LAZY_MODULES))
+        out = subprocess.check_output(
+            [sys.executable, '-c', code], universal_newlines=True)
+        assert out.strip() == '', out
+
+    @need_py37
+    def test_importtime(self):
+        times = measure_import_time('pytraj')
+        assert 'pytraj' in times
+        for name in LAZY_MODULES:
+            assert name not in times, name
+
+    def test_public_api(self):
+        traj = pt.datafiles.load_tz2()
+        from pytraj import matrix, rmsd, mean_structure
+        assert pt.matrix is matrix
+        assert pt.rmsd is rmsd
+        assert pt.mean_structure is pt.get_average_frame
+        assert pt.calc_distance is pt.distances is pt.distance
+        assert pt.analdict is pt.analdict
+        assert 'rmsd' in dir(pt)
+        pt.rmsd(traj, ref=0)
+
+        for name in pt.__all__:
+            getattr(pt, name)
+
+        with self.assertRaises(AttributeError):
+            pt.not_a_pytraj_function
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+import numpy as np
+import pytraj as pt
+from pytraj.testing import aa_eq
+from pytraj.math.imaging import (Imager, Unwrapper, wrap_xyz,
+                                 unitcells_to_matrices,
+                                 parse_autoimage_command)
+
+from utils import fn
+
+
+class TestImaging(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_unitcells_to_matrices(self):
+        ucell = unitcells_to_matrices(self.traj.unitcells)
+        assert ucell.shape == (self.traj.n_frames, 3, 3)
+        aa_eq(np.diagonal(ucell, axis1=1, axis2=2), self.traj.unitcells[:, :3])
+
+        # truncated octahedron: recover lengths and angles
+        box = [30., 30., 30., 109.4712190, 109.4712190, 109.4712190]
+        ucell = unitcells_to_matrices([box])[0]
+        aa_eq(np.linalg.norm(ucell, axis=1), box[:3])
+        cos_alpha = ucell[1].dot(ucell[2]) / 900.
+        aa_eq(np.degrees(np.arccos(cos_alpha)), box[3])
+
+    def test_autoimage_vs_cpptraj(self):
+        traj = self.traj[:]
+        traj_cpp = pt.autoimage(self.traj[:])
+        traj_np = pt.autoimage(traj, engine='numpy')
+        assert traj_np is traj
+
+        # same solute structure and all molecules are kept whole
+        aa_eq(pt.radgyr(traj_np, ':1-13'), pt.radgyr(traj_cpp, ':1-13'))
+        aa_eq(
+            pt.rmsd(traj_np, ref=traj_cpp, mask=':1-13', nofit=True),
+            np.zeros(traj.n_frames))
+        aa_eq(
+            pt.distance(traj_np, ':WAT@O :WAT@H1'),
+            pt.distance(self.traj, ':WAT@O :WAT@H1'))
+
+        # water oxygens are in the box
+        frac = np.einsum('fak,fkl->fal', traj_np['@O'].xyz,
+                         np.linalg.inv(unitcells_to_matrices(traj.unitcells)))
+        assert frac.min() > -0.05 and frac.max() < 1.05
+
+        # threads
+        xyz = self.traj.xyz.copy()
+        Imager(traj.top).autoimage(
+            xyz, traj.unitcells, n_threads=4, chunksize=3)
+        aa_eq(xyz, traj_np.xyz)
+
+        self.assertRaises(
+            ValueError,
+            lambda: pt.autoimage(self.traj[:], 'familiar', engine='numpy'))
+        self.assertRaises(
+            ValueError,
+            lambda: pt.autoimage(self.traj[:], frame_indices=[0, 1], engine='numpy'))
+
+    def test_parse_command(self):
+        assert parse_autoimage_command('') == {}
+        assert parse_autoimage_command('anchor :1-13 mobile :WAT origin') == {
+            'anchor': ':1-13',
+            'mobile': ':WAT',
+            'origin': True
+        }
+
+    def test_unwrap(self):
+        rng = np.random.RandomState(1)
+        n_frames = 50
+        walk = np.cumsum(rng.randn(n_frames, 20, 3), axis=0)
+        for box in ([15., 16., 17., 90., 90., 90.],
+                    [20., 20., 20., 109.4712190, 109.4712190, 109.4712190]):
+            boxes = np.array([box] * n_frames)
+            wrapped = wrap_xyz(walk.copy(), boxes)
+            full = Unwrapper().unwrap(wrapped, boxes)
+            aa_eq(full - full[0], walk - walk[0])
+
+            # carry state across chunks
+            unwrapper = Unwrapper()
+            chunks = [
+                unwrapper.unwrap(wrapped[i:i + 7], boxes[i:i + 7])
+                for i in range(0, n_frames, 7)
+            ]
+            aa_eq(np.concatenate(chunks), full)
+
+        unwrapper = Unwrapper()
+        xyz = np.concatenate([
+            unwrapper.unwrap(chunk.xyz, chunk.unitcells)
+            for chunk in self.traj.iterchunk(3)
+        ])
+        aa_eq(xyz, Unwrapper().unwrap(self.traj.xyz, self.traj.unitcells))
+
+
+if __name__ == "__main__":
+    unittest.main()
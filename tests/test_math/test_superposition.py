@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+import numpy as np
+import pytraj as pt
+from pytraj.testing import aa_eq
+from pytraj.math.superposition import superpose_xyz
+
+from utils import fn, tz2_trajin, tz2_top
+
+
+class TestSuperposeXYZ(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(tz2_trajin, tz2_top)
+
+    def test_rmsd_and_rotation_matrix_vs_cpptraj(self):
+        traj = self.traj
+        ref = traj[3]
+        indices = traj.top.select('@CA')
+        mat, trans, rmsd = superpose_xyz(
+            traj.xyz, ref.xyz, atom_indices=indices)
+
+        mat_cpp, rmsd_cpp = pt.rotation_matrix(
+            traj, mask='@CA', ref=ref, with_rmsd=True)
+        aa_eq(rmsd, rmsd_cpp)
+        aa_eq(mat, mat_cpp)
+
+        # mass-weighted
+        _, _, rmsd_mass = superpose_xyz(
+            traj.xyz,
+            ref.xyz,
+            atom_indices=indices,
+            weights=traj.top.mass[indices])
+        aa_eq(rmsd_mass, pt.rmsd(traj, mask='@CA', ref=ref, mass=True))
+
+        # nofit
+        _, _, rmsd_nofit = superpose_xyz(
+            traj.xyz, ref.xyz, atom_indices=indices, fit=False)
+        aa_eq(rmsd_nofit, pt.rmsd_nofit(traj, mask='@CA', ref=ref))
+
+    def test_inplace(self):
+        traj = self.traj
+        xyz = traj.xyz.copy()
+        # small chunksize to check the block loop
+        mat, trans, _ = superpose_xyz(
+            xyz,
+            traj[0].xyz,
+            atom_indices=traj.top.select('@CA'),
+            inplace=True,
+            chunksize=7)
+        aa_eq(xyz, np.matmul(traj.xyz, np.transpose(mat, (0, 2, 1))) +
+              trans[:, None, :])
+
+        t0 = traj[:]
+        t0.superpose(ref=0, mask='@CA')
+        aa_eq(xyz, t0.xyz)
+
+        xyz_ro = traj.xyz
+        xyz_ro.flags.writeable = False
+        self.assertRaises(ValueError,
+                          lambda: superpose_xyz(xyz_ro, traj[0].xyz, inplace=True))
+
+    def test_memmap(self):
+        traj = self.traj
+        fname = 'output/test_superpose_memmap.npy'
+        np.save(fname, traj.xyz)
+        xyz = np.load(fname, mmap_mode='r+')
+        superpose_xyz(xyz, traj[0].xyz, inplace=True)
+
+        t0 = traj[:]
+        t0.superpose(ref=0)
+        aa_eq(np.asarray(xyz), t0.xyz)
+
+    def test_in_memory_trajectory_vs_trajectory_iterator(self):
+        traj = self.traj
+        # TrajectoryIterator goes through cpptraj
+        for mask in ['@CA', '', ':3-7@CA,C,N']:
+            t0 = traj[:]
+            aa_eq(pt.rmsd(t0, mask=mask, ref=5), pt.rmsd(traj, mask=mask, ref=5))
+            aa_eq(pt.rmsd(t0, mask=mask, ref=5, nofit=True),
+                  pt.rmsd(traj, mask=mask, ref=5, nofit=True))
+            aa_eq(pt.rmsd(t0, mask=mask, ref=5, mass=True),
+                  pt.rmsd(traj, mask=mask, ref=5, mass=True))
+
+        # coordinates are updated
+        t0 = traj[:]
+        t1 = traj[:]
+        pt.rmsd(t0, mask='@CA', ref=2)
+        pt.transform(t1, ['rms @CA refindex 0'])
+        pt.superpose(t1, ref=2, mask='@CA')
+        aa_eq(t0.xyz, t1.xyz)
+
+        # frame_indices
+        t0 = traj[:]
+        aa_eq(
+            pt.rmsd(t0, mask='@CA', frame_indices=[1, 5, 8]),
+            pt.rmsd(traj, mask='@CA', frame_indices=[1, 5, 8]))
+
+        # multiple masks
+        t0 = traj[:]
+        aa_eq(
+            pt.rmsd(t0, mask=['@CA', '@C']),
+            pt.rmsd(traj, mask=['@CA', '@C']))
+
+    def test_iterframe_rmsfit(self):
+        traj = self.traj
+        t0 = traj[:]
+        xyz0 = np.array([frame.xyz.copy() for frame in traj.iterframe(rmsfit=(3, '@CA'))])
+        xyz1 = np.array([frame.xyz.copy() for frame in t0.iterframe(rmsfit=(3, '@CA'))])
+        aa_eq(xyz0, xyz1)
+
+        t0 = traj[:]
+        xyz1 = np.array([
+            frame.xyz.copy()
+            for frame in t0.iterframe(frame_indices=[8, 2, 4], rmsfit=(3, '@CA'))
+        ])
+        aa_eq(xyz0[[8, 2, 4]], xyz1)
+
+        # atom indices as mask
+        t0 = traj[:]
+        indices = pt.select_atoms('@CA', t0.top)
+        xyz1 = np.array(
+            [frame.xyz.copy() for frame in t0.iterframe(rmsfit=(3, indices))])
+        aa_eq(xyz0, xyz1)
+
+    def test_iterframe_rmsfit_break(self):
+        traj = self.traj
+        t0 = traj[:]
+        original = t0.xyz.copy()
+        fitted = pt.superpose(traj[:], ref=3, mask='@CA').xyz
+        for index, frame in enumerate(t0.iterframe(rmsfit=(3, '@CA'))):
+            if index == 1:
+                break
+        aa_eq(t0.xyz[:2], fitted[:2])
+        # frames that were not returned are not changed
+        aa_eq(t0.xyz[2:], original[2:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy as np
+import pytraj as pt
+from utils import fn
+from pytraj.testing import aa_eq
+
+try:
+    from mpi4py import MPI
+    has_mpi4py = True
+except ImportError:
+    MPI = None
+    has_mpi4py = False
+
+
+@unittest.skipUnless(has_mpi4py, 'must have mpi4py')
+def test_mpi_collectives():
+    from pytraj.parallel.mpi import iterload_mpi, _gatherv, _reduce_sum
+
+    comm = MPI.COMM_WORLD
+    rank = comm.rank
+
+    # low level
+    arr = np.arange(rank + 1, dtype='f8').repeat(3).reshape(rank + 1, 3)
+    gathered = _gatherv(comm, arr, allgather=True)
+    assert gathered.shape == (sum(range(1, comm.size + 1)), 3)
+    aa_eq(_reduce_sum(comm, np.ones(4), allreduce=True), [comm.size] * 4)
+
+    traj = iterload_mpi(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'), stagger=2)
+    assert traj.n_frames == 10
+
+    # time series with Gatherv, result on every rank
+    data = pt.pmap_mpi(pt.radgyr, traj, '@CA', allreduce=True)
+    aa_eq(data['RoG_00000'], pt.radgyr(traj, '@CA'))
+
+    # root only
+    data = pt.pmap_mpi(pt.radgyr, traj, '@CA', root=1)
+    if rank == 1:
+        aa_eq(data['RoG_00000'], pt.radgyr(traj, '@CA'))
+    else:
+        assert data is None
+
+    # reductions
+    frame = pt.pmap_mpi(pt.mean_structure, traj, '@CA', allreduce=True)
+    aa_eq(frame.xyz, pt.mean_structure(traj, '@CA').xyz)
+
+    mat = pt.pmap_mpi(pt.matrix.covar, traj, '@CA', allreduce=True)
+    aa_eq(mat, pt.matrix.covar(traj, '@CA'), decimal=3)
+
+    state = pt.pmap_mpi(
+        pt.grid_occupancy,
+        traj,
+        ':WAT@O',
+        grid_spacing=(1., 1., 1.),
+        allreduce=True)
+    serial = pt.grid_occupancy(traj, ':WAT@O', grid_spacing=(1., 1., 1.))
+    assert state.n_frames == traj.n_frames
+    aa_eq(state.counts, serial.counts)
+
+    profile = pt.pmap_mpi(pt.density_profile, traj, ':WAT@O', allreduce=True)
+    aa_eq(profile.mean, pt.density_profile(traj, ':WAT@O').mean)
+
+    # hbond: different keys for each rank, fallback to pickled gather
+    data = pt.pmap_mpi(pt.hbond, traj, allreduce=True)
+    assert data is not None
+
+
+if __name__ == '__main__':
+    test_mpi_collectives()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+import pytraj as pt
+from utils import fn
+from pytraj.testing import aa_eq
+from pytraj.parallel.ensemble import EnsembleResults
+
+
+class TestMapEnsemble(unittest.TestCase):
+    def test_files(self):
+        fname, tname = fn('tz2.ortho.nc'), fn('tz2.ortho.parm7')
+        traj = pt.iterload(fname, tname)
+        trajs = [fname, [fname, fname], 'missing.nc', traj]
+        for n_cores in [1, 2, 3]:
+            for backend in ['multiprocessing', 'threads']:
+                results = pt.map_ensemble(
+                    pt.radgyr,
+                    trajs,
+                    tname,
+                    '@CA',
+                    n_cores=n_cores,
+                    backend=backend)
+                assert isinstance(results, EnsembleResults)
+                # input order, failures isolated
+                assert list(results) == [fname, (fname, fname), traj]
+                assert results.failed == ['missing.nc']
+                assert 'missing.nc' in results.errors['missing.nc']
+                aa_eq(results[fname], pt.radgyr(traj, '@CA'))
+                aa_eq(results[(fname, fname)],
+                      pt.radgyr(pt.iterload([fname, fname], tname), '@CA'))
+                aa_eq(results[traj], pt.radgyr(traj, '@CA'))
+        self.assertRaises(RuntimeError, results.raise_errors)
+
+    def test_dict(self):
+        tname = fn('tz2.ortho.parm7')
+        top = pt.load_topology(tname)
+        trajs = {'ortho': fn('tz2.ortho.nc'), 'pattern': fn('tz2.ortho.n*')}
+        results = pt.map_ensemble(pt.rmsd, trajs, top, mask='@CA', ref=0)
+        expected = pt.rmsd(
+            pt.iterload(fn('tz2.ortho.nc'), tname), mask='@CA', ref=0)
+        aa_eq(results['ortho'], expected)
+        aa_eq(results['pattern'], expected)
+        assert not results.errors
+        results.raise_errors()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import os
+import time
+import unittest
+from functools import partial
+import pytraj as pt
+from utils import fn
+from pytraj.testing import aa_eq, tempfolder
+from pytraj.parallel.checkpoint import map_checkpointed
+
+
+def _crashing_worker(rank, crash_rank, once=None):
+    # kill the worker process (breaks the pool), only the first time if ``once``
+    if rank == crash_rank and (once is None or not os.path.exists(once)):
+        if once is not None:
+            open(once, 'w').close()
+        os._exit(1)
+    return rank * 10
+
+
+def _slow_worker(rank, crash_rank, once):
+    # crash once, then record when each block runs
+    if rank == crash_rank and not os.path.exists(once):
+        with open(once, 'w') as fh:
+            fh.write(repr(time.time()))
+        os._exit(1)
+    start = time.time()
+    time.sleep(0.5)
+    with open('times_{}_{}_{}'.format(rank, os.getpid(), start), 'w') as fh:
+        fh.write(repr(time.time()))
+    return rank * 10
+
+
+class TestPmapCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_resume(self):
+        traj = self.traj
+        with tempfolder():
+            data = pt.pmap(
+                pt.radgyr, traj, '@CA', n_cores=2, checkpoint='job')
+            aa_eq(data['RoG_00000'], pt.radgyr(traj, '@CA'))
+            job_dir = os.path.join('job', os.listdir('job')[0])
+            blocks = sorted(
+                name for name in os.listdir(job_dir) if name.endswith('.pkl'))
+            assert len(blocks) == 8
+
+            # a stopped job: only missing blocks are computed
+            os.remove(os.path.join(job_dir, blocks[3]))
+            mtime = os.path.getmtime(os.path.join(job_dir, blocks[0]))
+            data2 = pt.pmap(
+                pt.radgyr, traj, '@CA', n_cores=2, checkpoint='job')
+            aa_eq(data2['RoG_00000'], data['RoG_00000'])
+            assert os.path.exists(os.path.join(job_dir, blocks[3]))
+            assert os.path.getmtime(os.path.join(job_dir, blocks[0])) == mtime
+
+            # other inputs: other job
+            pt.pmap(pt.radgyr, traj, '@CB', n_cores=2, checkpoint='job')
+            assert len(os.listdir('job')) == 2
+
+    def test_merge_and_commands(self):
+        traj = self.traj
+        with tempfolder():
+            state = pt.pmap(
+                pt.density_profile,
+                traj,
+                ':WAT@O',
+                n_cores=2,
+                n_blocks=5,
+                checkpoint='job')
+            aa_eq(state.mean, pt.density_profile(traj, ':WAT@O').mean)
+
+            data = pt.pmap(
+                ['radgyr @CA', 'distance :3 :7'],
+                traj,
+                n_cores=3,
+                checkpoint='job',
+                job_key='commands')
+            expected = pt.compute(['radgyr @CA', 'distance :3 :7'], traj)
+            for key in expected:
+                aa_eq(data[key], expected[key])
+            assert os.path.exists(os.path.join('job', 'commands'))
+
+            # same job_key, other inputs
+            self.assertRaises(
+                ValueError,
+                lambda: pt.pmap(['radgyr @CB'], traj, n_cores=3,
+                                checkpoint='job', job_key='commands'))
+            self.assertRaises(
+                ValueError,
+                lambda: pt.pmap(pt.radgyr, traj, n_cores=2,
+                                checkpoint='job', backend='threads'))
+
+    def test_crashed_worker(self):
+        with tempfolder():
+            # blocks lost with the broken pool are not counted as failed
+            data = map_checkpointed(
+                partial(_crashing_worker, crash_rank=2, once='crashed'),
+                6, 3, 'job', 'flaky', retries=0)
+            assert data == [0, 10, 20, 30, 40, 50]
+
+            # only the block that crashes again fails, others are saved
+            self.assertRaises(
+                RuntimeError,
+                lambda: map_checkpointed(
+                    partial(_crashing_worker, crash_rank=4),
+                    6, 3, 'job', 'crash', retries=1))
+            saved = sorted(os.listdir(os.path.join('job', 'crash')))
+            assert saved == [
+                'block_{:05d}.pkl'.format(rank) for rank in [0, 1, 2, 3, 5]
+            ]
+
+    def test_crashed_worker_parallel_retry(self):
+        with tempfolder():
+            data = map_checkpointed(
+                partial(_slow_worker, crash_rank=0, once='crashed'),
+                6, 3, 'job', 'slow', retries=0)
+            assert data == [0, 10, 20, 30, 40, 50]
+
+            with open('crashed') as fh:
+                crashed_at = float(fh.read())
+            runs = []
+            for name in os.listdir('.'):
+                if name.startswith('times_'):
+                    with open(name) as fh:
+                        runs.append((float(name.split('_')[-1]), float(fh.read())))
+            retried = sorted(run for run in runs if run[0] > crashed_at)
+            assert len(retried) >= 2
+            # lost blocks are rerun in a pool of n_cores processes, not one at a time
+            assert any(next_start < end
+                       for (_, end), (next_start, _) in zip(retried, retried[1:]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+from __future__ import print_function
+import unittest
+import pytraj as pt
+from utils import fn
+from pytraj.testing import aa_eq
+from pytraj.analysis.c_action import do_action, c_action
+
+
+class TestPmapThreads(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_func(self):
+        traj = self.traj
+        for n_cores in [1, 2, 3]:
+            data = pt.pmap(
+                pt.radgyr, traj, '@CA', n_cores=n_cores, backend='threads')
+            aa_eq(data['RoG_00000'], pt.radgyr(traj, '@CA'))
+
+        data = pt.pmap(
+            pt.distance, traj, [':1@CA :5@CA', ':3@CA :8@CA'],
+            n_cores=3,
+            backend='threads')
+        aa_eq(
+            pt.tools.dict_to_ndarray(data),
+            pt.distance(traj, [':1@CA :5@CA', ':3@CA :8@CA']))
+
+        # reference, frame_indices
+        aa_eq(
+            pt.pmap(
+                pt.rmsd,
+                traj,
+                mask='@CA',
+                ref=3,
+                frame_indices=[0, 2, 4, 6, 8],
+                n_cores=2,
+                backend='threads')['RMSD_00001'],
+            pt.rmsd(traj, mask='@CA', ref=3, frame_indices=[0, 2, 4, 6, 8]))
+
+        # iter_options: Python loop, same result
+        data = pt.pmap(
+            pt.radgyr,
+            traj,
+            '@CA',
+            iter_options={'autoimage': True,
+                          'rmsfit': (0, '@CA')},
+            n_cores=2,
+            backend='threads')
+        aa_eq(data['RoG_00000'], pt.radgyr(traj, '@CA'))
+
+        # mergeable
+        state = pt.pmap(
+            pt.density_profile, traj, ':WAT@O', n_cores=2, backend='threads')
+        aa_eq(state.mean, pt.density_profile(traj, ':WAT@O').mean)
+
+        self.assertRaises(
+            ValueError,
+            lambda: pt.pmap(pt.radgyr, traj, backend='dask'))
+
+    def test_transformation(self):
+        traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+        traj.autoimage().superpose('@CA')
+        data = pt.pmap(pt.radgyr, traj, ':1-13', n_cores=2, backend='threads')
+        aa_eq(data['RoG_00000'], pt.radgyr(traj[:], ':1-13'))
+
+    def test_cpptraj_commands(self):
+        traj = self.traj
+        commands = ['radgyr @CA', 'distance :3 :7', 'rms @CA refindex 0']
+        data = pt.pmap(commands, traj, ref=traj[3], n_cores=3, backend='threads')
+        serial = pt.compute(commands, traj, ref=traj[3])
+        for key in serial:
+            aa_eq(data[key], serial[key])
+
+    def test_do_action_fast_path(self):
+        # frames are read in C++ for TrajectoryIterator and its FrameIterator
+        traj = self.traj
+        rg = pt.radgyr(traj[:], '@CA')
+        for fi, indices in [(traj, range(10)), (traj(1, 8, 2), [1, 3, 5, 7]),
+                            (traj(frame_indices=[-1, 0, 3]), [9, 0, 3])]:
+            c_dslist, _ = do_action(fi, '@CA', c_action.Action_Radgyr)
+            aa_eq(c_dslist[0].values, rg[indices])
+
+        for frame_indices in ([traj.n_frames + 5], [0, -traj.n_frames - 1]):
+            self.assertRaises(
+                IndexError,
+                lambda: pt.radgyr(traj, '@CA', frame_indices=frame_indices))
+
+    def test_capture_stdout_in_threads(self):
+        # functions returning cpptraj's output work in any thread
+        from threading import Thread
+        from multiprocessing.pool import ThreadPool
+
+        d0, d1 = pt.distance(self.traj, [':3 :7', ':8 :12'])
+        expected = pt.crank(d0, d1)
+        assert expected
+
+        out = []
+        threads = [Thread(target=lambda: out.append(pt.crank(d0, d1))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert out == [expected] * 3
+
+        pool = ThreadPool(2)
+        try:
+            assert pool.map(lambda _: pt.crank(d0, d1), range(4)) == [expected] * 4
+        finally:
+            pool.close()
+            pool.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import json
+import unittest
+import pytraj as pt
+from pytraj.testing import aa_eq, tempfolder
+from pytraj.utils.profiling import get_profiler
+
+from utils import fn, tz2_ortho_trajin, tz2_ortho_top
+
+
+class TestProfile(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(tz2_ortho_trajin, tz2_ortho_top)
+
+    def test_frame_iterator(self):
+        traj = self.traj
+        expected = pt.radgyr(traj(autoimage=True, rmsfit=(0, '@CA'), mask='@CA'))
+        assert get_profiler() is None
+
+        with pt.profile() as prof:
+            assert get_profiler() is prof
+            data = pt.radgyr(traj(autoimage=True, rmsfit=(0, '@CA'), mask='@CA'))
+        assert get_profiler() is None
+        aa_eq(data, expected)
+
+        stats = prof.to_dict()['FrameIterator']
+        for stage in ['read', 'autoimage', 'rmsfit', 'mask']:
+            assert stats[stage]['count'] == traj.n_frames, stage
+        assert 'FrameIterator' in prof.to_table()
+
+    def test_frame_iterator_no_mask(self):
+        traj = self.traj
+        expected = pt.radgyr(traj(autoimage=True))
+        with pt.profile() as prof:
+            data = pt.radgyr(traj(autoimage=True))
+        aa_eq(data, expected)
+
+        stats = prof.to_dict()['FrameIterator']
+        assert stats['read']['count'] == traj.n_frames
+        assert 'mask' not in stats
+
+    def test_actions(self):
+        traj = self.traj
+        with pt.profile(trace=True) as prof:
+            for _ in pt.pipe(traj, ['autoimage', 'radgyr @CA']):
+                pass
+            pt.compute(['autoimage', 'radgyr @CA'], traj)
+            pt.distance(traj, ':2 :3')
+            pt.compute(pt.radgyr, traj, '@CA')
+        stats = prof.to_dict()
+        assert stats['pipe']['read']['count'] == traj.n_frames
+        assert any('radgyr' in key for key in stats['pipe'])
+        assert any(key.startswith('run[') for key in stats['ActionList'])
+        assert 'callback:radgyr' in stats['compute']
+
+        with tempfolder():
+            prof.save_chrome_trace('trace.json')
+            with open('trace.json') as fh:
+                trace = json.load(fh)
+            assert len(trace['traceEvents']) > traj.n_frames
+
+    def test_off(self):
+        with pt.profile() as prof:
+            pass
+        pt.radgyr(self.traj)
+        assert not prof.stats
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import os
+import unittest
+import numpy as np
+import pytraj as pt
+from utils import fn
+from pytraj.testing import aa_eq, tempfolder
+from pytraj.utils.result_cache import ResultCache, memoize
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_call(self):
+        traj = self.traj
+        with tempfolder():
+            cache = ResultCache('cache')
+            data = cache.call(pt.rmsd, traj, mask='@CA', ref=0)
+            assert (cache.hits, cache.misses) == (0, 1)
+            # same call, positional and keyword arguments
+            aa_eq(cache.call(pt.rmsd, traj, '@CA', ref=0), data)
+            assert (cache.hits, cache.misses) == (1, 1)
+            aa_eq(data, pt.rmsd(traj, mask='@CA', ref=0))
+
+            # other arguments, frames or trajectory: new results
+            cache.call(pt.rmsd, traj, mask='@CB', ref=0)
+            cache.call(pt.rmsd, traj, mask='@CA', ref=1)
+            aa_eq(
+                cache.call(pt.rmsd, traj, mask='@CA', ref=0,
+                           frame_indices=[1, 3]), data[[1, 3]])
+            # same frames as array: cached
+            cache.call(pt.rmsd, traj, mask='@CA', ref=0,
+                       frame_indices=np.array([1, 3]))
+            assert (cache.hits, cache.misses) == (2, 4)
+            # generator: read once, used for both key and computation
+            aa_eq(
+                cache.call(pt.rmsd, traj, mask='@CA', ref=0,
+                           frame_indices=(i for i in [1, 3])), data[[1, 3]])
+            assert (cache.hits, cache.misses) == (3, 4)
+            # positional iterator is not cached (but not consumed)
+            aa_eq(
+                cache.call(pt.rmsd, traj, '@CA', 0, '', False, False, True,
+                           iter([1, 3])), data[[1, 3]])
+            assert (cache.hits, cache.misses) == (3, 4)
+
+            cache.call(pt.rmsd, traj[:], mask='@CA', ref=0)
+            cache.call(pt.rmsd, traj[:], mask='@CA', ref=0)
+            assert (cache.hits, cache.misses) == (4, 5)
+            other = traj[:]
+            other.xyz[0, 0] += 1.
+            cache.call(pt.rmsd, other, mask='@CA', ref=0)
+            assert cache.misses == 6
+
+            # transformations change the trajectory identity
+            traj2 = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+            cache.call(pt.radgyr, traj2, '@CA')
+            traj2.autoimage()
+            aa_eq(cache.call(pt.radgyr, traj2, '@CA'), pt.radgyr(traj2, '@CA'))
+            assert cache.misses == 8
+
+            # frame iterators can not be identified: not cached
+            n_entries = len(cache)
+            cache.call(pt.radgyr, traj(0, 8, 2), '@CA')
+            assert len(cache) == n_entries
+
+            # wrappers
+            state = cache.actions.density_profile(traj, ':WAT@O')
+            aa_eq(
+                cache.actions.density_profile(traj, ':WAT@O').mean,
+                state.mean)
+            commands = ['radgyr @CA', 'distance :3 :7']
+            out = cache.compute(commands, traj)
+            for key, value in cache.compute(commands, traj).items():
+                aa_eq(out[key], value)
+            aa_eq(
+                memoize(pt.radgyr, directory='cache')(traj, '@CA'),
+                pt.radgyr(traj, '@CA'))
+
+            cache.clear()
+            assert len(cache) == 0
+
+    def test_lru(self):
+        traj = self.traj
+        with tempfolder():
+            cache = ResultCache('cache')
+            cache.call(pt.radgyr, traj, '@CA')
+            entry_size = cache.size
+            cache.max_bytes = int(2.5 * entry_size)
+            for mask in ['@CB', '@C', '@O']:
+                cache.call(pt.radgyr, traj, mask)
+            assert len(cache) == 2
+            assert cache.size <= cache.max_bytes
+            # least recently used were removed
+            cache.call(pt.radgyr, traj, '@O')
+            assert cache.hits == 1
+            cache.call(pt.radgyr, traj, '@CA')
+            assert cache.hits == 1
+            assert all(
+                name.endswith('.pkl') for name in os.listdir('cache'))
+
+
+if __name__ == "__main__":
+    unittest.main()
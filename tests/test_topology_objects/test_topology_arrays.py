@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+import unittest
+import numpy as np
+import pytraj as pt
+from utils import fn
+from pytraj.testing import aa_eq
+
+
+class TestTopologyArrays(unittest.TestCase):
+    def setUp(self):
+        self.top = pt.load_topology(fn('tz2.ortho.parm7'))
+
+    def test_columns(self):
+        top = self.top
+        arrays = top.arrays
+        atoms = list(top.atoms)
+        residues = list(top.residues)
+        mols = list(top.mols)
+
+        aa_eq(arrays.mass, [atom.mass for atom in atoms])
+        aa_eq(arrays.charge, [atom.charge for atom in atoms])
+        aa_eq(arrays.atomic_number, [atom.atomic_number for atom in atoms])
+        aa_eq(arrays.resid, [atom.resid for atom in atoms])
+        aa_eq(arrays.molnum, [atom.molnum for atom in atoms])
+        assert arrays.name.tolist() == [atom.name for atom in atoms]
+        assert arrays.type.tolist() == [atom.type for atom in atoms]
+        assert arrays.element.tolist() == [atom.element for atom in atoms]
+        assert arrays.resname.tolist() == [atom.resname for atom in atoms]
+
+        assert arrays.res_name.tolist() == [res.name for res in residues]
+        aa_eq(arrays.res_first, [res.first for res in residues])
+        aa_eq(arrays.res_last, [res.last for res in residues])
+        aa_eq(arrays.res_number, [res.original_resid for res in residues])
+
+        aa_eq(arrays.mol_first, [mol.begin_atom for mol in mols])
+        aa_eq(arrays.mol_last, [mol.end_atom for mol in mols])
+        aa_eq(arrays.mol_is_solvent, [mol.is_solvent() for mol in mols])
+
+        aa_eq(arrays.bond_indices, [b.indices for b in top.bonds])
+        aa_eq(arrays.dihedral_indices, [d.indices for d in top.dihedrals])
+        assert arrays.angle_indices.shape == (len(list(top.angles)), 3)
+
+        aa_eq(top._total_charge, sum(atom.charge for atom in atoms))
+        self.assertRaises(AttributeError, lambda: arrays.xyz)
+        self.assertRaises(KeyError, lambda: arrays['xyz'])
+
+    def test_cache(self):
+        top = self.top
+        mass = top.arrays.mass
+        assert top.arrays['mass'] is mass
+        self.assertRaises(ValueError, lambda: mass.__setitem__(0, 1.))
+
+        # public properties return writable copies
+        assert top.mass is not mass
+        top.mass[0] = 1.
+        aa_eq(top.mass, mass)
+
+        # invalidated after modifying the Topology
+        top.strip(':WAT')
+        assert top.arrays.mass is not mass
+        assert len(top.arrays.mass) == top.n_atoms
+
+        top2 = self.top.copy()
+        charge = top2.charge
+        top2.join(pt.load_topology(fn('Tc5b.top')))
+        assert len(top2.charge) == top2.n_atoms
+        aa_eq(top2.charge[:len(charge)], charge)
+
+        bonds = top2.bond_indices
+        top2.add_bonds(np.array([[0, 5]]))
+        assert len(top2.bond_indices) == len(bonds) + 1
+
+    def test_indices_bonded_to(self):
+        top = self.top
+        expected = []
+        for atom in top.atoms:
+            expected.append(
+                sum(top[i].name.startswith('H')
+                    for i in atom.bonded_indices()))
+        aa_eq(top._indices_bonded_to('h'), expected)
+
+    def test_to_dict(self):
+        top = self.top
+        new_top = pt.Topology.from_dict(top.to_dict())
+        aa_eq(new_top.mass, top.mass)
+        aa_eq(new_top.charge, top.charge)
+        aa_eq(new_top.bond_indices, top.bond_indices)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -30,6 +30,20 @@ class TestTrajectoryIterator(unittest.TestCase):
         assert expected == sort_filename_by_number(
             orig_list), 'two filename list must be equal'
 
+    def test_copy(self):
+        traj = pt.iterload(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+        traj.autoimage()
+        other = traj.copy()
+        assert other.top is not traj.top
+        assert other.top.n_atoms == traj.top.n_atoms
+        aa_eq(other.top.mass, traj.top.mass)
+        aa_eq(other.xyz, traj.xyz)
+
+        # the copy owns its Topology
+        n_atoms = traj.top.n_atoms
+        del traj
+        assert other.top.n_atoms == n_atoms
+
     def test_comprehensive(self):
         traj = pt.iterload(
             fn('Test_RemdTraj/rem.nc.000'),
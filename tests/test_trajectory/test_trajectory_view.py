@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+import numpy as np
+import pytraj as pt
+from utils import fn
+from pytraj.testing import aa_eq
+
+
+class TestTrajectoryView(unittest.TestCase):
+    def setUp(self):
+        self.traj = pt.load(fn('tz2.ortho.nc'), fn('tz2.ortho.parm7'))
+
+    def test_view(self):
+        traj = self.traj
+        view = traj.subset()
+        assert isinstance(view, pt.TrajectoryView)
+        assert view.shape == traj.shape
+        # all atoms and sliced frames: numpy view, no copy
+        assert np.shares_memory(traj[2:8:3].xyz, traj.xyz)
+        assert np.shares_memory(view[2:8:3].xyz, traj.xyz)
+        aa_eq(view[2:8:3].xyz, traj.xyz[2:8:3])
+        aa_eq(view[::-1].xyz, traj.xyz[::-1])
+
+        solute = traj.subset('!:WAT')
+        expected = traj['!:WAT']
+        assert solute.top.n_atoms == expected.n_atoms
+        assert solute.top.n_residues == expected.top.n_residues
+        aa_eq(solute.xyz, expected.xyz)
+        aa_eq(solute.unitcells, traj.unitcells)
+        aa_eq(solute[3].xyz, expected[3].xyz)
+        aa_eq(solute[-1].xyz, expected[-1].xyz)
+        aa_eq(solute[3, '@CA'].xyz, traj[3, '@CA'].xyz)
+        aa_eq(np.array([frame.xyz.copy() for frame in solute]), expected.xyz)
+
+        # atom indices
+        indices = pt.select_atoms('@CA', traj.top)
+        aa_eq(traj.subset(indices).xyz, traj.xyz[:, indices])
+
+    def test_compose(self):
+        traj = self.traj
+        frame_indices = [8, 1, 5, 3]
+        # frames, then atoms, then frames
+        view = traj.subset(frame_indices=frame_indices)['!:WAT']['@CA'][1:]
+        expected = traj[frame_indices, '@CA'][1:]
+        assert view.n_frames == 3
+        assert view.n_atoms == expected.n_atoms
+        aa_eq(view.xyz, expected.xyz)
+        aa_eq(view[[0, 2], '@C'].xyz,
+              traj[[frame_indices[1], frame_indices[3]], '@C'].xyz)
+        aa_eq(traj.subset('!:WAT')[[True, False] * 5].xyz, traj['!:WAT'][::2].xyz)
+
+        self.assertRaises(IndexError, lambda: traj.subset(frame_indices=[100]))
+
+    def test_analysis(self):
+        traj = self.traj
+        view = traj.subset('!:WAT', frame_indices=slice(0, 10, 2))
+        solute = traj['!:WAT'][0:10:2]
+        aa_eq(pt.radgyr(view, '@CA'), pt.radgyr(solute, '@CA'))
+        aa_eq(pt.rmsd(view, mask='@CA', ref=1), pt.rmsd(solute, mask='@CA', ref=1))
+        aa_eq(
+            pt.distance(view, ':1@CA :5@CA', frame_indices=[0, 3]),
+            pt.distance(solute, ':1@CA :5@CA', frame_indices=[0, 3]))
+        aa_eq(pt.get_coordinates(view(mask='@CA')), solute['@CA'].xyz)
+        aa_eq(
+            pt.get_coordinates(view(rmsfit=(0, '@CA'))),
+            pt.get_coordinates(solute(rmsfit=(0, '@CA'))))
+
+        # analysis does not change the parent
+        xyz = traj.xyz.copy()
+        pt.rmsd(view, mask='@CA', ref=0)
+        aa_eq(traj.xyz, xyz)
+
+    def test_copy(self):
+        traj = self.traj
+        view = traj.subset('@CA', frame_indices=range(3))
+        new_traj = view.copy()
+        assert isinstance(new_traj, pt.Trajectory)
+        aa_eq(new_traj.xyz, traj['@CA'][:3].xyz)
+        aa_eq(new_traj.unitcells, traj.unitcells[:3])
+        new_traj.xyz[:] = 0.
+        aa_eq(view.xyz, traj['@CA'][:3].xyz)
+
+        full = traj.subset(frame_indices=slice(0, 4)).copy()
+        assert not np.shares_memory(full.xyz, traj.xyz)
+        assert full.xyz.flags['C_CONTIGUOUS']
+
+        # topology is not shared with the parent
+        n_atoms = traj.top.n_atoms
+        for view in (traj.subset(frame_indices=range(3)), traj.subset('@CA')):
+            new_traj = view.copy()
+            assert new_traj.top is not view.top
+            new_traj.top.strip(':1')
+            assert traj.top.n_atoms == n_atoms
+            assert view.top.n_atoms == view.n_atoms
+
+        # eager copies are still contiguous
+        assert traj['@CA'].xyz.flags['C_CONTIGUOUS']
+
+
+if __name__ == "__main__":
+    unittest.main()